@@ -7,10 +7,11 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from typing import Dict, List, Any, Optional
 import boto3
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from app.core.middleware import get_current_user
 from app.core.config import settings
+from app.core.responses import json_response
+from app.services.parallel_scan import count_items, parallel_scan, scan_all
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -52,20 +53,10 @@ async def get_all_users(admin_user: Dict[str, Any] = Depends(require_admin)) ->
         dynamodb = boto3.resource('dynamodb', region_name=settings.aws_region)
         users_table = dynamodb.Table(settings.users_table)
         
-        response = users_table.scan()
-        users = response.get('Items', [])
-        
-        # Convert Decimal to float for JSON serialization
-        def convert_decimals(obj):
-            if isinstance(obj, list):
-                return [convert_decimals(item) for item in obj]
-            elif isinstance(obj, dict):
-                return {key: convert_decimals(value) for key, value in obj.items()}
-            elif isinstance(obj, Decimal):
-                return float(obj)
-            return obj
-        
-        users = convert_decimals(users)
+        users = await scan_all(users_table, projection=[
+            'userId', 'email', 'full_name', 'role', 'created_at', 'carbon_budget',
+            'status', 'last_active', 'total_emissions', 'entries_count'
+        ])
         
         # Format for frontend
         formatted_users = []
@@ -84,11 +75,12 @@ async def get_all_users(admin_user: Dict[str, Any] = Depends(require_admin)) ->
                 'entries_count': user.get('entries_count', 0)
             })
         
-        return {
+        # Numbers stay Decimal; the response serializes them directly
+        return json_response({
             "success": True,  # Frontend expects this field
             "users": formatted_users,
             "total": len(formatted_users)
-        }
+        })
         
     except Exception as e:
         raise HTTPException(
@@ -105,18 +97,17 @@ async def get_pending_users(admin_user: Dict[str, Any] = Depends(require_admin))
         users_table = dynamodb.Table(settings.users_table)
         
         # Scan for users with status = 'pending'
-        response = users_table.scan(
-            FilterExpression='#status = :status',
-            ExpressionAttributeNames={
+        pending_users = await scan_all(
+            users_table,
+            filter_expression='#status = :status',
+            expression_attribute_names={
                 '#status': 'status'
             },
-            ExpressionAttributeValues={
+            expression_attribute_values={
                 ':status': 'pending'
             }
         )
         
-        pending_users = response.get('Items', [])
-        
         # Format for frontend
         formatted_users = []
         for user in pending_users:
@@ -150,29 +141,23 @@ async def get_admin_stats(admin_user: Dict[str, Any] = Depends(require_admin)) -
         entries_table = dynamodb.Table(settings.entries_table)
         
         # Get user count and pending count
-        users_response = users_table.scan()
-        all_users = users_response.get('Items', [])
-        total_users = len(all_users)
-        
-        # Count pending users
-        pending_count = sum(1 for user in all_users if user.get('status') == 'pending')
-        
-        # Get entries count and total emissions
-        entries_response = entries_table.scan()
-        entries = entries_response.get('Items', [])
-        total_entries = len(entries)
+        total_users = await count_items(users_table)
+        pending_count = await count_items(
+            users_table,
+            filter_expression='#status = :status',
+            expression_attribute_names={'#status': 'status'},
+            expression_attribute_values={':status': 'pending'}
+        )
         
-        # Calculate total emissions
+        # Stream entries, projecting only what the totals need
+        total_entries = 0
         total_emissions = 0.0
         current_month = datetime.now().strftime("%Y-%m")
         monthly_entries = 0
         
-        for entry in entries:
-            # Convert Decimal to float
-            co2_equiv = entry.get('co2_equivalent', 0)
-            if isinstance(co2_equiv, Decimal):
-                co2_equiv = float(co2_equiv)
-            total_emissions += co2_equiv
+        async for entry in parallel_scan(entries_table, projection=['co2_equivalent', 'date']):
+            total_entries += 1
+            total_emissions += float(entry.get('co2_equivalent', 0))
             
             # Count current month entries
             entry_date = entry.get('date', '')
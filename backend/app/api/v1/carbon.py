@@ -5,15 +5,22 @@ from typing import Dict, Any, Optional
 from datetime import date, datetime
 from decimal import Decimal
 
+import numpy as np
+
 from app.schemas.carbon import (
     CarbonEmissionCreate,
     CarbonEmissionUpdate,
     EmissionCategory
 )
 from app.core.middleware import get_current_user
+from app.core.responses import json_response
 from app.services.dynamodb_service import dynamodb_service
+from app.services.rank_index import leaderboard_index
+from app.services.recommendation_engine import recommendation_cache
+from app.services.scenario_engine import scenario_cache
 from app.services.carbon_calculator import calculate_carbon_footprint, calculator
 from app.models.dynamodb_models import CarbonEmissionModel
+from app.models.records import EmissionListItem
 
 router = APIRouter(prefix="/carbon-emissions", tags=["Carbon Tracking"])
 
@@ -120,46 +127,45 @@ async def get_carbon_emissions(
         start_date_str = start_date.isoformat() if start_date else None
         end_date_str = end_date.isoformat() if end_date else None
         
-        # Get emissions from DynamoDB
-        emissions = await dynamodb_service.get_user_emissions(
-            user_id=user_id,
-            start_date=start_date_str,
-            end_date=end_date_str,
-            limit=limit
-        )
+        # Newest entries in the window, from the user's cached emission history
+        history = await dynamodb_service.get_emission_history(user_id)
+        rows = history.newest(history.window(start_date_str, end_date_str), limit=limit)
         
         # Filter by category if specified
         if category:
-            emissions = [e for e in emissions if e.get('category') == category.value]
+            rows = rows[[history.strings.values[code] == category.value for code in history.categories[rows].tolist()]]
 
-        # Map items to frontend-friendly structure
-        ui_emissions = []
-        for e in emissions:
-            ui_emissions.append({
-                "id": e.get("entry_id") or e.get("timestamp"),
-                "category": e.get("category"),
-                "activity": e.get("activity"),
-                "amount": float(e.get("co2_equivalent", e.get("amount", 0)) or 0),
-                "unit": e.get("unit", "kg"),
-                "date": e.get("date"),
-                "description": e.get("description"),
-                "co2_equivalent": float(e.get("co2_equivalent", 0) or 0),
-                "emission_factor": float(e.get("emission_factor", 0) or 0),
-            })
+        # Map rows to frontend-friendly records, straight from the columns
+        values = history.strings.values
+        dates = history.dates(rows)
+        ui_emissions = [
+            EmissionListItem(
+                id=history.entry_ids[row] or str(history.timestamps[row]),
+                category=values[history.categories[row]],
+                activity=values[history.activities[row]],
+                amount=float(history.co2[row]),
+                unit=values[history.units[row]] or "kg",
+                date=dates[position],
+                description=history.descriptions[row],
+                co2_equivalent=float(history.co2[row]),
+                emission_factor=float(history.emission_factors[row]),
+            )
+            for position, row in enumerate(rows.tolist())
+        ]
 
         # Compute totals
-        total_emissions = sum(item.get("co2_equivalent") or 0 for item in ui_emissions)
+        co2 = history.co2[rows]
+        total_emissions = float(co2.sum())
         # Monthly emissions for current month
-        current_month_prefix = datetime.utcnow().strftime("%Y-%m")
-        monthly_emissions = sum(
-            (item.get("co2_equivalent") or 0)
-            for item in ui_emissions
-            if isinstance(item.get("date"), str) and item.get("date", "").startswith(current_month_prefix)
-        )
+        current_month = np.datetime64(datetime.utcnow().strftime("%Y-%m"), "M")
+        month_start = current_month.astype("datetime64[D]").astype(np.int64)
+        month_end = (current_month + 1).astype("datetime64[D]").astype(np.int64)
+        days = history.days[rows]
+        monthly_emissions = float(co2[(days >= month_start) & (days < month_end)].sum())
         # Goal progress against a simple 300kg monthly target (until user-specific budget implemented)
         goal_progress = min(int(round((monthly_emissions / 300.0) * 100)), 100) if monthly_emissions else 0
 
-        return {
+        return json_response({
             "success": True,
             "data": {
                 "emissions": ui_emissions,
@@ -167,7 +173,7 @@ async def get_carbon_emissions(
                 "monthly_emissions": round(monthly_emissions, 2),
                 "goal_progress": goal_progress
             }
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving emissions: {str(e)}")
@@ -221,6 +227,12 @@ async def create_carbon_emission(
         result = await dynamodb_service.create_carbon_emission(carbon_emission)
         
         if result.get("success"):
+            # The write bumped the data version; drop this process's copy eagerly too
+            recommendation_cache.invalidate(user_id)
+            scenario_cache.invalidate(user_id)
+            achievement_points = sum(a["points"] for a in result.get("new_achievements", []))
+            leaderboard_index.record(user_id, points=result.get("points_earned", 0) + achievement_points, activities=1)
+            leaderboard_index.set_streak(user_id, result.get("current_streak", 0))
             return {
                 "success": True,
                 "message": "Carbon emission recorded successfully",
@@ -232,6 +244,7 @@ async def create_carbon_emission(
                     "emission_factor": float(emission_factor),
                     "calculation_details": calculation_result["calculation_details"],
                     "calculation_region": calculation_result["region"],
+                    "new_achievements": result.get("new_achievements", []),
                     **emission_data.dict()
                 }
             }
@@ -271,6 +284,8 @@ async def update_carbon_emission(
                     updates["co2_equivalent"] = Decimal(str(value * 0.2))
                 elif field == "category" and value is not None:
                     updates[field] = value.value if hasattr(value, 'value') else str(value)
+                elif field == "date":
+                    updates[field] = value.isoformat()
                 else:
                     updates[field] = value
         
@@ -282,13 +297,15 @@ async def update_carbon_emission(
         
         if not success:
             raise HTTPException(status_code=404, detail="Emission not found or could not be updated")
+        recommendation_cache.invalidate(user_id)
+        scenario_cache.invalidate(user_id)
         
-        return {
+        return json_response({
             "timestamp": timestamp,
             "user_id": user_id,
             "message": "Carbon emission updated successfully",
-            **{k: (float(v) if isinstance(v, Decimal) else v) for k, v in updates.items()}
-        }
+            **updates
+        })
         
     except HTTPException:
         raise
@@ -313,10 +330,18 @@ async def delete_carbon_emission(
             raise HTTPException(status_code=401, detail="User ID not found")
         
         # Delete from DynamoDB
-        success = await dynamodb_service.delete_carbon_emission(user_id, timestamp)
+        result = await dynamodb_service.delete_carbon_emission(user_id, timestamp)
         
-        if not success:
+        if not result.get("success"):
             raise HTTPException(status_code=404, detail="Emission not found or could not be deleted")
+        recommendation_cache.invalidate(user_id)
+        scenario_cache.invalidate(user_id)
+        # Taken back from the periods the entry was credited to when written
+        leaderboard_index.retract(
+            user_id, datetime.fromisoformat(timestamp), points=result.get("points_reversed", 0), activities=1
+        )
+        if result.get("current_streak") is not None:
+            leaderboard_index.set_streak(user_id, result["current_streak"])
             
     except HTTPException:
         raise
@@ -354,7 +379,7 @@ async def get_analytics(
         analytics["period_start"] = start_date
         analytics["period_end"] = end_date
         
-        return analytics
+        return json_response(analytics)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving analytics: {str(e)}")
@@ -4,11 +4,18 @@ Handles achievements, streaks, challenges, leaderboards, and user progress
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Dict, List, Any, Optional
-from app.services.achievement_engine import AchievementEngine
+from app.services.achievement_engine import achievement_engine
 from app.services.streaks_challenges import StreaksChallengesEngine
 from app.services.leaderboard_engine import LeaderboardEngine
+from app.services.rank_index import leaderboard_index
+from app.services.activity_counters import ActivityCalendar, DailyCounters
+from app.services.challenge_counters import TIMEFRAME_WINDOWS, ChallengeCounters, window_start
+from app.services.dynamodb_service import dynamodb_service
+from app.services.gamification_snapshot import GamificationSnapshot, snapshot_cache
+from datetime import date, datetime, timedelta
 from app.core.middleware import get_current_user
 import logging
+import time
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -20,7 +27,6 @@ router = APIRouter(
 )
 
 # Initialize gamification engines
-achievement_engine = AchievementEngine()
 streaks_challenges_engine = StreaksChallengesEngine()
 leaderboard_engine = LeaderboardEngine()
 
@@ -41,26 +47,21 @@ async def get_gamification_profile(
             raise HTTPException(status_code=401, detail="Invalid user authentication")
         
         # Privacy-safe behavior: for non-demo users without data, return empty/zeroed profile
-        user_stats = await _get_user_stats(user_id)
-        
-        # Calculate user level and progress
-        level_info = achievement_engine.calculate_user_level(user_stats.get("total_points", 0))
+        snapshot = await _get_user_snapshot(user_id)
+        user_stats = snapshot.stats
+        level_info = snapshot.level
         
         # Get recent achievements
-        recent_achievements = await _get_recent_achievements(user_id, limit=5)
+        recent_achievements = _recent_achievements(snapshot, limit=5)
         
         # Get streak information
-        activity_dates = user_stats.get("activity_dates", [])
-        streak_info = streaks_challenges_engine.calculate_streak(activity_dates)
+        streak_info = user_stats["streak"]
         
         # Get current challenges progress
-        active_challenges = streaks_challenges_engine.get_active_challenges()
-        challenges_progress = []
-        for challenge in active_challenges[:3]:  # Top 3 challenges
-            progress = streaks_challenges_engine.check_challenge_progress(
-                challenge["id"], user_stats
-            )
-            challenges_progress.append(progress)
+        challenges_progress = [
+            streaks_challenges_engine.refresh_timing(progress)
+            for progress in snapshot.challenges[:3]  # Top 3 challenges
+        ]
         
         return {
             "success": True,
@@ -79,7 +80,7 @@ async def get_gamification_profile(
                     "total_activities": user_stats.get("total_activities", 0),
                     "carbon_saved_kg": user_stats.get("total_co2_reduced", 0),
                     "recommendations_completed": user_stats.get("recommendations_completed", 0),
-                    "days_active": len(set(activity_dates)) if activity_dates else 0
+                    "days_active": streak_info.get("total_active_days", 0)
                 }
             }
         }
@@ -105,31 +106,20 @@ async def get_achievements(
     """
     try:
         user_id = current_user.get('user_id')
-        user_stats = await _get_user_stats(user_id)
+        snapshot = await _get_user_snapshot(user_id)
         
         # Get all available achievements
         all_achievements = achievement_engine.get_all_achievements()
         
-        # Get user's earned achievements
-        earned_achievements = await _get_user_achievements(user_id)
-        earned_ids = {ach["achievement_id"] for ach in earned_achievements}
-        
-        # Calculate progress for unearned achievements
-        progress_info = []
-        if include_progress:
-            for achievement in all_achievements:
-                if achievement["id"] not in earned_ids:
-                    progress = achievement_engine.get_achievement_progress(
-                        achievement["id"], user_stats
-                    )
-                    if progress:
-                        progress_info.append(progress)
+        # Get user's earned achievements and progress towards the rest
+        earned_achievements = snapshot.achievements
+        progress_info = snapshot.achievements_progress if include_progress else []
         
         return {
             "success": True,
             "data": {
                 "earned_achievements": earned_achievements,
-                "achievements_progress": sorted(progress_info, key=lambda x: x["progress"], reverse=True),
+                "achievements_progress": progress_info,
                 "statistics": {
                     "total_earned": len(earned_achievements),
                     "total_available": len(all_achievements),
@@ -160,22 +150,14 @@ async def get_challenges(
     """
     try:
         user_id = current_user.get('user_id')
-        user_stats = await _get_user_stats(user_id)
-        
-        # Get active challenges
-        active_challenges = streaks_challenges_engine.get_active_challenges()
-        
-        # Filter by type if specified
-        if challenge_type:
-            active_challenges = [c for c in active_challenges if c["type"] == challenge_type]
+        snapshot = await _get_user_snapshot(user_id)
         
-        # Get progress for each challenge
-        challenges_with_progress = []
-        for challenge in active_challenges:
-            progress = streaks_challenges_engine.check_challenge_progress(
-                challenge["id"], user_stats
-            )
-            challenges_with_progress.append(progress)
+        # Get progress for each active challenge, filtered by type if specified
+        challenges_with_progress = [
+            streaks_challenges_engine.refresh_timing(progress)
+            for progress in snapshot.challenges
+            if not challenge_type or progress["type"] == challenge_type
+        ]
         
         # Get completed challenges for today
         completed_today = await _get_completed_challenges_today(user_id)
@@ -188,8 +170,8 @@ async def get_challenges(
                 "statistics": {
                     "total_active": len(challenges_with_progress),
                     "completed_count": len(completed_today),
-                    "potential_points": sum(c.get("points_reward", 0) for c in active_challenges),
-                    "potential_bonus": sum(c.get("bonus_points", 0) for c in active_challenges)
+                    "potential_points": sum(c.get("points_reward", 0) for c in challenges_with_progress),
+                    "potential_bonus": sum(c.get("bonus_points", 0) for c in challenges_with_progress)
                 }
             }
         }
@@ -222,12 +204,17 @@ async def complete_challenge(
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result["error"])
         
-        # Update user points (in production, save to database)
-        await _update_user_points(user_id, result["points_earned"])
+        # Only challenges whose window progress is complete can be claimed
+        progress = streaks_challenges_engine.check_challenge_progress(challenge_id, await _get_user_stats(user_id))
+        if not progress.get("is_completed"):
+            raise HTTPException(status_code=400, detail="Challenge is not completed yet")
         
-        # Check for new achievements
-        user_stats = await _get_user_stats(user_id)
-        new_achievements = achievement_engine.check_achievements(user_stats)
+        # Record the points once per challenge window; achievements are awarded
+        # by the writes that change their stats, so only those crossed here are reported
+        period_start = _challenge_period_start(challenge_id, datetime.utcnow().date())
+        new_achievements = await _update_user_points(
+            user_id, result["points_earned"], "challenge", f"{challenge_id}#{period_start.isoformat()}"
+        )
         
         return {
             "success": True,
@@ -238,11 +225,97 @@ async def complete_challenge(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error completing challenge {challenge_id} for user {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to complete challenge")
 
 
+@router.get("/streak/calendar")
+async def get_streak_calendar(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    start_date: Optional[date] = Query(None, description="First day (defaults to 90 days ago)"),
+    end_date: Optional[date] = Query(None, description="Last day (defaults to today)")
+) -> Dict[str, Any]:
+    """
+    Get the days the user was active, for history and calendar views
+    
+    Args:
+        start_date: First day of the range
+        end_date: Last day of the range
+        
+    Returns:
+        Active days in the range and the current streak
+    """
+    try:
+        user_id = current_user.get('user_id')
+        end_date = end_date or datetime.utcnow().date()
+        start_date = start_date or end_date - timedelta(days=89)
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+        
+        profile = await dynamodb_service.get_user_profile(user_id) or {}
+        calendar = ActivityCalendar.from_bytes(profile.get("activity_calendar"))
+        active_days = calendar.active_dates(start_date, end_date)
+        
+        return {
+            "success": True,
+            "data": {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "active_dates": [day.isoformat() for day in active_days],
+                "active_days": len(active_days),
+                "streak": calendar.streak_info(datetime.utcnow().date())
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting streak calendar for user {user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get streak calendar")
+
+
+@router.get("/points/history")
+async def get_points_history(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=500, description="Number of recent ledger entries")
+) -> Dict[str, Any]:
+    """
+    Get the user's points balance and ledger history
+    
+    Args:
+        limit: Number of recent ledger entries to return
+        
+    Returns:
+        Balance, period points, recent ledger entries and monthly summaries
+        of compacted history
+    """
+    try:
+        user_id = current_user.get('user_id')
+        profile = await dynamodb_service.get_user_profile(user_id) or {}
+        today = datetime.utcnow().date()
+        period_totals = DailyCounters.from_bytes(profile.get("daily_counters")).period_totals(today)
+        history = await dynamodb_service.get_points_history(user_id, limit)
+        
+        return {
+            "success": True,
+            "data": {
+                "balance": int(profile.get("total_points", 0)),
+                "points_today": period_totals["points_today"],
+                "points_this_week": period_totals["points_this_week"],
+                "points_this_month": period_totals["points_this_month"],
+                "entries": history["entries"],
+                "monthly": history["monthly"]
+            }
+        }
+        
+    except Exception as e:
+        logger.error(f"Error getting points history for user {user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get points history")
+
+
 @router.get("/leaderboards")
 async def get_leaderboards(
     current_user: Dict[str, Any] = Depends(get_current_user),
@@ -273,14 +346,12 @@ async def get_leaderboards(
         if period:
             available_leaderboards = [lb for lb in available_leaderboards if lb["period"] == period]
         
-        # For privacy, don't include mock global data for regular users
-        user_data = await _get_leaderboard_user_data()
-        
-        # Generate leaderboards
+        # Generate leaderboards from the current period's rank indexes
         leaderboards = []
         for lb_config in available_leaderboards[:6]:  # Limit to 6 leaderboards
-            leaderboard = leaderboard_engine.generate_leaderboard(
-                lb_config["id"], user_data, user_id, limit
+            leaderboard = leaderboard_engine.generate_leaderboard_from_index(
+                lb_config["id"], leaderboard_index.get(lb_config["id"]), user_id, limit,
+                previous=leaderboard_index.previous_ranks(lb_config["id"])
             )
             leaderboards.append(leaderboard)
         
@@ -302,6 +373,7 @@ async def get_leaderboards(
 async def get_leaderboard_by_id(
     leaderboard_id: str,
     limit: int = Query(default=10, ge=1, le=100),
+    around: int = Query(default=0, ge=0, le=25, description="Neighbours to include around the current user"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
@@ -310,6 +382,7 @@ async def get_leaderboard_by_id(
     Args:
         leaderboard_id: ID of the leaderboard to retrieve
         limit: Maximum number of entries to return
+        around: Neighbours to include on each side of the current user
         
     Returns:
         Detailed leaderboard with rankings
@@ -317,22 +390,22 @@ async def get_leaderboard_by_id(
     try:
         user_id = current_user.get('user_id')
         
-        # Get user data for leaderboard
-        user_data = await _get_leaderboard_user_data()
+        if leaderboard_id not in leaderboard_engine.leaderboard_configs:
+            raise HTTPException(status_code=404, detail="Leaderboard not found")
         
-        # Generate specific leaderboard
-        leaderboard = leaderboard_engine.generate_leaderboard(
-            leaderboard_id, user_data, user_id, limit
+        # Generate specific leaderboard from its rank index
+        leaderboard = leaderboard_engine.generate_leaderboard_from_index(
+            leaderboard_id, leaderboard_index.get(leaderboard_id), user_id, limit, around,
+            previous=leaderboard_index.previous_ranks(leaderboard_id)
         )
         
-        if "error" in leaderboard:
-            raise HTTPException(status_code=404, detail="Leaderboard not found")
-        
         return {
             "success": True,
             "data": leaderboard
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting leaderboard {leaderboard_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get leaderboard")
@@ -350,29 +423,28 @@ async def get_gamification_stats(
     """
     try:
         user_id = current_user.get('user_id')
-        user_stats = await _get_user_stats(user_id)
+        snapshot = await _get_user_snapshot(user_id)
+        user_stats = snapshot.stats
         
         # Get user rankings across all leaderboards
-        leaderboard_data = await _get_leaderboard_user_data()
-        rankings = leaderboard_engine.get_user_rankings(user_id, leaderboard_data)
+        rankings = snapshot.rankings
         
         # Calculate engagement metrics
-        activity_dates = user_stats.get("activity_dates", [])
-        streak_info = streaks_challenges_engine.calculate_streak(activity_dates)
+        streak_info = user_stats["streak"]
         
         return {
             "success": True,
             "data": {
                 "overview": {
                     "total_points": user_stats.get("total_points", 0),
-                    "current_level": achievement_engine.calculate_user_level(user_stats.get("total_points", 0))["current_level"],
+                    "current_level": snapshot.level["current_level"],
                     "achievements_earned": user_stats.get("achievements_count", 0),
                     "current_streak": streak_info["current_streak"],
                     "goals_achieved": user_stats.get("goals_achieved", 0)
                 },
                 "rankings": rankings,
                 "engagement": {
-                    "total_active_days": len(set(activity_dates)) if activity_dates else 0,
+                    "total_active_days": streak_info.get("total_active_days", 0),
                     "longest_streak": streak_info["longest_streak"],
                     "avg_activities_per_day": user_stats.get("avg_activities_per_day", 0),
                     "consistency_score": min(100, (streak_info["current_streak"] / 30) * 100)
@@ -402,7 +474,7 @@ async def _get_user_stats(user_id: str) -> Dict[str, Any]:
         return uid in ("demo-user", "admin-user", "mock_admin_id") or (settings.debug and str(uid).startswith("mock_"))
 
     if _is_demo(user_id):
-        return {
+        stats = {
             "total_points": 2850,
             "total_activities": 47,
             "achievements_count": 8,
@@ -428,29 +500,38 @@ async def _get_user_stats(user_id: str) -> Dict[str, Any]:
             "avg_activities_per_day": 2.3,
             "environmental_impact_score": 78
         }
-    # Regular users: empty defaults
-    return {
-        "total_points": 0,
-        "total_activities": 0,
-        "achievements_count": 0,
+        stats["streak"] = streaks_challenges_engine.calculate_streak(stats["activity_dates"])
+        return stats
+    # Regular users: totals from the profile, period figures from the daily counters,
+    # challenge progress from the challenge window counters and streaks from the activity calendar
+    profile = await dynamodb_service.get_user_profile(user_id) or {}
+    counters = DailyCounters.from_bytes(profile.get("daily_counters"))
+    today = datetime.utcnow().date()
+    calendar = ActivityCalendar.from_bytes(profile.get("activity_calendar"))
+    if calendar.active_days or not int(profile.get("entries_count", 0)):
+        streak = calendar.streak_info(today)
+    else:
+        # Entries logged before activity calendars existed: streaks from the emission history
+        history = await dynamodb_service.get_emission_history(user_id)
+        streak = streaks_challenges_engine.streak_from_days(history.active_days(), today)
+    stats = {
+        "total_points": int(profile.get("total_points", 0)),
+        "total_activities": int(profile.get("entries_count", 0)),
+        "achievements_count": int(profile.get("achievements_count", 0)),
         "goals_achieved": 0,
-        "goals_set": 0,
-        "current_streak": 0,
-        "longest_streak": 0,
-        "total_co2_reduced": 0,
+        "goals_set": int(profile.get("goals_set", 0)),
+        "current_streak": streak["current_streak"],
+        "longest_streak": streak["longest_streak"],
+        "total_co2_reduced": float(profile.get("total_co2_reduced", 0)),
         "recommendations_completed": 0,
         "activity_dates": [],
-        "points_today": 0,
-        "points_this_week": 0,
-        "points_this_month": 0,
-        "activities_today": 0,
-        "activities_this_week": 0,
-        "activities_this_month": 0,
-        "co2_reduced_this_week": 0,
-        "co2_reduced_this_month": 0,
         "avg_activities_per_day": 0,
-        "environmental_impact_score": 0
+        "environmental_impact_score": 0,
+        "streak": streak,
+        "challenge_windows": ChallengeCounters.from_bytes(profile.get("challenge_counters")).all_window_stats(today)
     }
+    stats.update(counters.period_totals(today))
+    return stats
 
 
 async def _get_user_achievements(user_id: str) -> List[Dict[str, Any]]:
@@ -477,13 +558,68 @@ async def _get_user_achievements(user_id: str) -> List[Dict[str, Any]]:
                 "earned_at": "2025-09-18T14:30:00Z"
             }
         ]
-    return []
+    # Regular users: awards persisted when their write events crossed a threshold
+    return [
+        {
+            "achievement_id": item["achievement_id"],
+            "name": item.get("name", ""),
+            "points": int(item.get("points", 0)),
+            "tier": item.get("tier", ""),
+            "icon": item.get("icon", ""),
+            "earned_at": item.get("earned_at", "")
+        }
+        for item in await dynamodb_service.get_user_achievements(user_id)
+    ]
 
 
-async def _get_recent_achievements(user_id: str, limit: int) -> List[Dict[str, Any]]:
+def _recent_achievements(snapshot: GamificationSnapshot, limit: int) -> List[Dict[str, Any]]:
     """Get user's most recent achievements"""
-    achievements = await _get_user_achievements(user_id)
-    return sorted(achievements, key=lambda x: x["earned_at"], reverse=True)[:limit]
+    return sorted(snapshot.achievements, key=lambda x: x["earned_at"], reverse=True)[:limit]
+
+
+async def _get_user_snapshot(user_id: str) -> GamificationSnapshot:
+    """
+    Get the user's gamification snapshot, shared by the profile, achievements,
+    challenges and stats endpoints
+    
+    The snapshot is rebuilt only when the user's data version or the day has
+    changed since it was built; otherwise this costs one projected version
+    read. The version is read before the data, so a write racing a rebuild
+    at worst makes the next request rebuild again, never serve stale data.
+    """
+    today = datetime.utcnow().date()
+    version = (await dynamodb_service.get_data_version(user_id), today.isoformat())
+    snapshot = snapshot_cache.get(user_id, version)
+    if snapshot is None:
+        user_stats = await _get_user_stats(user_id)
+        earned = await _get_user_achievements(user_id)
+        earned_ids = {ach["achievement_id"] for ach in earned}
+        progress = [
+            achievement_engine.get_achievement_progress(achievement["id"], user_stats)
+            for achievement in achievement_engine.get_all_achievements()
+            if achievement["id"] not in earned_ids
+        ]
+        snapshot = GamificationSnapshot(
+            user_id=user_id,
+            version=version,
+            stats=user_stats,
+            level=achievement_engine.calculate_user_level(user_stats.get("total_points", 0)),
+            achievements=earned,
+            achievements_progress=sorted((p for p in progress if p), key=lambda x: x["progress"], reverse=True),
+            challenges=[
+                streaks_challenges_engine.check_challenge_progress(challenge["id"], user_stats)
+                for challenge in streaks_challenges_engine.get_active_challenges()
+            ]
+        )
+        snapshot_cache.put(user_id, version, snapshot)
+    
+    # Ranks move with other users' scores, so they follow a TTL rather than the data version
+    if snapshot_cache.rankings_stale(snapshot):
+        snapshot.rankings = leaderboard_engine.get_indexed_user_rankings(
+            user_id, {lb_id: leaderboard_index.get(lb_id) for lb_id in leaderboard_engine.leaderboard_configs}
+        )
+        snapshot.rankings_at = time.monotonic()
+    return snapshot
 
 
 async def _get_completed_challenges_today(user_id: str) -> List[Dict[str, Any]]:
@@ -503,19 +639,22 @@ async def _get_completed_challenges_today(user_id: str) -> List[Dict[str, Any]]:
     return []
 
 
-async def _update_user_points(user_id: str, points: int) -> bool:
-    """Update user's total points"""
-    # In production, update database
-    logger.info(f"Updated user {user_id} points by {points}")
-    return True
+def _challenge_period_start(challenge_id: str, today: date) -> date:
+    """First day (UTC) of the window a challenge's completion counts in; special challenges run once"""
+    challenge = streaks_challenges_engine.challenges[challenge_id]
+    window = TIMEFRAME_WINDOWS.get(challenge.criteria.get("timeframe"))
+    return window_start(window, today) if window else challenge.start_date.date()
 
 
-async def _get_leaderboard_user_data() -> List[Dict[str, Any]]:
-    """Get user data for leaderboard generation.
-    For now, return empty to avoid showing unrelated users to regular accounts.
-    Demo/admin users may receive sample data in future behind an explicit flag.
-    """
-    return []
+async def _update_user_points(user_id: str, points: int, source: str, idempotency_key: str) -> List[Dict[str, Any]]:
+    """Record points in the ledger, returning any achievements the update awarded"""
+    result = await dynamodb_service.record_points(user_id, points, source, idempotency_key)
+    if not result or not result["recorded"]:
+        return []
+    new_achievements = result["new_achievements"]
+    leaderboard_index.record(user_id, points=points + sum(a["points"] for a in new_achievements))
+    logger.info(f"Updated user {user_id} points by {points}")
+    return new_achievements
 
 
 # Helper functions for gamification API endpoints
\ No newline at end of file
@@ -9,6 +9,7 @@ from decimal import Decimal
 
 from app.schemas.carbon import GoalCreate, EmissionCategory
 from app.core.middleware import get_current_user
+from app.core.responses import json_response
 from app.services.dynamodb_service import dynamodb_service
 from app.models.dynamodb_models import GoalModel
 
@@ -46,6 +47,43 @@ class GoalResponse(BaseModel):
     progress_percentage: float = 0.0
 
 
+def _iso_datetime(value: Any) -> str:
+    """A stored ISO timestamp as GoalResponse writes it (UTC as "Z"), without parsing it"""
+    value = str(value)
+    return f"{value[:-6]}Z" if value.endswith("+00:00") else value
+
+
+def _goal_response(goal: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    GoalResponse fields for a stored goal item
+    
+    Dates and timestamps stay the ISO strings they are stored as, so the
+    list route renders them without parsing; GoalResponse(**fields) parses
+    them where a validated model is wanted.
+    """
+    target = float(goal.get('target_amount', 0))
+    current = float(goal.get('current_amount', 0))
+    today = date.today().isoformat()
+    now = datetime.now().isoformat()
+    return {
+        "goal_id": goal.get('goalId', ''),
+        "user_id": goal.get('userId', ''),
+        "category": goal.get('category', ''),
+        "target_amount": target,
+        "target_period": goal.get('target_period', 'monthly'),
+        "description": goal.get('description'),
+        "current_amount": current,
+        "is_active": goal.get('is_active', True),
+        "is_achieved": goal.get('is_achieved', False),
+        "start_date": str(goal.get('start_date') or today)[:10],
+        "end_date": str(goal.get('end_date') or today)[:10],
+        "achieved_date": str(goal['achieved_date'])[:10] if goal.get('achieved_date') else None,
+        "created_at": _iso_datetime(goal.get('created_at') or now),
+        "updated_at": _iso_datetime(goal.get('updated_at') or now),
+        "progress_percentage": (current / target * 100) if target > 0 else 0.0,
+    }
+
+
 @router.get("/", response_model=List[GoalResponse])
 async def get_goals(
     current_user: Dict[str, Any] = Depends(get_current_user),
@@ -70,34 +108,8 @@ async def get_goals(
         if category:
             goals = [g for g in goals if g.get('category') == category.value]
         
-        # Transform to response format
-        goal_responses = []
-        for goal in goals:
-            # Calculate progress percentage
-            target = float(goal.get('target_amount', 0))
-            current = float(goal.get('current_amount', 0))
-            progress = (current / target * 100) if target > 0 else 0.0
-            
-            goal_response = GoalResponse(
-                goal_id=goal.get('goalId', ''),
-                user_id=goal.get('userId', ''),
-                category=goal.get('category', ''),
-                target_amount=target,
-                target_period=goal.get('target_period', 'monthly'),
-                description=goal.get('description'),
-                current_amount=current,
-                is_active=goal.get('is_active', True),
-                is_achieved=goal.get('is_achieved', False),
-                start_date=datetime.fromisoformat(goal.get('start_date', datetime.now().date().isoformat())).date(),
-                end_date=datetime.fromisoformat(goal.get('end_date', datetime.now().date().isoformat())).date(),
-                achieved_date=datetime.fromisoformat(goal['achieved_date']).date() if goal.get('achieved_date') else None,
-                created_at=datetime.fromisoformat(goal.get('created_at', datetime.now().isoformat())),
-                updated_at=datetime.fromisoformat(goal.get('updated_at', datetime.now().isoformat())),
-                progress_percentage=progress
-            )
-            goal_responses.append(goal_response)
-        
-        return goal_responses
+        # Goals come straight from storage, so skip validating a GoalResponse per item
+        return json_response([_goal_response(goal) for goal in goals])
         
     except HTTPException:
         raise
@@ -194,28 +206,7 @@ async def get_goal(
         if not goal:
             raise HTTPException(status_code=404, detail="Goal not found")
         
-        # Transform to response format
-        target = float(goal.get('target_amount', 0))
-        current = float(goal.get('current_amount', 0))
-        progress = (current / target * 100) if target > 0 else 0.0
-        
-        return GoalResponse(
-            goal_id=goal.get('goalId', ''),
-            user_id=goal.get('userId', ''),
-            category=goal.get('category', ''),
-            target_amount=target,
-            target_period=goal.get('target_period', 'monthly'),
-            description=goal.get('description'),
-            current_amount=current,
-            is_active=goal.get('is_active', True),
-            is_achieved=goal.get('is_achieved', False),
-            start_date=datetime.fromisoformat(goal.get('start_date', datetime.now().date().isoformat())).date(),
-            end_date=datetime.fromisoformat(goal.get('end_date', datetime.now().date().isoformat())).date(),
-            achieved_date=datetime.fromisoformat(goal['achieved_date']).date() if goal.get('achieved_date') else None,
-            created_at=datetime.fromisoformat(goal.get('created_at', datetime.now().isoformat())),
-            updated_at=datetime.fromisoformat(goal.get('updated_at', datetime.now().isoformat())),
-            progress_percentage=progress
-        )
+        return GoalResponse(**_goal_response(goal))
         
     except HTTPException:
         raise
@@ -2,9 +2,17 @@
 API endpoints for carbon reduction recommendations
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Dict, List, Any
-from app.services.recommendation_engine import RecommendationEngine
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime
+from app.services.recommendation_engine import RecommendationEngine, RecommendationResult, recommendation_cache
 from app.services.activity_service import ActivityService
+from app.services.dynamodb_service import dynamodb_service
+from app.services.recommendation_precompute import is_fresh, result_from_item
+from app.services.collaborative_filtering import factor_model_cache, user_vector
+from app.services.peer_index import GLOBAL_REGION, peer_index_cache, peer_insights
+from app.services.rank_index import default_store
+from app.services.scenario_engine import scenario_cache, scenario_engine
+from app.core.config import settings
 from app.core.middleware import get_current_user
 import logging
 
@@ -44,31 +52,25 @@ async def get_user_recommendations(
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid user authentication")
             
-        # Get user activities for analysis
-        activities = await activity_service.get_user_activities(user_id)
+        # Analysis and ranking, recomputed only when the user's data has changed
+        result = await _get_recommendation_result(user_id, category)
 
         # Privacy-safe default: if no activities/emissions for this user, return empty set
-        if not activities:
+        if not result.activity_count:
             return {
                 "success": True,
                 "data": {
                     "recommendations": [],
-                    "user_patterns": recommendation_engine.analyze_user_patterns([]),
+                    "user_patterns": result.analysis,
                     "total_potential_savings_kg": 0,
                     "implementation_stats": {"easy": 0, "medium": 0, "hard": 0, "free": 0, "low_cost": 0, "medium_cost": 0, "high_cost": 0},
                     "count": 0
                 }
             }
         
-        # Generate personalized recommendations
-        recommendations = recommendation_engine.generate_recommendations(
-            activities=activities,
-            category_filter=category,
-            limit=limit
-        )
-        
-        # Get user patterns for context
-        user_patterns = recommendation_engine.analyze_user_patterns(activities)
+        # Personalized recommendations and user patterns for context
+        recommendations = result.recommendations[:limit]
+        user_patterns = result.analysis
         
         # Calculate potential total savings
         total_potential_savings = sum(
@@ -94,6 +96,140 @@ async def get_user_recommendations(
         raise HTTPException(status_code=500, detail="Failed to generate recommendations")
 
 
+@router.post("/{recommendation_id}/complete")
+async def complete_recommendation(
+    recommendation_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Mark a recommendation as completed by the user
+    
+    Completed recommendations are left out of the user's ranking and train
+    the collaborative-filtering model that personalizes everyone's ranking.
+    
+    Args:
+        recommendation_id: Recommendation template id
+        current_user: Authenticated user information
+        
+    Returns:
+        Dict confirming the completion
+    """
+    user_id = current_user.get('user_id')
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid user authentication")
+    if recommendation_id not in recommendation_engine.template_order:
+        raise HTTPException(status_code=404, detail="Recommendation not found")
+    
+    try:
+        if not await dynamodb_service.complete_recommendation(user_id, recommendation_id):
+            raise HTTPException(status_code=500, detail="Failed to complete recommendation")
+        recommendation_cache.invalidate(user_id)
+        
+        return {
+            "success": True,
+            "data": {
+                "recommendation_id": recommendation_id,
+                "completed": True
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error completing recommendation {recommendation_id} for user {user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to complete recommendation")
+
+
+@router.get("/peers")
+async def get_peer_comparison(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Compare the user's last 30 days with the users whose footprint looks most like theirs
+    
+    Peers come from the user's region when it has a published cohort index,
+    otherwise from all users.
+    
+    Args:
+        current_user: Authenticated user information
+        
+    Returns:
+        Dict containing the cohort comparison, savings estimate and insights
+    """
+    try:
+        user_id = current_user.get('user_id')
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Invalid user authentication")
+        
+        result = await _get_recommendation_result(user_id, None)
+        profile = await dynamodb_service.get_user_profile(user_id) or {}
+        region, comparison = await _get_peer_comparison(
+            user_id, profile.get('region') or GLOBAL_REGION, result.analysis.get('category_breakdown', {})
+        )
+        
+        return {
+            "success": True,
+            "data": {
+                "region": region,
+                "comparison": comparison,
+                "insights": peer_insights(comparison)
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error comparing user {current_user.get('user_id')} with peers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to compare with peers")
+
+
+@router.get("/scenarios")
+async def get_scenarios(
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of scenarios to return"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Replay the user's last year of activities under what-if scenarios
+    
+    Each scenario substitutes activities in the user's actual history (e.g.
+    driving electric on their regional grid, or taking the train instead of
+    domestic flights) and reports the emissions it would have saved.
+    
+    Args:
+        limit: Maximum number of scenarios to return
+        current_user: Authenticated user information
+        
+    Returns:
+        Dict containing history totals and scenarios, largest saving first
+    """
+    try:
+        user_id = current_user.get('user_id')
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Invalid user authentication")
+        
+        data_version = await dynamodb_service.get_data_version(user_id)
+        version = (data_version, datetime.utcnow().date().isoformat())
+        profile = await dynamodb_service.get_user_profile(user_id) or {}
+        region = profile.get('region')
+        
+        report = scenario_cache.get(user_id, version, region)
+        if report is None:
+            history = await activity_service.get_user_emission_columns(user_id, days=settings.scenario_history_days)
+            report = scenario_engine.simulate(history, region)
+            scenario_cache.put(user_id, version, report, region)
+        
+        return {
+            "success": True,
+            "data": {**report, "scenarios": report["scenarios"][:limit]}
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error simulating scenarios for user {current_user.get('user_id')}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to simulate scenarios")
+
+
 @router.get("/categories")
 async def get_recommendation_categories() -> Dict[str, Any]:
     """
@@ -161,11 +297,11 @@ async def get_recommendation_stats(
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid user authentication")
             
-        # Get user activities
-        activities = await activity_service.get_user_activities(user_id)
+        # Analysis and ranking shared with the recommendations endpoint
+        result = await _get_recommendation_result(user_id, None)
 
         # If no activities/emissions yet, return zeros
-        if not activities:
+        if not result.activity_count:
             empty_stats = {
                 "total_recommendations": 0,
                 "by_category": {},
@@ -179,11 +315,8 @@ async def get_recommendation_stats(
             }
             return {"success": True, "data": empty_stats}
         
-        # Generate recommendations for analysis
-        all_recommendations = recommendation_engine.generate_recommendations(
-            activities=activities,
-            limit=50  # Get more for comprehensive stats
-        )
+        # Use more recommendations for comprehensive stats
+        all_recommendations = result.recommendations[:50]
         
         # Calculate statistics
         stats = {
@@ -208,6 +341,61 @@ async def get_recommendation_stats(
         raise HTTPException(status_code=500, detail="Failed to generate statistics")
 
 
+async def _get_recommendation_result(user_id: str, category: Optional[str]) -> RecommendationResult:
+    """
+    Get the user's pattern analysis and full recommendation ranking for a category filter
+    
+    Cached per user and filter, keyed by the user's data version (bumped by
+    every emission write) and the day, since the analysed window moves daily.
+    The version is read before the activities, so a racing write only costs
+    an extra recomputation on the next request. On a miss the row written by
+    the nightly precompute job is served if it was computed at the same data
+    version; new users and users who logged or completed something since are
+    ranked on demand, with the collaborative-filtering model when one is
+    published.
+    """
+    data_version = await dynamodb_service.get_data_version(user_id)
+    version = (data_version, datetime.utcnow().date().isoformat())
+    result = recommendation_cache.get(user_id, version, category)
+    if result is not None:
+        return result
+
+    item = None
+    if not activity_service.is_demo_user(user_id):
+        item = await dynamodb_service.get_precomputed_recommendations(user_id)
+        if is_fresh(item, data_version, settings.recommendation_precompute_max_age_hours):
+            result = result_from_item(item, recommendation_engine, category)
+
+    if result is None:
+        activities = await activity_service.get_user_emission_columns(user_id)
+        completed = await dynamodb_service.get_completed_recommendations(user_id)
+        model = await factor_model_cache.get(dynamodb_service.get_recommendation_model)
+        analysis, ranked = recommendation_engine.recommend(
+            activities,
+            category_filter=category,
+            completed=completed,
+            model=model,
+            user_factors=user_vector(model, item, completed) if model else None
+        )
+        result = RecommendationResult(len(activities), analysis, ranked)
+    recommendation_cache.put(user_id, version, result, category)
+    return result
+
+
+async def _get_peer_comparison(
+    user_id: str,
+    region: str,
+    category_totals: Dict[str, float]
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """(region used, comparison) against the region's cohort index, or the global one if it has none"""
+    store = default_store()
+    for candidate in dict.fromkeys([region, GLOBAL_REGION]):
+        index = await peer_index_cache.get(candidate, store.load)
+        if index is not None and len(index) > settings.peer_cohort_size:
+            return candidate, index.compare(category_totals, settings.peer_cohort_size, user_id=user_id)
+    return GLOBAL_REGION, None
+
+
 def _get_implementation_stats(recommendations: List[Dict[str, Any]]) -> Dict[str, int]:
     """Calculate implementation statistics for recommendations"""
     stats = {
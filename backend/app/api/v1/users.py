@@ -4,6 +4,7 @@ User profile API routes
 
 from fastapi import APIRouter, Depends, status, HTTPException
 from typing import Dict, Any
+from datetime import datetime
 
 from app.schemas.user import (
     UserProfileCreate,
@@ -14,6 +15,7 @@ from app.schemas.user import (
 )
 from app.core.middleware import get_current_user
 from app.services.dynamodb_service import dynamodb_service
+from app.services.activity_counters import ActivityCalendar
 from app.models.dynamodb_models import UserProfileModel
 
 router = APIRouter(prefix="/users", tags=["User Management"])
@@ -116,16 +118,10 @@ async def get_user_stats(
         goals = await dynamodb_service.get_user_goals(user_id)
         achievements = await dynamodb_service.get_user_achievements(user_id)
         
-        # Get recent emissions for streak calculation
-        recent_emissions = await dynamodb_service.get_user_emissions(user_id, limit=30)
-        
-        # Calculate streak days and last entry date
-        streak_days = 0
-        last_entry_date = None
-        if recent_emissions:
-            last_entry_date = recent_emissions[0].get("date")
-            # Simple streak calculation - can be enhanced
-            streak_days = len(set([e.get("date") for e in recent_emissions[:7]]))
+        # Streak and last entry date come from the incrementally kept activity calendar
+        streak = ActivityCalendar.from_bytes(profile.get("activity_calendar")).streak_info(datetime.utcnow().date())
+        streak_days = streak["current_streak"]
+        last_entry_date = streak["last_activity_date"]
         
         # Calculate average daily emissions (simplified)
         total_emissions = profile.get("total_emissions", 0)
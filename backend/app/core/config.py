@@ -35,6 +35,57 @@ class Settings(BaseSettings):
     entries_table: str = "carbontrack-entries"
     goals_table: str = "carbontrack-goals"
     achievements_table: str = "carbontrack-achievements"
+    leaderboards_table: str = "carbontrack-leaderboards"
+    points_ledger_table: str = "carbontrack-points-ledger"
+    recommendations_table: str = "carbontrack-recommendations"
+    
+    # Leaderboard rank indexes are snapshotted to the leaderboards table this often
+    leaderboard_snapshot_interval_seconds: int = 300
+    # Snapshots assume a single writer; with several workers, enable them on one only
+    leaderboard_snapshots_enabled: bool = True
+    # Rank indexes are rebuilt from the users table this often (and at startup
+    # when a snapshot is missing), so every worker converges; 0 turns it off
+    leaderboard_rebuild_interval_seconds: int = 86400
+    
+    # Points ledger: points per logged activity, and how long individual ledger
+    # rows (and so their idempotency keys) are kept before compaction
+    points_per_activity: int = 10
+    points_ledger_retention_days: int = 90
+    
+    # Per-user gamification snapshots kept in memory, and how long their
+    # leaderboard ranks are reused before being re-read from the rank indexes
+    gamification_snapshot_cache_size: int = 10000
+    gamification_snapshot_rank_ttl_seconds: int = 30
+    
+    # Memory budget for users' emission histories cached as columns (LRU-evicted)
+    emission_store_max_bytes: int = 256 * 1024 * 1024
+    
+    # Ranked recommendations kept in memory (one entry per user and category filter)
+    recommendation_cache_max_entries: int = 5000
+    
+    # Precomputed recommendation rows older than this are ignored and
+    # recomputed on demand (the batch job normally runs daily)
+    recommendation_precompute_max_age_hours: int = 26
+    
+    # Collaborative filtering over recommendation completions: weight of the
+    # predicted preference (about 0-1) in the ranking score, model size and
+    # L2 penalty, the fewest users with completions worth training on, and
+    # how often the API reloads the trained model
+    recommendation_cf_weight: float = 20.0
+    recommendation_cf_factors: int = 8
+    recommendation_cf_regularization: float = 5.0
+    recommendation_cf_min_users: int = 50
+    recommendation_model_refresh_seconds: int = 3600
+    
+    # Peer cohorts ("people like you"): cohort size, and the fewest active
+    # users a region needs for its own index (smaller regions use the global one)
+    peer_cohort_size: int = 50
+    peer_cohort_min_region_users: int = 200
+    
+    # What-if scenarios: days of history replayed, and reports kept in
+    # memory (one entry per user and region)
+    scenario_history_days: int = 365
+    scenario_cache_max_entries: int = 5000
     
     # JWT configuration
     jwt_secret_key: str = "your_super_secret_jwt_key_change_in_production"
@@ -0,0 +1,70 @@
+"""
+Fast JSON responses for CarbonTrack
+
+Route results are dicts and lists built from DynamoDB items, whose numbers
+are Decimal. FastAPI passes every result through jsonable_encoder (or the
+route's response model) and then the standard library json encoder.
+FastJSONResponse renders with orjson instead. orjson handles datetime,
+date, enums, dataclasses (slotted ones included) and NumPy values natively,
+and Decimal through a default hook.
+
+It is the application's default response class, so every route renders
+with orjson. Routes whose data comes straight from storage can also return
+``json_response(...)``, which skips jsonable_encoder and response model
+validation. Their response_model still documents the shape.
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Numpy arrays and scalars as lists and numbers, non-string keys as strings,
+# UTC datetimes with "Z" as Pydantic writes them
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not serialize itself"""
+    if isinstance(value, Decimal):
+        # As FastAPI's encoder: integral values become ints, others floats
+        exponent = value.as_tuple().exponent
+        return int(value) if isinstance(exponent, int) and exponent >= 0 else float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes with native Decimal and datetime support"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> FastJSONResponse:
+    """
+    Return trusted data without FastAPI's encoding and validation pass
+
+    Args:
+        content: Dicts, lists, dataclasses, Decimals, dates...
+        status_code: HTTP status code
+        headers: Extra response headers
+
+    Returns:
+        The rendered response
+    """
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -3,13 +3,96 @@ CarbonTrack FastAPI Backend
 A SaaS MVP for tracking and reducing carbon footprints
 """
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 
 from app.core.config import settings
+from app.core.responses import FastJSONResponse
 from app.api.v1.api import api_router
+from app.services.rank_index import leaderboard_index
+
+logger = logging.getLogger(__name__)
+
+
+async def _write_leaderboard_snapshot():
+    """
+    Persist changed leaderboard indexes without blocking the event loop
+
+    The indexes are copied on the loop, then written by a worker thread;
+    writes that fail are retried on the next snapshot.
+    """
+    pending = leaderboard_index.take_snapshot()
+    if pending:
+        _, failed = await asyncio.to_thread(leaderboard_index.write_snapshot, pending)
+        leaderboard_index.restore_dirty(failed)
+
+
+async def _snapshot_leaderboards():
+    """Periodically freeze finished periods' ranks, persist changed indexes and drop finished periods"""
+    while True:
+        await asyncio.sleep(settings.leaderboard_snapshot_interval_seconds)
+        try:
+            leaderboard_index.roll_over()
+            if settings.leaderboard_snapshots_enabled:
+                await _write_leaderboard_snapshot()
+            leaderboard_index.prune()
+        except Exception as e:
+            logger.error(f"Error snapshotting leaderboards: {str(e)}")
+
+
+async def _rebuild_leaderboards():
+    """Periodically rebuild the current periods' indexes from the users table"""
+    while True:
+        await asyncio.sleep(settings.leaderboard_rebuild_interval_seconds)
+        try:
+            users = await leaderboard_index.rebuild_from_table()
+            logger.info(f"Rebuilt leaderboard indexes from {users} users")
+        except Exception as e:
+            logger.error(f"Error rebuilding leaderboards: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Reload leaderboard indexes on startup and snapshot them while running and on shutdown
+
+    Every worker process keeps its own indexes and a snapshot replaces the
+    stored ones, so only one worker should write snapshots (see
+    leaderboard_snapshots_enabled). Boards without a snapshot, and every
+    board periodically, are rebuilt from the users table.
+    """
+    loaded = 0
+    try:
+        loaded = await asyncio.to_thread(leaderboard_index.reload)
+        logger.info(f"Loaded {loaded} leaderboard index snapshots")
+    except Exception as e:
+        logger.error(f"Error loading leaderboard snapshots: {str(e)}")
+    if loaded < len(leaderboard_index.configs):
+        try:
+            users = await leaderboard_index.rebuild_from_table()
+            logger.info(f"Rebuilt leaderboard indexes from {users} users")
+        except Exception as e:
+            logger.error(f"Error rebuilding leaderboards: {str(e)}")
+    tasks = [asyncio.create_task(_snapshot_leaderboards())]
+    if settings.leaderboard_rebuild_interval_seconds:
+        tasks.append(asyncio.create_task(_rebuild_leaderboards()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        if settings.leaderboard_snapshots_enabled:
+            try:
+                await _write_leaderboard_snapshot()
+            except Exception as e:
+                logger.error(f"Error snapshotting leaderboards: {str(e)}")
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -18,7 +101,9 @@ app = FastAPI(
     version=settings.app_version,
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS with support for wildcard via env ALLOWED_ORIGINS="*"
@@ -4,7 +4,9 @@ from decimal import Decimal
 import uuid
 from dataclasses import dataclass, field
 
-@dataclass
+from app.models.records import SLOTS
+
+@dataclass(**SLOTS)
 class CarbonEmissionModel:
     user_id: str
     entry_id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -48,6 +50,7 @@ class UserProfileModel:
     avatar_url: Optional[str] = None
     preferred_units: Dict[str, str] = field(default_factory=lambda: {"distance": "km", "energy": "kWh", "weight": "kg"})
     carbon_budget: Optional[Decimal] = None
+    region: Optional[str] = None
     total_emissions: Decimal = field(default_factory=lambda: Decimal('0'))
     current_month_emissions: Decimal = field(default_factory=lambda: Decimal('0'))
     entries_count: int = 0
@@ -73,6 +76,8 @@ class UserProfileModel:
             item['avatar_url'] = self.avatar_url
         if self.carbon_budget:
             item['carbon_budget'] = self.carbon_budget  # Keep as Decimal
+        if self.region:
+            item['region'] = self.region
         return item
 
 @dataclass  
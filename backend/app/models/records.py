@@ -0,0 +1,84 @@
+"""
+Compact in-process record types for CarbonTrack
+
+Collections built per request (a user's activities, list endpoint rows,
+leaderboard entries) can hold many thousands of records. Plain dicts and
+regular dataclass instances each carry their own ``__dict__``, and strings
+read from DynamoDB are fresh objects per item even when every entry says
+"transportation". The records here use ``__slots__`` and share one interned
+string object per distinct category, activity and unit.
+
+A slot holds a pointer either way, so per-object records keep interned
+strings rather than integer codes. Integer codes pay off in array-backed
+storage, where they are int16 (see EmissionStore).
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Optional, Tuple
+
+# Dataclass options that give instances __slots__ instead of a __dict__
+# (Python 3.10+; older runtimes get regular dataclasses)
+SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def intern_text(value: Any) -> Any:
+    """The interned copy of a string (other values unchanged)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(**SLOTS)
+class ActivityRecord:
+    """One emission entry in the shape ActivityService returns"""
+    activity_id: str
+    user_id: str
+    timestamp: str
+    date: str
+    category: str
+    activity: str
+    co2_equivalent: float
+    description: str = ""
+
+    # Keys of the activity dicts this record replaces, aliases included
+    KEYS: ClassVar[Tuple[str, ...]] = (
+        "activity_id", "user_id", "timestamp", "date", "activity_type", "activity_name", "category",
+        "carbon_footprint", "description", "co2_equivalent", "activity",
+    )
+
+    @property
+    def activity_type(self) -> str:
+        return self.category
+
+    @property
+    def activity_name(self) -> str:
+        return self.activity
+
+    @property
+    def carbon_footprint(self) -> float:
+        return self.co2_equivalent
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access, for callers written against the activity dicts"""
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.KEYS}
+
+
+@dataclass(**SLOTS)
+class EmissionListItem:
+    """One row of the emissions list endpoint"""
+    id: Optional[str]
+    category: str
+    activity: str
+    amount: float
+    unit: str
+    date: str
+    description: Optional[str]
+    co2_equivalent: float
+    emission_factor: float
@@ -3,8 +3,9 @@ Pydantic schemas for carbon tracking
 """
 
 from typing import Optional
+import datetime as dt
 from datetime import date, datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from enum import Enum
 
 
@@ -29,25 +30,46 @@ class TransportActivity(str, Enum):
     WALK = "walk"
 
 
+# Oldest entry date accepted (the activity calendar keeps a bit per day
+# from a user's first entry), and the largest amount of one entry
+MIN_EMISSION_DATE = date(2000, 1, 1)
+MAX_EMISSION_AMOUNT = 1_000_000
+
+
+def validate_emission_date(value: Optional[date]) -> Optional[date]:
+    """Reject entry dates after today (UTC) or before MIN_EMISSION_DATE"""
+    if value is None:
+        return value
+    if value > datetime.utcnow().date():
+        raise ValueError("date cannot be in the future")
+    if value < MIN_EMISSION_DATE:
+        raise ValueError(f"date cannot be before {MIN_EMISSION_DATE.isoformat()}")
+    return value
+
+
 class CarbonEmissionCreate(BaseModel):
     """Schema for creating carbon emission entry"""
     date: date
     category: EmissionCategory
     activity: str
-    amount: float = Field(..., gt=0, description="Amount must be greater than 0")
+    amount: float = Field(..., gt=0, le=MAX_EMISSION_AMOUNT, description="Amount must be greater than 0")
     unit: str = Field(..., min_length=1, max_length=20)
     description: Optional[str] = Field(None, max_length=500)
 
+    _check_date = field_validator("date")(validate_emission_date)
+
 
 class CarbonEmissionUpdate(BaseModel):
     """Schema for updating carbon emission entry"""
-    date: Optional[date] = None
+    date: Optional[dt.date] = None  # dt.date: the field's default would shadow the type
     category: Optional[EmissionCategory] = None
     activity: Optional[str] = None
-    amount: Optional[float] = Field(None, gt=0)
+    amount: Optional[float] = Field(None, gt=0, le=MAX_EMISSION_AMOUNT)
     unit: Optional[str] = Field(None, min_length=1, max_length=20)
     description: Optional[str] = Field(None, max_length=500)
 
+    _check_date = field_validator("date")(validate_emission_date)
+
 
 class CarbonEmissionResponse(BaseModel):
     """Schema for carbon emission response"""
@@ -22,6 +22,7 @@ class UserProfileCreate(BaseModel):
         description="User's preferred units for measurements"
     )
     carbon_budget: Optional[float] = Field(None, gt=0, description="Monthly carbon budget in kg CO2")
+    region: Optional[str] = Field(None, max_length=64, description="Region for peer comparisons, e.g. a country code")
 
 
 class UserProfileUpdate(BaseModel):
@@ -30,6 +31,7 @@ class UserProfileUpdate(BaseModel):
     avatar_url: Optional[str] = Field(None, max_length=500)
     preferred_units: Optional[Dict[str, str]] = None
     carbon_budget: Optional[float] = Field(None, gt=0)
+    region: Optional[str] = Field(None, max_length=64)
 
 
 class UserProfileResponse(BaseModel):
@@ -40,6 +42,7 @@ class UserProfileResponse(BaseModel):
     avatar_url: Optional[str] = None
     preferred_units: Dict[str, str] = Field(default_factory=dict)
     carbon_budget: Optional[float] = None
+    region: Optional[str] = None
     total_emissions: float = 0.0
     current_month_emissions: float = 0.0
     entries_count: int = 0
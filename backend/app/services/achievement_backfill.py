@@ -0,0 +1,403 @@
+"""
+Bulk achievement backfill for CarbonTrack
+
+Awards achievements retroactively after a new achievement is added or its
+criteria change. Per-user stats are streamed from parallel scans of the
+users and entries tables into NumPy columns, every criterion is evaluated
+as one vectorized threshold comparison over all users, and the resulting
+awards are batch-written in user-id order. As on the live path, each
+award's points then go through the points ledger (keyed by achievement, so
+they are credited once) and the user's data version is bumped. Progress is
+checkpointed after each fully written chunk of users, so an interrupted run
+resumes where it stopped; awards that already exist are never rewritten.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.achievement_engine import AchievementEngine, achievement_engine
+from app.services.activity_counters import ActivityCalendar
+from app.services.bulk_loader import ConcurrentBatchWriter, _to_day_array
+from app.services.parallel_scan import parallel_scan
+
+logger = logging.getLogger(__name__)
+
+USER_PROJECTION = ["userId", "entries_count", "goals_set", "total_co2_reduced", "activity_calendar", "achievements_count"]
+ENTRY_PROJECTION = ["userId", "date"]
+
+
+# ====================
+# STAT COLUMNS
+# ====================
+
+@dataclass
+class UserStatColumns:
+    """Achievement stats for all users, one float64 column per stat, rows sorted by user id"""
+    user_ids: List[str]
+    columns: Dict[str, np.ndarray]
+    achievements_count: Optional[np.ndarray] = None  # Count stored on each profile
+    users_scanned: int = 0
+    entries_scanned: int = 0
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+
+def longest_runs(user_codes: np.ndarray, days: np.ndarray, user_count: int) -> np.ndarray:
+    """
+    Longest run of consecutive active days per user
+
+    Args:
+        user_codes: Row index of the user for each entry
+        days: Day number (e.g. datetime64[D] as int) of each entry
+        user_count: Number of users (length of the result)
+
+    Returns:
+        int64 array of longest streaks, zero for users without entries
+    """
+    longest = np.zeros(user_count, dtype=np.int64)
+    if len(user_codes) == 0:
+        return longest
+    pairs = np.unique(np.stack([user_codes.astype(np.int64), days.astype(np.int64)], axis=1), axis=0)
+    users, active = pairs[:, 0], pairs[:, 1]
+    starts = np.ones(len(pairs), dtype=bool)
+    starts[1:] = (users[1:] != users[:-1]) | (active[1:] - active[:-1] != 1)
+    run_ids = np.cumsum(starts) - 1
+    run_lengths = np.bincount(run_ids)
+    np.maximum.at(longest, users[starts], run_lengths)
+    return longest
+
+
+async def collect_user_stats(
+    users_table,
+    entries_table,
+    total_segments: int = 8,
+    max_read_units_per_second: Optional[float] = None,
+) -> UserStatColumns:
+    """
+    Build stat columns from parallel scans of the users and entries tables
+
+    Activity counts and streaks come from the entries themselves, so users
+    whose profile counters predate them are still credited; the profile's
+    counters and activity calendar are used where they are higher.
+
+    Args:
+        users_table: boto3 Table for user profiles
+        entries_table: boto3 Table for emission entries
+        total_segments: Parallel scan segments per table
+        max_read_units_per_second: Optional read capacity cap per table
+
+    Returns:
+        UserStatColumns for every user with a profile or at least one entry
+    """
+    profiles: Dict[str, Dict[str, Any]] = {}
+    entry_users: List[str] = []
+    entry_days: List[str] = []
+
+    async def scan_users():
+        async for item in parallel_scan(users_table, total_segments, projection=USER_PROJECTION,
+                                        max_read_units_per_second=max_read_units_per_second):
+            profiles[item["userId"]] = item
+
+    async def scan_entries():
+        async for item in parallel_scan(entries_table, total_segments, projection=ENTRY_PROJECTION,
+                                        max_read_units_per_second=max_read_units_per_second):
+            entry_users.append(item["userId"])
+            entry_days.append(str(item.get("date", ""))[:10])
+
+    await asyncio.gather(scan_users(), scan_entries())
+
+    # Entries without a parseable date still count as activities, just not towards streaks
+    days = _to_day_array(entry_days)
+    user_ids, user_codes = np.unique(np.array(list(profiles) + entry_users, dtype=object), return_inverse=True)
+    user_ids = user_ids.tolist()
+    entry_codes = user_codes[len(profiles):]
+    profile_codes = user_codes[:len(profiles)]
+    count = len(user_ids)
+
+    dated = ~np.isnat(days)
+    activity_count = np.bincount(entry_codes, minlength=count).astype(np.float64)
+    streak_days = longest_runs(entry_codes[dated], days[dated].astype(np.int64), count).astype(np.float64)
+    goals_set = np.zeros(count)
+    co2_saved = np.zeros(count)
+    stored_counts = np.zeros(count, dtype=np.int64)
+    for code, profile in zip(profile_codes, profiles.values()):
+        stored_counts[code] = int(profile.get("achievements_count", 0))
+        activity_count[code] = max(activity_count[code], float(profile.get("entries_count", 0)))
+        goals_set[code] = float(profile.get("goals_set", 0))
+        co2_saved[code] = float(profile.get("total_co2_reduced", 0))
+        if profile.get("activity_calendar"):
+            calendar = ActivityCalendar.from_bytes(profile["activity_calendar"])
+            streak_days[code] = max(streak_days[code], calendar.longest_streak)
+
+    return UserStatColumns(
+        user_ids=user_ids,
+        columns={
+            "activity_count": activity_count,
+            "streak_days": streak_days,
+            "goals_set": goals_set,
+            "co2_saved_kg": co2_saved,
+        },
+        achievements_count=stored_counts,
+        users_scanned=len(profiles),
+        entries_scanned=len(entry_users),
+    )
+
+
+def evaluate_awards(engine: AchievementEngine, stats: UserStatColumns) -> Dict[str, np.ndarray]:
+    """
+    Which users satisfy each achievement, as boolean masks over stats rows
+
+    Each stat column is compared against all of its thresholds at once: a
+    searchsorted over the engine's sorted thresholds gives, per user, how
+    many of them are met. Stats with no column (no data source yet) count
+    as zero, matching the per-user rule check.
+    """
+    earned = {achievement_id: np.zeros(len(stats), dtype=bool) for achievement_id in engine.achievements}
+    for stat, (thresholds, achievement_ids) in engine.thresholds.items():
+        column = stats.columns.get(stat)
+        if column is None:
+            column = np.zeros(len(stats))
+        met = np.searchsorted(np.asarray(thresholds), column, side="right")
+        for position, achievement_id in enumerate(achievement_ids):
+            earned[achievement_id] |= met > position
+    return earned
+
+
+async def load_existing_awards(
+    achievements_table,
+    user_ids: List[str],
+    total_segments: int = 8,
+    max_read_units_per_second: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """Masks of awards already stored, keyed by achievement id, over the sorted user_ids"""
+    award_users: List[str] = []
+    award_ids: List[str] = []
+    async for item in parallel_scan(achievements_table, total_segments, projection=["user_id", "achievement_id"],
+                                    max_read_units_per_second=max_read_units_per_second):
+        award_users.append(item["user_id"])
+        award_ids.append(item["achievement_id"])
+
+    existing: Dict[str, np.ndarray] = {}
+    if not user_ids or not award_users:
+        return existing
+    keys = np.array(user_ids, dtype=object)
+    positions = np.minimum(np.searchsorted(keys, np.array(award_users, dtype=object)), len(keys) - 1)
+    known = keys[positions] == np.array(award_users, dtype=object)
+    for position, achievement_id in zip(positions[known].tolist(), np.array(award_ids, dtype=object)[known].tolist()):
+        existing.setdefault(achievement_id, np.zeros(len(keys), dtype=bool))[position] = True
+    return existing
+
+
+# ====================
+# CHECKPOINTS AND ORCHESTRATION
+# ====================
+
+def rules_fingerprint(engine: AchievementEngine) -> str:
+    """Identifies the rule set a checkpoint was written for"""
+    rules = {achievement_id: a.criteria for achievement_id, a in sorted(engine.achievements.items())}
+    return hashlib.sha256(json.dumps(rules, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+@dataclass
+class BackfillCheckpoint:
+    """Resume point: every user up to and including ``last_user_id`` is written"""
+    rules_id: str
+    last_user_id: str = ""
+    users_processed: int = 0
+    awards_written: int = 0
+    updated_at: str = ""
+
+    @classmethod
+    def load(cls, path: str, rules_id: str) -> "BackfillCheckpoint":
+        if not os.path.exists(path):
+            return cls(rules_id=rules_id)
+        with open(path) as f:
+            checkpoint = cls(**json.load(f))
+        if checkpoint.rules_id != rules_id:
+            raise ValueError(f"Checkpoint {path} was written for different achievement rules; remove it to start over")
+        return checkpoint
+
+    def save(self, path: str):
+        self.updated_at = datetime.utcnow().isoformat()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class BackfillStats:
+    """Progress snapshot passed to progress callbacks and returned at the end"""
+    users_scanned: int = 0
+    entries_scanned: int = 0
+    users_processed: int = 0
+    users_awarded: int = 0
+    awards_written: int = 0
+    resumed_after: str = ""
+    scan_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    users_per_second: float = 0.0
+    awards_by_achievement: Dict[str, int] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+
+
+async def run_backfill(
+    users_table,
+    entries_table,
+    achievements_table,
+    engine: AchievementEngine = achievement_engine,
+    chunk_users: int = 1000,
+    workers: int = 8,
+    total_segments: int = 8,
+    max_read_units_per_second: Optional[float] = None,
+    checkpoint_path: Optional[str] = None,
+    dry_run: bool = False,
+    table_factory: Optional[Callable[[], Any]] = None,
+    progress: Optional[Callable[[BackfillStats], None]] = None,
+    now: Optional[datetime] = None,
+    record_points: Optional[Callable[[str, int, str, str], Awaitable[Optional[Dict[str, Any]]]]] = None,
+) -> BackfillStats:
+    """
+    Award every achievement users already qualify for but do not hold
+
+    Args:
+        users_table: boto3 Table for user profiles (also receives achievements_count)
+        entries_table: boto3 Table for emission entries
+        achievements_table: boto3 Table receiving the awards
+        engine: Achievement rules to evaluate
+        chunk_users: Users per write chunk and checkpoint step
+        workers: Concurrent writer threads
+        total_segments: Parallel scan segments per table
+        max_read_units_per_second: Optional read capacity cap for the scans
+        checkpoint_path: Where to persist the resume point (no resume when omitted)
+        dry_run: Evaluate and count awards without writing anything
+        table_factory: Builds an achievements Table per writer thread (defaults to boto3)
+        progress: Called with a BackfillStats snapshot after each chunk
+        now: Award time (defaults to the start of the run)
+        record_points: Credits an award's points, as DynamoDBService.record_points
+            (user_id, points, 'achievement', achievement_id); no points when omitted
+
+    Returns:
+        Final BackfillStats; ``errors`` is non-empty if any chunk failed to write
+    """
+    rules_id = rules_fingerprint(engine)
+    checkpoint = (
+        BackfillCheckpoint.load(checkpoint_path, rules_id) if checkpoint_path else BackfillCheckpoint(rules_id=rules_id)
+    )
+    earned_at = now or datetime.utcnow()
+    started = time.monotonic()
+    stats = BackfillStats(resumed_after=checkpoint.last_user_id)
+
+    columns = await collect_user_stats(users_table, entries_table, total_segments, max_read_units_per_second)
+    existing = await load_existing_awards(achievements_table, columns.user_ids, total_segments, max_read_units_per_second)
+    stats.users_scanned = columns.users_scanned
+    stats.entries_scanned = columns.entries_scanned
+    stats.scan_seconds = time.monotonic() - started
+
+    earned = evaluate_awards(engine, columns)
+    achievement_ids = list(engine.achievements)
+    held = np.stack([existing.get(a, np.zeros(len(columns), dtype=bool)) for a in achievement_ids])
+    new = np.stack([earned[a] for a in achievement_ids]) & ~held
+    # Profiles whose stored count disagrees with their awards (including awards
+    # written by an interrupted run) get the full count rewritten
+    totals = (held | new).sum(axis=0)
+    stale = totals != columns.achievements_count
+    # Points are credited before the count is set, so awards of a chunk that
+    # failed part-way are still owed (and counted stale) when it is rerun;
+    # the ledger ignores awards whose points were already credited
+    owed = (held | new) & (stale | new.any(axis=0))
+    records = {a: engine.award_record(a, earned_at) for a in achievement_ids}
+    first = 0
+    if checkpoint.last_user_id and len(columns):
+        first = int(np.searchsorted(np.array(columns.user_ids, dtype=object), checkpoint.last_user_id, side="right"))
+
+    def snapshot():
+        elapsed = time.monotonic() - started
+        stats.elapsed_seconds = elapsed
+        stats.users_per_second = stats.users_processed / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    def set_counts(counts: Dict[str, int]):
+        # SET rather than ADD keeps the count right when a chunk is retried;
+        # the data version bump marks the user's cached results stale
+        for user_id, total in counts.items():
+            users_table.update_item(
+                Key={"userId": user_id},
+                UpdateExpression="SET achievements_count = :count ADD data_version :one",
+                ExpressionAttributeValues={":count": total, ":one": 1},
+            )
+
+    def commit(last_user_id: str, users: int, awarded_users: int, awards: int):
+        stats.users_processed += users
+        stats.users_awarded += awarded_users
+        stats.awards_written += awards
+        checkpoint.last_user_id = last_user_id
+        checkpoint.users_processed += users
+        checkpoint.awards_written += awards
+        if checkpoint_path and not dry_run:
+            checkpoint.save(checkpoint_path)
+        if progress:
+            progress(snapshot())
+
+    writer = None if dry_run else ConcurrentBatchWriter(
+        getattr(achievements_table, "name", ""),
+        max_workers=workers,
+        table_factory=table_factory or (lambda: achievements_table),
+        overwrite_by_pkeys=["user_id", "achievement_id"],
+    )
+    pending: deque = deque()
+
+    async def drain(limit: int):
+        # Chunks commit in user order, so the checkpoint never skips an unwritten chunk
+        while len(pending) > limit:
+            future, counts, credits, summary = pending.popleft()
+            await asyncio.wrap_future(future)
+            for user_id, achievement_id in credits:
+                points = records[achievement_id]["points"]
+                if await record_points(user_id, points, "achievement", achievement_id) is None:
+                    raise RuntimeError(f"Could not credit points for {achievement_id} to {user_id}")
+            await asyncio.to_thread(set_counts, counts)
+            commit(*summary)
+
+    try:
+        for start in range(first, len(columns), chunk_users):
+            end = min(start + chunk_users, len(columns))
+            rows, awards = np.nonzero(new[:, start:end].T)
+            items = []
+            for row, award in zip((rows + start).tolist(), awards.tolist()):
+                achievement_id = achievement_ids[award]
+                items.append(engine.award_item(columns.user_ids[row], records[achievement_id]))
+                stats.awards_by_achievement[achievement_id] = stats.awards_by_achievement.get(achievement_id, 0) + 1
+            counts = {columns.user_ids[row]: int(totals[row]) for row in (np.flatnonzero(stale[start:end]) + start).tolist()}
+            credits = []
+            if record_points:
+                owed_rows, owed_awards = np.nonzero(owed[:, start:end].T)
+                credits = [(columns.user_ids[row], achievement_ids[award])
+                           for row, award in zip((owed_rows + start).tolist(), owed_awards.tolist())]
+            summary = (columns.user_ids[end - 1], end - start, len(np.unique(rows)), len(items))
+            if dry_run:
+                commit(*summary)
+                continue
+            pending.append((writer.submit(items), counts, credits, summary))
+            await drain(workers)
+        if writer:
+            await drain(0)
+    except Exception as e:
+        logger.error(f"Stopping achievement backfill after write failure: {e}")
+        stats.errors.append(str(e))
+    finally:
+        if writer:
+            writer.close(cancel=bool(stats.errors))
+
+    return snapshot()
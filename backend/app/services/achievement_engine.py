@@ -1,17 +1,38 @@
 """
 Gamification Achievement System
 Defines achievements, badges, and point calculations for CarbonTrack users
+
+Achievement rules are compiled into a threshold index (stat name -> sorted
+thresholds), so a write that moves one stat from an old to a new value
+finds exactly the achievements it crossed with a bisect, instead of
+re-checking every rule on every read.
 """
+from bisect import bisect_right
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
+from app.models.records import SLOTS
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
 
+# Stats that achievement criteria can be written against
+STAT_CRITERIA = (
+    "activity_count",
+    "streak_days",
+    "reduction_percentage",
+    "net_zero",
+    "goals_set",
+    "goals_achieved",
+    "co2_saved_kg",
+    "recommendations_completed",
+)
+
+
 class AchievementType(Enum):
     """Types of achievements available"""
     CARBON_REDUCTION = "carbon_reduction"
@@ -31,7 +52,7 @@ class BadgeTier(Enum):
     DIAMOND = "diamond"
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Achievement:
     """Achievement definition"""
     id: str
@@ -55,6 +76,7 @@ class AchievementEngine:
     
     def __init__(self):
         self.achievements = self._initialize_achievements()
+        self.thresholds = self._compile_thresholds()
     
     def _initialize_achievements(self) -> Dict[str, Achievement]:
         """Initialize all available achievements"""
@@ -352,6 +374,96 @@ class AchievementEngine:
             
         return achievements
     
+    def _compile_thresholds(self) -> Dict[str, Tuple[List[float], List[str]]]:
+        """
+        Build the stat -> (sorted thresholds, achievement ids) index
+        
+        Criteria keys are alternatives (any one satisfied unlocks the
+        achievement), so each key becomes its own entry. Boolean criteria
+        such as net_zero are thresholds of 1 over the stat read as 0/1;
+        qualifiers like timeframe are not stats and are skipped.
+        """
+        entries: Dict[str, List[Tuple[float, str]]] = {}
+        for achievement_id, achievement in self.achievements.items():
+            for stat, threshold in achievement.criteria.items():
+                if stat not in STAT_CRITERIA:
+                    continue
+                entries.setdefault(stat, []).append((float(threshold), achievement_id))
+        
+        index = {}
+        for stat, pairs in entries.items():
+            pairs.sort()
+            index[stat] = ([threshold for threshold, _ in pairs], [achievement_id for _, achievement_id in pairs])
+        return index
+    
+    def newly_unlocked(self, stat: str, old: float, new: float) -> List[str]:
+        """
+        Achievements whose threshold on ``stat`` lies in (old, new]
+        
+        Args:
+            stat: Stat name as used in achievement criteria
+            old: Value before the write
+            new: Value after the write
+            
+        Returns:
+            Achievement ids crossed by the change, lowest threshold first
+        """
+        if stat not in self.thresholds or new <= old:
+            return []
+        thresholds, achievement_ids = self.thresholds[stat]
+        return achievement_ids[bisect_right(thresholds, float(old)):bisect_right(thresholds, float(new))]
+    
+    def evaluate_changes(
+        self,
+        changes: Dict[str, Tuple[float, float]],
+        earned_at: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Award records for the achievements crossed by a set of stat changes
+        
+        Args:
+            changes: Stat name -> (old value, new value) from one write event
+            earned_at: Award time (defaults to now)
+            
+        Returns:
+            Newly earned achievements in the check_achievements format
+        """
+        earned_at = earned_at or datetime.utcnow()
+        unlocked = []
+        for stat, (old, new) in changes.items():
+            for achievement_id in self.newly_unlocked(stat, float(old), float(new)):
+                if achievement_id not in unlocked:
+                    unlocked.append(achievement_id)
+        return [self.award_record(achievement_id, earned_at) for achievement_id in unlocked]
+    
+    def award_record(self, achievement_id: str, earned_at: datetime) -> Dict[str, Any]:
+        """Award record for one achievement in the check_achievements format"""
+        achievement = self.achievements[achievement_id]
+        return {
+            "achievement_id": achievement.id,
+            "name": achievement.name,
+            "description": achievement.description,
+            "tier": achievement.tier.value,
+            "points": achievement.points,
+            "icon": achievement.icon,
+            "unlocked_message": achievement.unlocked_message,
+            "earned_at": earned_at.isoformat()
+        }
+    
+    def award_item(self, user_id: str, award: Dict[str, Any]) -> Dict[str, Any]:
+        """Achievements-table item for an award record (readable by both achievement APIs)"""
+        achievement = self.achievements[award["achievement_id"]]
+        return {
+            "user_id": user_id,
+            **award,
+            "title": award["name"],
+            "category": achievement.type.value,
+            "is_unlocked": True,
+            "unlocked_date": award["earned_at"],
+            "created_at": award["earned_at"],
+            "updated_at": award["earned_at"]
+        }
+    
     def calculate_user_level(self, total_points: int) -> Dict[str, Any]:
         """Calculate user level based on total points"""
         levels = [
@@ -408,22 +520,21 @@ class AchievementEngine:
         Returns:
             List of newly earned achievements
         """
-        newly_earned = []
+        earned_at = datetime.utcnow()
+        satisfied = set()
+        for stat, (thresholds, achievement_ids) in self.thresholds.items():
+            try:
+                value = float(user_stats.get(stat, 0) or 0)
+            except (TypeError, ValueError):
+                logger.error(f"Invalid value for stat {stat}: {user_stats.get(stat)!r}")
+                continue
+            satisfied.update(achievement_ids[:bisect_right(thresholds, value)])
         
-        for achievement_id, achievement in self.achievements.items():
-            if self._check_achievement_criteria(achievement, user_stats):
-                newly_earned.append({
-                    "achievement_id": achievement_id,
-                    "name": achievement.name,
-                    "description": achievement.description,
-                    "tier": achievement.tier.value,
-                    "points": achievement.points,
-                    "icon": achievement.icon,
-                    "unlocked_message": achievement.unlocked_message,
-                    "earned_at": datetime.utcnow().isoformat()
-                })
-                
-        return newly_earned
+        return [
+            self.award_record(achievement_id, earned_at)
+            for achievement_id in self.achievements
+            if achievement_id in satisfied
+        ]
     
     def _check_achievement_criteria(self, achievement: Achievement, user_stats: Dict[str, Any]) -> bool:
         """Check if user meets the criteria for a specific achievement"""
@@ -527,4 +638,8 @@ class AchievementEngine:
                 "progress_description": achievement.progress_description
             }
             for achievement in self.achievements.values()
-        ]
\ No newline at end of file
+        ]
+
+
+# Shared engine instance
+achievement_engine = AchievementEngine()
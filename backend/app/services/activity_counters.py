@@ -0,0 +1,327 @@
+"""
+Per-user daily activity counters for CarbonTrack
+
+Each user keeps a ring of the last 32 daily buckets (points, activities,
+CO₂ reduced in grams) packed into one small binary attribute on their
+user item. Writes bump today's bucket; daily, weekly, monthly and rolling
+figures are sums over at most 31 integers, with no history scan.
+
+Next to it, an ActivityCalendar keeps a one-bit-per-day bitmap of active
+days together with the streak state (last active day, current run,
+longest run), so streak reads are O(1) whatever the history length, and
+EntryDayCounts keeps how many entries are dated each active day, so a day
+is cleared from the calendar when its last entry goes without a query.
+"""
+
+import struct
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+RING_DAYS = 32
+FIELDS = ("points", "activities", "co2_reduced")
+
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<Bi")  # version, ordinal of the newest bucket's day
+
+# Buckets saturate instead of overflowing (int32 grams cap out at about 2,147 t)
+_INT32 = np.iinfo(np.int32)
+
+
+class DailyCounters:
+    """Ring buffer of per-day counters ending at ``head_day`` (a date ordinal)"""
+
+    __slots__ = ("head_day", "buckets")
+
+    def __init__(self, head_day: int = 0, buckets: Optional[np.ndarray] = None):
+        self.head_day = head_day
+        self.buckets = buckets if buckets is not None else np.zeros((len(FIELDS), RING_DAYS), dtype=np.int32)
+
+    # ====================
+    # ENCODING
+    # ====================
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_FORMAT_VERSION, self.head_day) + self.buckets.astype("<i4").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "DailyCounters":
+        """Decode a packed ring (an empty or missing value gives empty counters)"""
+        if not data:
+            return cls()
+        data = bytes(getattr(data, "value", data))
+        version, head_day = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported daily counters version: {version}")
+        buckets = np.frombuffer(data, dtype="<i4", offset=_HEADER.size).reshape(len(FIELDS), RING_DAYS)
+        return cls(head_day, buckets.astype(np.int32))
+
+    # ====================
+    # UPDATES
+    # ====================
+
+    def _advance(self, day: int):
+        """Move the head forward to ``day``, clearing the buckets it passes"""
+        if day <= self.head_day:
+            return
+        if day - self.head_day >= RING_DAYS:
+            self.buckets[:] = 0
+        else:
+            slots = [d % RING_DAYS for d in range(self.head_day + 1, day + 1)]
+            self.buckets[:, slots] = 0
+        self.head_day = day
+
+    def add(self, day: date, points: int = 0, activities: int = 0, co2_reduced: float = 0) -> bool:
+        """
+        Add to one day's bucket
+
+        Args:
+            day: Day the activity counts towards
+            points: Points earned
+            activities: Activities logged
+            co2_reduced: CO₂ reduced in kg (stored as whole grams)
+
+        Returns:
+            False if the day is older than the ring and was dropped
+        """
+        ordinal = day.toordinal()
+        self._advance(ordinal)
+        if ordinal <= self.head_day - RING_DAYS:
+            return False
+        slot = ordinal % RING_DAYS
+        totals = [int(value) for value in self.buckets[:, slot]]
+        totals[0] += int(points)
+        totals[1] += int(activities)
+        totals[2] += int(round(float(co2_reduced) * 1000))
+        self.buckets[:, slot] = [max(_INT32.min, min(_INT32.max, total)) for total in totals]
+        return True
+
+    # ====================
+    # READS
+    # ====================
+
+    def total(self, field: str, start: date, end: date) -> float:
+        """Sum of one field over the days start..end inclusive (days outside the ring count as zero)"""
+        first = max(start.toordinal(), self.head_day - RING_DAYS + 1)
+        last = min(end.toordinal(), self.head_day)
+        if first > last:
+            return 0
+        row = self.buckets[FIELDS.index(field)]
+        value = int(row[[d % RING_DAYS for d in range(first, last + 1)]].sum())
+        return value / 1000 if field == "co2_reduced" else value
+
+    def rolling(self, field: str, days: int, today: date) -> float:
+        """Sum over the last ``days`` days including today"""
+        return self.total(field, today - timedelta(days=days - 1), today)
+
+    def period_totals(self, today: date) -> Dict[str, float]:
+        """Today / ISO week / calendar month figures in the gamification stats naming"""
+        week_start = today - timedelta(days=today.weekday())
+        month_start = today.replace(day=1)
+        totals = {}
+        for field in FIELDS:
+            totals[f"{field}_today"] = self.total(field, today, today)
+            totals[f"{field}_this_week"] = self.total(field, week_start, today)
+            totals[f"{field}_this_month"] = self.total(field, month_start, today)
+        return totals
+
+
+class ActivityCalendar:
+    """Bitmap of active days (bit i = first_day + i) with incrementally kept streaks"""
+
+    __slots__ = ("first_day", "bits", "last_active", "current_run", "longest_streak", "active_days")
+
+    _HEADER = struct.Struct("<BiiiiI")  # version, first_day, last_active, current_run, longest, active days
+
+    def __init__(self, first_day: int = 0, bits: int = 0, last_active: int = 0,
+                 current_run: int = 0, longest_streak: int = 0, active_days: int = 0):
+        self.first_day = first_day
+        self.bits = bits
+        self.last_active = last_active
+        self.current_run = current_run
+        self.longest_streak = longest_streak
+        self.active_days = active_days
+
+    def to_bytes(self) -> bytes:
+        header = self._HEADER.pack(_FORMAT_VERSION, self.first_day, self.last_active,
+                                   self.current_run, self.longest_streak, self.active_days)
+        return header + self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "ActivityCalendar":
+        """Decode a packed calendar (an empty or missing value gives an empty calendar)"""
+        if not data:
+            return cls()
+        data = bytes(getattr(data, "value", data))
+        version, *state = cls._HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported activity calendar version: {version}")
+        first_day, last_active, current_run, longest, active_days = state
+        bits = int.from_bytes(data[cls._HEADER.size:], "little")
+        return cls(first_day, bits, last_active, current_run, longest, active_days)
+
+    def is_active(self, day: date) -> bool:
+        offset = day.toordinal() - self.first_day
+        return self.active_days > 0 and offset >= 0 and bool(self.bits >> offset & 1)
+
+    def _run_through(self, ordinal: int) -> int:
+        """Length of the run of active days containing ``ordinal``"""
+        offset = ordinal - self.first_day
+        start = offset
+        while start > 0 and self.bits >> (start - 1) & 1:
+            start -= 1
+        end = offset
+        while self.bits >> (end + 1) & 1:
+            end += 1
+        return end - start + 1
+
+    def mark(self, day: date) -> bool:
+        """
+        Record activity on a day
+
+        Returns:
+            False if the day was already marked
+        """
+        ordinal = day.toordinal()
+        if not self.active_days:
+            self.first_day = self.last_active = ordinal
+            self.bits = 1
+            self.current_run = self.longest_streak = self.active_days = 1
+            return True
+        if ordinal < self.first_day:
+            self.bits <<= self.first_day - ordinal
+            self.first_day = ordinal
+        offset = ordinal - self.first_day
+        if self.bits >> offset & 1:
+            return False
+        self.bits |= 1 << offset
+        self.active_days += 1
+
+        if ordinal > self.last_active:
+            # Common case: a new latest day extends or restarts the run
+            self.current_run = self.current_run + 1 if ordinal == self.last_active + 1 else 1
+            self.last_active = ordinal
+            self.longest_streak = max(self.longest_streak, self.current_run)
+        else:
+            # Backfilled day: it may join neighbouring runs, including the current one
+            self.longest_streak = max(self.longest_streak, self._run_through(ordinal))
+            if ordinal == self.last_active - self.current_run:
+                self.current_run = self._run_through(self.last_active)
+        return True
+
+    def unmark(self, day: date) -> bool:
+        """
+        Clear a day whose entries were all deleted or moved, recomputing the streaks
+
+        Returns:
+            False if the day was not marked
+        """
+        if not self.is_active(day):
+            return False
+        self.bits &= ~(1 << (day.toordinal() - self.first_day))
+        self.active_days -= 1
+        if not self.active_days:
+            self.first_day = self.last_active = self.current_run = self.longest_streak = 0
+            return True
+        # Keep bit 0 on the first active day and last_active on the last one
+        shift = (self.bits & -self.bits).bit_length() - 1
+        self.bits >>= shift
+        self.first_day += shift
+        self.last_active = self.first_day + self.bits.bit_length() - 1
+        self.current_run = self._run_through(self.last_active)
+        longest, runs = 0, self.bits
+        while runs:
+            runs &= runs >> 1
+            longest += 1
+        self.longest_streak = longest
+        return True
+
+    def streak_info(self, today: date) -> Dict[str, Any]:
+        """Streak summary in the shape returned by StreaksChallengesEngine.calculate_streak"""
+        if not self.active_days:
+            return {
+                "current_streak": 0,
+                "longest_streak": 0,
+                "last_activity_date": None,
+                "streak_status": "no_activities"
+            }
+        gap = today.toordinal() - self.last_active
+        if gap <= 0:
+            status = "active_today"
+        elif gap == 1:
+            status = "active_yesterday"
+        else:
+            status = "broken"
+        return {
+            "current_streak": self.current_run if gap <= 1 else 0,
+            "longest_streak": self.longest_streak,
+            "last_activity_date": date.fromordinal(self.last_active).isoformat(),
+            "streak_status": status,
+            "total_active_days": self.active_days
+        }
+
+    def active_dates(self, start: date, end: date) -> List[date]:
+        """Active days between start and end inclusive, for history and calendar views"""
+        if not self.active_days:
+            return []
+        first = max(start.toordinal(), self.first_day)
+        last = min(end.toordinal(), self.last_active)
+        if first > last:
+            return []
+        window = self.bits >> (first - self.first_day) & ((1 << (last - first + 1)) - 1)
+        days = []
+        while window:
+            low = window & -window
+            days.append(date.fromordinal(first + low.bit_length() - 1))
+            window ^= low
+        return days
+
+
+class EntryDayCounts:
+    """Number of entries dated each active day (day ordinal -> count)"""
+
+    __slots__ = ("counts",)
+
+    _HEADER = struct.Struct("<BI")  # version, number of days
+
+    def __init__(self, counts: Optional[Dict[int, int]] = None):
+        self.counts = counts if counts is not None else {}
+
+    def to_bytes(self) -> bytes:
+        days = sorted(self.counts)
+        return (self._HEADER.pack(_FORMAT_VERSION, len(days))
+                + np.asarray(days, dtype="<i4").tobytes()
+                + np.asarray([self.counts[day] for day in days], dtype="<i4").tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "EntryDayCounts":
+        """Decode packed counts (an empty or missing value gives no counts)"""
+        if not data:
+            return cls()
+        data = bytes(getattr(data, "value", data))
+        version, size = cls._HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported entry day counts version: {version}")
+        days = np.frombuffer(data, dtype="<i4", count=size, offset=cls._HEADER.size)
+        counts = np.frombuffer(data, dtype="<i4", count=size, offset=cls._HEADER.size + 4 * size)
+        return cls(dict(zip(days.tolist(), counts.tolist())))
+
+    @classmethod
+    def from_dates(cls, dates: Iterable[str]) -> "EntryDayCounts":
+        """Count entries from their ISO dates"""
+        return cls({date.fromisoformat(day).toordinal(): count for day, count in Counter(dates).items()})
+
+    def count(self, day: date) -> int:
+        return self.counts.get(day.toordinal(), 0)
+
+    def add(self, day: date, delta: int) -> int:
+        """Change one day's count; returns the new count (days reaching zero are dropped)"""
+        ordinal = day.toordinal()
+        count = max(0, self.counts.get(ordinal, 0) + delta)
+        if count:
+            self.counts[ordinal] = count
+        else:
+            self.counts.pop(ordinal, None)
+        return count
@@ -2,12 +2,20 @@
 Activity Service - Manages user carbon tracking activities
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
+from app.models.records import ActivityRecord, intern_text
+from app.services.emission_columns import EmissionColumns
+
 logger = logging.getLogger(__name__)
 
+# Most recent entries returned for a window
+MAX_RECENT_ENTRIES = 1000
+
 
 class ActivityService:
     """Service for managing user activities and carbon tracking data."""
@@ -16,7 +24,36 @@ class ActivityService:
         """Initialize the ActivityService."""
         self.activities = {}  # In-memory storage for demo purposes
         
-    async def get_user_activities(self, user_id: str, days: int = 30) -> List[Dict[str, Any]]:
+    @staticmethod
+    def is_demo_user(user_id: Optional[str]) -> bool:
+        """Whether the user gets a generated demo history instead of their stored emissions"""
+        from app.core.config import settings
+
+        return bool(
+            user_id
+            and (
+                user_id in ("demo-user", "admin-user", "mock_admin_id")
+                or (settings.debug and str(user_id).startswith("mock_"))
+            )
+        )
+
+    @staticmethod
+    def _emission_to_activity(user_id: str, idx: int, emission: Dict[str, Any]) -> ActivityRecord:
+        """Map an emission record to the activity structure callers expect."""
+        ts = emission.get("timestamp") or emission.get("created_at") or datetime.utcnow().isoformat()
+        date_str = emission.get("date") or (ts[:10] if isinstance(ts, str) else datetime.utcnow().strftime("%Y-%m-%d"))
+        return ActivityRecord(
+            activity_id=emission.get("entry_id") or f"{user_id}_{idx}",
+            user_id=user_id,
+            timestamp=ts,
+            date=date_str,
+            category=intern_text(emission.get("category", "other")),
+            activity=intern_text(emission.get("activity", "unknown")),
+            co2_equivalent=float(emission.get("co2_equivalent", 0) or 0),
+            description=emission.get("description", ""),
+        )
+
+    async def get_user_activities(self, user_id: str, days: int = 30) -> List[ActivityRecord]:
         """
         Get user activities for the specified number of days.
         
@@ -29,117 +66,29 @@ class ActivityService:
         """
         try:
             # Only generate sample activities for explicit demo/admin/mock users; otherwise derive from real emissions or return empty
-            from app.core.config import settings
-            from app.services.dynamodb_service import dynamodb_service
-
-            def _is_demo_user(uid: Optional[str]) -> bool:
-                return bool(
-                    uid
-                    and (
-                        uid in ("demo-user", "admin-user", "mock_admin_id")
-                        or (settings.debug and str(uid).startswith("mock_"))
-                    )
-                )
-
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=days)
+            # Demo/admin users get a deterministic generated history for UX demos,
+            # built once per day rather than on every request
+            if self.is_demo_user(user_id):
+                from app.services.workload_generator import demo_entries
 
-            # Demo/admin users get generated sample activities for UX demos
-            if _is_demo_user(user_id):
-                activities: List[Dict[str, Any]] = []
-                
-                # Sample activity types and their carbon impact (demo only)
-                sample_activities = [
-                    {
-                        "activity_type": "transportation",
-                        "activity_name": "Drive to work",
-                        "carbon_footprint": 12.5,
-                        "category": "commute",
-                        "description": "Daily commute by car"
-                    },
-                    {
-                        "activity_type": "transportation",
-                        "activity_name": "Public transport",
-                        "carbon_footprint": 3.2,
-                        "category": "commute",
-                        "description": "Bus/metro commute"
-                    },
-                    {
-                        "activity_type": "energy",
-                        "activity_name": "Home electricity",
-                        "carbon_footprint": 8.7,
-                        "category": "utilities",
-                        "description": "Daily electricity usage"
-                    },
-                    {
-                        "activity_type": "food",
-                        "activity_name": "Meat consumption",
-                        "carbon_footprint": 6.1,
-                        "category": "diet",
-                        "description": "Beef/pork meals"
-                    },
-                    {
-                        "activity_type": "food",
-                        "activity_name": "Plant-based meal",
-                        "carbon_footprint": 1.8,
-                        "category": "diet",
-                        "description": "Vegetarian/vegan meals"
-                    },
-                    {
-                        "activity_type": "waste",
-                        "activity_name": "Recycling",
-                        "carbon_footprint": -2.1,
-                        "category": "sustainability",
-                        "description": "Waste recycling activities"
-                    }
+                activities = [
+                    self._emission_to_activity(user_id, idx, emission)
+                    for idx, emission in enumerate(demo_entries(user_id, days))
                 ]
-
-                current_date = start_date
-                import random
-                while current_date <= end_date:
-                    daily_activities = random.sample(sample_activities, random.randint(2, 4))
-                    for idx, activity in enumerate(daily_activities):
-                        activity_record = {
-                            "activity_id": f"{user_id}_{current_date.strftime('%Y%m%d')}_{idx}",
-                            "user_id": user_id,
-                            "timestamp": current_date.isoformat(),
-                            "date": current_date.strftime('%Y-%m-%d'),
-                            **activity
-                        }
-                        activities.append(activity_record)
-                    current_date += timedelta(days=1)
-
                 logger.info(f"Generated {len(activities)} demo activities for user {user_id}")
                 return activities
 
             # For real users, derive activities from stored emissions within date range
-            start_iso = start_date.isoformat()
-            end_iso = end_date.isoformat()
-            emissions = await dynamodb_service.get_user_emissions(user_id, start_iso, end_iso, limit=1000)
+            history, rows = await self._recent_rows(user_id, days)
+            emissions = history.items(rows)
 
             if not emissions:
                 return []
 
-            activities: List[Dict[str, Any]] = []
-            for idx, emission in enumerate(emissions):
-                # Map emission record to an activity-like structure
-                ts = emission.get("timestamp") or emission.get("created_at") or datetime.utcnow().isoformat()
-                date_str = emission.get("date") or (ts[:10] if isinstance(ts, str) else datetime.utcnow().strftime("%Y-%m-%d"))
-                activity_record = {
-                    "activity_id": emission.get("entry_id") or f"{user_id}_{idx}",
-                    "user_id": user_id,
-                    "timestamp": ts,
-                    "date": date_str,
-                    "activity_type": emission.get("category", "other"),
-                    "activity_name": emission.get("activity", "unknown"),
-                    "category": emission.get("category", "other"),
-                    "carbon_footprint": float(emission.get("co2_equivalent", 0) or 0),
-                    "description": emission.get("description", ""),
-                    # Fields used by RecommendationEngine
-                    "co2_equivalent": float(emission.get("co2_equivalent", 0) or 0),
-                    "activity": emission.get("activity", "unknown"),
-                }
-                activities.append(activity_record)
+            activities = [
+                self._emission_to_activity(user_id, idx, emission)
+                for idx, emission in enumerate(emissions)
+            ]
 
             logger.info(f"Derived {len(activities)} activities from emissions for user {user_id}")
             return activities
@@ -148,6 +97,33 @@ class ActivityService:
             logger.error(f"Error getting user activities: {str(e)}")
             return []
     
+    async def get_user_emission_columns(self, user_id: str, days: int = 30) -> EmissionColumns:
+        """
+        The entries get_user_activities returns, as columns
+        
+        For real users these are sliced from the cached emission history
+        without building an activity dict per entry.
+        """
+        try:
+            if self.is_demo_user(user_id):
+                return EmissionColumns.from_entries(await self.get_user_activities(user_id, days))
+            history, rows = await self._recent_rows(user_id, days)
+            return history.columns(rows)
+        except Exception as e:
+            logger.error(f"Error getting user emission columns: {str(e)}")
+            return EmissionColumns.from_entries([])
+    
+    @staticmethod
+    async def _recent_rows(user_id: str, days: int) -> Tuple[Any, np.ndarray]:
+        """The user's cached history and its rows in the window, newest first"""
+        from app.services.dynamodb_service import dynamodb_service
+        
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        history = await dynamodb_service.get_emission_history(user_id)
+        rows = history.newest(history.window(start_date.isoformat(), end_date.isoformat()), limit=MAX_RECENT_ENTRIES)
+        return history, rows
+    
     async def add_activity(self, user_id: str, activity_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Add a new activity for the user.
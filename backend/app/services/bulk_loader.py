@@ -0,0 +1,753 @@
+"""
+Bulk loader for carbon emission entries
+
+Streams CSV, NDJSON or JSON-array sources, validates and prices rows in
+NumPy-vectorized chunks and writes them to the entries table through a pool
+of concurrent batch writers. Progress is checkpointed as a byte offset into
+the source, so an interrupted load resumes where it stopped instead of
+starting over.
+
+Loaded entries skip the per-entry user statistics (totals, daily and
+challenge counters, streak calendar). At the end of a load every user it
+wrote entries for gets their data and emissions versions bumped, so cached
+emission histories, recommendation and gamification snapshots and
+precomputed rows are rebuilt from the new entries on their next read.
+"""
+
+import codecs
+import csv
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import boto3
+import numpy as np
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.core.config import settings
+from app.schemas.carbon import EmissionCategory
+from app.services.carbon_calculator import CarbonCalculator, calculator
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("csv", "ndjson", "json")
+REQUIRED_FIELDS = ("user_id", "date", "category", "activity", "amount", "unit")
+VALID_CATEGORIES = sorted(category.value for category in EmissionCategory)
+
+# Namespace for deterministic entry ids, so re-loading a chunk after a crash
+# overwrites the same items instead of duplicating them
+ENTRY_ID_NAMESPACE = uuid.UUID("6f1c3c1e-4b1a-4f55-9a43-7d3b8f0e2c11")
+
+_READ_SIZE = 1 << 16
+
+
+class SourceRow(NamedTuple):
+    """A raw record read from a source file"""
+    end_offset: int  # Byte offset just past this record
+    data: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+
+# ====================
+# SOURCE READERS
+# ====================
+
+def detect_format(path: str) -> str:
+    """Infer the source format from the file extension"""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("ndjson", "jsonl"):
+        return "ndjson"
+    if extension in ("csv", "json"):
+        return extension
+    raise ValueError(f"Cannot infer format from '{path}', pass one of {SUPPORTED_FORMATS}")
+
+
+def source_fingerprint(path: str) -> str:
+    """Identify a source by size and leading content, independent of its path"""
+    digest = hashlib.sha1()
+    digest.update(str(os.path.getsize(path)).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(_READ_SIZE))
+    return digest.hexdigest()
+
+
+def iter_records(path: str, fmt: str, start_offset: int = 0) -> Iterator[SourceRow]:
+    """
+    Stream records from a source file starting at a byte offset
+
+    Args:
+        path: Source file path
+        fmt: One of SUPPORTED_FORMATS
+        start_offset: Byte offset to resume from (an ``end_offset`` seen earlier)
+
+    Yields:
+        SourceRow for every record, including unparseable ones
+    """
+    if fmt == "csv":
+        return _iter_csv(path, start_offset)
+    if fmt == "ndjson":
+        return _iter_ndjson(path, start_offset)
+    if fmt == "json":
+        return _iter_json_array(path, start_offset)
+    raise ValueError(f"Unsupported format '{fmt}', expected one of {SUPPORTED_FORMATS}")
+
+
+def _iter_ndjson(path: str, start_offset: int) -> Iterator[SourceRow]:
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield SourceRow(offset, None, f"invalid JSON: {e}")
+                continue
+            if isinstance(data, dict):
+                yield SourceRow(offset, data)
+            else:
+                yield SourceRow(offset, None, "record is not a JSON object")
+
+
+def _iter_csv(path: str, start_offset: int) -> Iterator[SourceRow]:
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+        header = [name.strip() for name in header]
+        position = [max(start_offset, f.tell())]
+        f.seek(position[0])
+
+        def lines() -> Iterator[str]:
+            # csv.reader pulls exactly the lines of one row per iteration, so
+            # position always points just past the last row returned
+            for line in iter(f.readline, b""):
+                position[0] += len(line)
+                yield line.decode("utf-8")
+
+        for row in csv.reader(lines()):
+            if not any(cell.strip() for cell in row):
+                continue
+            if len(row) != len(header):
+                yield SourceRow(position[0], None, f"expected {len(header)} columns, got {len(row)}")
+                continue
+            yield SourceRow(position[0], dict(zip(header, row)))
+
+
+def _iter_json_array(path: str, start_offset: int) -> Iterator[SourceRow]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        buffer = ""
+        buffer_offset = start_offset  # Byte offset of buffer[0]
+        expect_open = start_offset == 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, eof
+            chunk = f.read(_READ_SIZE)
+            eof = not chunk
+            buffer += utf8.decode(chunk, final=eof)
+            return not eof
+
+        def consume(count: int):
+            nonlocal buffer, buffer_offset
+            buffer_offset += len(buffer[:count].encode("utf-8"))
+            buffer = buffer[count:]
+
+        while True:
+            stripped = buffer.lstrip(" \t\r\n,\ufeff")
+            consume(len(buffer) - len(stripped))
+            if not buffer:
+                if eof or not fill():
+                    if expect_open:
+                        raise ValueError(f"{path} is empty, expected a JSON array")
+                    return
+                continue
+            if expect_open:
+                if buffer[0] != "[":
+                    raise ValueError(f"{path} does not contain a JSON array")
+                consume(1)
+                expect_open = False
+                continue
+            if buffer[0] == "]":
+                return
+            try:
+                data, end = decoder.raw_decode(buffer)
+            except ValueError:
+                if fill():
+                    continue
+                raise ValueError(f"Malformed JSON array in {path} at byte {buffer_offset}")
+            if end == len(buffer) and not eof and fill():
+                continue  # A scalar may continue past the buffer
+            consume(end)
+            if isinstance(data, dict):
+                yield SourceRow(buffer_offset, data)
+            else:
+                yield SourceRow(buffer_offset, None, "record is not a JSON object")
+
+
+# ====================
+# VECTORIZED VALIDATION AND PRICING
+# ====================
+
+def _field(data: Dict[str, Any], name: str) -> Any:
+    value = data.get(name)
+    if value is None and name == "user_id":
+        value = data.get("userId")
+    return value
+
+
+def _to_float_array(values: List[Any]) -> np.ndarray:
+    """Parse numbers in one pass, falling back per element only on bad input"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        parsed = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                parsed[i] = float(value)
+            except (TypeError, ValueError):
+                parsed[i] = np.nan
+        return parsed
+
+
+def _to_day_array(values: List[str]) -> np.ndarray:
+    """Parse YYYY-MM-DD strings to datetime64[D], NaT where invalid"""
+    try:
+        days = np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        days = np.empty(len(values), dtype="datetime64[D]")
+        for i, value in enumerate(values):
+            try:
+                days[i] = np.datetime64(value, "D")
+            except ValueError:
+                days[i] = np.datetime64("NaT")
+    # numpy accepts partial dates such as "2025-01"; entries need a full date
+    full_length = np.fromiter((len(v) == 10 for v in values), dtype=bool, count=len(values))
+    days[~full_length] = np.datetime64("NaT")
+    return days
+
+
+def round_half_up(values: np.ndarray, places: int = 2) -> np.ndarray:
+    """Vectorized ROUND_HALF_UP, matching the calculator's Decimal quantize"""
+    scale = 10.0 ** places
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5 + 1e-9) / scale
+
+
+def _synthetic_timestamp(day: str, entry_id: str) -> str:
+    """Deterministic, collision-resistant sort key for rows without a timestamp"""
+    digest = int(hashlib.sha1(entry_id.encode()).hexdigest()[:12], 16)
+    seconds, micros = divmod(digest % (86400 * 1_000_000), 1_000_000)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    return f"{day}T{hours:02d}:{minutes:02d}:{secs:02d}.{micros:06d}"
+
+
+def prepare_chunk(
+    rows: List[SourceRow],
+    source_id: str,
+    calc: CarbonCalculator = calculator,
+    trust_co2: bool = False,
+    factor_cache: Optional[Dict[Tuple[str, str, str], Optional[float]]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validate a chunk of source rows and compute CO2e for all of them at once
+
+    Args:
+        rows: Raw rows from iter_records
+        source_id: Source fingerprint, used to derive stable entry ids
+        calc: Calculator providing emission factors
+        trust_co2: Keep a row's own co2_equivalent when present instead of recomputing
+        factor_cache: Optional cache of resolved factors shared across chunks
+
+    Returns:
+        Tuple of (DynamoDB items ready to write, rejected rows with reasons)
+    """
+    factor_cache = {} if factor_cache is None else factor_cache
+    rejects: List[Dict[str, Any]] = []
+    candidates: List[Tuple[SourceRow, Dict[str, Any]]] = []
+
+    for row in rows:
+        if row.error:
+            rejects.append({"offset": row.end_offset, "reason": row.error})
+            continue
+        missing = [name for name in REQUIRED_FIELDS if _field(row.data, name) in (None, "")]
+        if missing:
+            rejects.append({"offset": row.end_offset, "reason": f"missing field(s): {', '.join(missing)}", "record": row.data})
+            continue
+        candidates.append((row, row.data))
+
+    if not candidates:
+        return [], rejects
+
+    records = [data for _, data in candidates]
+    amount_raw = [str(data["amount"]).strip() for data in records]
+    amounts = _to_float_array(amount_raw)
+    day_strings = [str(data["date"]).strip()[:10] for data in records]
+    days = _to_day_array(day_strings)
+    categories = np.array([str(data["category"]).strip().lower() for data in records])
+    units = [str(data["unit"]).strip() for data in records]
+
+    amount_ok = np.isfinite(amounts) & (amounts > 0)
+    date_ok = ~np.isnat(days)
+    category_ok = np.isin(categories, VALID_CATEGORIES)
+    unit_ok = np.fromiter((0 < len(u) <= 20 for u in units), dtype=bool, count=len(units))
+    description_ok = np.fromiter(
+        (len(str(data.get("description") or "")) <= 500 for data in records), dtype=bool, count=len(records)
+    )
+    valid = amount_ok & date_ok & category_ok & unit_ok & description_ok
+
+    for i in np.flatnonzero(~valid):
+        reasons = []
+        if not amount_ok[i]:
+            reasons.append("amount must be a number greater than 0")
+        if not date_ok[i]:
+            reasons.append("date must be YYYY-MM-DD")
+        if not category_ok[i]:
+            reasons.append(f"unknown category '{categories[i]}'")
+        if not unit_ok[i]:
+            reasons.append("unit must be 1-20 characters")
+        if not description_ok[i]:
+            reasons.append("description longer than 500 characters")
+        rejects.append({"offset": candidates[i][0].end_offset, "reason": "; ".join(reasons), "record": records[i]})
+
+    index = np.flatnonzero(valid)
+    if index.size == 0:
+        return [], rejects
+
+    # Resolve one factor per distinct (category, activity, unit) and broadcast it
+    keys = [(categories[i], str(records[i]["activity"]).strip(), units[i]) for i in index]
+    unique_keys = list(dict.fromkeys(keys))
+    position = {key: n for n, key in enumerate(unique_keys)}
+    table = np.empty(len(unique_keys), dtype=np.float64)
+    for n, key in enumerate(unique_keys):
+        if key not in factor_cache:
+            factor = calc.resolve_factor(*key)
+            factor_cache[key] = None if factor is None else float(factor)
+        table[n] = np.nan if factor_cache[key] is None else factor_cache[key]
+    factors = table[np.fromiter((position[key] for key in keys), dtype=np.int64, count=len(keys))]
+
+    valid_amounts = amounts[index]
+    co2 = round_half_up(valid_amounts * factors)
+
+    # Activities the vectorized path can't price exactly go through the scalar calculator
+    for j in np.flatnonzero(np.isnan(factors)):
+        category, activity, unit = keys[j]
+        co2[j] = calc.calculate_emission(category, activity, float(valid_amounts[j]), unit)["co2_equivalent"]
+
+    if trust_co2:
+        provided = _to_float_array([records[i].get("co2_equivalent") for i in index])
+        co2 = np.where(np.isfinite(provided), provided, co2)
+
+    emission_factors = co2 / valid_amounts
+    now = datetime.utcnow().isoformat()
+    items: List[Dict[str, Any]] = []
+
+    for j, i in enumerate(index):
+        row, data = candidates[i]
+        entry_id = str(data.get("entry_id") or uuid.uuid5(ENTRY_ID_NAMESPACE, f"{source_id}:{row.end_offset}"))
+        item = {
+            "userId": str(_field(data, "user_id")),
+            "timestamp": str(data.get("timestamp") or _synthetic_timestamp(day_strings[i], entry_id)),
+            "entry_id": entry_id,
+            "date": day_strings[i],
+            "category": str(categories[i]),
+            "activity": keys[j][1],
+            "amount": Decimal(amount_raw[i]),
+            "unit": units[i],
+            "created_at": str(data.get("created_at") or now),
+            "updated_at": now,
+        }
+        if data.get("description"):
+            item["description"] = str(data["description"])
+        if co2[j]:
+            item["co2_equivalent"] = Decimal(f"{co2[j]:.2f}")
+            item["emission_factor"] = Decimal(str(float(emission_factors[j])))
+        items.append(item)
+
+    return items, rejects
+
+
+# ====================
+# CONCURRENT BATCH WRITER
+# ====================
+
+class ConcurrentBatchWriter:
+    """
+    Writes chunks of items to a DynamoDB table from a pool of threads
+
+    Each worker thread owns its own boto3 session (resources are not
+    thread-safe) and flushes a whole chunk through ``batch_writer``, which
+    retries unprocessed items. The number of chunks in flight is bounded so
+    memory stays flat however large the source is.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        max_workers: int = 8,
+        region: Optional[str] = None,
+        table_factory: Optional[Callable[[], Any]] = None,
+        overwrite_by_pkeys: Optional[List[str]] = None,
+    ):
+        self.table_name = table_name
+        self.region = region or settings.aws_region
+        self._table_factory = table_factory or self._default_table_factory
+        self._overwrite_by_pkeys = overwrite_by_pkeys
+        self._local = threading.local()
+        self._slots = threading.BoundedSemaphore(max_workers * 2)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-writer")
+
+    def _default_table_factory(self):
+        session = boto3.session.Session()
+        return session.resource("dynamodb", region_name=self.region).Table(self.table_name)
+
+    def _table(self):
+        table = getattr(self._local, "table", None)
+        if table is None:
+            table = self._local.table = self._table_factory()
+        return table
+
+    def _write(self, items: List[Dict[str, Any]]) -> int:
+        with self._table().batch_writer(overwrite_by_pkeys=self._overwrite_by_pkeys) as batch:
+            for item in items:
+                batch.put_item(Item=item)
+        return len(items)
+
+    def submit(self, items: List[Dict[str, Any]]) -> Future:
+        """Queue a chunk for writing, blocking while too many chunks are in flight"""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._write, items)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def write_stream(
+        self,
+        items: Iterator[Dict[str, Any]],
+        chunk_size: int = 1000,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Write an item stream in chunks and wait for every chunk to land
+
+        Args:
+            items: Items to write, consumed lazily
+            chunk_size: Items per writer task
+            progress: Called with the number of items queued so far
+
+        Returns:
+            Number of items written; the first write failure is re-raised
+        """
+        queued = 0
+        futures: List[Future] = []
+        chunk: List[Dict[str, Any]] = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) < chunk_size:
+                continue
+            futures.append(self.submit(chunk))
+            queued += len(chunk)
+            chunk = []
+            if progress:
+                progress(queued)
+            # Surface failures early and keep only unfinished futures around
+            for future in futures:
+                if future.done():
+                    future.result()
+            futures = [future for future in futures if not future.done()]
+        if chunk:
+            futures.append(self.submit(chunk))
+            queued += len(chunk)
+        for future in futures:
+            future.result()
+        if progress:
+            progress(queued)
+        return queued
+
+    def close(self, cancel: bool = False):
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+
+    def __enter__(self) -> "ConcurrentBatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
+
+
+# ====================
+# CACHE INVALIDATION
+# ====================
+
+def _users_table_factory(region: Optional[str]) -> Callable[[], Any]:
+    def factory():
+        session = boto3.session.Session()
+        resource = session.resource("dynamodb", region_name=region or settings.aws_region)
+        return resource.Table(os.getenv("USERS_TABLE") or settings.users_table)
+    return factory
+
+
+def bump_user_versions(
+    user_ids: Iterable[str],
+    users_table_factory: Callable[[], Any],
+    max_workers: int = 8,
+) -> List[str]:
+    """
+    Bump data_version and emissions_version for users whose entries changed
+
+    Users without a profile item are skipped rather than created.
+
+    Args:
+        user_ids: Users to bump
+        users_table_factory: Builds a users Table per worker thread
+        max_workers: Concurrent update threads
+
+    Returns:
+        Errors for users whose bump failed
+    """
+    local = threading.local()
+
+    def bump(user_id: str) -> Optional[str]:
+        table = getattr(local, "table", None)
+        if table is None:
+            table = local.table = users_table_factory()
+        try:
+            table.update_item(
+                Key={"userId": user_id},
+                UpdateExpression="ADD data_version :one, emissions_version :one",
+                ConditionExpression="attribute_exists(userId)",
+                ExpressionAttributeValues={":one": 1},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                return f"version bump for {user_id}: {e}"
+        except BotoCoreError as e:
+            return f"version bump for {user_id}: {e}"
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="version-bump") as executor:
+        return [error for error in executor.map(bump, sorted(user_ids)) if error]
+
+
+# ====================
+# CHECKPOINTS AND LOAD ORCHESTRATION
+# ====================
+
+@dataclass
+class LoadCheckpoint:
+    """Resume point for a load: everything before ``offset`` is written"""
+    source_id: str
+    offset: int = 0
+    rows_loaded: int = 0
+    rows_rejected: int = 0
+    updated_at: str = ""
+
+    @classmethod
+    def load(cls, path: str, source_id: str) -> "LoadCheckpoint":
+        if not os.path.exists(path):
+            return cls(source_id=source_id)
+        with open(path) as f:
+            checkpoint = cls(**json.load(f))
+        if checkpoint.source_id != source_id:
+            raise ValueError(f"Checkpoint {path} belongs to a different source; remove it to start over")
+        return checkpoint
+
+    def save(self, path: str):
+        self.updated_at = datetime.utcnow().isoformat()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class LoadStats:
+    """Progress snapshot passed to progress callbacks and returned at the end"""
+    rows_loaded: int = 0
+    rows_rejected: int = 0
+    rows_read: int = 0
+    offset: int = 0
+    resumed_from: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+class _OrderedCommitter:
+    """Advances the checkpoint only across chunks that are all written"""
+
+    def __init__(self, checkpoint: LoadCheckpoint, checkpoint_path: Optional[str], rejects_file):
+        self.checkpoint = checkpoint
+        self.checkpoint_path = checkpoint_path
+        self.rejects_file = rejects_file
+        self.lock = threading.Lock()
+        self.next_seq = 0
+        self.pending: Dict[int, Tuple[int, int, List[Dict[str, Any]]]] = {}
+        self.errors: List[str] = []
+
+    def completed(self, seq: int, end_offset: int, written: int, rejects: List[Dict[str, Any]]):
+        with self.lock:
+            self.pending[seq] = (end_offset, written, rejects)
+            advanced = False
+            while self.next_seq in self.pending:
+                end_offset, written, rejects = self.pending.pop(self.next_seq)
+                self.checkpoint.offset = end_offset
+                self.checkpoint.rows_loaded += written
+                self.checkpoint.rows_rejected += len(rejects)
+                if self.rejects_file:
+                    for reject in rejects:
+                        self.rejects_file.write(json.dumps(reject, default=str) + "\n")
+                self.next_seq += 1
+                advanced = True
+            if advanced and self.checkpoint_path:
+                if self.rejects_file:
+                    self.rejects_file.flush()
+                self.checkpoint.save(self.checkpoint_path)
+
+    def failed(self, seq: int, error: BaseException):
+        with self.lock:
+            self.errors.append(f"chunk {seq}: {error}")
+
+
+def run_bulk_load(
+    source: str,
+    table_name: Optional[str] = None,
+    fmt: Optional[str] = None,
+    chunk_size: int = 5000,
+    workers: int = 8,
+    checkpoint_path: Optional[str] = None,
+    rejects_path: Optional[str] = None,
+    trust_co2: bool = False,
+    region: Optional[str] = None,
+    table_factory: Optional[Callable[[], Any]] = None,
+    progress: Optional[Callable[[LoadStats], None]] = None,
+    progress_interval: float = 1.0,
+    calc: CarbonCalculator = calculator,
+    users_table_factory: Optional[Callable[[], Any]] = None,
+) -> LoadStats:
+    """
+    Load emission entries from a file into the entries table
+
+    Args:
+        source: Path to a CSV, NDJSON or JSON-array file
+        table_name: Target table (defaults to the configured entries table)
+        fmt: Source format, inferred from the extension when omitted
+        chunk_size: Rows validated, priced and written together
+        workers: Concurrent writer threads
+        checkpoint_path: Where to persist resume offsets (no resume when omitted)
+        rejects_path: NDJSON file collecting rejected rows and reasons
+        trust_co2: Keep co2_equivalent values already present in the source
+        region: AWS region of the table
+        table_factory: Builds a Table per writer thread (for tests and local stores)
+        progress: Called with a LoadStats snapshot roughly every progress_interval seconds
+        calc: Calculator providing emission factors
+        users_table_factory: Builds a users Table per thread for the final
+            version bump (defaults to the configured users table)
+
+    Returns:
+        Final LoadStats; ``errors`` is non-empty if any chunk or version bump failed
+    """
+    fmt = fmt or detect_format(source)
+    table_name = table_name or os.getenv("ENTRIES_TABLE") or settings.entries_table
+    source_id = source_fingerprint(source)
+    checkpoint = (
+        LoadCheckpoint.load(checkpoint_path, source_id) if checkpoint_path else LoadCheckpoint(source_id=source_id)
+    )
+
+    stats = LoadStats(resumed_from=checkpoint.offset, offset=checkpoint.offset)
+    started = time.monotonic()
+    last_report = started
+    factor_cache: Dict[Tuple[str, str, str], Optional[float]] = {}
+    rejects_file = open(rejects_path, "a") if rejects_path else None
+    committer = _OrderedCommitter(checkpoint, checkpoint_path, rejects_file)
+    base_loaded = checkpoint.rows_loaded
+    base_rejected = checkpoint.rows_rejected
+    touched_users: Set[str] = set()
+
+    def snapshot() -> LoadStats:
+        elapsed = time.monotonic() - started
+        with committer.lock:
+            stats.rows_loaded = checkpoint.rows_loaded - base_loaded
+            stats.rows_rejected = checkpoint.rows_rejected - base_rejected
+            stats.offset = checkpoint.offset
+            stats.errors = list(committer.errors)
+        stats.elapsed_seconds = elapsed
+        stats.rows_per_second = stats.rows_loaded / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    def on_done(seq: int, end_offset: int, rejects: List[Dict[str, Any]]):
+        def callback(future: Future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                committer.failed(seq, error)
+            else:
+                committer.completed(seq, end_offset, future.result(), rejects)
+        return callback
+
+    writer = ConcurrentBatchWriter(
+        table_name,
+        max_workers=workers,
+        region=region,
+        table_factory=table_factory,
+        overwrite_by_pkeys=["userId", "timestamp"],
+    )
+
+    try:
+        with writer:
+            seq = 0
+            chunk: List[SourceRow] = []
+            rows = iter_records(source, fmt, checkpoint.offset)
+            while True:
+                row = next(rows, None)
+                if row is not None:
+                    chunk.append(row)
+                    stats.rows_read += 1
+                    if len(chunk) < chunk_size:
+                        continue
+                if chunk:
+                    items, rejects = prepare_chunk(chunk, source_id, calc, trust_co2, factor_cache)
+                    touched_users.update(item["userId"] for item in items)
+                    future = writer.submit(items)
+                    future.add_done_callback(on_done(seq, chunk[-1].end_offset, rejects))
+                    seq += 1
+                    chunk = []
+                if committer.errors:
+                    logger.error(f"Stopping bulk load after write failure: {committer.errors[0]}")
+                    break
+                now = time.monotonic()
+                if progress and now - last_report >= progress_interval:
+                    progress(snapshot())
+                    last_report = now
+                if row is None:
+                    break
+    finally:
+        if rejects_file:
+            rejects_file.close()
+        # Even a failed load may have written some chunks, so bump every user it reached
+        if touched_users:
+            bump_errors = bump_user_versions(
+                touched_users, users_table_factory or _users_table_factory(region), workers
+            )
+            with committer.lock:
+                committer.errors.extend(bump_errors)
+
+    final = snapshot()
+    if progress:
+        progress(final)
+    return final
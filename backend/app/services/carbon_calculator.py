@@ -13,7 +13,7 @@ Sources:
 """
 
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 from enum import Enum
 import logging
 
@@ -34,6 +34,14 @@ class Region(Enum):
     AUSTRALIA = "australia"
     GLOBAL_AVERAGE = "global_average"
 
+# Approximate weight (kg) of one serving, used to convert "servings" to kg
+SERVING_WEIGHTS = {
+    "beef": 0.113, "lamb": 0.113, "pork": 0.113,  # 4 oz meat serving
+    "chicken": 0.113, "turkey": 0.113, "fish_farmed": 0.113, "fish_wild": 0.113,
+    "milk": 0.25, "cheese": 0.03, "eggs": 0.05,  # Standard dairy servings
+    "rice": 0.08, "pasta": 0.08, "bread": 0.03,  # Grain servings
+}
+
 class CarbonCalculator:
     """
     Comprehensive carbon footprint calculator with scientifically-based emission factors
@@ -285,13 +293,7 @@ class CarbonCalculator:
             
             # Convert servings to approximate kg (rough estimates)
             elif unit.lower() in ["serving", "servings", "portion", "portions"]:
-                serving_weights = {
-                    "beef": 0.113, "lamb": 0.113, "pork": 0.113,  # 4 oz meat serving
-                    "chicken": 0.113, "turkey": 0.113, "fish_farmed": 0.113, "fish_wild": 0.113,
-                    "milk": 0.25, "cheese": 0.03, "eggs": 0.05,  # Standard dairy servings
-                    "rice": 0.08, "pasta": 0.08, "bread": 0.03,  # Grain servings
-                }
-                weight_per_serving = serving_weights.get(activity, 0.1)  # 100g default
+                weight_per_serving = SERVING_WEIGHTS.get(activity, 0.1)  # 100g default
                 amount = amount * Decimal(str(weight_per_serving))
                 unit = "kg"
             
@@ -349,6 +351,52 @@ class CarbonCalculator:
             logger.error(f"Waste calculation error: {e}")
             return Decimal("0.5"), "Error in calculation, using fallback: 0.5 kg CO₂e"
     
+    def resolve_factor(self, category: str, activity: str, unit: str) -> Optional[Decimal]:
+        """
+        Resolve the effective kg CO2e per input unit for an activity
+        
+        Applies the same unit conversions and fallbacks as the calculate_*
+        methods, so ``amount * factor`` matches ``calculate_emission`` before
+        rounding. Bulk paths use this to look a factor up once per distinct
+        (category, activity, unit) instead of once per row.
+        
+        Returns:
+            The factor, or None when the scalar path would fall back to a
+            fixed error value (e.g. electricity in an unsupported unit)
+        """
+        category = category.lower()
+        unit_lower = unit.lower()
+        
+        if category == "transportation":
+            multiplier = Decimal("1.60934") if unit_lower in ["miles", "mile", "mi"] else Decimal("1")
+            factor = self.transportation_factors.get(activity, self.transportation_factors["car_gasoline_medium"])
+            return multiplier * factor
+        
+        if category == "energy":
+            if activity == "electricity":
+                if unit_lower in ["kwh", "kilowatt_hours", "kw_hours"]:
+                    return self.energy_factors["electricity"]
+                return None
+            activity_key = f"{activity}_{unit_lower}" if activity in ["natural_gas", "heating_oil", "propane"] else activity
+            return self.energy_factors.get(activity_key, Decimal("0.5"))
+        
+        if category == "food":
+            if unit_lower in ["lbs", "lb", "pounds", "pound"]:
+                multiplier = Decimal("0.453592")
+            elif unit_lower in ["serving", "servings", "portion", "portions"]:
+                multiplier = Decimal(str(SERVING_WEIGHTS.get(activity, 0.1)))
+            else:
+                multiplier = Decimal("1")
+            factor = self.food_factors.get(activity, self.food_factors["chicken"])
+            return multiplier * factor
+        
+        if category == "waste":
+            multiplier = Decimal("0.453592") if unit_lower in ["lbs", "lb", "pounds", "pound"] else Decimal("1")
+            factor = self.waste_factors.get(activity, self.waste_factors["landfill_mixed"])
+            return multiplier * factor
+        
+        return Decimal("0.5")
+    
     def calculate_emission(self, category: str, activity: str, amount: float, unit: str) -> Dict[str, any]:
         """
         Main calculation method - routes to appropriate category calculator
@@ -0,0 +1,166 @@
+"""
+Per-user challenge window counters for CarbonTrack
+
+Challenges are judged over a window (today, this ISO week, this calendar
+month). For each window a user keeps one row of counters packed into a
+binary attribute on their user item: activities logged, activities per
+category, a bitmask of the categories seen, and emissions for the window
+and the one before it (for reduction challenges). Emission writes bump all
+three rows in the same conditional update as the daily counters (deletes
+and edits take their entries back out), so the challenges endpoint reads
+every challenge's progress from one fetch.
+"""
+
+import struct
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+WINDOWS = ("day", "week", "month")
+CATEGORIES = ("transportation", "energy", "food", "waste")
+
+# Challenge criteria timeframe -> counter window
+TIMEFRAME_WINDOWS = {"today": "day", "week": "week", "month": "month"}
+
+# Columns of a window row
+_START, _ACTIVITIES = 0, 1
+_CATEGORY_COUNTS = slice(2, 2 + len(CATEGORIES))
+_MASK = 2 + len(CATEGORIES)
+_CO2, _PREVIOUS_CO2, _PREVIOUS_DAYS = _MASK + 1, _MASK + 2, _MASK + 3
+_COLUMNS = _MASK + 4
+
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<B")
+
+# Counters saturate instead of overflowing (int32 grams cap out at about 2,147 t)
+_MAX_VALUE = int(np.iinfo(np.int32).max)
+
+
+def _clamped(value: int) -> int:
+    return max(0, min(_MAX_VALUE, value))
+
+
+def window_start(window: str, day: date) -> date:
+    """First day of the window containing ``day``"""
+    if window == "day":
+        return day
+    if window == "week":
+        return day - timedelta(days=day.weekday())
+    if window == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown challenge window: {window}")
+
+
+class ChallengeCounters:
+    """One row of counters per challenge window (CO₂ is kept in whole grams)"""
+
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: Optional[np.ndarray] = None):
+        self.rows = rows if rows is not None else np.zeros((len(WINDOWS), _COLUMNS), dtype=np.int32)
+
+    # ====================
+    # ENCODING
+    # ====================
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_FORMAT_VERSION) + self.rows.astype("<i4").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "ChallengeCounters":
+        """Decode packed counters (an empty or missing value gives empty counters)"""
+        if not data:
+            return cls()
+        data = bytes(getattr(data, "value", data))
+        (version,) = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported challenge counters version: {version}")
+        rows = np.frombuffer(data, dtype="<i4", offset=_HEADER.size).reshape(len(WINDOWS), _COLUMNS)
+        return cls(rows.astype(np.int32))
+
+    # ====================
+    # UPDATES
+    # ====================
+
+    @staticmethod
+    def _rolled(window: str, row: np.ndarray, start: int) -> np.ndarray:
+        """The row as it reads for the window starting at ``start`` (the stored window may be older)"""
+        if row[_START] == start:
+            return row
+        previous_start = window_start(window, date.fromordinal(start - 1)).toordinal()
+        rolled = np.zeros(_COLUMNS, dtype=np.int32)
+        rolled[_START] = start
+        rolled[_PREVIOUS_CO2] = row[_CO2] if row[_START] == previous_start else 0
+        rolled[_PREVIOUS_DAYS] = start - previous_start
+        return rolled
+
+    def record(self, day: date, category: Optional[str], co2_kg: float = 0, count: int = 1) -> bool:
+        """
+        Count logged activities in every window containing ``day``
+
+        Args:
+            day: Day the activity was logged
+            category: Emission category (categories outside CATEGORIES count as activities only)
+            co2_kg: Emissions of the activities in kg (negative when taking them back)
+            count: Activities logged, or negative to take back deleted or edited ones
+                (only the stored windows change, and the previous window's emissions)
+
+        Returns:
+            False if the day is older than the stored windows and was dropped
+        """
+        grams = int(round(float(co2_kg) * 1000))
+        recorded = False
+        for index, window in enumerate(WINDOWS):
+            start = window_start(window, day).toordinal()
+            stored = self.rows[index]
+            if start < stored[_START]:
+                # Of the window before the stored one only its emissions are kept
+                previous_start = window_start(window, date.fromordinal(int(stored[_START]) - 1)).toordinal()
+                if start == previous_start:
+                    stored[_PREVIOUS_CO2] = _clamped(int(stored[_PREVIOUS_CO2]) + grams)
+                    recorded = True
+                continue
+            if count < 0 and start != stored[_START]:
+                continue
+            row = self._rolled(window, stored, start).copy()
+            row[_ACTIVITIES] = _clamped(int(row[_ACTIVITIES]) + count)
+            if category in CATEGORIES:
+                position = CATEGORIES.index(category)
+                row[_CATEGORY_COUNTS][position] = _clamped(int(row[_CATEGORY_COUNTS][position]) + count)
+                if row[_CATEGORY_COUNTS][position]:
+                    row[_MASK] |= 1 << position
+                else:
+                    row[_MASK] &= ~(1 << position)
+            row[_CO2] = _clamped(int(row[_CO2]) + grams)
+            self.rows[index] = row
+            recorded = True
+        return recorded
+
+    # ====================
+    # READS
+    # ====================
+
+    def window_stats(self, window: str, today: date) -> Dict[str, Any]:
+        """Progress stats for the window containing ``today``, in the keys challenge criteria use"""
+        start = window_start(window, today).toordinal()
+        stored = self.rows[WINDOWS.index(window)]
+        row = self._rolled(window, stored, start) if stored[_START] <= start else np.zeros(_COLUMNS, dtype=np.int32)
+        stats = {
+            "activities_logged": int(row[_ACTIVITIES]),
+            "categories_logged": [c for i, c in enumerate(CATEGORIES) if row[_MASK] >> i & 1],
+            "reduction_percentage": 0.0,
+        }
+        for category, count in zip(CATEGORIES, row[_CATEGORY_COUNTS]):
+            stats[f"{category}_activities"] = int(count)
+        # Compare daily averages so a part-elapsed window is judged fairly
+        # against the full previous one; an empty window is not a reduction
+        if row[_PREVIOUS_CO2] > 0 and row[_PREVIOUS_DAYS] > 0 and row[_ACTIVITIES] > 0:
+            previous_rate = row[_PREVIOUS_CO2] / row[_PREVIOUS_DAYS]
+            current_rate = row[_CO2] / (today.toordinal() - start + 1)
+            stats["reduction_percentage"] = round(max(0.0, (previous_rate - current_rate) / previous_rate * 100), 1)
+        return stats
+
+    def all_window_stats(self, today: date) -> Dict[str, Dict[str, Any]]:
+        """Window -> progress stats for every challenge window"""
+        return {window: self.window_stats(window, today) for window in WINDOWS}
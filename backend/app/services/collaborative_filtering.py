@@ -0,0 +1,239 @@
+"""
+Collaborative filtering over recommendation completions for CarbonTrack
+
+Users mark recommendations completed. Completions are implicit feedback:
+completing one says the user wanted it, but not completing one says little.
+The nightly job factorizes the user x recommendation completion matrix with
+implicit-feedback alternating least squares, where each completion gets
+confidence ``1 + alpha`` and each other cell gets confidence 1. This
+produces a short factor vector per user and per recommendation. Online
+ranking adds the dot product of the user's vector with each candidate's
+vector to the heuristic score.
+
+There are only as many items as recommendation templates, so the completion
+matrix is held densely, and each least-squares step solves one small k x k
+system per user, batched through ``np.linalg.solve``. Factors are stored as
+float16 bytes: a user vector at the default 8 factors is 16 bytes.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Key of the model row in the recommendations table (user ids never start with '#')
+MODEL_KEY = "#model"
+
+# Rows per batched solve, and outer products per slice; bounds the working arrays
+_SOLVE_CHUNK = 65536
+
+
+# ====================
+# ENCODING
+# ====================
+
+def encode_factors(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype="<f2").tobytes()
+
+
+def decode_factors(data: Any, factors: int) -> Optional[np.ndarray]:
+    """Decode a stored factor vector (None if missing or of another model's width)"""
+    if not data:
+        return None
+    vector = np.frombuffer(bytes(getattr(data, "value", data)), dtype="<f2")
+    if len(vector) != factors:
+        return None
+    return vector.astype(np.float32)
+
+
+# ====================
+# MODEL
+# ====================
+
+@dataclass
+class FactorModel:
+    """Item factors of a trained model; user vectors are stored per user or folded in"""
+    item_ids: List[str]
+    item_factors: np.ndarray  # float32 (items, factors)
+    regularization: float
+    alpha: float
+    trained_at: str = ""
+
+    def __post_init__(self):
+        self.item_index = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        factors = self.item_factors
+        self._gram = factors.T @ factors + self.regularization * np.eye(self.factors, dtype=np.float32)
+
+    @property
+    def factors(self) -> int:
+        return self.item_factors.shape[1]
+
+    def fold_in(self, completed: Iterable[str]) -> np.ndarray:
+        """
+        A user vector from their completions against the fixed item factors
+
+        This is the user half of an ALS step, so it gives the vector training
+        would give. Used for users who completed something after training.
+        """
+        rows = [self.item_index[item_id] for item_id in completed if item_id in self.item_index]
+        if not rows:
+            return np.zeros(self.factors, dtype=np.float32)
+        selected = self.item_factors[rows]
+        system = self._gram + self.alpha * selected.T @ selected
+        return np.linalg.solve(system, (1 + self.alpha) * selected.sum(axis=0)).astype(np.float32)
+
+    def affinities(self, user_vector: np.ndarray, item_ids: Sequence[str]) -> Dict[str, float]:
+        """Predicted preference (about 0 to 1) for each candidate the model knows"""
+        known = [item_id for item_id in item_ids if item_id in self.item_index]
+        if not known:
+            return {}
+        scores = self.item_factors[[self.item_index[item_id] for item_id in known]] @ user_vector
+        return dict(zip(known, scores.tolist()))
+
+    def to_item(self, users: int) -> Dict[str, Any]:
+        """The model row for the recommendations table"""
+        return {
+            "user_id": MODEL_KEY,
+            "item_ids": list(self.item_ids),
+            "item_factors": encode_factors(self.item_factors),
+            "factors": self.factors,
+            "regularization": Decimal(str(self.regularization)),
+            "alpha": Decimal(str(self.alpha)),
+            "trained_at": self.trained_at,
+            "users": users,
+        }
+
+    @classmethod
+    def from_item(cls, item: Optional[Dict[str, Any]]) -> Optional["FactorModel"]:
+        if not item or not item.get("item_ids"):
+            return None
+        factors = int(item["factors"])
+        data = bytes(getattr(item["item_factors"], "value", item["item_factors"]))
+        item_factors = np.frombuffer(data, dtype="<f2").astype(np.float32).reshape(-1, factors)
+        return cls(
+            item_ids=list(item["item_ids"]),
+            item_factors=item_factors,
+            regularization=float(item["regularization"]),
+            alpha=float(item["alpha"]),
+            trained_at=item.get("trained_at", ""),
+        )
+
+
+def user_vector(model: FactorModel, row: Optional[Dict[str, Any]], completed: Iterable[str]) -> np.ndarray:
+    """
+    The user's factor vector for ``model``
+
+    Uses the vector stored on the user's precomputed row when it belongs to
+    this model and the user has completed nothing since; otherwise folds in
+    the user's current completions.
+    """
+    completed = list(completed)
+    if row and row.get("model_trained_at") == model.trained_at and int(row.get("completions", -1)) == len(completed):
+        stored = decode_factors(row.get("cf_factors"), model.factors)
+        if stored is not None:
+            return stored
+    return model.fold_in(completed)
+
+
+class FactorModelCache:
+    """The published model, reloaded at most once per refresh interval"""
+
+    def __init__(self, refresh_seconds: float = 3600):
+        self.refresh_seconds = refresh_seconds
+        self._model: Optional[FactorModel] = None
+        self._loaded_at: Optional[float] = None
+
+    async def get(self, load: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[FactorModel]:
+        """The cached model, calling ``load`` for the model row when it is due a reload"""
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.refresh_seconds:
+            try:
+                self._model = FactorModel.from_item(await load())
+            except Exception as e:
+                logger.error(f"Error loading recommendation model: {e}")
+            self._loaded_at = now
+        return self._model
+
+
+# ====================
+# TRAINING
+# ====================
+
+def completion_matrix(completions: Sequence[Iterable[str]], item_ids: List[str]) -> np.ndarray:
+    """Dense bool (users, items) matrix; completions of unknown items are ignored"""
+    index = {item_id: i for i, item_id in enumerate(item_ids)}
+    matrix = np.zeros((len(completions), len(item_ids)), dtype=bool)
+    for row, completed in enumerate(completions):
+        columns = [index[item_id] for item_id in completed if item_id in index]
+        matrix[row, columns] = True
+    return matrix
+
+
+def _solve_side(preferences: np.ndarray, fixed: np.ndarray, regularization: float, alpha: float) -> np.ndarray:
+    """One ALS half-step: the best factors for every row of ``preferences`` given the other side"""
+    factors = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(factors, dtype=np.float32)
+    solved = np.zeros((preferences.shape[0], factors), dtype=np.float32)
+    for start in range(0, preferences.shape[0], _SOLVE_CHUNK):
+        chunk = preferences[start:start + _SOLVE_CHUNK].astype(np.float32)
+        # Y^T C_u Y = Y^T Y + alpha * sum over the row's completions of y_i y_i^T,
+        # as a product with the flattened outer products (built in slices)
+        outer_sums = np.zeros((len(chunk), factors * factors), dtype=np.float32)
+        for inner in range(0, fixed.shape[0], _SOLVE_CHUNK):
+            block = fixed[inner:inner + _SOLVE_CHUNK]
+            outer = (block[:, :, None] * block[:, None, :]).reshape(len(block), -1)
+            outer_sums += chunk[:, inner:inner + len(block)] @ outer
+        systems = gram + alpha * outer_sums.reshape(-1, factors, factors)
+        targets = (1 + alpha) * chunk @ fixed
+        solved[start:start + len(chunk)] = np.linalg.solve(systems, targets[..., None])[..., 0]
+    return solved
+
+
+def train_factors(
+    completions: Sequence[Iterable[str]],
+    item_ids: List[str],
+    factors: int = 8,
+    regularization: float = 5.0,
+    alpha: float = 20.0,
+    iterations: int = 10,
+    seed: int = 42,
+    trained_at: str = "",
+) -> Tuple[FactorModel, np.ndarray]:
+    """
+    Factorize the completion matrix with implicit-feedback ALS
+
+    Args:
+        completions: Completed recommendation ids, one collection per user
+        item_ids: Every recommendation id (the matrix columns)
+        factors: Length of each factor vector
+        regularization: L2 penalty on factor vectors; with few items, weak
+            penalties let a user's vector fit only what they completed
+        alpha: Extra confidence given to a completion
+        iterations: Alternating user/item passes
+        seed: Seed for the initial item factors
+        trained_at: Timestamp recorded on the model
+
+    Returns:
+        (model with item factors, float32 user factors in ``completions`` order)
+    """
+    matrix = completion_matrix(completions, item_ids)
+    rng = np.random.default_rng(seed)
+    item_factors = rng.normal(0, 0.1, size=(len(item_ids), factors)).astype(np.float32)
+    user_factors = np.zeros((len(completions), factors), dtype=np.float32)
+    for _ in range(iterations):
+        user_factors = _solve_side(matrix, item_factors, regularization, alpha)
+        item_factors = _solve_side(matrix.T, user_factors, regularization, alpha)
+    user_factors = _solve_side(matrix, item_factors, regularization, alpha)
+    model = FactorModel(list(item_ids), item_factors, regularization, alpha, trained_at)
+    return model, user_factors
+
+
+# Global instance
+factor_model_cache = FactorModelCache(settings.recommendation_model_refresh_seconds)
@@ -5,8 +5,9 @@ Handles all database operations for users, carbon data, goals, and achievements
 
 import boto3
 import os
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import uuid
+from datetime import date, datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
 from decimal import Decimal
 from botocore.exceptions import ClientError
 
@@ -17,7 +18,26 @@ from app.models.dynamodb_models import (
     GoalModel,
     AchievementModel
 )
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeSerializer
+from app.services.activity_counters import ActivityCalendar, DailyCounters, EntryDayCounts
+from app.services.challenge_counters import ChallengeCounters
+from app.services.achievement_engine import achievement_engine
+from app.services.collaborative_filtering import MODEL_KEY
+from app.services.emission_store import EmissionStore, UserEmissions
+from app.services.points_ledger import (
+    ENTRY_PREFIX,
+    MAX_ROWS_PER_TRANSACTION,
+    POINT_SOURCES,
+    format_entry,
+    entry_key,
+    format_summary,
+    ledger_item,
+    summarize_rows,
+    summary_key
+)
+
+_serializer = TypeSerializer()
 
 
 class DynamoDBService:
@@ -33,6 +53,12 @@ class DynamoDBService:
         self.entries_table = self.dynamodb.Table(entries_table_name)
         self.goals_table = self.dynamodb.Table(settings.goals_table)
         self.achievements_table = self.dynamodb.Table(settings.achievements_table)
+        self.leaderboards_table = self.dynamodb.Table(settings.leaderboards_table)
+        self.points_ledger_table = self.dynamodb.Table(settings.points_ledger_table)
+        self.recommendations_table = self.dynamodb.Table(settings.recommendations_table)
+        
+        # Recently read emission histories, kept as columns
+        self.emission_store = EmissionStore(settings.emission_store_max_bytes)
     
     # ====================
     # USER OPERATIONS
@@ -67,17 +93,47 @@ class DynamoDBService:
             print(f"Error getting user profile: {e}")
             return None
     
+    async def get_data_version(self, user_id: str) -> int:
+        """
+        Get the user's data version, bumped by every write that changes their
+        emissions or gamification stats (emissions, points, achievements, goals)
+        """
+        try:
+            response = self.users_table.get_item(
+                Key={'userId': user_id},
+                ProjectionExpression='data_version'
+            )
+            return int((response.get('Item') or {}).get('data_version', 0))
+        except ClientError as e:
+            print(f"Error getting data version: {e}")
+            return 0
+    
+    async def get_emissions_version(self, user_id: str) -> int:
+        """Get the user's emissions version, bumped only by writes to their emission entries"""
+        try:
+            response = self.users_table.get_item(
+                Key={'userId': user_id},
+                ProjectionExpression='emissions_version'
+            )
+            return int((response.get('Item') or {}).get('emissions_version', 0))
+        except ClientError as e:
+            print(f"Error getting emissions version: {e}")
+            return 0
+    
     async def update_user_profile(self, user_id: str, updates: Dict[str, Any]) -> bool:
         """Update user profile"""
         try:
             # Build update expression
             update_expression = "SET "
             expression_values = {}
+            expression_names = {}
             
             for key, value in updates.items():
                 if key != 'userId':  # Don't update the partition key
-                    update_expression += f"{key} = :{key}, "
+                    # Names are aliased since some fields (e.g. region) are reserved words
+                    update_expression += f"#{key} = :{key}, "
                     expression_values[f":{key}"] = value
+                    expression_names[f"#{key}"] = key
             
             # Add updated_at timestamp
             update_expression += "updated_at = :updated_at"
@@ -86,6 +142,7 @@ class DynamoDBService:
             self.users_table.update_item(
                 Key={'userId': user_id},
                 UpdateExpression=update_expression,
+                ExpressionAttributeNames=expression_names,
                 ExpressionAttributeValues=expression_values
             )
             
@@ -101,6 +158,9 @@ class DynamoDBService:
     
     async def create_carbon_emission(self, emission_data: CarbonEmissionModel) -> Dict[str, Any]:
         """Create a new carbon emission entry"""
+        # Future days would move the counter windows and streak calendar ahead
+        if emission_data.emission_date > datetime.utcnow().date():
+            return {"success": False, "error": "Emission date cannot be in the future"}
         try:
             item = emission_data.to_dynamodb_item()
             
@@ -109,13 +169,37 @@ class DynamoDBService:
             
             self.entries_table.put_item(Item=item)
             
-            # Update user's statistics
-            await self._update_user_stats(emission_data.user_id, emission_data.co2_equivalent or Decimal('0'))
+            # Update user's statistics and award any achievements they cross;
+            # an entry whose stats could not be applied is taken back out
+            changes = await self._update_user_stats(
+                emission_data.user_id,
+                emission_data.co2_equivalent or Decimal('0'),
+                emission_data.emission_date,
+                emission_data.category,
+                entry=item
+            )
+            if changes is None:
+                self.entries_table.delete_item(Key={'userId': emission_data.user_id, 'timestamp': item['timestamp']})
+                return {"success": False, "error": "Could not update user statistics"}
+            new_achievements = await self.award_achievements(emission_data.user_id, changes)
+            
+            # Points for logging the activity, keyed by entry so a retried write earns them once
+            points_earned = 0
+            if settings.points_per_activity:
+                recorded = await self.record_points(
+                    emission_data.user_id, settings.points_per_activity, 'activity', emission_data.entry_id
+                )
+                if recorded and recorded["recorded"]:
+                    points_earned = settings.points_per_activity
+                    new_achievements += recorded["new_achievements"]
             
             return {
                 "success": True, 
                 "entry_id": emission_data.entry_id,
-                "timestamp": item['timestamp']
+                "timestamp": item['timestamp'],
+                "points_earned": points_earned,
+                "new_achievements": new_achievements,
+                "current_streak": changes['current_streak'][1]
             }
             
         except ClientError as e:
@@ -154,6 +238,35 @@ class DynamoDBService:
             print(f"Error getting user emissions: {e}")
             return []
     
+    async def get_emission_history(self, user_id: str) -> UserEmissions:
+        """
+        Get a user's full emission history as columns
+        
+        Served from the in-memory emission store while it matches the user's
+        emissions version (read before the entries, so a racing write only
+        costs a rebuild on the next read); otherwise every entry is queried
+        and the store is refilled.
+        """
+        version = await self.get_emissions_version(user_id)
+        history = self.emission_store.get(user_id, version)
+        if history is not None:
+            return history
+        try:
+            items = []
+            kwargs = {'KeyConditionExpression': Key('userId').eq(user_id)}
+            while True:
+                response = self.entries_table.query(**kwargs)
+                items.extend(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except ClientError as e:
+            print(f"Error getting emission history: {e}")
+            return self.emission_store.build([])
+        history = self.emission_store.build(items)
+        self.emission_store.put(user_id, version, history)
+        return history
+    
     async def update_carbon_emission(
         self, 
         user_id: str, 
@@ -175,11 +288,15 @@ class DynamoDBService:
             update_expression += "updated_at = :updated_at"
             expression_values[':updated_at'] = datetime.utcnow().isoformat()
             
-            self.entries_table.update_item(
+            response = self.entries_table.update_item(
                 Key={'userId': user_id, 'timestamp': timestamp},
                 UpdateExpression=update_expression,
-                ExpressionAttributeValues=expression_values
+                ConditionExpression='attribute_exists(userId)',
+                ExpressionAttributeValues=expression_values,
+                ReturnValues='ALL_OLD'
             )
+            old_item = response['Attributes']
+            self._apply_entry_change(user_id, old_item, dict(old_item, **updates))
             
             return True
             
@@ -187,17 +304,58 @@ class DynamoDBService:
             print(f"Error updating carbon emission: {e}")
             return False
     
-    async def delete_carbon_emission(self, user_id: str, timestamp: str) -> bool:
-        """Delete a carbon emission entry"""
+    async def delete_carbon_emission(self, user_id: str, timestamp: str) -> Dict[str, Any]:
+        """Delete a carbon emission entry and take back its stats and activity points"""
         try:
-            self.entries_table.delete_item(
-                Key={'userId': user_id, 'timestamp': timestamp}
+            response = self.entries_table.delete_item(
+                Key={'userId': user_id, 'timestamp': timestamp},
+                ReturnValues='ALL_OLD'
             )
-            return True
+            if 'Attributes' not in response:
+                return {"success": False, "error": "Emission not found"}
+            current_streak = self._apply_entry_change(user_id, response['Attributes'])
+            points_reversed = await self._reverse_activity_points(user_id, response['Attributes'])
+            return {
+                "success": True,
+                "timestamp": timestamp,
+                "points_reversed": points_reversed,
+                "current_streak": current_streak
+            }
             
         except ClientError as e:
             print(f"Error deleting carbon emission: {e}")
-            return False
+            return {"success": False, "error": str(e)}
+    
+    async def _reverse_activity_points(self, user_id: str, entry: Dict[str, Any]) -> int:
+        """
+        Take back the points a deleted entry earned when it was logged
+        
+        The reversal is a ledger row keyed by the same entry id, so deleting
+        and logging again never earns more than one credit per entry kept.
+        Entries whose credit was never recorded (or already compacted away)
+        are left alone.
+        
+        Returns:
+            Points taken back
+        """
+        entry_id = entry.get('entry_id')
+        if not entry_id:
+            return 0
+        try:
+            credit = self.points_ledger_table.get_item(
+                Key={'user_id': user_id, 'entry_key': entry_key('activity', entry_id)}
+            ).get('Item')
+        except ClientError as e:
+            print(f"Error reading activity points: {e}")
+            return 0
+        points = int(credit.get('points', 0)) if credit else 0
+        if points <= 0:
+            return 0
+        recorded = await self.record_points(
+            user_id, -points, 'activity', f"{entry_id}#reversal",
+            day=date.fromisoformat(credit['day']), reference=credit['entry_key']
+        )
+        return points if recorded and recorded["recorded"] else 0
     
     # ====================
     # GOAL OPERATIONS
@@ -210,7 +368,18 @@ class DynamoDBService:
             
             self.goals_table.put_item(Item=item)
             
-            return {"success": True, "goal_id": goal_data.goal_id}
+            response = self.users_table.update_item(
+                Key={'userId': goal_data.user_id},
+                UpdateExpression='ADD goals_set :one, data_version :one',
+                ExpressionAttributeValues={':one': 1},
+                ReturnValues='UPDATED_OLD'
+            )
+            goals_set = int(response.get('Attributes', {}).get('goals_set', 0))
+            new_achievements = await self.award_achievements(
+                goal_data.user_id, {'goals_set': (goals_set, goals_set + 1)}
+            )
+            
+            return {"success": True, "goal_id": goal_data.goal_id, "new_achievements": new_achievements}
             
         except ClientError as e:
             return {"success": False, "error": str(e)}
@@ -263,28 +432,518 @@ class DynamoDBService:
             print(f"Error getting user achievements: {e}")
             return []
     
+    async def award_achievements(
+        self,
+        user_id: str,
+        changes: Dict[str, Tuple[float, float]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Persist the achievements crossed by a write event
+        
+        Each award is a conditional put, so an achievement is stored (and
+        counted on the user's profile, and its points added to the ledger)
+        exactly once even if concurrent or replayed writes cross the same
+        threshold.
+        
+        Args:
+            user_id: User whose stats changed
+            changes: Stat name -> (old value, new value)
+            
+        Returns:
+            Achievements awarded by this call
+        """
+        awarded = []
+        for award in achievement_engine.evaluate_changes(changes):
+            try:
+                self.achievements_table.put_item(
+                    Item=achievement_engine.award_item(user_id, award),
+                    ConditionExpression='attribute_not_exists(achievement_id)'
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    print(f"Error awarding achievement: {e}")
+                continue
+            awarded.append(award)
+            await self.record_points(user_id, award['points'], 'achievement', award['achievement_id'])
+        
+        if awarded:
+            try:
+                self.users_table.update_item(
+                    Key={'userId': user_id},
+                    UpdateExpression='ADD achievements_count :count, data_version :one',
+                    ExpressionAttributeValues={':count': len(awarded), ':one': 1}
+                )
+            except ClientError as e:
+                print(f"Error updating achievement count: {e}")
+        return awarded
+
+    # ====================
+    # RECOMMENDATION OPERATIONS
+    # ====================
+
+    async def get_precomputed_recommendations(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get the user's batch-precomputed recommendation row, if the nightly job wrote one"""
+        try:
+            response = self.recommendations_table.get_item(Key={'user_id': user_id})
+            return response.get('Item')
+        except ClientError as e:
+            print(f"Error getting precomputed recommendations: {e}")
+            return None
+
+    async def get_recommendation_model(self) -> Optional[Dict[str, Any]]:
+        """Get the collaborative-filtering model row written by the nightly job"""
+        return await self.get_precomputed_recommendations(MODEL_KEY)
+
+    async def complete_recommendation(self, user_id: str, recommendation_id: str) -> bool:
+        """Mark a recommendation completed (idempotent; bumps the data version so rankings refresh)"""
+        try:
+            self.users_table.update_item(
+                Key={'userId': user_id},
+                UpdateExpression='ADD completed_recommendations :ids, data_version :one',
+                ExpressionAttributeValues={':ids': {recommendation_id}, ':one': 1}
+            )
+            return True
+        except ClientError as e:
+            print(f"Error completing recommendation: {e}")
+            return False
+
+    async def get_completed_recommendations(self, user_id: str) -> Set[str]:
+        """Get the ids of the recommendations the user has completed"""
+        try:
+            response = self.users_table.get_item(
+                Key={'userId': user_id},
+                ProjectionExpression='completed_recommendations'
+            )
+            return set((response.get('Item') or {}).get('completed_recommendations', ()))
+        except ClientError as e:
+            print(f"Error getting completed recommendations: {e}")
+            return set()
+
     # ====================
     # HELPER METHODS
     # ====================
     
-    async def _update_user_stats(self, user_id: str, co2_amount: Decimal):
-        """Update user's emission statistics"""
+    async def _update_user_stats(
+        self,
+        user_id: str,
+        co2_amount: Decimal,
+        activity_date: Optional[date] = None,
+        category: Optional[str] = None,
+        entry: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Tuple[float, float]]]:
+        """
+        Update user's emission statistics, activity counters, challenge window
+        counters and streak calendar
+        
+        An entry counts towards periods on the day it is written (UTC), not
+        its emission date: its activity bucket, challenge windows, activity
+        points ledger row and leaderboard periods all use that day, and a
+        delete takes them back from the same day. Only the activity calendar,
+        which drives streaks, records the emission date.
+        
+        Args:
+            entry: The new entry's item, appended to the user's cached history
+                when that was current before this write
+        
+        Returns:
+            Stat changes (old, new) for activity_count, streak_days and current_streak
+        """
         try:
             current_date = datetime.utcnow()
             
-            # Update total emissions and entry count - uses userId (camelCase) to match table
-            self.users_table.update_item(
-                Key={'userId': user_id},
-                UpdateExpression='ADD total_emissions :co2, entries_count :one SET last_active = :now',
-                ExpressionAttributeValues={
+            # Update total emissions, entry count, today's activity bucket, the
+            # challenge windows and the activity calendar - uses userId (camelCase) to match table
+            _, calendar, previous = self._update_daily_counters(
+                user_id,
+                current_date.date(),
+                'ADD total_emissions :co2, entries_count :one, emissions_version :one SET last_active = :now',
+                {
                     ':co2': co2_amount,  # Keep as Decimal for DynamoDB
                     ':one': 1,
                     ':now': current_date.isoformat()
-                }
+                },
+                day_changes=[(activity_date or current_date.date(), 1)],
+                challenge_changes=[(category, co2_amount, 1)],
+                activities=1
             )
+            entries_count = int(previous.get('entries_count', 0))
+            if entry is not None:
+                emissions_version = int(previous.get('emissions_version', 0))
+                self.emission_store.append(user_id, emissions_version, emissions_version + 1, entry)
+            before = ActivityCalendar.from_bytes(previous.get('activity_calendar'))
+            today = current_date.date()
+            return {
+                'activity_count': (entries_count, entries_count + 1),
+                'streak_days': (before.longest_streak, calendar.longest_streak),
+                'current_streak': (before.streak_info(today)['current_streak'], calendar.streak_info(today)['current_streak'])
+            }
             
-        except ClientError as e:
+        except (ClientError, ValueError, OverflowError) as e:
             print(f"Error updating user stats: {e}")
+            return None
+    
+    async def add_user_points(
+        self,
+        user_id: str,
+        points: int,
+        co2_reduced: float = 0,
+        source: str = 'adjustment',
+        idempotency_key: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Add earned points (and optional CO₂ reduction) through the points ledger
+        
+        Args:
+            source: Ledger source, one of POINT_SOURCES
+            idempotency_key: Key identifying this award; a fresh one is generated when omitted
+        
+        Returns:
+            Achievements awarded by the update (none for a replayed key), or None if it failed
+        """
+        result = await self.record_points(
+            user_id, points, source, idempotency_key or str(uuid.uuid4()), co2_reduced=co2_reduced
+        )
+        return result["new_achievements"] if result else None
+    
+    async def record_points(
+        self,
+        user_id: str,
+        points: int,
+        source: str,
+        idempotency_key: str,
+        co2_reduced: float = 0,
+        day: Optional[date] = None,
+        reference: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Append a points ledger row and update the user's running totals atomically
+        
+        The ledger row is put only if its key is new, in one transaction with
+        the user's total_points / total_co2_reduced and daily counters, so a
+        replayed idempotency key changes nothing.
+        
+        Args:
+            user_id: User earning the points
+            points: Points earned (may be negative for corrections)
+            source: One of POINT_SOURCES
+            idempotency_key: Unique key of the event within its source
+            co2_reduced: CO₂ reduction in kg credited with the points
+            day: Day the points count towards (defaults to today, UTC, the day
+                entries and challenges count on; see _update_user_stats)
+            reference: Optional free-form reference, e.g. a challenge id
+        
+        Returns:
+            {"recorded": bool, "entry_key": str, "new_achievements": [...]},
+            or None if the write failed
+        """
+        try:
+            item = ledger_item(user_id, points, source, idempotency_key, co2_reduced, day, reference)
+            previous = self._append_ledger_entry(item, co2_reduced)
+            if previous is None:
+                return {"recorded": False, "entry_key": item["entry_key"], "new_achievements": []}
+            co2_before = float(previous.get('total_co2_reduced', 0))
+            new_achievements = await self.award_achievements(
+                user_id, {'co2_saved_kg': (co2_before, co2_before + float(co2_reduced))}
+            )
+            return {"recorded": True, "entry_key": item["entry_key"], "new_achievements": new_achievements}
+        except (ClientError, ValueError) as e:
+            print(f"Error recording points: {e}")
+            return None
+    
+    def _append_ledger_entry(self, item: Dict[str, Any], co2_reduced: float, max_attempts: int = 5) -> Optional[Dict[str, Any]]:
+        """
+        Transactionally put a ledger row and apply it to the user's totals
+        
+        Returns:
+            The user's totals before the update, or None if the row already existed
+        """
+        user_id = item['user_id']
+        for attempt in range(max_attempts):
+            current = self.users_table.get_item(
+                Key={'userId': user_id},
+                ProjectionExpression='daily_counters, total_points, total_co2_reduced'
+            ).get('Item') or {}
+            # The condition on daily_counters also pins the totals read above,
+            # since every points write rewrites the counters
+            update, _, _ = self._counter_update(
+                user_id,
+                current,
+                ['daily_counters'],
+                date.fromisoformat(item['day']),
+                'ADD total_points :points, total_co2_reduced :co2',
+                {':points': item['points'], ':co2': item['co2_reduced']},
+                None,
+                {'points': item['points'], 'co2_reduced': co2_reduced}
+            )
+            try:
+                self.dynamodb.meta.client.transact_write_items(TransactItems=[
+                    {'Put': {
+                        'TableName': self.points_ledger_table.name,
+                        'Item': _serialize(item),
+                        'ConditionExpression': 'attribute_not_exists(entry_key)'
+                    }},
+                    {'Update': {
+                        'TableName': self.users_table.name,
+                        'Key': _serialize(update['Key']),
+                        'UpdateExpression': update['UpdateExpression'],
+                        'ConditionExpression': update['ConditionExpression'],
+                        'ExpressionAttributeValues': _serialize(update['ExpressionAttributeValues'])
+                    }}
+                ])
+                return current
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+                reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+                if reasons and reasons[0] == 'ConditionalCheckFailed':
+                    return None  # Idempotency key already recorded
+                if attempt == max_attempts - 1:
+                    raise
+    
+    def _query_ledger(self, key_condition) -> List[Dict[str, Any]]:
+        items = []
+        kwargs = {'KeyConditionExpression': key_condition}
+        while True:
+            response = self.points_ledger_table.query(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    async def get_points_history(self, user_id: str, limit: int = 50) -> Dict[str, Any]:
+        """Recent ledger rows (newest first) and compacted monthly summaries for a user"""
+        try:
+            items = self._query_ledger(Key('user_id').eq(user_id))
+            entries = sorted(
+                (item for item in items if item['entry_key'].startswith(ENTRY_PREFIX)),
+                key=lambda item: item.get('created_at', ''),
+                reverse=True
+            )
+            summaries = sorted(
+                (format_summary(item) for item in items if not item['entry_key'].startswith(ENTRY_PREFIX)),
+                key=lambda summary: summary['month'],
+                reverse=True
+            )
+            return {"entries": [format_entry(item) for item in entries[:limit]], "monthly": summaries}
+        except ClientError as e:
+            print(f"Error getting points history: {e}")
+            return {"entries": [], "monthly": []}
+    
+    async def compact_points_ledger(self, user_id: str, before: date) -> Dict[str, int]:
+        """
+        Roll a user's ledger rows dated before ``before`` into monthly summary rows
+        
+        Each batch adds its rows to the month's summary and deletes them in
+        one transaction, so a crash or a concurrent run never counts a row
+        twice. Running totals are untouched: compaction only reshapes history.
+        
+        Returns:
+            Rows compacted and summary updates made
+        """
+        rows = [
+            item for item in self._query_ledger(
+                Key('user_id').eq(user_id) & Key('entry_key').begins_with(ENTRY_PREFIX)
+            )
+            if str(item.get('day', '')) < before.isoformat()
+        ]
+        
+        compacted = 0
+        summaries = 0
+        now = datetime.utcnow().isoformat()
+        for month in sorted(summarize_rows(rows)):
+            month_rows = [row for row in rows if str(row['day'])[:7] == month]
+            for start in range(0, len(month_rows), MAX_ROWS_PER_TRANSACTION):
+                batch = summarize_rows(month_rows[start:start + MAX_ROWS_PER_TRANSACTION])[month]
+                values = {':points': batch['points'], ':co2': batch['co2_reduced'], ':entries': batch['entries'], ':now': now}
+                additions = ['points :points', 'co2_reduced :co2', 'entries :entries']
+                for source, points in batch['by_source'].items():
+                    if source in POINT_SOURCES:
+                        values[f':{source}'] = points
+                        additions.append(f'points_{source} :{source}')
+                actions = [{'Update': {
+                    'TableName': self.points_ledger_table.name,
+                    'Key': _serialize({'user_id': user_id, 'entry_key': summary_key(month)}),
+                    'UpdateExpression': f"ADD {', '.join(additions)} SET updated_at = :now",
+                    'ExpressionAttributeValues': _serialize(values)
+                }}]
+                actions += [{'Delete': {
+                    'TableName': self.points_ledger_table.name,
+                    'Key': _serialize({'user_id': user_id, 'entry_key': key}),
+                    'ConditionExpression': 'attribute_exists(entry_key)'
+                }} for key in batch['entry_keys']]
+                self.dynamodb.meta.client.transact_write_items(TransactItems=actions)
+                compacted += len(batch['entry_keys'])
+                summaries += 1
+        return {"rows": compacted, "summaries": summaries}
+    
+    def _apply_entry_change(
+        self,
+        user_id: str,
+        old_item: Dict[str, Any],
+        new_item: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        """
+        Take a deleted entry (or an edited entry's old values) back out of the user's stats
+        
+        Totals, the entry count, the activity bucket of the day it was written
+        and its challenge windows change by the difference, in the same
+        conditional counter update as a new entry. A date whose entry count
+        drops to zero is cleared from the activity calendar and a moved
+        entry's new date marked. The cached history and derived results are
+        marked stale.
+        
+        Returns:
+            The user's current streak if the activity calendar changed, else None
+        """
+        self.emission_store.invalidate(user_id)
+        old_day = str(old_item.get('date') or '')
+        new_day = str(new_item.get('date') or '') if new_item is not None else None
+        day_changes = []
+        if old_day and old_day != new_day:
+            day_changes.append((date.fromisoformat(old_day), -1))
+        if new_day and new_day != old_day:
+            day_changes.append((date.fromisoformat(new_day), 1))
+        written = date.fromisoformat(old_item['timestamp'][:10])
+        old_co2 = Decimal(str(old_item.get('co2_equivalent') or 0))
+        changes = [(old_item.get('category'), -old_co2, -1)]
+        if new_item is None:
+            co2_delta, count, deltas = -old_co2, -1, {'activities': -1}
+        else:
+            new_co2 = Decimal(str(new_item.get('co2_equivalent') or 0))
+            co2_delta, count, deltas = new_co2 - old_co2, 0, {}
+            changes.append((new_item.get('category'), new_co2, 1))
+        _, calendar, _ = self._update_daily_counters(
+            user_id,
+            written,
+            'ADD total_emissions :co2, entries_count :count, emissions_version :one',
+            {':co2': co2_delta, ':count': count, ':one': 1},
+            day_changes=day_changes,
+            challenge_changes=changes,
+            **deltas
+        )
+        if calendar is None:
+            return None
+        return calendar.streak_info(datetime.utcnow().date())['current_streak']
+    
+    def _count_entry_days(self, user_id: str) -> EntryDayCounts:
+        """Per-day entry counts of the user's stored entries (seeds profiles written before the counts existed)"""
+        kwargs = {
+            'KeyConditionExpression': Key('userId').eq(user_id),
+            'ProjectionExpression': '#date',
+            'ExpressionAttributeNames': {'#date': 'date'}
+        }
+        dates = []
+        while True:
+            response = self.entries_table.query(**kwargs)
+            dates.extend(str(item['date']) for item in response.get('Items', []) if item.get('date'))
+            if 'LastEvaluatedKey' not in response:
+                return EntryDayCounts.from_dates(dates)
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def _update_daily_counters(
+        self,
+        user_id: str,
+        day: date,
+        update_expression: str,
+        expression_values: Dict[str, Any],
+        day_changes: Optional[List[Tuple[date, int]]] = None,
+        challenge_changes: Optional[List[Tuple[Optional[str], Decimal, int]]] = None,
+        max_attempts: int = 5,
+        **deltas
+    ) -> Tuple[DailyCounters, Optional[ActivityCalendar], Dict[str, Any]]:
+        """
+        Apply a stats update together with daily counter deltas
+        
+        The packed counters (and, when day_changes are given as (entry date,
+        entries added), the per-day entry counts and activity calendar; when challenge_changes are given as (category, CO₂ kg,
+        activities), the challenge window counters) are read, bumped and written back in the same update,
+        conditioned on the values that were read, and retried if a
+        concurrent write got there first. The pre-update values of the
+        touched attributes are returned alongside, for change detection.
+        """
+        attributes = ['daily_counters'] + (['activity_calendar', 'entry_days'] if day_changes else [])
+        if challenge_changes:
+            attributes.append('challenge_counters')
+        for attempt in range(max_attempts):
+            item = self.users_table.get_item(
+                Key={'userId': user_id},
+                ProjectionExpression=', '.join(attributes + (['entries_count'] if day_changes else []))
+            ).get('Item') or {}
+            update, counters, calendar = self._counter_update(
+                user_id, item, attributes, day, update_expression, expression_values, day_changes, deltas,
+                challenge_changes
+            )
+            try:
+                response = self.users_table.update_item(**update, ReturnValues='UPDATED_OLD')
+                return counters, calendar, response.get('Attributes', {})
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException' or attempt == max_attempts - 1:
+                    raise
+    
+    def _counter_update(
+        self,
+        user_id: str,
+        item: Dict[str, Any],
+        attributes: List[str],
+        day: date,
+        update_expression: str,
+        expression_values: Dict[str, Any],
+        day_changes: Optional[List[Tuple[date, int]]],
+        deltas: Dict[str, Any],
+        challenge_changes: Optional[List[Tuple[Optional[str], Decimal, int]]] = None
+    ) -> Tuple[Dict[str, Any], DailyCounters, Optional[ActivityCalendar]]:
+        """Build the conditional user update that writes bumped counters (calendar, challenge windows) back"""
+        counters = DailyCounters.from_bytes(item.get('daily_counters'))
+        counters.add(day, **deltas)
+        calendar = None
+        new_values = {'daily_counters': counters.to_bytes()}
+        if day_changes:
+            calendar = ActivityCalendar.from_bytes(item.get('activity_calendar'))
+            if 'entry_days' in item or not int(item.get('entries_count', 0)):
+                entry_days = EntryDayCounts.from_bytes(item.get('entry_days'))
+                for changed, delta in day_changes:
+                    entry_days.add(changed, delta)
+            else:
+                # Entries logged before the counts existed: count the stored
+                # entries, which already include this write
+                entry_days = self._count_entry_days(user_id)
+            for changed, _ in day_changes:
+                if entry_days.count(changed):
+                    calendar.mark(changed)
+                else:
+                    calendar.unmark(changed)
+            new_values['activity_calendar'] = calendar.to_bytes()
+            new_values['entry_days'] = entry_days.to_bytes()
+        if challenge_changes:
+            challenge_counters = ChallengeCounters.from_bytes(item.get('challenge_counters'))
+            for category, co2_kg, count in challenge_changes:
+                challenge_counters.record(day, category, co2_kg, count)
+            new_values['challenge_counters'] = challenge_counters.to_bytes()
+        
+        # Every counter write changes gamification stats, so it bumps the data version
+        values = dict(expression_values, **{':version_step': 1})
+        if update_expression.startswith('ADD '):
+            update_expression = f"ADD data_version :version_step, {update_expression[4:]}"
+        else:
+            update_expression = f"ADD data_version :version_step {update_expression}"
+        assignments = []
+        conditions = []
+        for attribute in attributes:
+            values[f':new_{attribute}'] = new_values[attribute]
+            assignments.append(f"{attribute} = :new_{attribute}")
+            if attribute in item:
+                conditions.append(f"{attribute} = :old_{attribute}")
+                values[f':old_{attribute}'] = item[attribute]
+            else:
+                conditions.append(f"attribute_not_exists({attribute})")
+        separator = ', ' if ' SET ' in f' {update_expression} ' else ' SET '
+        update = {
+            'Key': {'userId': user_id},
+            'UpdateExpression': f"{update_expression}{separator}{', '.join(assignments)}",
+            'ConditionExpression': ' AND '.join(conditions),
+            'ExpressionAttributeValues': values
+        }
+        return update, counters, calendar
     
     async def get_analytics(
         self, 
@@ -294,31 +953,17 @@ class DynamoDBService:
     ) -> Dict[str, Any]:
         """Get analytics data for a user within a date range"""
         try:
-            emissions = await self.get_user_emissions(
-                user_id, start_date, end_date, limit=1000
-            )
-            
-            # Calculate analytics
-            total_emissions = sum(float(e.get('co2_equivalent', 0)) for e in emissions)
-            
-            # Group by category
-            by_category = {}
-            for emission in emissions:
-                category = emission.get('category', 'other')
-                by_category[category] = by_category.get(category, 0) + float(emission.get('co2_equivalent', 0))
-            
-            # Group by month
-            by_month = {}
-            for emission in emissions:
-                emission_date = emission.get('date', '')[:7]  # YYYY-MM
-                by_month[emission_date] = by_month.get(emission_date, 0) + float(emission.get('co2_equivalent', 0))
+            history = await self.get_emission_history(user_id)
+            rows = history.window(start_date, end_date)
+            entry_count = rows.stop - rows.start
+            total_emissions = float(history.co2[rows].sum())
             
             return {
                 "total_emissions": total_emissions,
-                "emissions_by_category": by_category,
-                "emissions_by_month": by_month,
-                "entry_count": len(emissions),
-                "average_daily_emissions": total_emissions / max(1, len(emissions))
+                "emissions_by_category": history.category_totals(rows),
+                "emissions_by_month": history.monthly_totals(rows),
+                "entry_count": entry_count,
+                "average_daily_emissions": total_emissions / max(1, entry_count)
             }
             
         except Exception as e:
@@ -326,5 +971,10 @@ class DynamoDBService:
             return {}
 
 
+def _serialize(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Low-level attribute values for client calls such as transact_write_items"""
+    return {key: _serializer.serialize(value) for key, value in values.items()}
+
+
 # Global instance
 dynamodb_service = DynamoDBService()
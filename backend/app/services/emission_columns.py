@@ -0,0 +1,113 @@
+"""
+Columnar emission histories for CarbonTrack
+
+Analysis code sums a user's emissions by category, activity and month. On
+multi-year histories, walking a list of entry dicts and parsing every date
+dominates that work. EmissionColumns converts a history into parallel NumPy
+arrays once: days as datetime64, categories and (category, activity) pairs
+as small integer codes, and CO₂ as float64. Breakdowns are then a
+``bincount`` over the codes. Dates are parsed in one vectorized call per
+history, once per distinct date string.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+NAT = np.datetime64("NaT", "D")
+
+
+def parse_days(date_strings: List[str]) -> np.ndarray:
+    """
+    Parse distinct ISO dates (or the date part of ISO timestamps) into datetime64 days
+
+    Strings are parsed in one vectorized call. If that call fails, each
+    string is parsed on its own, and unparseable ones become NaT.
+    """
+    dates = np.array([s[:10] for s in date_strings], dtype="U10")
+    try:
+        return dates.astype("datetime64[D]")
+    except ValueError:
+        days = np.empty(len(dates), dtype="datetime64[D]")
+        for i, value in enumerate(dates):
+            try:
+                days[i] = np.datetime64(value, "D")
+            except ValueError:
+                days[i] = NAT
+        return days
+
+
+@dataclass
+class EmissionColumns:
+    """One user's emission history as parallel arrays"""
+    days: np.ndarray  # datetime64[D], NaT where the entry's date is unparseable
+    category_codes: np.ndarray  # int32 index into categories
+    activity_codes: np.ndarray  # int32 index into activities
+    co2: np.ndarray  # float64 kg CO₂e
+    categories: List[str]  # in order of first appearance
+    activities: List[Tuple[str, str]]  # (category, activity), in order of first appearance
+
+    def __len__(self) -> int:
+        return len(self.co2)
+
+    @classmethod
+    def from_entries(cls, emissions: List[Dict[str, Any]]) -> "EmissionColumns":
+        """Build the columns from entry dicts shaped like ActivityService output"""
+        # Codes are assigned in order of first appearance by interning each
+        # column in a dict, which is cheaper than sorting strings with np.unique
+        category_index: Dict[str, int] = {}
+        activity_index: Dict[Tuple[str, str], int] = {}
+        date_index: Dict[str, int] = {}
+
+        categories = [emission.get("category", "unknown") for emission in emissions]
+        activities = [emission.get("activity", "unknown") for emission in emissions]
+        category_codes = [category_index.setdefault(category, len(category_index)) for category in categories]
+        activity_codes = [activity_index.setdefault(pair, len(activity_index)) for pair in zip(categories, activities)]
+        date_codes = [date_index.setdefault(str(emission.get("date", "")), len(date_index)) for emission in emissions]
+        co2 = [float(emission.get("co2_equivalent", 0)) for emission in emissions]
+
+        return cls(
+            days=parse_days(list(date_index))[np.array(date_codes, dtype=np.int32)],
+            category_codes=np.array(category_codes, dtype=np.int32),
+            activity_codes=np.array(activity_codes, dtype=np.int32),
+            co2=np.array(co2, dtype=np.float64),
+            categories=list(category_index),
+            activities=list(activity_index),
+        )
+
+    # ====================
+    # BREAKDOWNS
+    # ====================
+
+    def category_totals(self) -> Dict[str, float]:
+        sums = np.bincount(self.category_codes, weights=self.co2, minlength=len(self.categories))
+        return dict(zip(self.categories, sums.tolist()))
+
+    def activity_totals(self) -> Dict[Tuple[str, str], float]:
+        """(category, activity) -> kg CO₂e"""
+        sums = np.bincount(self.activity_codes, weights=self.co2, minlength=len(self.activities))
+        return dict(zip(self.activities, sums.tolist()))
+
+    def activity_name_totals(self) -> Dict[str, float]:
+        """Activity -> kg CO₂e, summed across categories"""
+        if not len(self):
+            return {}
+        name_index: Dict[str, int] = {}
+        name_of_pair = np.array(
+            [name_index.setdefault(activity, len(name_index)) for _, activity in self.activities],
+            dtype=np.int32,
+        )
+        sums = np.bincount(name_of_pair[self.activity_codes], weights=self.co2, minlength=len(name_index))
+        return dict(zip(name_index, sums.tolist()))
+
+    def monthly_totals(self) -> Dict[str, float]:
+        """Month ("YYYY-MM") -> kg CO₂e in order of first appearance, leaving out entries without a valid date"""
+        valid = ~np.isnat(self.days)
+        if not valid.any():
+            return {}
+        months = self.days[valid].astype("datetime64[M]")
+        unique, first, inverse = np.unique(months, return_index=True, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.co2[valid], minlength=len(unique))
+        order = np.argsort(first, kind="stable")
+        return {str(unique[i]): float(sums[i]) for i in order}
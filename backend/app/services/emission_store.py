@@ -0,0 +1,307 @@
+"""
+Columnar in-memory emission store for CarbonTrack
+
+The list endpoint, analytics, ActivityService (and through it the
+recommendation engine and scenarios) each used to query a user's entries and
+walk the item dicts, converting every Decimal to float. The store keeps each
+recently used user's full history in memory as parallel arrays instead:
+
+- entry dates as int32 day numbers since 1970-01-01
+- category, activity and unit as int16 codes into the history's own string
+  table (int32 once a history holds more than 32,768 distinct values)
+- amount, CO₂e and emission factor as float64
+- timestamps (the table's sort key) sorted ascending, so a date window is
+  two binary searches and a slice
+
+A history is built once from the entries table and tagged with the user's
+emissions version, which only emission writes bump. A new entry written by
+this process is appended in place when the cached history is current, and
+any other change makes the next read rebuild it. Histories are evicted
+least recently used first once their total size exceeds the memory budget.
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.emission_columns import EmissionColumns, parse_days
+
+logger = logging.getLogger(__name__)
+
+# Day number of entries without a valid date
+NO_DAY = np.iinfo(np.int32).min
+
+# Rough size of a Python string object beyond its characters, and of a
+# string table slot (list pointer and dict entry), for the budget
+_STRING_OVERHEAD = 56
+_TABLE_SLOT_OVERHEAD = 40
+
+# Category and activity codes combined into one int64 key
+_PAIR_BASE = 1 << 32
+
+
+class StringTable:
+    """
+    Distinct strings of one user's history, numbered in order of first use
+
+    Each history (and the copies its appends make) has its own table, so
+    codes are dropped with the history and free-text values cannot fill a
+    table other users depend on.
+    """
+
+    INT16_CODES = int(np.iinfo(np.int16).max) + 1
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def codes(self, values: Iterable[str]) -> np.ndarray:
+        """Codes as int16, or int32 once the table outgrows int16"""
+        codes = [self.code(value) for value in values]
+        return np.array(codes, dtype=np.int16 if len(self.values) <= self.INT16_CODES else np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the strings and their lookups"""
+        return sum(len(value) + _STRING_OVERHEAD + _TABLE_SLOT_OVERHEAD for value in self.values)
+
+
+def _day_numbers(date_strings: List[str]) -> np.ndarray:
+    """int32 day numbers of ISO dates, NO_DAY where missing or invalid"""
+    distinct: Dict[str, int] = {}
+    positions = np.array([distinct.setdefault(value, len(distinct)) for value in date_strings], dtype=np.int64)
+    days = parse_days(list(distinct))
+    numbers = np.where(np.isnat(days), NO_DAY, days.astype(np.int64)).astype(np.int32)
+    return numbers[positions] if len(positions) else np.zeros(0, dtype=np.int32)
+
+
+def _floats(items: List[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.array([float(item.get(key, 0) or 0) for item in items], dtype=np.float64)
+
+
+@dataclass
+class UserEmissions:
+    """One user's emission history as parallel arrays, oldest entry first"""
+    timestamps: np.ndarray  # str, ascending (the entries table sort key)
+    entry_ids: np.ndarray  # object, None when absent
+    days: np.ndarray  # int32 days since 1970-01-01, NO_DAY when the date is missing
+    categories: np.ndarray  # int16 (or int32) codes into the string table
+    activities: np.ndarray  # int16 (or int32)
+    units: np.ndarray  # int16 (or int32)
+    amounts: np.ndarray  # float64
+    co2: np.ndarray  # float64 kg CO₂e
+    emission_factors: np.ndarray  # float64
+    descriptions: np.ndarray  # object, None when absent
+    strings: StringTable
+
+    _FIELDS = ("timestamps", "entry_ids", "days", "categories", "activities", "units",
+               "amounts", "co2", "emission_factors", "descriptions")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_items(cls, items: List[Dict[str, Any]], strings: Optional[StringTable] = None) -> "UserEmissions":
+        """Build from entries table items (in any order), with a new string table unless one is given"""
+        strings = strings if strings is not None else StringTable()
+        items = sorted(items, key=lambda item: str(item.get("timestamp", "")))
+        timestamps = [str(item.get("timestamp", "")) for item in items]
+        return cls(
+            timestamps=np.array(timestamps, dtype=str) if items else np.zeros(0, dtype="U1"),
+            entry_ids=np.array([item.get("entry_id") for item in items], dtype=object),
+            days=_day_numbers([str(item.get("date") or timestamp[:10]) for item, timestamp in zip(items, timestamps)]),
+            categories=strings.codes(item.get("category", "other") for item in items),
+            activities=strings.codes(item.get("activity", "unknown") for item in items),
+            units=strings.codes(item.get("unit", "") for item in items),
+            amounts=_floats(items, "amount"),
+            co2=_floats(items, "co2_equivalent"),
+            emission_factors=_floats(items, "emission_factor"),
+            descriptions=np.array([item.get("description") or None for item in items], dtype=object),
+            strings=strings,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held, including the objects behind the object columns and the string table"""
+        size = sum(getattr(self, name).nbytes for name in self._FIELDS) + self.strings.nbytes
+        for name in ("entry_ids", "descriptions"):
+            size += sum(len(value) + _STRING_OVERHEAD for value in getattr(self, name) if value)
+        return size
+
+    def append(self, item: Dict[str, Any]) -> "UserEmissions":
+        """A copy with one more entry, inserted at its timestamp"""
+        added = UserEmissions.from_items([item], self.strings)
+        at = int(np.searchsorted(self.timestamps, added.timestamps[0], side="right"))
+        # concatenate rather than insert, so a longer timestamp widens the string column
+        columns = {
+            name: np.concatenate([getattr(self, name)[:at], getattr(added, name), getattr(self, name)[at:]])
+            for name in self._FIELDS
+        }
+        return UserEmissions(strings=self.strings, **columns)
+
+    # ====================
+    # READS
+    # ====================
+
+    def window(self, start: Optional[str] = None, end: Optional[str] = None) -> slice:
+        """
+        Rows whose timestamp is between ``start`` and ``end`` (inclusive)
+
+        Bounds compare as strings, like the key conditions the entries
+        table was queried with.
+        """
+        low = int(np.searchsorted(self.timestamps, start, side="left")) if start else 0
+        high = int(np.searchsorted(self.timestamps, end, side="right")) if end else len(self)
+        return slice(low, max(low, high))
+
+    def newest(self, rows: slice = slice(None), limit: Optional[int] = None) -> np.ndarray:
+        """Row numbers within ``rows``, newest first, at most ``limit`` of them"""
+        start, stop, _ = rows.indices(len(self))
+        if limit is not None:
+            start = max(start, stop - limit)
+        return np.arange(stop - 1, start - 1, -1)
+
+    def items(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Entries table items (with float numbers) for the given rows, in that order"""
+        values = self.strings.values
+        dates = self.dates(rows)
+        items = []
+        for position, row in enumerate(rows.tolist()):
+            item = {
+                "timestamp": str(self.timestamps[row]),
+                "date": dates[position],
+                "category": values[self.categories[row]],
+                "activity": values[self.activities[row]],
+                "amount": float(self.amounts[row]),
+                "unit": values[self.units[row]],
+                "co2_equivalent": float(self.co2[row]),
+                "emission_factor": float(self.emission_factors[row]),
+            }
+            if self.entry_ids[row] is not None:
+                item["entry_id"] = self.entry_ids[row]
+            if self.descriptions[row] is not None:
+                item["description"] = self.descriptions[row]
+            items.append(item)
+        return items
+
+    def dates(self, rows: np.ndarray) -> List[str]:
+        """ISO dates of the given rows ("" where missing)"""
+        days = self.days[rows]
+        text = days.astype("datetime64[D]").astype(str)
+        return np.where(days == NO_DAY, "", text).tolist()
+
+    def columns(self, rows: np.ndarray) -> EmissionColumns:
+        """The given rows as EmissionColumns for the recommendation and scenario engines"""
+        values = self.strings.values
+        days = self.days[rows]
+        category_codes, category_first, category_rows = np.unique(
+            self.categories[rows], return_index=True, return_inverse=True
+        )
+        pairs = self.categories[rows].astype(np.int64) * _PAIR_BASE + self.activities[rows]
+        pair_codes, pair_first, pair_rows = np.unique(pairs, return_index=True, return_inverse=True)
+        # Codes are renumbered in order of first appearance, as from_entries numbers them
+        category_order = np.argsort(category_first, kind="stable")
+        pair_order = np.argsort(pair_first, kind="stable")
+        return EmissionColumns(
+            days=np.where(days == NO_DAY, np.datetime64("NaT"), days.astype("datetime64[D]")).astype("datetime64[D]"),
+            category_codes=np.argsort(category_order).astype(np.int32)[category_rows.reshape(-1)],
+            activity_codes=np.argsort(pair_order).astype(np.int32)[pair_rows.reshape(-1)],
+            co2=self.co2[rows],
+            categories=[values[code] for code in category_codes[category_order].tolist()],
+            activities=[
+                (values[code // _PAIR_BASE], values[code % _PAIR_BASE])
+                for code in pair_codes[pair_order].tolist()
+            ],
+        )
+
+    def category_totals(self, rows: slice = slice(None)) -> Dict[str, float]:
+        """Category -> kg CO₂e"""
+        codes, inverse = np.unique(self.categories[rows], return_inverse=True)
+        sums = np.bincount(inverse.reshape(-1), weights=self.co2[rows], minlength=len(codes))
+        return {self.strings.values[code]: total for code, total in zip(codes.tolist(), sums.tolist())}
+
+    def monthly_totals(self, rows: slice = slice(None)) -> Dict[str, float]:
+        """Month ("YYYY-MM", "" for entries without a date) -> kg CO₂e"""
+        days = self.days[rows]
+        months = np.where(days == NO_DAY, NO_DAY, days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64))
+        unique, inverse = np.unique(months, return_inverse=True)
+        sums = np.bincount(inverse.reshape(-1), weights=self.co2[rows], minlength=len(unique))
+        labels = ["" if month == NO_DAY else str(np.datetime64(month, "M")) for month in unique.tolist()]
+        return dict(zip(labels, sums.tolist()))
+
+    def active_days(self, rows: slice = slice(None)) -> np.ndarray:
+        """Distinct day numbers with at least one entry, ascending"""
+        days = np.unique(self.days[rows])
+        return days[days != NO_DAY]
+
+
+class EmissionStore:
+    """Users' histories, LRU-evicted past a byte budget, each valid for one emissions version"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._histories: "OrderedDict[str, Tuple[int, UserEmissions, int]]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    def get(self, user_id: str, version: int) -> Optional[UserEmissions]:
+        """The cached history if it was built at ``version``, else None"""
+        cached = self._histories.get(user_id)
+        if cached is None or cached[0] != version:
+            self.misses += 1
+            return None
+        self._histories.move_to_end(user_id)
+        self.hits += 1
+        return cached[1]
+
+    def build(self, items: List[Dict[str, Any]]) -> UserEmissions:
+        return UserEmissions.from_items(items)
+
+    def put(self, user_id: str, version: int, history: UserEmissions):
+        self.invalidate(user_id)
+        size = history.nbytes
+        if size > self.max_bytes:
+            return
+        self._histories[user_id] = (version, history, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, _, evicted) = self._histories.popitem(last=False)
+            self.nbytes -= evicted
+
+    def append(self, user_id: str, old_version: int, new_version: int, item: Dict[str, Any]):
+        """
+        Add an entry this process wrote
+
+        Applied only when the cached history was current just before the
+        write; otherwise it is dropped and rebuilt on the next read.
+        """
+        cached = self._histories.get(user_id)
+        if cached is None:
+            return
+        if cached[0] != old_version:
+            self.invalidate(user_id)
+            return
+        self.put(user_id, new_version, cached[1].append(item))
+
+    def invalidate(self, user_id: str):
+        cached = self._histories.pop(user_id, None)
+        if cached is not None:
+            self.nbytes -= cached[2]
@@ -0,0 +1,59 @@
+"""
+Per-user gamification snapshots for CarbonTrack
+
+The gamification profile, achievements, challenges and stats screens all
+show the same derived figures: points and level, streak, earned
+achievements and progress towards the rest, challenge progress and
+leaderboard ranks. A snapshot holds all of them for one user, tagged with
+the user's data version (bumped by every write that changes their stats)
+and the day it was built for. Endpoints share it for as long as both still
+match, so a screen that calls several of them costs one small version read.
+
+Ranks move when other users score, not when this user's data changes, so
+they are refreshed from the in-memory rank indexes after a short TTL
+instead of being tied to the data version.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.versioned_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GamificationSnapshot:
+    """Everything the gamification endpoints derive from one user's data"""
+    user_id: str
+    version: Tuple[Any, str]  # (data version, day built for)
+    stats: Dict[str, Any]
+    level: Dict[str, Any]
+    achievements: List[Dict[str, Any]]
+    achievements_progress: List[Dict[str, Any]]
+    challenges: List[Dict[str, Any]]
+    rankings: Dict[str, Any] = field(default_factory=dict)
+    rankings_at: Optional[float] = None
+
+
+class SnapshotCache(VersionedCache):
+    """Snapshots by user, with a TTL on the rank summary they carry"""
+
+    def __init__(self, max_entries: int = 10000, rank_ttl_seconds: float = 30):
+        super().__init__(max_entries)
+        self.rank_ttl_seconds = rank_ttl_seconds
+
+    def rankings_stale(self, snapshot: GamificationSnapshot, now: Optional[float] = None) -> bool:
+        if snapshot.rankings_at is None:
+            return True
+        return (now if now is not None else time.monotonic()) - snapshot.rankings_at >= self.rank_ttl_seconds
+
+
+# Global instance
+snapshot_cache = SnapshotCache(
+    settings.gamification_snapshot_cache_size,
+    settings.gamification_snapshot_rank_ttl_seconds
+)
@@ -4,10 +4,17 @@ Handles personal and community leaderboards with different time periods and cate
 """
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 from dataclasses import dataclass
+import hashlib
+import hmac
 import logging
 
+import numpy as np
+
+from app.core.config import settings
+from app.models.records import SLOTS
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -29,7 +36,7 @@ class LeaderboardPeriod(Enum):
     ALL_TIME = "all_time"
 
 
-@dataclass
+@dataclass(**SLOTS)
 class LeaderboardEntry:
     """Individual leaderboard entry"""
     user_id: str
@@ -45,6 +52,122 @@ class LeaderboardEntry:
     additional_stats: Dict[str, Any]
 
 
+# Stat field holding each (type, period) score; periods a type does not track
+# fall back to its all-time field, matching the original per-user lookup
+SCORE_FIELDS: Dict[Tuple[LeaderboardType, LeaderboardPeriod], str] = {
+    (LeaderboardType.POINTS, LeaderboardPeriod.DAILY): "points_today",
+    (LeaderboardType.POINTS, LeaderboardPeriod.WEEKLY): "points_this_week",
+    (LeaderboardType.POINTS, LeaderboardPeriod.MONTHLY): "points_this_month",
+    (LeaderboardType.POINTS, LeaderboardPeriod.ALL_TIME): "total_points",
+    (LeaderboardType.CARBON_REDUCTION, LeaderboardPeriod.DAILY): "total_co2_reduced",
+    (LeaderboardType.CARBON_REDUCTION, LeaderboardPeriod.WEEKLY): "co2_reduced_this_week",
+    (LeaderboardType.CARBON_REDUCTION, LeaderboardPeriod.MONTHLY): "co2_reduced_this_month",
+    (LeaderboardType.CARBON_REDUCTION, LeaderboardPeriod.ALL_TIME): "total_co2_reduced",
+    (LeaderboardType.ACTIVITIES, LeaderboardPeriod.DAILY): "activities_today",
+    (LeaderboardType.ACTIVITIES, LeaderboardPeriod.WEEKLY): "activities_this_week",
+    (LeaderboardType.ACTIVITIES, LeaderboardPeriod.MONTHLY): "activities_this_month",
+    (LeaderboardType.ACTIVITIES, LeaderboardPeriod.ALL_TIME): "total_activities",
+}
+for _period in LeaderboardPeriod:
+    SCORE_FIELDS[(LeaderboardType.STREAK, _period)] = "current_streak"
+    SCORE_FIELDS[(LeaderboardType.GOALS_ACHIEVED, _period)] = "goals_achieved"
+
+
+def score_field(config: Dict[str, Any]) -> str:
+    """Stat field a leaderboard configuration ranks by"""
+    return SCORE_FIELDS[(config["type"], config["period"])]
+
+
+def public_user_id(user_id: str) -> str:
+    """Stable opaque id shown for other users on community boards (keyed, so it cannot be mapped back)"""
+    digest = hmac.new(settings.jwt_secret_key.encode(), str(user_id).encode(), hashlib.sha256).hexdigest()
+    return f"anon_{digest[:16]}"
+
+
+class LeaderboardScores:
+    """
+    Column-oriented scores for a population of users
+
+    Every stat field a leaderboard ranks by becomes one float64 array, built
+    in a single pass over the user dicts (or handed over directly as arrays),
+    so all leaderboards are scored with vectorized operations instead of a
+    dict lookup per user per board.
+    """
+
+    def __init__(self, user_ids: Sequence[str], columns: Dict[str, np.ndarray],
+                 users: Optional[Sequence[Dict[str, Any]]] = None):
+        self.user_ids = user_ids
+        self.columns = columns
+        self.users = users
+        self._positions: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_user_data(cls, user_data: Sequence[Dict[str, Any]],
+                       fields: Optional[Sequence[str]] = None) -> "LeaderboardScores":
+        """Extract score columns from user stat dicts in one pass"""
+        fields = list(fields or sorted(set(SCORE_FIELDS.values())))
+        if user_data:
+            matrix = np.array(
+                [[user.get(name) or 0 for name in fields] for user in user_data],
+                dtype=np.float64,
+            )
+        else:
+            matrix = np.zeros((0, len(fields)), dtype=np.float64)
+        # Fortran order keeps each column contiguous
+        matrix = np.asfortranarray(matrix)
+        columns = {name: matrix[:, i] for i, name in enumerate(fields)}
+        return cls([user.get("user_id", "") for user in user_data], columns, user_data)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def column(self, name: str) -> np.ndarray:
+        values = self.columns.get(name)
+        return values if values is not None else np.zeros(len(self), dtype=np.float64)
+
+    def position(self, user_id: str) -> Optional[int]:
+        if self._positions is None:
+            self._positions = {uid: i for i, uid in enumerate(self.user_ids)}
+        return self._positions.get(user_id)
+
+    def user(self, index: int) -> Dict[str, Any]:
+        if self.users is not None:
+            return self.users[index]
+        user = {"user_id": self.user_ids[index]}
+        user.update({name: values[index].item() for name, values in self.columns.items()})
+        return user
+
+
+def top_indices(scores: np.ndarray, eligible: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Indices of the ``limit`` best eligible scores, best first
+
+    Uses a partial selection (O(n)) instead of a full sort. Ties keep input
+    order, the same as a stable descending sort of the whole population.
+    """
+    candidates = np.flatnonzero(eligible)
+    if limit <= 0 or candidates.size == 0:
+        return candidates[:0]
+    values = scores[candidates]
+    if candidates.size > limit:
+        cutoff = -np.partition(-values, limit - 1)[limit - 1]
+        above = candidates[values > cutoff]
+        at_cutoff = candidates[values == cutoff][:limit - above.size]
+        candidates = np.concatenate([above, at_cutoff])
+        values = scores[candidates]
+    return candidates[np.lexsort((candidates, -values))]
+
+
+def rank_of(scores: np.ndarray, eligible: np.ndarray, index: int) -> Optional[int]:
+    """1-based rank of one user by counting better eligible scores (None if not ranked)"""
+    if not eligible[index]:
+        return None
+    score = scores[index]
+    better = np.count_nonzero(eligible & (scores > score))
+    tied_before = np.count_nonzero(eligible[:index] & (scores[:index] == score))
+    return int(better + tied_before) + 1
+
+
 class LeaderboardEngine:
     """
     Manages community leaderboards, rankings, and competitive elements
@@ -140,7 +263,8 @@ class LeaderboardEngine:
         }
     
     def generate_leaderboard(self, leaderboard_id: str, user_data: List[Dict[str, Any]], 
-                           current_user_id: str = None, limit: int = 50) -> Dict[str, Any]:
+                           current_user_id: str = None, limit: int = 50,
+                           scores: Optional[LeaderboardScores] = None) -> Dict[str, Any]:
         """
         Generate a leaderboard based on user data
         
@@ -149,6 +273,7 @@ class LeaderboardEngine:
             user_data: List of user statistics
             current_user_id: ID of current user for highlighting
             limit: Maximum number of entries to return
+            scores: Pre-extracted score columns (built from user_data when omitted)
             
         Returns:
             Complete leaderboard with rankings and metadata
@@ -157,24 +282,31 @@ class LeaderboardEngine:
             return {"error": "Leaderboard configuration not found"}
             
         config = self.leaderboard_configs[leaderboard_id]
+        if scores is None:
+            scores = LeaderboardScores.from_user_data(user_data)
+        values = scores.column(score_field(config))
+        eligible = self._eligible(values, config)
         
-        # Filter and sort users based on leaderboard type
-        ranked_users = self._rank_users(user_data, config, limit)
+        # Top-N by partial selection, then build entries only for those users
+        ranked_users = [
+            self._build_entry(scores.user(int(index)), config, rank)
+            for rank, index in enumerate(top_indices(values, eligible, limit), start=1)
+        ]
         
-        # Find current user position if specified
+        # Current user's rank is counted directly, even outside the top N
         current_user_entry = None
         current_user_rank = None
         
         if current_user_id:
-            for i, entry in enumerate(ranked_users):
-                if entry.user_id == current_user_id:
-                    current_user_entry = entry
-                    current_user_rank = i + 1
-                    break
+            position = scores.position(current_user_id)
+            if position is not None:
+                current_user_rank = rank_of(values, eligible, position)
+                if current_user_rank is not None:
+                    current_user_entry = self._build_entry(scores.user(position), config, current_user_rank)
         
         # Calculate statistics
-        total_participants = len([u for u in user_data if self._get_user_score(u, config) > 0])
-        average_score = sum(self._get_user_score(u, config) for u in user_data) / len(user_data) if user_data else 0
+        total_participants = int(np.count_nonzero(values > 0))
+        average_score = float(values.mean()) if len(values) else 0
         
         return {
             "leaderboard_id": leaderboard_id,
@@ -192,6 +324,7 @@ class LeaderboardEngine:
             } if current_user_id else None,
             "statistics": {
                 "total_participants": total_participants,
+                "ranked_users": int(np.count_nonzero(eligible)),
                 "average_score": round(average_score, 2),
                 "top_score": ranked_users[0].score if ranked_users else 0,
                 "last_updated": datetime.utcnow().isoformat()
@@ -203,81 +336,119 @@ class LeaderboardEngine:
             }
         }
     
-    def _rank_users(self, user_data: List[Dict[str, Any]], config: Dict[str, Any], 
-                   limit: int) -> List[LeaderboardEntry]:
-        """Rank users based on leaderboard configuration"""
-        # Calculate scores and create entries
-        entries = []
+    def generate_leaderboard_from_index(self, leaderboard_id: str, index, current_user_id: str = None,
+                                        limit: int = 50, around: int = 0, previous=None) -> Dict[str, Any]:
+        """
+        Generate a leaderboard from an incrementally maintained rank index
         
-        for user in user_data:
-            score = self._get_user_score(user, config)
+        Args:
+            leaderboard_id: ID of the leaderboard configuration
+            index: RankIndex of the current period
+            current_user_id: ID of current user for highlighting
+            limit: Maximum number of entries to return
+            around: Neighbours to include on each side of the current user
+            previous: RankSnapshot of the previous period, for previous_rank and rank_change
             
-            if score > 0 or config["type"] == LeaderboardType.STREAK:  # Include zero streaks
-                entry = LeaderboardEntry(
-                    user_id=user.get("user_id", ""),
-                    username=user.get("username", user.get("email", "Anonymous")),
-                    display_name=user.get("display_name", user.get("full_name", "User")),
-                    rank=0,  # Will be set after sorting
-                    score=score,
-                    previous_rank=user.get("previous_rank", 0),
-                    rank_change=0,  # Will be calculated
-                    avatar_url=user.get("avatar_url", ""),
-                    level=user.get("level", 1),
-                    badge_icon=user.get("badge_icon", "🌱"),
-                    additional_stats=self._get_additional_stats(user, config)
-                )
-                entries.append(entry)
+        Returns:
+            Same structure as generate_leaderboard, plus the current user's neighbours.
+            Other users are listed under public_user_id with placeholder names;
+            only the current user's own entries carry their user id.
+        """
+        if leaderboard_id not in self.leaderboard_configs:
+            return {"error": "Leaderboard configuration not found"}
         
-        # Sort by score (descending)
-        entries.sort(key=lambda x: x.score, reverse=True)
+        config = self.leaderboard_configs[leaderboard_id]
+        field_name = score_field(config)
+        # Scores are ordered best first, so positive scores fill the leading ranks
+        ranked_count = len(index) if config["type"] == LeaderboardType.STREAK else index.participants
         
-        # Assign ranks and calculate changes
-        for i, entry in enumerate(entries[:limit]):
-            entry.rank = i + 1
-            entry.rank_change = entry.previous_rank - entry.rank if entry.previous_rank > 0 else 0
-            
-        return entries[:limit]
+        def entry(user_id: str, score: float, rank: int) -> LeaderboardEntry:
+            previous_rank = (previous.rank(user_id) or 0) if previous is not None else 0
+            shown_id = user_id if user_id == current_user_id else public_user_id(user_id)
+            return self._build_entry({"user_id": shown_id, field_name: score, "previous_rank": previous_rank}, config, rank)
+        
+        ranked_users = [
+            entry(user_id, score, rank)
+            for rank, (user_id, score) in enumerate(index.top(min(limit, ranked_count)), start=1)
+        ]
+        
+        current_user = None
+        if current_user_id:
+            rank = index.rank(current_user_id)
+            if rank is not None and rank > ranked_count:
+                rank = None
+            neighbours = [
+                self._serialize_entry(entry(user_id, score, neighbour_rank))
+                for neighbour_rank, user_id, score in index.around(current_user_id, around)
+                if neighbour_rank <= ranked_count
+            ] if rank and around else []
+            current_user = {
+                "entry": self._serialize_entry(entry(current_user_id, index.score(current_user_id), rank)) if rank else None,
+                "rank": rank,
+                "is_in_top": rank <= limit if rank else False,
+                "neighbours": neighbours
+            }
+        
+        return {
+            "leaderboard_id": leaderboard_id,
+            "title": config["title"],
+            "description": config["description"],
+            "icon": config["icon"],
+            "score_label": config["score_label"],
+            "period": config["period"].value,
+            "type": config["type"].value,
+            "entries": [self._serialize_entry(e) for e in ranked_users],
+            "current_user": current_user,
+            "statistics": {
+                "total_participants": index.participants,
+                "ranked_users": ranked_count,
+                "average_score": round(index.total / len(index), 2) if len(index) else 0,
+                "top_score": ranked_users[0].score if ranked_users else 0,
+                "last_updated": datetime.utcnow().isoformat()
+            },
+            "metadata": {
+                "period_start": self._get_period_start(config["period"]).isoformat(),
+                "period_end": self._get_period_end(config["period"]).isoformat(),
+                "next_update": self._get_next_update_time(config["period"]).isoformat()
+            }
+        }
+    
+    def _eligible(self, values: np.ndarray, config: Dict[str, Any]) -> np.ndarray:
+        """Users that appear on the board: positive scores, plus zero streaks"""
+        if config["type"] == LeaderboardType.STREAK:
+            return np.ones(len(values), dtype=bool)
+        return values > 0
+    
+    def _build_entry(self, user: Dict[str, Any], config: Dict[str, Any], rank: int) -> LeaderboardEntry:
+        """Create the entry for one ranked user"""
+        previous_rank = user.get("previous_rank", 0)
+        return LeaderboardEntry(
+            user_id=user.get("user_id", ""),
+            username=user.get("username", user.get("email", "Anonymous")),
+            display_name=user.get("display_name", user.get("full_name", "User")),
+            rank=rank,
+            score=self._get_user_score(user, config),
+            previous_rank=previous_rank,
+            rank_change=previous_rank - rank if previous_rank > 0 else 0,
+            avatar_url=user.get("avatar_url", ""),
+            level=user.get("level", 1),
+            badge_icon=user.get("badge_icon", "🌱"),
+            additional_stats=self._get_additional_stats(user, config)
+        )
+    
+    def _rank_users(self, user_data: List[Dict[str, Any]], config: Dict[str, Any], 
+                   limit: int) -> List[LeaderboardEntry]:
+        """Rank users based on leaderboard configuration"""
+        scores = LeaderboardScores.from_user_data(user_data, [score_field(config)])
+        values = scores.column(score_field(config))
+        return [
+            self._build_entry(scores.user(int(index)), config, rank)
+            for rank, index in enumerate(top_indices(values, self._eligible(values, config), limit), start=1)
+        ]
     
     def _get_user_score(self, user: Dict[str, Any], config: Dict[str, Any]) -> float:
         """Get user score based on leaderboard type"""
-        leaderboard_type = config["type"]
-        period = config["period"]
-        
-        if leaderboard_type == LeaderboardType.POINTS:
-            if period == LeaderboardPeriod.DAILY:
-                return user.get("points_today", 0)
-            elif period == LeaderboardPeriod.WEEKLY:
-                return user.get("points_this_week", 0)
-            elif period == LeaderboardPeriod.MONTHLY:
-                return user.get("points_this_month", 0)
-            else:  # ALL_TIME
-                return user.get("total_points", 0)
-                
-        elif leaderboard_type == LeaderboardType.CARBON_REDUCTION:
-            if period == LeaderboardPeriod.WEEKLY:
-                return user.get("co2_reduced_this_week", 0)
-            elif period == LeaderboardPeriod.MONTHLY:
-                return user.get("co2_reduced_this_month", 0)
-            else:
-                return user.get("total_co2_reduced", 0)
-                
-        elif leaderboard_type == LeaderboardType.STREAK:
-            return user.get("current_streak", 0)
-            
-        elif leaderboard_type == LeaderboardType.ACTIVITIES:
-            if period == LeaderboardPeriod.DAILY:
-                return user.get("activities_today", 0)
-            elif period == LeaderboardPeriod.WEEKLY:
-                return user.get("activities_this_week", 0)
-            elif period == LeaderboardPeriod.MONTHLY:
-                return user.get("activities_this_month", 0)
-            else:
-                return user.get("total_activities", 0)
-                
-        elif leaderboard_type == LeaderboardType.GOALS_ACHIEVED:
-            return user.get("goals_achieved", 0)
-            
-        return 0
+        return user.get(score_field(config), 0)
     
     def _get_additional_stats(self, user: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
         """Get additional statistics to display for each user"""
@@ -338,53 +509,44 @@ class LeaderboardEngine:
             "additional_stats": entry.additional_stats
         }
     
-    def _get_period_start(self, period: LeaderboardPeriod) -> datetime:
+    def _get_period_start(self, period: LeaderboardPeriod, now: Optional[datetime] = None) -> datetime:
         """Get start date for leaderboard period"""
-        now = datetime.utcnow()
+        now = now or datetime.utcnow()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
         
         if period == LeaderboardPeriod.DAILY:
-            return now.replace(hour=0, minute=0, second=0, microsecond=0)
+            return today
         elif period == LeaderboardPeriod.WEEKLY:
-            return now - timedelta(days=now.weekday())
+            return today - timedelta(days=now.weekday())
         elif period == LeaderboardPeriod.MONTHLY:
-            return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            return today.replace(day=1)
         else:  # ALL_TIME
             return datetime(2020, 1, 1)  # App launch date
     
-    def _get_period_end(self, period: LeaderboardPeriod) -> datetime:
+    def _get_period_end(self, period: LeaderboardPeriod, now: Optional[datetime] = None) -> datetime:
         """Get end date for leaderboard period"""
-        now = datetime.utcnow()
+        now = now or datetime.utcnow()
         
-        if period == LeaderboardPeriod.DAILY:
-            return now.replace(hour=23, minute=59, second=59, microsecond=999999)
-        elif period == LeaderboardPeriod.WEEKLY:
-            week_start = now - timedelta(days=now.weekday())
-            return week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-        elif period == LeaderboardPeriod.MONTHLY:
-            if now.month == 12:
-                next_month = now.replace(year=now.year + 1, month=1, day=1)
-            else:
-                next_month = now.replace(month=now.month + 1, day=1)
-            return next_month - timedelta(seconds=1)
-        else:  # ALL_TIME
+        if period == LeaderboardPeriod.ALL_TIME:
             return datetime(2030, 12, 31)  # Far future
+        return self._get_next_update_time(period, now) - timedelta(microseconds=1)
     
-    def _get_next_update_time(self, period: LeaderboardPeriod) -> datetime:
-        """Get next time leaderboard will be updated"""
-        now = datetime.utcnow()
+    def _get_next_update_time(self, period: LeaderboardPeriod, now: Optional[datetime] = None) -> datetime:
+        """Get next time leaderboard will be updated (the next period boundary)"""
+        now = now or datetime.utcnow()
         
         if period == LeaderboardPeriod.DAILY:
-            return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            return self._get_period_start(period, now) + timedelta(days=1)
         elif period == LeaderboardPeriod.WEEKLY:
-            week_start = now - timedelta(days=now.weekday())
-            return week_start + timedelta(days=7)
+            return self._get_period_start(period, now) + timedelta(days=7)
         elif period == LeaderboardPeriod.MONTHLY:
-            if now.month == 12:
-                return now.replace(year=now.year + 1, month=1, day=1)
+            month_start = self._get_period_start(period, now)
+            if month_start.month == 12:
+                return month_start.replace(year=month_start.year + 1, month=1)
             else:
-                return now.replace(month=now.month + 1, day=1)
+                return month_start.replace(month=month_start.month + 1)
         else:  # ALL_TIME
-            return now + timedelta(hours=1)  # Update hourly
+            return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)  # Update hourly
     
     def get_available_leaderboards(self) -> List[Dict[str, Any]]:
         """Get list of all available leaderboards"""
@@ -404,22 +566,52 @@ class LeaderboardEngine:
             
         return leaderboards
     
-    def get_user_rankings(self, user_id: str, user_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Get a user's rankings across all leaderboards"""
+    def get_user_rankings(self, user_id: str, user_data: List[Dict[str, Any]],
+                          scores: Optional[LeaderboardScores] = None) -> Dict[str, Any]:
+        """Get a user's rankings on the leaderboards they are ranked on"""
         rankings = {}
+        if scores is None:
+            scores = LeaderboardScores.from_user_data(user_data)
+        position = scores.position(user_id)
+        if position is None:
+            return rankings
         
-        for leaderboard_id in self.leaderboard_configs.keys():
-            leaderboard = self.generate_leaderboard(leaderboard_id, user_data, user_id, limit=100)
+        for leaderboard_id, config in self.leaderboard_configs.items():
+            values = scores.column(score_field(config))
+            eligible = self._eligible(values, config)
+            rank = rank_of(values, eligible, position)
+            if rank is None:
+                continue
             
-            if leaderboard.get("current_user"):
-                user_info = leaderboard["current_user"]
-                rankings[leaderboard_id] = {
-                    "title": leaderboard["title"],
-                    "rank": user_info["rank"],
-                    "score": user_info["entry"]["score"] if user_info["entry"] else 0,
-                    "total_participants": leaderboard["statistics"]["total_participants"],
-                    "percentile": round((1 - (user_info["rank"] - 1) / leaderboard["statistics"]["total_participants"]) * 100, 1) if user_info["rank"] else 0,
-                    "icon": leaderboard["icon"]
-                }
+            rankings[leaderboard_id] = {
+                "title": config["title"],
+                "rank": rank,
+                "score": self._get_user_score(scores.user(position), config),
+                "total_participants": int(np.count_nonzero(values > 0)),
+                "percentile": round((1 - (rank - 1) / int(np.count_nonzero(eligible))) * 100, 1),
+                "icon": config["icon"]
+            }
                 
-        return rankings
\ No newline at end of file
+        return rankings
+    
+    def get_indexed_user_rankings(self, user_id: str, indexes: Dict[str, Any]) -> Dict[str, Any]:
+        """Get a user's rankings from the current rank index of each leaderboard they are ranked on"""
+        rankings = {}
+        
+        for leaderboard_id, index in indexes.items():
+            config = self.leaderboard_configs[leaderboard_id]
+            ranked_count = len(index) if config["type"] == LeaderboardType.STREAK else index.participants
+            rank = index.rank(user_id)
+            if rank is None or rank > ranked_count:
+                continue
+            
+            rankings[leaderboard_id] = {
+                "title": config["title"],
+                "rank": rank,
+                "score": index.score(user_id),
+                "total_participants": index.participants,
+                "percentile": round((1 - (rank - 1) / ranked_count) * 100, 1),
+                "icon": config["icon"]
+            }
+        
+        return rankings
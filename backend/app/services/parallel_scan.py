@@ -0,0 +1,220 @@
+"""
+Parallel segmented scans for DynamoDB tables
+
+A single ``scan()`` call returns at most 1 MB and stops, so callers that
+ignore ``LastEvaluatedKey`` silently see a truncated table. ``parallel_scan``
+splits the table into ``TotalSegments`` segments, pages through each one in
+a worker thread and streams the items back as an async iterator, optionally
+capped to a read-capacity budget.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_DONE = object()
+
+
+class CapacityRateLimiter:
+    """Token bucket over consumed read capacity units, shared by all segments"""
+
+    def __init__(self, units_per_second: float):
+        if units_per_second <= 0:
+            raise ValueError("units_per_second must be positive")
+        self.units_per_second = float(units_per_second)
+        self._tokens = self.units_per_second
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.units_per_second, self._tokens + (now - self._updated) * self.units_per_second)
+        self._updated = now
+
+    async def wait(self):
+        """Block until the bucket is out of debt"""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.units_per_second)
+                self._refill()
+
+    async def consume(self, units: float):
+        """Charge capacity reported by a finished request (may go into debt)"""
+        async with self._lock:
+            self._refill()
+            self._tokens -= units
+
+
+def build_scan_kwargs(
+    projection: Optional[List[str]] = None,
+    filter_expression: Any = None,
+    expression_attribute_names: Optional[Dict[str, str]] = None,
+    expression_attribute_values: Optional[Dict[str, Any]] = None,
+    page_size: Optional[int] = None,
+    select: Optional[str] = None,
+    consistent_read: bool = False,
+) -> Dict[str, Any]:
+    """
+    Build common scan() keyword arguments
+
+    Projected attribute names are always aliased (``#p0``, ``#p1``...) so
+    reserved words such as ``status`` or ``timestamp`` can be projected.
+    """
+    kwargs: Dict[str, Any] = {}
+    names = dict(expression_attribute_names or {})
+    if projection:
+        aliases = []
+        for i, attribute in enumerate(projection):
+            alias = f"#p{i}"
+            names[alias] = attribute
+            aliases.append(alias)
+        kwargs["ProjectionExpression"] = ", ".join(aliases)
+    if filter_expression is not None:
+        kwargs["FilterExpression"] = filter_expression
+    if names:
+        kwargs["ExpressionAttributeNames"] = names
+    if expression_attribute_values:
+        kwargs["ExpressionAttributeValues"] = expression_attribute_values
+    if page_size:
+        kwargs["Limit"] = page_size
+    if select:
+        kwargs["Select"] = select
+    if consistent_read:
+        kwargs["ConsistentRead"] = True
+    return kwargs
+
+
+async def scan_pages(
+    table,
+    total_segments: int = 4,
+    max_read_units_per_second: Optional[float] = None,
+    queue_size: int = 8,
+    **scan_kwargs,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream raw scan() responses from all segments of a table
+
+    Args:
+        table: boto3 DynamoDB Table resource (or anything with a compatible scan())
+        total_segments: Number of segments scanned concurrently
+        max_read_units_per_second: Optional cap on consumed read capacity
+        queue_size: Pages buffered ahead of the consumer
+        **scan_kwargs: Extra scan() arguments, see build_scan_kwargs
+
+    Yields:
+        One response dict per page, in completion order
+    """
+    if total_segments < 1:
+        raise ValueError("total_segments must be at least 1")
+
+    limiter = CapacityRateLimiter(max_read_units_per_second) if max_read_units_per_second else None
+    if limiter:
+        scan_kwargs["ReturnConsumedCapacity"] = "TOTAL"
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def scan_segment(segment: int):
+        kwargs = dict(scan_kwargs)
+        if total_segments > 1:
+            kwargs.update(Segment=segment, TotalSegments=total_segments)
+        try:
+            while True:
+                if limiter:
+                    await limiter.wait()
+                response = await asyncio.to_thread(table.scan, **kwargs)
+                if limiter:
+                    await limiter.consume(response.get("ConsumedCapacity", {}).get("CapacityUnits", 0))
+                await queue.put(response)
+                last_key = response.get("LastEvaluatedKey")
+                if not last_key:
+                    break
+                kwargs["ExclusiveStartKey"] = last_key
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_SEGMENT_DONE)
+
+    tasks = [asyncio.create_task(scan_segment(segment)) for segment in range(total_segments)]
+    try:
+        remaining = total_segments
+        while remaining:
+            page = await queue.get()
+            if page is _SEGMENT_DONE:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def parallel_scan(
+    table,
+    total_segments: int = 4,
+    projection: Optional[List[str]] = None,
+    filter_expression: Any = None,
+    expression_attribute_names: Optional[Dict[str, str]] = None,
+    expression_attribute_values: Optional[Dict[str, Any]] = None,
+    page_size: Optional[int] = None,
+    max_read_units_per_second: Optional[float] = None,
+    consistent_read: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream every item of a table using a parallel segmented scan
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        total_segments: Number of segments scanned concurrently
+        projection: Attribute names to return (all attributes when omitted)
+        filter_expression: boto3 condition or expression string applied server-side
+        expression_attribute_names: Placeholders used by filter_expression
+        expression_attribute_values: Values used by filter_expression
+        page_size: Items evaluated per request (DynamoDB Limit)
+        max_read_units_per_second: Optional cap on consumed read capacity
+        consistent_read: Use strongly consistent reads
+
+    Yields:
+        Items in no particular order
+    """
+    kwargs = build_scan_kwargs(
+        projection, filter_expression, expression_attribute_names,
+        expression_attribute_values, page_size, consistent_read=consistent_read,
+    )
+    async for page in scan_pages(table, total_segments, max_read_units_per_second, **kwargs):
+        for item in page.get("Items", []):
+            yield item
+
+
+async def count_items(
+    table,
+    total_segments: int = 4,
+    filter_expression: Any = None,
+    expression_attribute_names: Optional[Dict[str, str]] = None,
+    expression_attribute_values: Optional[Dict[str, Any]] = None,
+    max_read_units_per_second: Optional[float] = None,
+) -> int:
+    """Count items (matching an optional filter) across all pages and segments"""
+    kwargs = build_scan_kwargs(
+        filter_expression=filter_expression,
+        expression_attribute_names=expression_attribute_names,
+        expression_attribute_values=expression_attribute_values,
+        select="COUNT",
+    )
+    total = 0
+    async for page in scan_pages(table, total_segments, max_read_units_per_second, **kwargs):
+        total += page.get("Count", 0)
+    return total
+
+
+async def scan_all(table, **kwargs) -> List[Dict[str, Any]]:
+    """Collect a parallel_scan into a list (for callers that need every item)"""
+    return [item async for item in parallel_scan(table, **kwargs)]
@@ -0,0 +1,200 @@
+"""
+Peer-cohort index for CarbonTrack "people like you" comparisons
+
+Each active user is represented by their emissions over the last 30 days,
+split by category, as one row of a float32 matrix per region. Users are
+similar when their category mix is similar (cosine similarity of the
+rows). That compares a commuter with other commuters, and a
+heavy-heating household with other households like it, rather than with
+a national average.
+
+Exact search is a single matrix-vector product, which is fine for tens of
+thousands of users. For larger regions, rows are bucketed by random
+hyperplanes through the mean mix (random-projection LSH). A lookup scores
+only the query's bucket and the buckets one bit away, so about
+``(bits + 1) * target_bucket`` rows instead of the whole region. The
+nightly precompute job publishes one snapshot per region, plus a
+``global`` one, through ``RankIndexStore``.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PEER_CATEGORIES = ("transportation", "energy", "food", "waste", "other")
+GLOBAL_REGION = "global"
+
+# Regions up to this size are searched exactly
+EXACT_SEARCH_MAX_USERS = 20000
+# Rows per bucket the projection aims for
+_TARGET_BUCKET = 1000
+
+
+def index_key(region: str) -> str:
+    """RankIndexStore key of a region's snapshot"""
+    return f"peers#{region}"
+
+
+def breakdown_vector(category_totals: Mapping[str, float]) -> np.ndarray:
+    """kg CO₂e per PEER_CATEGORIES entry (categories outside the list count as other)"""
+    vector = np.zeros(len(PEER_CATEGORIES), dtype=np.float32)
+    for category, co2 in category_totals.items():
+        position = PEER_CATEGORIES.index(category) if category in PEER_CATEGORIES else len(PEER_CATEGORIES) - 1
+        vector[position] += float(co2)
+    return vector
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class PeerIndex:
+    """Nearest neighbours by category mix among one region's users"""
+
+    def __init__(self, user_ids: Sequence[str], breakdowns: np.ndarray, seed: int = 7):
+        breakdowns = np.asarray(breakdowns, dtype=np.float32).reshape(-1, len(PEER_CATEGORIES))
+        unit = _unit_rows(breakdowns)
+        size = len(breakdowns)
+        self.bits = 0 if size <= EXACT_SEARCH_MAX_USERS else min(16, int(np.log2(size / _TARGET_BUCKET)))
+        self.center = unit.mean(axis=0) if size else np.zeros(len(PEER_CATEGORIES), dtype=np.float32)
+        self.planes = np.random.default_rng(seed).normal(size=(self.bits, len(PEER_CATEGORIES))).astype(np.float32)
+
+        # Rows are stored sorted by bucket, so each bucket is a contiguous slice
+        codes = self._codes(unit)
+        order = np.argsort(codes, kind="stable")
+        self.user_ids = [user_ids[i] for i in order]
+        self.breakdowns = breakdowns[order]
+        self.unit = unit[order]
+        self.totals = self.breakdowns.sum(axis=1)
+        self.bucket_bounds = np.searchsorted(codes[order], np.arange((1 << self.bits) + 1))
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def _codes(self, unit: np.ndarray) -> np.ndarray:
+        if not self.bits:
+            return np.zeros(len(unit), dtype=np.int64)
+        above = (unit - self.center) @ self.planes.T > 0
+        return above.astype(np.int64) @ (1 << np.arange(self.bits, dtype=np.int64))
+
+    def _scored_candidates(self, query: np.ndarray, wanted: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (rows, similarities) for the query's bucket and those one bit away
+
+        Falls back to every row if those buckets hold too few users.
+        """
+        if self.bits:
+            code = int(self._codes(query[None, :])[0])
+            slices = [
+                (int(self.bucket_bounds[p]), int(self.bucket_bounds[p + 1]))
+                for p in [code] + [code ^ (1 << bit) for bit in range(self.bits)]
+            ]
+            slices = [(start, stop) for start, stop in slices if stop > start]
+            if sum(stop - start for start, stop in slices) >= wanted:
+                # Buckets are contiguous, so each is scored through a view without copying rows
+                rows = np.concatenate([np.arange(start, stop) for start, stop in slices])
+                similarity = np.concatenate([self.unit[start:stop] @ query for start, stop in slices])
+                return rows, similarity
+        return np.arange(len(self)), self.unit @ query
+
+    def neighbours(self, breakdown: np.ndarray, k: int = 50, exclude: Optional[str] = None) -> np.ndarray:
+        """Rows of the ``k`` users whose category mix is most like ``breakdown``, most similar first"""
+        query = _unit_rows(np.asarray(breakdown, dtype=np.float32))
+        rows, similarity = self._scored_candidates(query, k + 1)
+        if len(rows) > k + 1:
+            top = np.argpartition(-similarity, k + 1)[:k + 1]
+            rows, similarity = rows[top], similarity[top]
+        rows = rows[np.argsort(-similarity, kind="stable")]
+        if exclude is not None:
+            rows = rows[[self.user_ids[row] != exclude for row in rows]]
+        return rows[:k]
+
+    def compare(self, category_totals: Mapping[str, float], k: int = 50, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        How a user's last 30 days compare with the ``k`` users most like them
+
+        Args:
+            category_totals: The user's kg CO₂e per category over the window
+            k: Cohort size
+            user_id: Left out of their own cohort
+
+        Returns:
+            Cohort figures and a savings estimate, or None without emissions or peers
+        """
+        breakdown = breakdown_vector(category_totals)
+        total = float(breakdown.sum())
+        rows = self.neighbours(breakdown, k, exclude=user_id) if total > 0 else np.zeros(0, dtype=np.int64)
+        if not len(rows):
+            return None
+        peer_totals = self.totals[rows]
+        peer_mean = self.breakdowns[rows].mean(axis=0)
+        median = float(np.median(peer_totals))
+        return {
+            "peers": int(len(rows)),
+            "your_total_kg": round(total, 2),
+            "peer_median_kg": round(median, 2),
+            # Share of the cohort emitting more than the user
+            "better_than_percent": round(float((peer_totals > total).mean() * 100), 1),
+            "category_gap_kg": {
+                category: round(float(gap), 2) for category, gap in zip(PEER_CATEGORIES, breakdown - peer_mean)
+            },
+            # Reaching the cohort median is a demonstrated, realistic target
+            "estimated_savings_kg": round(max(0.0, total - median), 2),
+        }
+
+
+def peer_insights(comparison: Optional[Dict[str, Any]]) -> List[str]:
+    """Insight lines for a peer comparison"""
+    if not comparison:
+        return []
+    insights = []
+    if comparison["estimated_savings_kg"] > 0:
+        insights.append(
+            f"People with a footprint like yours emit {comparison['peer_median_kg']:.0f} kg a month; "
+            f"matching them would save {comparison['estimated_savings_kg']:.0f} kg"
+        )
+    else:
+        insights.append(f"You emit less than {comparison['better_than_percent']:.0f}% of people with a footprint like yours")
+    category, gap = max(comparison["category_gap_kg"].items(), key=lambda pair: pair[1])
+    if gap > 0:
+        insights.append(f"Your {category} emissions are {gap:.0f} kg above similar users")
+    return insights
+
+
+class PeerIndexCache:
+    """Published peer indexes by region, reloaded at most once per refresh interval"""
+
+    def __init__(self, refresh_seconds: float = 3600):
+        self.refresh_seconds = refresh_seconds
+        self._indexes: Dict[str, Tuple[float, Optional[PeerIndex]]] = {}
+
+    async def get(
+        self,
+        region: str,
+        load: Callable[[str], Optional[Tuple[List[str], np.ndarray]]],
+    ) -> Optional[PeerIndex]:
+        """The region's index, calling ``load`` (in a thread) with its snapshot key when due a reload"""
+        now = time.monotonic()
+        cached = self._indexes.get(region)
+        if cached is None or now - cached[0] >= self.refresh_seconds:
+            index = cached[1] if cached else None
+            try:
+                snapshot = await asyncio.to_thread(load, index_key(region))
+                index = PeerIndex(*snapshot) if snapshot else None
+            except Exception as e:
+                logger.error(f"Error loading peer index for {region}: {e}")
+            cached = (now, index)
+            self._indexes[region] = cached
+        return cached[1]
+
+
+# Global instance
+peer_index_cache = PeerIndexCache(settings.recommendation_model_refresh_seconds)
@@ -0,0 +1,203 @@
+"""
+Points ledger for CarbonTrack
+
+Every point a user earns (logged activities, completed challenges,
+achievements, manual adjustments) is appended to the points ledger table
+as one row keyed by its source and an idempotency key, in the same
+transaction that bumps the running totals on the user item. Replaying a
+write is therefore a no-op, balances and period points stay O(1) reads,
+and the ledger remains an auditable history.
+
+Rows older than the retention window are rolled into one summary row per
+user and month by the compaction job, so the table does not grow without
+bound. Idempotency keys are honoured for as long as their row is kept.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from boto3.dynamodb.conditions import Attr
+
+from app.services.parallel_scan import parallel_scan
+
+logger = logging.getLogger(__name__)
+
+POINT_SOURCES = ("activity", "challenge", "achievement", "adjustment")
+
+ENTRY_PREFIX = "txn#"
+SUMMARY_PREFIX = "summary#"
+
+# DynamoDB caps a transaction at 100 actions: one summary update plus the row deletes
+MAX_ROWS_PER_TRANSACTION = 99
+
+
+def entry_key(source: str, idempotency_key: str) -> str:
+    """Sort key of a ledger row; the same source and key always map to the same row"""
+    if source not in POINT_SOURCES:
+        raise ValueError(f"Unknown points source: {source}")
+    return f"{ENTRY_PREFIX}{source}#{idempotency_key}"
+
+
+def summary_key(month: str) -> str:
+    """Sort key of the compacted summary row for a YYYY-MM month"""
+    return f"{SUMMARY_PREFIX}{month}"
+
+
+def ledger_item(
+    user_id: str,
+    points: int,
+    source: str,
+    idempotency_key: str,
+    co2_reduced: float = 0,
+    day: Optional[date] = None,
+    reference: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build one ledger row"""
+    now = datetime.utcnow()
+    item = {
+        "user_id": user_id,
+        "entry_key": entry_key(source, idempotency_key),
+        "source": source,
+        "idempotency_key": idempotency_key,
+        "points": int(points),
+        "co2_reduced": Decimal(str(co2_reduced)),
+        "day": (day or now.date()).isoformat(),
+        "created_at": now.isoformat(),
+    }
+    if reference:
+        item["reference"] = reference
+    return item
+
+
+def summarize_rows(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Group ledger rows into per-month totals
+
+    Returns:
+        Month (YYYY-MM) -> points, co2_reduced, entries, points per source
+        and the entry keys that were summarized
+    """
+    months: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        month = str(row["day"])[:7]
+        summary = months.setdefault(month, {
+            "points": 0,
+            "co2_reduced": Decimal("0"),
+            "entries": 0,
+            "by_source": {},
+            "entry_keys": [],
+        })
+        points = int(row.get("points", 0))
+        summary["points"] += points
+        summary["co2_reduced"] += Decimal(str(row.get("co2_reduced", 0)))
+        summary["entries"] += 1
+        source = row.get("source", "adjustment")
+        summary["by_source"][source] = summary["by_source"].get(source, 0) + points
+        summary["entry_keys"].append(row["entry_key"])
+    return months
+
+
+def format_summary(item: Dict[str, Any]) -> Dict[str, Any]:
+    """API shape of a stored summary row"""
+    return {
+        "month": item["entry_key"][len(SUMMARY_PREFIX):],
+        "points": int(item.get("points", 0)),
+        "co2_reduced": float(item.get("co2_reduced", 0)),
+        "entries": int(item.get("entries", 0)),
+        "by_source": {
+            source: int(item[f"points_{source}"]) for source in POINT_SOURCES if item.get(f"points_{source}")
+        },
+    }
+
+
+def format_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    """API shape of a ledger row"""
+    entry = {
+        "source": item.get("source"),
+        "idempotency_key": item.get("idempotency_key"),
+        "points": int(item.get("points", 0)),
+        "co2_reduced": float(item.get("co2_reduced", 0)),
+        "day": item.get("day"),
+        "created_at": item.get("created_at"),
+    }
+    if item.get("reference"):
+        entry["reference"] = item["reference"]
+    return entry
+
+
+# ====================
+# COMPACTION JOB
+# ====================
+
+@dataclass
+class CompactionStats:
+    """Progress snapshot passed to progress callbacks and returned at the end"""
+    users_compacted: int = 0
+    rows_compacted: int = 0
+    summaries_updated: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+async def run_compaction(
+    service,
+    retention_days: int = 90,
+    today: Optional[date] = None,
+    total_segments: int = 8,
+    max_read_units_per_second: Optional[float] = None,
+    progress: Optional[Callable[[CompactionStats], None]] = None,
+) -> CompactionStats:
+    """
+    Roll ledger rows older than the retention window into monthly summaries
+
+    Args:
+        service: DynamoDBService whose points ledger is compacted
+        retention_days: Days of individual rows to keep
+        today: Reference day (defaults to today, UTC)
+        total_segments: Parallel scan segments
+        max_read_units_per_second: Optional read capacity cap for the scan
+        progress: Called with a CompactionStats snapshot after each user
+
+    Returns:
+        Final CompactionStats; failed users are listed in ``errors`` and
+        can be retried by running the job again
+    """
+    cutoff = (today or datetime.utcnow().date()) - timedelta(days=retention_days)
+    started = time.monotonic()
+    stats = CompactionStats()
+
+    # Only the keys of rows past the cutoff are needed to find the users to compact
+    users = set()
+    async for item in parallel_scan(
+        service.points_ledger_table,
+        total_segments,
+        projection=["user_id"],
+        filter_expression=Attr("entry_key").begins_with(ENTRY_PREFIX) & Attr("day").lt(cutoff.isoformat()),
+        max_read_units_per_second=max_read_units_per_second,
+    ):
+        users.add(item["user_id"])
+
+    for user_id in sorted(users):
+        try:
+            result = await service.compact_points_ledger(user_id, cutoff)
+        except Exception as e:
+            logger.error(f"Error compacting points ledger for {user_id}: {e}")
+            stats.errors.append(f"{user_id}: {e}")
+            continue
+        stats.users_compacted += 1
+        stats.rows_compacted += result["rows"]
+        stats.summaries_updated += result["summaries"]
+        elapsed = time.monotonic() - started
+        stats.elapsed_seconds = elapsed
+        stats.rows_per_second = stats.rows_compacted / elapsed if elapsed > 0 else 0.0
+        if progress:
+            progress(stats)
+
+    stats.elapsed_seconds = time.monotonic() - started
+    stats.rows_per_second = stats.rows_compacted / stats.elapsed_seconds if stats.elapsed_seconds > 0 else 0.0
+    return stats
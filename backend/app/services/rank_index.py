@@ -0,0 +1,722 @@
+"""
+Incremental rank indexes for CarbonTrack leaderboards
+
+Each leaderboard keeps one ``RankIndex`` per period bucket (today, this ISO
+week, this month, all time). Indexes are updated as points, activities and
+CO₂ reductions are recorded, and answer top-N, rank-of-user and
+neighbours-around-me queries in logarithmic time without re-reading every
+user. Indexes are snapshotted to the leaderboards table in compact chunks
+and reloaded on startup; when a snapshot is missing, and periodically after
+that, the current periods are rebuilt from the durable totals and counters
+on the users table.
+"""
+
+import logging
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from boto3.dynamodb.conditions import Key
+
+from app.services.activity_counters import ActivityCalendar, DailyCounters
+from app.services.leaderboard_engine import LeaderboardEngine, LeaderboardPeriod, LeaderboardType, score_field
+from app.services.parallel_scan import parallel_scan
+
+logger = logging.getLogger(__name__)
+
+# Recorded stat -> leaderboard type it feeds
+STAT_TYPES = {
+    "points": LeaderboardType.POINTS,
+    "activities": LeaderboardType.ACTIVITIES,
+    "co2_reduced": LeaderboardType.CARBON_REDUCTION,
+}
+
+# Boards kept as rank indexes. Goal completions are not recorded anywhere
+# yet, so goals boards are not indexed and read as empty.
+INDEXED_TYPES = set(STAT_TYPES.values()) | {LeaderboardType.STREAK}
+
+# Users-table attributes a rebuild reads
+REBUILD_PROJECTION = ["userId", "total_points", "entries_count", "total_co2_reduced",
+                      "daily_counters", "activity_calendar"]
+
+
+# ====================
+# ORDER STATISTICS
+# ====================
+
+class OrderStatisticList:
+    """
+    Sorted list with positional access
+
+    Keys live in sorted blocks of roughly ``load`` items; a Fenwick tree
+    over block lengths maps positions to blocks. add/remove/index/select
+    cost O(log n) block lookups plus a memmove inside one block.
+    """
+
+    def __init__(self, keys: Iterable[Any] = (), load: int = 512):
+        self._load = load
+        self._blocks: List[List[Any]] = []
+        self._maxes: List[Any] = []
+        self._tree: List[int] = [0]
+        self._len = 0
+        ordered = sorted(keys)
+        if ordered:
+            self._blocks = [ordered[i:i + load] for i in range(0, len(ordered), load)]
+            self._maxes = [block[-1] for block in self._blocks]
+            self._len = len(ordered)
+            self._rebuild_tree()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _rebuild_tree(self):
+        tree = [0] * (len(self._blocks) + 1)
+        for i, block in enumerate(self._blocks, start=1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, block_index: int, delta: int):
+        i = block_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, block_index: int) -> int:
+        """Number of keys in blocks before block_index"""
+        total = 0
+        i = block_index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """(block, offset) of the key at a position"""
+        position = 0
+        remaining = index
+        step = 1 << (len(self._blocks).bit_length() - 1) if self._blocks else 0
+        while step:
+            candidate = position + step
+            if candidate < len(self._tree) and self._tree[candidate] <= remaining:
+                position = candidate
+                remaining -= self._tree[candidate]
+            step >>= 1
+        return position, remaining
+
+    def add(self, key: Any):
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._rebuild_tree()
+            return
+        b = bisect_left(self._maxes, key)
+        if b == len(self._blocks):
+            b -= 1
+            self._blocks[b].append(key)
+            self._maxes[b] = key
+        else:
+            insort(self._blocks[b], key)
+        self._len += 1
+        block = self._blocks[b]
+        if len(block) > 2 * self._load:
+            half = len(block) // 2
+            self._blocks[b:b + 1] = [block[:half], block[half:]]
+            self._maxes[b:b + 1] = [block[half - 1], block[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(b, 1)
+
+    def _find(self, key: Any) -> Tuple[int, int]:
+        b = bisect_left(self._maxes, key)
+        if b < len(self._blocks):
+            i = bisect_left(self._blocks[b], key)
+            if i < len(self._blocks[b]) and self._blocks[b][i] == key:
+                return b, i
+        raise ValueError(f"{key!r} is not in list")
+
+    def remove(self, key: Any):
+        b, i = self._find(key)
+        block = self._blocks[b]
+        del block[i]
+        self._len -= 1
+        if block:
+            self._maxes[b] = block[-1]
+            self._tree_add(b, -1)
+        else:
+            del self._blocks[b]
+            del self._maxes[b]
+            self._rebuild_tree()
+
+    def index(self, key: Any) -> int:
+        b, i = self._find(key)
+        return self._prefix(b) + i
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("list index out of range")
+        b, offset = self._locate(index)
+        return self._blocks[b][offset]
+
+    def islice(self, start: int, stop: int) -> Iterator[Any]:
+        """Keys at positions [start, stop)"""
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return
+        b, offset = self._locate(start)
+        remaining = stop - start
+        while remaining:
+            chunk = self._blocks[b][offset:offset + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            b, offset = b + 1, 0
+
+    def __iter__(self) -> Iterator[Any]:
+        for block in self._blocks:
+            yield from block
+
+
+class RankIndex:
+    """
+    Scores of one leaderboard period, ordered best first
+
+    Ordering is by score descending, then user_id, so ranks are stable and
+    identical after a snapshot round trip.
+    """
+
+    def __init__(self, user_ids: Sequence[str] = (), scores: Sequence[float] = ()):
+        self._scores: Dict[str, float] = {uid: float(score) for uid, score in zip(user_ids, scores)}
+        self._order = OrderStatisticList((-score, uid) for uid, score in self._scores.items())
+        self.total = float(sum(self._scores.values()))
+        self.participants = sum(1 for score in self._scores.values() if score > 0)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._scores
+
+    def score(self, user_id: str) -> Optional[float]:
+        return self._scores.get(user_id)
+
+    def set_score(self, user_id: str, score: float) -> float:
+        score = float(score)
+        previous = self._scores.get(user_id)
+        if previous == score:
+            return score
+        if previous is not None:
+            self._order.remove((-previous, user_id))
+            self.total -= previous
+            self.participants -= previous > 0
+        self._scores[user_id] = score
+        self._order.add((-score, user_id))
+        self.total += score
+        self.participants += score > 0
+        return score
+
+    def increment(self, user_id: str, delta: float) -> float:
+        return self.set_score(user_id, self._scores.get(user_id, 0.0) + float(delta))
+
+    def remove(self, user_id: str):
+        score = self._scores.pop(user_id, None)
+        if score is not None:
+            self._order.remove((-score, user_id))
+            self.total -= score
+            self.participants -= score > 0
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based rank, or None if the user has no score"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._order.index((-score, user_id)) + 1
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[str, float]]:
+        """(user_id, score) for ranks offset+1 .. offset+limit"""
+        return [(uid, -neg) for neg, uid in self._order.islice(offset, offset + limit)]
+
+    def around(self, user_id: str, radius: int) -> List[Tuple[int, str, float]]:
+        """(rank, user_id, score) for the user and up to ``radius`` neighbours each side"""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return [
+            (start + i + 1, uid, -neg)
+            for i, (neg, uid) in enumerate(self._order.islice(start, rank + radius))
+        ]
+
+    def to_arrays(self) -> Tuple[List[str], np.ndarray]:
+        """User ids and float64 scores in rank order"""
+        ordered = list(self._order)
+        return [uid for _, uid in ordered], np.fromiter((-neg for neg, _ in ordered), np.float64, len(ordered))
+
+
+def period_key(period: LeaderboardPeriod, when: Optional[datetime] = None) -> str:
+    """Bucket a timestamp falls into for a leaderboard period"""
+    when = when or datetime.utcnow()
+    if period == LeaderboardPeriod.DAILY:
+        return when.strftime("%Y-%m-%d")
+    if period == LeaderboardPeriod.WEEKLY:
+        year, week, _ = when.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == LeaderboardPeriod.MONTHLY:
+        return when.strftime("%Y-%m")
+    return "all_time"
+
+
+class RankSnapshot:
+    """
+    Final ranks of a finished leaderboard period
+
+    Stored as user ids sorted by id plus an aligned int32 rank array, so
+    previous_rank is a binary search rather than a recomputation of the
+    previous period.
+    """
+
+    def __init__(self, user_ids: Sequence[str], ranks: Sequence[int], source: str = ""):
+        self.user_ids = list(user_ids)
+        self.ranks = np.asarray(ranks, dtype=np.int32)
+        self.source = source
+
+    @classmethod
+    def from_ranking(cls, ranked_user_ids: Sequence[str], source: str = "") -> "RankSnapshot":
+        """Build from user ids listed best first"""
+        order = sorted(range(len(ranked_user_ids)), key=ranked_user_ids.__getitem__)
+        return cls([ranked_user_ids[i] for i in order], np.asarray(order, dtype=np.int32) + 1, source)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def rank(self, user_id: str) -> Optional[int]:
+        i = bisect_left(self.user_ids, user_id)
+        if i < len(self.user_ids) and self.user_ids[i] == user_id:
+            return int(self.ranks[i])
+        return None
+
+
+# ====================
+# PERSISTENCE
+# ====================
+
+class RankIndexStore:
+    """
+    Snapshots of rank indexes in the leaderboards table
+
+    A snapshot is a ``meta`` item plus data chunks keyed
+    ``<snapshot_id>#<n>``, each holding newline-joined user ids and
+    zlib-compressed scores (float64 by default; a 2-D array stores one row
+    of values per user). The meta item is written last and
+    names the live snapshot, so readers never see a half-written one;
+    chunks of the replaced snapshot are deleted afterwards.
+    """
+
+    META = "meta"
+
+    def __init__(self, table, chunk_users: int = 5000):
+        self.table = table
+        self.chunk_users = chunk_users
+
+    def _chunks(self, index_key: str, snapshot_id: str) -> List[Dict[str, Any]]:
+        items = []
+        kwargs = {"KeyConditionExpression": Key("index_key").eq(index_key) & Key("chunk").begins_with(f"{snapshot_id}#")}
+        while True:
+            response = self.table.query(**kwargs)
+            items.extend(response.get("Items", []))
+            if not response.get("LastEvaluatedKey"):
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def save(self, index_key: str, user_ids: List[str], scores: np.ndarray, dtype: str = "<f8", **attributes) -> str:
+        """Write a snapshot and make it the live one; returns the snapshot id
+
+        Extra keyword attributes are stored on the meta item (see load_meta).
+        """
+        scores = np.asarray(scores)
+        if scores.ndim == 2:
+            attributes["columns"] = scores.shape[1]
+        if dtype != "<f8":
+            attributes["dtype"] = dtype
+        previous = self.table.get_item(Key={"index_key": index_key, "chunk": self.META}).get("Item")
+        snapshot_id = str(time.time_ns())
+        chunk_count = 0
+        with self.table.batch_writer() as batch:
+            for chunk_count, start in enumerate(range(0, len(user_ids), self.chunk_users), start=1):
+                stop = start + self.chunk_users
+                batch.put_item(Item={
+                    "index_key": index_key,
+                    "chunk": f"{snapshot_id}#{chunk_count - 1:05d}",
+                    "user_ids": "\n".join(user_ids[start:stop]),
+                    "scores": zlib.compress(np.ascontiguousarray(scores[start:stop], dtype=dtype).tobytes()),
+                })
+        self.table.put_item(Item={
+            "index_key": index_key,
+            "chunk": self.META,
+            "snapshot_id": snapshot_id,
+            "chunks": chunk_count,
+            "size": len(user_ids),
+            "saved_at": datetime.utcnow().isoformat(),
+            **attributes,
+        })
+        if previous:
+            with self.table.batch_writer() as batch:
+                for item in self._chunks(index_key, previous["snapshot_id"]):
+                    batch.delete_item(Key={"index_key": index_key, "chunk": item["chunk"]})
+        return snapshot_id
+
+    def load_meta(self, index_key: str) -> Optional[Dict[str, Any]]:
+        """Meta item of the live snapshot"""
+        return self.table.get_item(Key={"index_key": index_key, "chunk": self.META}).get("Item")
+
+    def load(self, index_key: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """User ids and scores of the live snapshot, or None if there is none"""
+        meta = self.load_meta(index_key)
+        if not meta:
+            return None
+        chunks = sorted(self._chunks(index_key, meta["snapshot_id"]), key=lambda item: item["chunk"])
+        if len(chunks) != int(meta["chunks"]):
+            raise ValueError(f"Snapshot {meta['snapshot_id']} of {index_key} is incomplete")
+        dtype = meta.get("dtype", "<f8")
+        shape = (-1, int(meta["columns"])) if "columns" in meta else (-1,)
+        user_ids: List[str] = []
+        parts = []
+        for item in chunks:
+            ids = item["user_ids"].split("\n") if item["user_ids"] else []
+            values = np.frombuffer(zlib.decompress(bytes(item["scores"])), dtype=dtype).reshape(shape)
+            if len(ids) != len(values):
+                raise ValueError(f"Corrupt chunk {item['chunk']} of {index_key}")
+            user_ids.extend(ids)
+            parts.append(values)
+        scores = np.concatenate(parts) if parts else np.zeros((0,) + shape[1:], dtype=dtype)
+        return user_ids, scores
+
+
+def default_store() -> RankIndexStore:
+    """Store backed by the configured leaderboards table"""
+    from app.services.dynamodb_service import dynamodb_service
+    return RankIndexStore(dynamodb_service.leaderboards_table)
+
+
+# ====================
+# LEADERBOARD INDEXES
+# ====================
+
+@dataclass
+class PendingSnapshot:
+    """A copy of one changed index (or previous ranks), taken for writing elsewhere"""
+    store_key: str
+    user_ids: List[str]
+    scores: np.ndarray
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    leaderboard_id: Optional[str] = None  # Set for previous-rank snapshots
+
+
+def user_scores(user: Dict[str, Any], today) -> Dict[str, float]:
+    """Leaderboard stats of one users-table item, from its totals, daily counters and activity calendar"""
+    calendar = ActivityCalendar.from_bytes(user.get("activity_calendar"))
+    stats = {
+        "total_points": float(user.get("total_points", 0) or 0),
+        "total_activities": float(user.get("entries_count", 0) or 0),
+        "total_co2_reduced": float(user.get("total_co2_reduced", 0) or 0),
+        "current_streak": float(calendar.streak_info(today)["current_streak"]),
+    }
+    stats.update(DailyCounters.from_bytes(user.get("daily_counters")).period_totals(today))
+    return stats
+
+
+class LeaderboardIndex:
+    """
+    All rank indexes, one per (leaderboard, period bucket)
+
+    At every period boundary (and hourly for all-time boards, following
+    LeaderboardEngine's update schedule) the final ranking of the finished
+    period is frozen into a RankSnapshot, which supplies previous_rank for
+    the current period.
+
+    Indexes live in the process that records into them, and a snapshot
+    replaces the stored copy of an index wholesale. With several worker
+    processes the last snapshot written wins and drops the other workers'
+    updates, so snapshots assume a single writer: run one worker, or enable
+    leaderboard_snapshots_enabled on one worker only. Rebuilding from the
+    users table (see rebuild) brings every worker back to the durable totals.
+    """
+
+    def __init__(self, configs: Optional[Dict[str, Dict[str, Any]]] = None, store: Optional[RankIndexStore] = None):
+        self.engine = LeaderboardEngine()
+        self.configs = configs or {
+            leaderboard_id: config for leaderboard_id, config in self.engine.leaderboard_configs.items()
+            if config["type"] in INDEXED_TYPES
+        }
+        self.store = store
+        self._indexes: Dict[str, RankIndex] = {}
+        self._dirty: Set[str] = set()
+        self._previous: Dict[str, RankSnapshot] = {}
+        self._previous_dirty: Set[str] = set()
+        self._next_rollover: Dict[str, datetime] = {}
+        # Serializes snapshot writes, which may run on worker threads
+        self._write_lock = threading.Lock()
+
+    def key(self, leaderboard_id: str, when: Optional[datetime] = None) -> str:
+        return f"{leaderboard_id}#{period_key(self.configs[leaderboard_id]['period'], when)}"
+
+    def _previous_period_key(self, leaderboard_id: str, when: datetime) -> str:
+        """Key of the period right before the one containing ``when``"""
+        start = self.engine._get_period_start(self.configs[leaderboard_id]["period"], when)
+        return self.key(leaderboard_id, start - timedelta(microseconds=1))
+
+    def get(self, leaderboard_id: str, when: Optional[datetime] = None) -> RankIndex:
+        """Index of the period containing ``when`` (now by default); boards not indexed are empty"""
+        if leaderboard_id not in self.configs:
+            return RankIndex()
+        key = self.key(leaderboard_id, when)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = RankIndex()
+        return index
+
+    def ranked_user_ids(self, leaderboard_id: str, index: RankIndex) -> List[str]:
+        """User ids that hold a rank, best first (zero scores only rank on streak boards)"""
+        ranked = len(index) if self.configs[leaderboard_id]["type"] == LeaderboardType.STREAK else index.participants
+        return [user_id for user_id, _ in index.top(ranked)]
+
+    def record(self, user_id: str, points: float = 0, activities: int = 0,
+               co2_reduced: float = 0, when: Optional[datetime] = None) -> None:
+        """Add a user's new points / activities / CO₂ reduction to every board they feed"""
+        deltas = {
+            STAT_TYPES["points"]: points,
+            STAT_TYPES["activities"]: activities,
+            STAT_TYPES["co2_reduced"]: co2_reduced,
+        }
+        for leaderboard_id, config in self.configs.items():
+            delta = deltas.get(config["type"])
+            if delta:
+                self.get(leaderboard_id, when).increment(user_id, delta)
+                self._dirty.add(self.key(leaderboard_id, when))
+
+    def retract(self, user_id: str, written: datetime, points: float = 0, activities: int = 0,
+                co2_reduced: float = 0, now: Optional[datetime] = None) -> None:
+        """
+        Take back stats recorded at ``written`` (a deleted entry's write time)
+
+        Only the current period and finished periods still held are changed;
+        pruned periods keep the ranks they were frozen with.
+        """
+        deltas = {
+            STAT_TYPES["points"]: -points,
+            STAT_TYPES["activities"]: -activities,
+            STAT_TYPES["co2_reduced"]: -co2_reduced,
+        }
+        for leaderboard_id, config in self.configs.items():
+            delta = deltas.get(config["type"])
+            key = self.key(leaderboard_id, written)
+            if delta and (key in self._indexes or key == self.key(leaderboard_id, now)):
+                self.get(leaderboard_id, written).increment(user_id, delta)
+                self._dirty.add(key)
+
+    def set_score(self, leaderboard_id: str, user_id: str, score: float,
+                  when: Optional[datetime] = None) -> None:
+        """Set an absolute score"""
+        self.get(leaderboard_id, when).set_score(user_id, score)
+        self._dirty.add(self.key(leaderboard_id, when))
+
+    def set_streak(self, user_id: str, current_streak: int, when: Optional[datetime] = None) -> None:
+        """
+        Set a user's current streak on every streak board
+
+        Called with the streak a write leaves on the user's activity calendar.
+        Streaks that lapse without a write, or change with an edited entry's
+        date, are corrected by the next rebuild.
+        """
+        for leaderboard_id, config in self.configs.items():
+            if config["type"] == LeaderboardType.STREAK:
+                self.set_score(leaderboard_id, user_id, current_streak, when)
+
+    def rebuild(self, users: Iterable[Dict[str, Any]], when: Optional[datetime] = None) -> int:
+        """
+        Replace the current period of every board with scores derived from users-table items
+
+        Period scores come from each user's daily counters, all-time scores
+        from their totals and streaks from their activity calendar, so the
+        result matches what the live path recorded. Every user with entries
+        holds a streak rank, as on the streak boards generate_leaderboard builds.
+
+        Returns:
+            Users read
+        """
+        now = when or datetime.utcnow()
+        today = now.date()
+        fields = {leaderboard_id: score_field(config) for leaderboard_id, config in self.configs.items()}
+        columns: Dict[str, Tuple[List[str], List[float]]] = {leaderboard_id: ([], []) for leaderboard_id in self.configs}
+        count = 0
+        for user in users:
+            stats = user_scores(user, today)
+            for leaderboard_id, field_name in fields.items():
+                score = stats.get(field_name, 0)
+                streak = self.configs[leaderboard_id]["type"] == LeaderboardType.STREAK
+                if score > 0 or (streak and stats["total_activities"] > 0):
+                    user_ids, scores = columns[leaderboard_id]
+                    user_ids.append(user["userId"])
+                    scores.append(score)
+            count += 1
+        for leaderboard_id, (user_ids, scores) in columns.items():
+            key = self.key(leaderboard_id, now)
+            self._indexes[key] = RankIndex(user_ids, scores)
+            self._dirty.add(key)
+        return count
+
+    async def rebuild_from_table(self, users_table=None, total_segments: int = 4,
+                                 when: Optional[datetime] = None) -> int:
+        """
+        Rebuild from a parallel scan of the users table (the configured one by default)
+
+        Points recorded into the live index while the scan runs may be left
+        out until the next rebuild.
+        """
+        if users_table is None:
+            from app.services.dynamodb_service import dynamodb_service
+            users_table = dynamodb_service.users_table
+        users = [user async for user in parallel_scan(users_table, total_segments, projection=REBUILD_PROJECTION)]
+        return self.rebuild(users, when)
+
+    def roll_over(self, when: Optional[datetime] = None) -> List[str]:
+        """
+        Freeze the previous period's ranks of every board whose boundary has passed
+
+        Returns:
+            Leaderboard ids that rolled over
+        """
+        now = when or datetime.utcnow()
+        rolled = []
+        for leaderboard_id, config in self.configs.items():
+            due = self._next_rollover.get(leaderboard_id)
+            if due is not None and now >= due:
+                source = self._previous_period_key(leaderboard_id, now)
+                finished = self._indexes.get(source)
+                ranking = self.ranked_user_ids(leaderboard_id, finished) if finished is not None else []
+                self._previous[leaderboard_id] = RankSnapshot.from_ranking(ranking, source)
+                self._previous_dirty.add(leaderboard_id)
+                rolled.append(leaderboard_id)
+            if due is None or now >= due:
+                self._next_rollover[leaderboard_id] = self.engine._get_next_update_time(config["period"], now)
+        return rolled
+
+    def previous_ranks(self, leaderboard_id: str, when: Optional[datetime] = None) -> Optional[RankSnapshot]:
+        """Ranks at the end of the previous period (rolling over first if a boundary passed)"""
+        self.roll_over(when)
+        return self._previous.get(leaderboard_id)
+
+    def prune(self, when: Optional[datetime] = None) -> List[str]:
+        """Drop indexes of finished periods; returns their keys"""
+        self.roll_over(when)
+        current = {self.key(leaderboard_id, when) for leaderboard_id in self.configs}
+        stale = [key for key in self._indexes if key not in current]
+        for key in stale:
+            del self._indexes[key]
+            self._dirty.discard(key)
+        return stale
+
+    def take_snapshot(self) -> List[PendingSnapshot]:
+        """
+        Copy every index and rank snapshot changed since the last call and mark them clean
+
+        Cheap enough for the event loop; the copies can then be written from
+        a worker thread with write_snapshot while recording carries on.
+        """
+        pending = []
+        for key in sorted(self._dirty):
+            index = self._indexes.get(key)
+            if index is not None:
+                pending.append(PendingSnapshot(key, *index.to_arrays()))
+        self._dirty.clear()
+        for leaderboard_id in sorted(self._previous_dirty):
+            previous = self._previous[leaderboard_id]
+            pending.append(PendingSnapshot(
+                f"{leaderboard_id}#previous", list(previous.user_ids), previous.ranks.astype(np.float64),
+                {"source": previous.source}, leaderboard_id
+            ))
+        self._previous_dirty.clear()
+        return pending
+
+    def write_snapshot(
+        self,
+        pending: List[PendingSnapshot],
+        store: Optional[RankIndexStore] = None
+    ) -> Tuple[int, List[PendingSnapshot]]:
+        """
+        Persist copies from take_snapshot (safe to call from a worker thread)
+
+        Returns:
+            (snapshots written, snapshots that failed and should be marked dirty again)
+        """
+        store = store or self.store or default_store()
+        written = 0
+        failed = []
+        with self._write_lock:
+            for snapshot in pending:
+                try:
+                    store.save(snapshot.store_key, snapshot.user_ids, snapshot.scores, **snapshot.attributes)
+                    written += 1
+                except Exception as e:
+                    logger.error(f"Error writing leaderboard snapshot {snapshot.store_key}: {str(e)}")
+                    failed.append(snapshot)
+        return written, failed
+
+    def restore_dirty(self, failed: List[PendingSnapshot]):
+        """Mark snapshots whose write failed as changed again, so the next snapshot retries them"""
+        for snapshot in failed:
+            if snapshot.leaderboard_id is not None:
+                self._previous_dirty.add(snapshot.leaderboard_id)
+            elif snapshot.store_key in self._indexes:
+                self._dirty.add(snapshot.store_key)
+
+    def snapshot(self, store: Optional[RankIndexStore] = None) -> int:
+        """Persist every index and rank snapshot changed since the last call; returns how many were written"""
+        written, failed = self.write_snapshot(self.take_snapshot(), store)
+        self.restore_dirty(failed)
+        return written
+
+    def reload(self, store: Optional[RankIndexStore] = None, when: Optional[datetime] = None) -> int:
+        """Load the current period's snapshot of every leaderboard; returns how many were found"""
+        store = store or self.store or default_store()
+        now = when or datetime.utcnow()
+        loaded = 0
+        for leaderboard_id, config in self.configs.items():
+            key = self.key(leaderboard_id, now)
+            snapshot = store.load(key)
+            if snapshot is not None:
+                self._indexes[key] = RankIndex(*snapshot)
+                self._dirty.discard(key)
+                loaded += 1
+            self._reload_previous(store, leaderboard_id, now)
+            self._next_rollover[leaderboard_id] = self.engine._get_next_update_time(config["period"], now)
+        return loaded
+
+    def _reload_previous(self, store: RankIndexStore, leaderboard_id: str, now: datetime):
+        """Restore previous ranks, rebuilding them if the process was down across a boundary"""
+        expected = self._previous_period_key(leaderboard_id, now)
+        meta = store.load_meta(f"{leaderboard_id}#previous")
+        all_time = self.configs[leaderboard_id]["period"] == LeaderboardPeriod.ALL_TIME
+        if meta and (all_time or meta.get("source") == expected):
+            user_ids, ranks = store.load(f"{leaderboard_id}#previous")
+            self._previous[leaderboard_id] = RankSnapshot(user_ids, ranks.astype(np.int32), meta.get("source", ""))
+            self._previous_dirty.discard(leaderboard_id)
+            return
+        finished = store.load(expected) if not all_time else None
+        if finished is not None:
+            ranking = self.ranked_user_ids(leaderboard_id, RankIndex(*finished))
+            self._previous[leaderboard_id] = RankSnapshot.from_ranking(ranking, expected)
+            self._previous_dirty.add(leaderboard_id)
+
+
+# Global leaderboard index instance
+leaderboard_index = LeaderboardIndex()
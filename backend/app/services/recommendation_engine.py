@@ -5,11 +5,17 @@ Analyzes user emission patterns and provides intelligent, personalized recommend
 based on scientific data and best practices for carbon footprint reduction.
 """
 
-from typing import Dict, List, Any
-from datetime import datetime
+from typing import Dict, Iterable, List, Any, Optional, Tuple, Union
+from dataclasses import dataclass, field
 import logging
 
+import numpy as np
+
+from app.core.config import settings
 from app.services.carbon_calculator import calculator
+from app.services.collaborative_filtering import FactorModel
+from app.services.emission_columns import EmissionColumns
+from app.services.versioned_cache import VersionedCache
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +29,24 @@ class RecommendationCategory:
     LIFESTYLE = "lifestyle"
 
 
+@dataclass
+class RecommendationResult:
+    """A user's pattern analysis and full recommendation ranking, as cached per data version"""
+    activity_count: int
+    analysis: Dict[str, Any]
+    recommendations: List[Dict[str, Any]]
+
+
+@dataclass
+class EmissionTotals:
+    """Per-category, per-activity and per-month CO2 sums from one pass over a user's entries"""
+    category_totals: Dict[str, float] = field(default_factory=dict)
+    activity_totals: Dict[str, float] = field(default_factory=dict)  # "category:activity" -> kg
+    activity_co2: Dict[str, float] = field(default_factory=dict)  # activity -> kg, for trigger lookups
+    monthly_trends: Dict[str, float] = field(default_factory=dict)
+    entries: int = 0
+
+
 class RecommendationEngine:
     """
     Intelligent carbon reduction recommendation system
@@ -255,6 +279,44 @@ class RecommendationEngine:
                 }
             ]
         }
+        
+        # Inverted index from trigger activity to the recommendations it makes
+        # relevant, so scoring visits only the candidates a user's activities hit
+        self.template_order: Dict[str, Tuple[int, str, Dict[str, Any]]] = {}
+        self.trigger_index: Dict[str, List[str]] = {}
+        self.untriggered: List[str] = []
+        for category, recs in self.recommendations.items():
+            for rec in recs:
+                self.template_order[rec["id"]] = (len(self.template_order), category, rec)
+                triggers = rec.get("triggers", [])
+                if not triggers:
+                    self.untriggered.append(rec["id"])
+                for trigger in dict.fromkeys(triggers):
+                    self.trigger_index.setdefault(trigger, []).append(rec["id"])
+    
+    def aggregate_emissions(self, emissions: List[Dict[str, Any]]) -> EmissionTotals:
+        """
+        Sum a user's emissions by category, activity and month
+        
+        Args:
+            emissions: List of user's emission entries
+            
+        Returns:
+            EmissionTotals that analysis, scoring and savings estimates read from
+        """
+        return self.aggregate_columns(EmissionColumns.from_entries(emissions))
+    
+    def aggregate_columns(self, columns: EmissionColumns) -> EmissionTotals:
+        """Sum a columnar history with one bincount per breakdown"""
+        return EmissionTotals(
+            category_totals=columns.category_totals(),
+            activity_totals={
+                f"{category}:{activity}": co2 for (category, activity), co2 in columns.activity_totals().items()
+            },
+            activity_co2=columns.activity_name_totals(),
+            monthly_trends=columns.monthly_totals(),
+            entries=len(columns),
+        )
     
     def analyze_user_patterns(self, emissions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -266,7 +328,11 @@ class RecommendationEngine:
         Returns:
             Analysis results with patterns, top categories, and key insights
         """
-        if not emissions:
+        return self._analysis_from_totals(self.aggregate_emissions(emissions))
+    
+    def _analysis_from_totals(self, totals: EmissionTotals) -> Dict[str, Any]:
+        """Pattern analysis from precomputed emission totals"""
+        if not totals.entries:
             return {
                 "total_emissions": 0,
                 "category_breakdown": {},
@@ -275,31 +341,9 @@ class RecommendationEngine:
                 "insights": []
             }
         
-        # Calculate totals by category and activity
-        category_totals = {}
-        activity_totals = {}
-        monthly_trends = {}
-        
-        for emission in emissions:
-            category = emission.get("category", "unknown")
-            activity = emission.get("activity", "unknown") 
-            co2 = float(emission.get("co2_equivalent", 0))
-            date_str = emission.get("date", "")
-            
-            # Category totals
-            category_totals[category] = category_totals.get(category, 0) + co2
-            
-            # Activity totals
-            activity_key = f"{category}:{activity}"
-            activity_totals[activity_key] = activity_totals.get(activity_key, 0) + co2
-            
-            # Monthly trends
-            try:
-                date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00')) if 'T' in date_str else datetime.strptime(date_str, '%Y-%m-%d')
-                month_key = f"{date_obj.year}-{date_obj.month:02d}"
-                monthly_trends[month_key] = monthly_trends.get(month_key, 0) + co2
-            except Exception:
-                pass
+        category_totals = totals.category_totals
+        activity_totals = totals.activity_totals
+        monthly_trends = totals.monthly_trends
         
         # Sort activities by impact
         top_activities = sorted(activity_totals.items(), key=lambda x: x[1], reverse=True)[:5]
@@ -317,47 +361,93 @@ class RecommendationEngine:
             "insights": insights
         }
     
-    def generate_recommendations(self, emissions: List[Dict[str, Any]], limit: int = 8) -> List[Dict[str, Any]]:
+    def generate_recommendations(
+        self,
+        emissions: List[Dict[str, Any]],
+        limit: int = 8,
+        category_filter: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
         Generate personalized carbon reduction recommendations
         
         Args:
             emissions: User's emission entries
             limit: Maximum number of recommendations to return
+            category_filter: Only consider recommendations from this category
             
         Returns:
             List of personalized recommendations with impact estimates
         """
+        return self.recommend(emissions, limit, category_filter)[1]
+    
+    def recommend(
+        self,
+        emissions: Union[List[Dict[str, Any]], EmissionColumns],
+        limit: Optional[int] = None,
+        category_filter: Optional[str] = None,
+        completed: Iterable[str] = (),
+        model: Optional[FactorModel] = None,
+        user_factors: Optional[np.ndarray] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Pattern analysis and ranked recommendations from a single pass over the entries
+        
+        Args:
+            emissions: User's emission entries, or the same history as columns
+            limit: Maximum number of recommendations to return (None for all)
+            category_filter: Only consider recommendations from this category
+            completed: Recommendation ids the user has completed (left out of the ranking)
+            model: Collaborative-filtering model trained on completions, if any
+            user_factors: The user's factor vector for ``model``
+            
+        Returns:
+            (analyze_user_patterns result, generate_recommendations result)
+        """
         if not emissions:
             # Return general recommendations for new users
-            return self._get_general_recommendations(limit)
+            return self._analysis_from_totals(EmissionTotals()), self._get_general_recommendations(limit)
         
-        # Analyze user patterns
-        analysis = self.analyze_user_patterns(emissions)
-        
-        # Get user activities
-        user_activities = set()
-        for emission in emissions:
-            user_activities.add(emission.get("activity", ""))
+        # One pass over the entries; everything below reads the sums
+        if isinstance(emissions, EmissionColumns):
+            totals = self.aggregate_columns(emissions)
+        else:
+            totals = self.aggregate_emissions(emissions)
+        analysis = self._analysis_from_totals(totals)
+        user_activities = totals.activity_co2
+        
+        # Candidates are the recommendations the user's activities trigger plus
+        # the always-applicable ones, visited in template order
+        candidates = set(self.untriggered)
+        for activity in user_activities:
+            candidates.update(self.trigger_index.get(activity, ()))
+        candidates.difference_update(completed)
+        
+        # What users with similar completions went on to complete, as one
+        # dot product per candidate
+        affinity = {}
+        if model is not None and user_factors is not None:
+            affinity = model.affinities(user_factors, list(candidates))
         
         # Score and rank recommendations
         scored_recommendations = []
         
-        for category, recs in self.recommendations.items():
-            for rec in recs:
-                score = self._score_recommendation(rec, analysis, user_activities, emissions)
-                if score > 0:
-                    rec_with_score = rec.copy()
-                    rec_with_score["score"] = score
-                    rec_with_score["estimated_annual_savings"] = self._calculate_potential_savings(
-                        rec, analysis, emissions
-                    )
-                    scored_recommendations.append(rec_with_score)
+        for _, category, rec in sorted(self.template_order[rec_id] for rec_id in candidates):
+            if category_filter and category != category_filter:
+                continue
+            score = self._score_recommendation(rec, analysis, user_activities)
+            if score > 0:
+                score += settings.recommendation_cf_weight * affinity.get(rec["id"], 0.0)
+                rec_with_score = rec.copy()
+                rec_with_score["score"] = score
+                rec_with_score["estimated_annual_savings"] = self._calculate_potential_savings(
+                    rec, analysis, user_activities
+                )
+                scored_recommendations.append(rec_with_score)
         
         # Sort by score and return top recommendations
         scored_recommendations.sort(key=lambda x: x["score"], reverse=True)
         
-        return scored_recommendations[:limit]
+        return analysis, scored_recommendations[:limit]
     
     def _generate_insights(self, category_totals: Dict, activity_totals: Dict, total_emissions: float) -> List[str]:
         """Generate insights about user's carbon footprint"""
@@ -419,7 +509,7 @@ class RecommendationEngine:
         
         return patterns
     
-    def _score_recommendation(self, rec: Dict, analysis: Dict, user_activities: set, emissions: List) -> float:
+    def _score_recommendation(self, rec: Dict, analysis: Dict, user_activities) -> float:
         """Score a recommendation based on relevance to user"""
         score = 0
         
@@ -456,9 +546,9 @@ class RecommendationEngine:
         
         return score
     
-    def _calculate_potential_savings(self, rec: Dict, analysis: Dict, emissions: List) -> float:
-        """Calculate potential annual CO2 savings from recommendation"""
-        if not emissions or analysis.get("total_emissions", 0) == 0:
+    def _calculate_potential_savings(self, rec: Dict, analysis: Dict, activity_co2: Dict[str, float]) -> float:
+        """Calculate potential annual CO2 savings from recommendation, from per-activity CO2 sums"""
+        if not activity_co2 or analysis.get("total_emissions", 0) == 0:
             return 0
         
         triggers = rec.get("triggers", [])
@@ -467,10 +557,7 @@ class RecommendationEngine:
             return analysis["total_emissions"] * rec.get("potential_savings_factor", 0) * 12  # Annualize
         
         # Calculate savings for specific activities
-        relevant_emissions = 0
-        for emission in emissions:
-            if emission.get("activity") in triggers:
-                relevant_emissions += float(emission.get("co2_equivalent", 0))
+        relevant_emissions = sum(activity_co2.get(activity, 0) for activity in dict.fromkeys(triggers))
         
         # Annual estimate (assuming monthly data)
         annual_relevant = relevant_emissions * 12
@@ -478,13 +565,13 @@ class RecommendationEngine:
         
         return round(potential_savings, 1)
     
-    def _get_general_recommendations(self, limit: int) -> List[Dict[str, Any]]:
+    def _get_general_recommendations(self, limit: Optional[int]) -> List[Dict[str, Any]]:
         """Get general recommendations for new users"""
         general_recs = []
         
         # Pick top recommendations from each category
         for category, recs in self.recommendations.items():
-            if general_recs and len(general_recs) >= limit:
+            if general_recs and limit is not None and len(general_recs) >= limit:
                 break
             
             # Get the easiest/most impactful recommendation from this category
@@ -505,4 +592,7 @@ class RecommendationEngine:
 
 
 # Global recommendation engine instance
-recommendation_engine = RecommendationEngine()
\ No newline at end of file
+recommendation_engine = RecommendationEngine()
+
+# Ranked recommendations per user and category filter, keyed by data version
+recommendation_cache = VersionedCache(settings.recommendation_cache_max_entries)
@@ -0,0 +1,382 @@
+"""
+Offline recommendation precomputation for CarbonTrack
+
+Weekly digests and the dashboard need recommendations for every active
+user. The batch job collects recently active users (and everyone who has
+completed a recommendation) from a parallel scan of the users table, trains
+the collaborative-filtering model on their completions, queries each active
+user's recent emission history from a pool of reader threads, ranks whole
+chunks of users in a process pool (scoring is CPU-bound Python, so threads
+would serialize on the GIL) and batch-writes one row per user, with their
+factor vector, to the precomputed recommendations table. The model's item
+factors go in a row of their own, and the users' category breakdowns are
+published as per-region peer-cohort indexes.
+
+Each row carries the data version the user had when their history was
+read. The API serves a row only while the user's data version still
+matches and the row is recent; otherwise (new users, or users who logged
+since) it falls back to computing on demand.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from boto3.dynamodb.conditions import Attr, Key
+
+from app.core.config import settings
+from app.services.bulk_loader import ConcurrentBatchWriter
+from app.services.collaborative_filtering import FactorModel, encode_factors, train_factors
+from app.services.peer_index import GLOBAL_REGION, PEER_CATEGORIES, breakdown_vector, index_key
+from app.services.parallel_scan import parallel_scan
+from app.services.rank_index import RankIndexStore
+from app.services.recommendation_engine import RecommendationEngine, RecommendationResult
+
+logger = logging.getLogger(__name__)
+
+USER_PROJECTION = ["userId", "data_version", "last_active", "completed_recommendations", "region"]
+ENTRY_PROJECTION = ["#date", "#timestamp", "category", "activity", "co2_equivalent"]
+
+# Newest entries ranked per user, the same cap the API reads with
+MAX_ENTRIES = 1000
+
+# (user id, data version, slim emission entries, completed ids, factor vector or None)
+UserHistory = Tuple[str, int, List[Dict[str, Any]], List[str], Optional[np.ndarray]]
+
+
+# ====================
+# RANKING (runs in worker processes)
+# ====================
+
+_worker_engine: Optional[RecommendationEngine] = None
+
+
+def rank_histories(
+    histories: List[UserHistory],
+    computed_at: str,
+    window_days: int,
+    model: Optional[FactorModel] = None,
+) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    Rank recommendations for a chunk of users
+
+    Module-level so it can be pickled to a process pool; each worker
+    process builds its engine (and trigger index) once.
+
+    Returns:
+        (one precomputed table item per user, float32 category breakdowns for the peer index)
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = RecommendationEngine()
+    items = []
+    breakdowns = np.zeros((len(histories), len(PEER_CATEGORIES)), dtype=np.float32)
+    for row, (user_id, data_version, entries, completed, factors) in enumerate(histories):
+        analysis, ranked = _worker_engine.recommend(entries, completed=completed, model=model, user_factors=factors)
+        breakdowns[row] = breakdown_vector(analysis["category_breakdown"])
+        item = precomputed_item(
+            user_id, data_version, RecommendationResult(len(entries), analysis, ranked), computed_at, window_days
+        )
+        if model is not None and factors is not None:
+            item.update(cf_factors=encode_factors(factors), model_trained_at=model.trained_at, completions=len(completed))
+        items.append(item)
+    return items, breakdowns
+
+
+def precomputed_item(
+    user_id: str,
+    data_version: int,
+    result: RecommendationResult,
+    computed_at: str,
+    window_days: int,
+) -> Dict[str, Any]:
+    """Table item for one user's ranking; the payload is JSON so floats need no Decimal conversion"""
+    return {
+        "user_id": user_id,
+        "data_version": int(data_version),
+        "computed_at": computed_at,
+        "window_days": window_days,
+        "activity_count": result.activity_count,
+        "payload": json.dumps({"analysis": result.analysis, "recommendations": result.recommendations}),
+    }
+
+
+def result_from_item(
+    item: Dict[str, Any],
+    engine: RecommendationEngine,
+    category_filter: Optional[str] = None,
+) -> RecommendationResult:
+    """
+    Rebuild a cached result from a precomputed item
+
+    Rows hold the unfiltered ranking; a category filter only skips
+    templates, so filtering the ranking gives the same order as ranking
+    with the filter.
+    """
+    payload = json.loads(item["payload"])
+    ranked = payload["recommendations"]
+    if category_filter:
+        ranked = [
+            rec for rec in ranked
+            if rec.get("id") in engine.template_order and engine.template_order[rec["id"]][1] == category_filter
+        ]
+    return RecommendationResult(int(item.get("activity_count", 0)), payload["analysis"], ranked)
+
+
+def is_fresh(item: Optional[Dict[str, Any]], data_version: int, max_age_hours: float, now: Optional[datetime] = None) -> bool:
+    """Whether a precomputed item may be served for the user's current data version"""
+    if not item or int(item.get("data_version", -1)) != int(data_version):
+        return False
+    try:
+        computed_at = datetime.fromisoformat(item["computed_at"])
+    except (KeyError, ValueError):
+        return False
+    return (now or datetime.utcnow()) - computed_at <= timedelta(hours=max_age_hours)
+
+
+# ====================
+# BATCH JOB
+# ====================
+
+def publish_peer_indexes(
+    store: RankIndexStore,
+    user_ids: List[str],
+    breakdowns: List[np.ndarray],
+    regions: Dict[str, str],
+    min_users: Optional[int] = None,
+) -> int:
+    """
+    Save the global peer index and one per region with enough users
+
+    Returns:
+        Number of indexes saved
+    """
+    if not user_ids:
+        return 0
+    if min_users is None:
+        min_users = settings.peer_cohort_min_region_users
+    matrix = np.stack(breakdowns).astype(np.float32)
+    store.save(index_key(GLOBAL_REGION), user_ids, matrix, dtype="<f4")
+    saved = 1
+    by_region: Dict[str, List[int]] = {}
+    for row, user_id in enumerate(user_ids):
+        if user_id in regions:
+            by_region.setdefault(regions[user_id], []).append(row)
+    for region, rows in by_region.items():
+        if len(rows) >= min_users and region != GLOBAL_REGION:
+            store.save(index_key(region), [user_ids[row] for row in rows], matrix[rows], dtype="<f4")
+            saved += 1
+    return saved
+
+
+@dataclass
+class PrecomputeStats:
+    """Progress snapshot passed to progress callbacks and returned at the end"""
+    users_scanned: int = 0
+    training_users: int = 0
+    peer_regions: int = 0
+    users_ranked: int = 0
+    entries_read: int = 0
+    rows_written: int = 0
+    elapsed_seconds: float = 0.0
+    users_per_second: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+def _query_history(entries_table, user_id: str, start: str, end: str) -> List[Dict[str, Any]]:
+    """A user's newest entries in [start, end], slimmed to the fields the engine reads"""
+    entries = []
+    kwargs = {
+        "KeyConditionExpression": Key("userId").eq(user_id) & Key("timestamp").between(start, end),
+        "ProjectionExpression": ", ".join(ENTRY_PROJECTION),
+        "ExpressionAttributeNames": {"#date": "date", "#timestamp": "timestamp"},
+        "ScanIndexForward": False,
+        "Limit": MAX_ENTRIES,
+    }
+    while True:
+        response = entries_table.query(**kwargs)
+        for item in response.get("Items", []):
+            entries.append({
+                "date": str(item.get("date") or str(item.get("timestamp", ""))[:10]),
+                "category": item.get("category", "other"),
+                "activity": item.get("activity", "unknown"),
+                "co2_equivalent": float(item.get("co2_equivalent", 0) or 0),
+            })
+        if len(entries) >= MAX_ENTRIES or "LastEvaluatedKey" not in response:
+            return entries[:MAX_ENTRIES]
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+async def run_precompute(
+    users_table,
+    entries_table,
+    recommendations_table,
+    window_days: int = 30,
+    processes: int = 4,
+    chunk_users: int = 250,
+    read_concurrency: int = 16,
+    workers: int = 4,
+    total_segments: int = 8,
+    max_read_units_per_second: Optional[float] = None,
+    table_factory: Optional[Callable[[], Any]] = None,
+    progress: Optional[Callable[[PrecomputeStats], None]] = None,
+    now: Optional[datetime] = None,
+    min_training_users: Optional[int] = None,
+    peer_store: Optional[RankIndexStore] = None,
+) -> PrecomputeStats:
+    """
+    Train the completion model and precompute ranked recommendations for every user active in the window
+
+    Users are collected before ranking, since the model needs every
+    completion; at a few hundred bytes per user that fits a batch host's
+    memory even for millions of users.
+
+    Args:
+        users_table: boto3 Table for user profiles
+        entries_table: boto3 Table for emission entries
+        recommendations_table: boto3 Table receiving one row per user
+        window_days: Days of history ranked (matches the API's activity window)
+        processes: Ranking worker processes (0 ranks in this process)
+        chunk_users: Users per ranking task and write chunk
+        read_concurrency: Concurrent history queries
+        workers: Concurrent writer threads
+        total_segments: Parallel scan segments for the users table
+        max_read_units_per_second: Optional read capacity cap for the scan
+        table_factory: Builds a recommendations Table per writer thread (defaults to boto3)
+        progress: Called with a PrecomputeStats snapshot after each written chunk
+        now: End of the history window and row timestamp (defaults to now, UTC)
+        min_training_users: Fewest users with completions to train the
+            collaborative-filtering model on (below it, ranking is heuristic only)
+        peer_store: Where to publish peer-cohort indexes (None skips them)
+
+    Returns:
+        Final PrecomputeStats; failed chunks are listed in ``errors`` and
+        their users are served on demand until the next run
+    """
+    now = now or datetime.utcnow()
+    if min_training_users is None:
+        min_training_users = settings.recommendation_cf_min_users
+    start = (now - timedelta(days=window_days)).isoformat()
+    end = now.isoformat()
+    computed_at = now.isoformat()
+    started = time.monotonic()
+    stats = PrecomputeStats()
+
+    reads = asyncio.Semaphore(read_concurrency)
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 0 else None
+    loop = asyncio.get_running_loop()
+    writer = ConcurrentBatchWriter(
+        getattr(recommendations_table, "name", ""),
+        max_workers=workers,
+        table_factory=table_factory or (lambda: recommendations_table),
+    )
+    pending: deque = deque()
+
+    def snapshot():
+        elapsed = time.monotonic() - started
+        stats.elapsed_seconds = elapsed
+        stats.users_per_second = stats.users_ranked / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    async def history(user: Dict[str, Any]) -> UserHistory:
+        async with reads:
+            entries = await asyncio.to_thread(_query_history, entries_table, user["userId"], start, end)
+        factors = user_factors.get(user["userId"])
+        return user["userId"], int(user.get("data_version", 0)), entries, user["completed"], factors
+
+    async def submit(users: List[Dict[str, Any]]):
+        histories = await asyncio.gather(*(history(user) for user in users))
+        stats.entries_read += sum(len(history[2]) for history in histories)
+        if pool:
+            ranked = loop.run_in_executor(pool, rank_histories, histories, computed_at, window_days, model)
+        else:
+            ranked = loop.create_future()
+            ranked.set_result(rank_histories(histories, computed_at, window_days, model))
+        pending.append(ranked)
+
+    async def drain(limit: int):
+        while len(pending) > limit:
+            items, breakdowns = await pending.popleft()
+            try:
+                await asyncio.wrap_future(writer.submit(items))
+            except Exception as e:
+                logger.error(f"Error writing precomputed recommendations: {e}")
+                stats.errors.append(str(e))
+                continue
+            for item, breakdown in zip(items, breakdowns):
+                if breakdown.any():
+                    peer_ids.append(item["user_id"])
+                    peer_rows.append(breakdown)
+            stats.users_ranked += len(items)
+            stats.rows_written += len(items)
+            if progress:
+                progress(snapshot())
+
+    model: Optional[FactorModel] = None
+    user_factors: Dict[str, np.ndarray] = {}
+    regions: Dict[str, str] = {}
+    peer_ids: List[str] = []
+    peer_rows: List[np.ndarray] = []
+    try:
+        # Users inactive for the whole window have nothing to rank, but their
+        # completions still inform the model
+        users: List[Dict[str, Any]] = []
+        async for user in parallel_scan(
+            users_table,
+            total_segments,
+            projection=USER_PROJECTION,
+            filter_expression=Attr("last_active").gte(start) | Attr("completed_recommendations").exists(),
+            max_read_units_per_second=max_read_units_per_second,
+        ):
+            stats.users_scanned += 1
+            users.append({
+                "userId": user["userId"],
+                "data_version": int(user.get("data_version", 0)),
+                "active": str(user.get("last_active", "")) >= start,
+                "completed": sorted(user.get("completed_recommendations", ())),
+            })
+            if user.get("region"):
+                regions[user["userId"]] = str(user["region"])
+
+        trainees = [user for user in users if user["completed"]]
+        stats.training_users = len(trainees)
+        if trainees and len(trainees) >= min_training_users:
+            item_ids = list(RecommendationEngine().template_order)
+            model, factors = train_factors(
+                [user["completed"] for user in trainees],
+                item_ids,
+                factors=settings.recommendation_cf_factors,
+                regularization=settings.recommendation_cf_regularization,
+                trained_at=computed_at,
+            )
+            user_factors = {user["userId"]: factors[row] for row, user in enumerate(trainees)}
+
+        active = [user for user in users if user["active"]]
+        del users
+        for offset in range(0, len(active), chunk_users):
+            await submit(active[offset:offset + chunk_users])
+            await drain(max(processes, 1))
+        await drain(0)
+
+        # Rows name the model their vectors belong to; the API folds in a
+        # vector for any row that does not match the published model
+        if model is not None and not stats.errors:
+            await asyncio.to_thread(recommendations_table.put_item, Item=model.to_item(stats.training_users))
+        if peer_store is not None and not stats.errors:
+            stats.peer_regions = await asyncio.to_thread(publish_peer_indexes, peer_store, peer_ids, peer_rows, regions)
+    except Exception as e:
+        logger.error(f"Stopping recommendation precompute: {e}")
+        stats.errors.append(str(e))
+    finally:
+        writer.close(cancel=bool(stats.errors))
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return snapshot()
@@ -0,0 +1,265 @@
+"""
+What-if scenario simulator for CarbonTrack
+
+Recommendation savings are flat estimates (a template's savings factor
+times a month of emissions). A scenario instead replays the user's own
+history with substitutions applied, e.g. every gasoline-car kilometre
+driven electric on the user's regional grid, half of their beef eaten as
+chicken, or a quarter of their domestic flights taken by train.
+
+A substitution replaces a share of a source activity's emissions with the
+target activity's emissions for the same amount. The entries keep their
+amounts and units, so the substituted CO₂e is the entry's CO₂e times the
+ratio of the two emission factors. Every scenario is therefore linear in
+the user's CO₂e per activity and month. The history is summed once into
+an (activity x month) grid over the activities any scenario touches, and
+the whole catalogue is evaluated as one (scenarios x activities) matrix
+product with that grid.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.carbon_calculator import CarbonCalculator, Region
+from app.services.emission_columns import EmissionColumns
+from app.services.versioned_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+# Histories shorter than this are treated as a month when annualizing
+MIN_ANNUALIZED_DAYS = 30
+
+# Profile regions are free text (often a country code); these map onto calculator regions
+REGION_ALIASES = {
+    "us": Region.US_AVERAGE,
+    "usa": Region.US_AVERAGE,
+    "eu": Region.EU_AVERAGE,
+    "gb": Region.UK,
+    "uk": Region.UK,
+    "ca": Region.CANADA,
+    "au": Region.AUSTRALIA,
+}
+
+GASOLINE_CARS = ("car_gasoline_small", "car_gasoline_medium", "car_gasoline_large")
+CARS = GASOLINE_CARS + ("car_diesel_small", "car_diesel_medium")
+SHORT_HAUL_FLIGHTS = ("flight_domestic_short", "flight_domestic_medium")
+RED_MEAT = ("beef", "lamb", "pork")
+
+
+@dataclass(frozen=True)
+class Substitution:
+    """Replace ``share`` of the sources' emissions with the target activity's"""
+    sources: Tuple[str, ...]
+    target: str
+    share: float = 1.0
+
+
+@dataclass(frozen=True)
+class Scenario:
+    id: str
+    title: str
+    category: str
+    substitutions: Tuple[Substitution, ...]
+
+
+def _shares(*shares: float) -> List[Tuple[int, float]]:
+    return [(round(share * 100), share) for share in shares]
+
+
+def default_scenarios() -> List[Scenario]:
+    """The catalogue evaluated for every user"""
+    scenarios = [
+        Scenario("car_to_ev", "Drive an electric car instead", "transportation",
+                 (Substitution(CARS, "car_electric"),)),
+        Scenario("car_to_hybrid", "Drive a hybrid instead", "transportation",
+                 (Substitution(GASOLINE_CARS, "car_hybrid"),)),
+        Scenario("car_to_ev_half", "Share an electric car for half your driving", "transportation",
+                 (Substitution(CARS, "car_electric", 0.5),)),
+    ]
+    for percent, share in _shares(0.25, 0.5, 1.0):
+        scenarios.append(Scenario(f"car_to_train_{percent}", f"Take the train for {percent}% of car trips",
+                                  "transportation", (Substitution(CARS, "train_local", share),)))
+        scenarios.append(Scenario(f"car_to_bus_{percent}", f"Take the bus for {percent}% of car trips",
+                                  "transportation", (Substitution(CARS, "bus_city", share),)))
+    for percent, share in _shares(0.25, 0.5, 0.75, 1.0):
+        scenarios.append(Scenario(f"flights_to_train_{percent}", f"Replace {percent}% of domestic flights with rail",
+                                  "transportation", (Substitution(SHORT_HAUL_FLIGHTS, "train_intercity", share),)))
+    for percent, share in _shares(0.25, 0.5, 1.0):
+        scenarios.append(Scenario(f"beef_to_chicken_{percent}", f"Swap {percent}% of beef for chicken",
+                                  "food", (Substitution(("beef",), "chicken", share),)))
+        scenarios.append(Scenario(f"red_meat_to_chicken_{percent}", f"Swap {percent}% of red meat for chicken",
+                                  "food", (Substitution(RED_MEAT, "chicken", share),)))
+        scenarios.append(Scenario(f"meat_to_legumes_{percent}", f"Swap {percent}% of meat for beans and lentils",
+                                  "food", (Substitution(RED_MEAT + ("chicken", "turkey"), "legumes", share),)))
+    for percent, share in _shares(0.5, 1.0):
+        scenarios.append(Scenario(f"cheese_to_yogurt_{percent}", f"Swap {percent}% of cheese for yogurt",
+                                  "food", (Substitution(("cheese",), "yogurt", share),)))
+        scenarios.append(Scenario(f"compost_food_{percent}", f"Compost {percent}% of food waste",
+                                  "waste", (Substitution(("landfill_food",), "composting_food", share),)))
+        scenarios.append(Scenario(f"recycle_paper_{percent}", f"Recycle {percent}% of paper waste",
+                                  "waste", (Substitution(("landfill_paper",), "recycling_paper", share),)))
+    scenarios.append(Scenario(
+        "commute_and_diet", "Take the train for half of car trips and swap half of red meat for chicken", "lifestyle",
+        (Substitution(CARS, "train_local", 0.5), Substitution(RED_MEAT, "chicken", 0.5)),
+    ))
+    scenarios.append(Scenario(
+        "low_carbon_travel", "Drive electric and take the train instead of domestic flights", "lifestyle",
+        (Substitution(CARS, "car_electric"), Substitution(SHORT_HAUL_FLIGHTS, "train_intercity")),
+    ))
+    return scenarios
+
+
+def calculator_region(region: Optional[str]) -> Region:
+    """The calculator region for a profile region, US average when unknown"""
+    value = (region or "").strip().lower()
+    try:
+        return Region(value)
+    except ValueError:
+        return REGION_ALIASES.get(value, Region.US_AVERAGE)
+
+
+def _factor(calculator: CarbonCalculator, activity: str) -> Optional[Decimal]:
+    for factors in (calculator.transportation_factors, calculator.food_factors,
+                    calculator.waste_factors, calculator.energy_factors):
+        if activity in factors:
+            return factors[activity]
+    return None
+
+
+class ScenarioMatrix:
+    """A scenario catalogue compiled against one region's emission factors"""
+
+    def __init__(self, scenarios: Sequence[Scenario], calculator: CarbonCalculator):
+        self.scenarios = list(scenarios)
+        self.activities: Dict[str, int] = {}
+        for scenario in self.scenarios:
+            for substitution in scenario.substitutions:
+                for source in substitution.sources:
+                    self.activities.setdefault(source, len(self.activities))
+
+        # shares[s, a]: fraction of activity a's emissions scenario s replaces;
+        # reductions[s, a]: fraction of them it saves (share x (1 - factor ratio))
+        self.shares = np.zeros((len(self.scenarios), len(self.activities)))
+        self.reductions = np.zeros_like(self.shares)
+        for row, scenario in enumerate(self.scenarios):
+            for substitution in scenario.substitutions:
+                target = _factor(calculator, substitution.target)
+                for source in substitution.sources:
+                    factor = _factor(calculator, source)
+                    if target is None or not factor:
+                        logger.warning(f"Scenario {scenario.id}: no factor for {source} -> {substitution.target}")
+                        continue
+                    column = self.activities[source]
+                    self.shares[row, column] += substitution.share
+                    self.reductions[row, column] += substitution.share * (1 - float(target / factor))
+
+    def activity_grid(self, columns: EmissionColumns) -> Tuple[List[str], np.ndarray]:
+        """
+        The history's CO₂e per scenario activity and month
+
+        Returns:
+            (months "YYYY-MM" in order, (activities, months + 1) array whose
+            last column holds entries without a valid date)
+        """
+        pair_rows = np.array(
+            [self.activities.get(activity, -1) for _, activity in columns.activities], dtype=np.int64
+        )
+        rows = pair_rows[columns.activity_codes] if len(columns) else np.zeros(0, dtype=np.int64)
+        valid = ~np.isnat(columns.days)
+        months, month_codes = np.unique(columns.days[valid].astype("datetime64[M]"), return_inverse=True)
+        month_columns = np.full(len(columns), len(months), dtype=np.int64)
+        month_columns[valid] = month_codes.reshape(-1)
+
+        width = len(months) + 1
+        used = rows >= 0
+        grid = np.bincount(
+            rows[used] * width + month_columns[used],
+            weights=columns.co2[used],
+            minlength=len(self.activities) * width,
+        ).reshape(len(self.activities), width)
+        return [str(month) for month in months], grid
+
+    def simulate(self, columns: EmissionColumns, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Replay a history under every scenario
+
+        Args:
+            columns: The user's emission history
+            today: End of the history window (defaults to today), for annualizing
+
+        Returns:
+            History totals and the applicable scenarios, largest saving first
+        """
+        history_kg = float(columns.co2.sum())
+        months, grid = self.activity_grid(columns)
+        affected = (self.shares @ grid).sum(axis=1)
+        savings = self.reductions @ grid
+
+        valid = columns.days[~np.isnat(columns.days)]
+        end = np.datetime64(today or date.today(), "D")
+        days_covered = int((end - valid.min()).astype(int)) + 1 if len(valid) else 0
+        annualize = 365 / max(days_covered, MIN_ANNUALIZED_DAYS)
+
+        results = []
+        for row in np.flatnonzero(affected > 0):
+            scenario = self.scenarios[row]
+            saved = float(savings[row].sum())
+            results.append({
+                "id": scenario.id,
+                "title": scenario.title,
+                "category": scenario.category,
+                "affected_kg": round(float(affected[row]), 2),
+                "scenario_total_kg": round(history_kg - saved, 2),
+                "savings_kg": round(saved, 2),
+                "savings_percent": round(saved / history_kg * 100, 1) if history_kg > 0 else 0.0,
+                "estimated_annual_savings": round(saved * annualize, 1),
+                "monthly_savings_kg": [round(value, 2) for value in savings[row, :-1].tolist()],
+            })
+        results.sort(key=lambda result: result["savings_kg"], reverse=True)
+        return {
+            "history_kg": round(history_kg, 2),
+            "days_covered": days_covered,
+            "months": months,
+            "scenarios": results,
+        }
+
+
+class ScenarioEngine:
+    """The default catalogue, compiled once per calculator region"""
+
+    def __init__(self, scenarios: Optional[Sequence[Scenario]] = None):
+        self.scenarios = list(scenarios) if scenarios is not None else default_scenarios()
+        self._matrices: Dict[Region, ScenarioMatrix] = {}
+
+    def matrix(self, region: Optional[str]) -> ScenarioMatrix:
+        calculator_key = calculator_region(region)
+        matrix = self._matrices.get(calculator_key)
+        if matrix is None:
+            matrix = ScenarioMatrix(self.scenarios, CarbonCalculator(region=calculator_key))
+            self._matrices[calculator_key] = matrix
+        return matrix
+
+    def simulate(
+        self,
+        emissions: Union[List[Dict[str, Any]], EmissionColumns],
+        region: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Replay a user's entries (or columns) under every scenario with their region's emission factors"""
+        if not isinstance(emissions, EmissionColumns):
+            emissions = EmissionColumns.from_entries(emissions)
+        report = self.matrix(region).simulate(emissions)
+        report["region"] = calculator_region(region).value
+        return report
+
+
+# Global instance
+scenario_engine = ScenarioEngine()
+
+# Scenario reports per user and region, keyed by data version
+scenario_cache = VersionedCache(settings.scenario_cache_max_entries)
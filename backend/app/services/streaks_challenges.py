@@ -2,15 +2,22 @@
 Streaks and Challenges System for CarbonTrack Gamification
 Handles daily streaks, weekly/monthly challenges, and progress tracking
 """
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 import logging
 
+import numpy as np
+
+from app.services.challenge_counters import TIMEFRAME_WINDOWS
+from app.services.emission_columns import parse_days
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
+_EPOCH = date(1970, 1, 1)
+
 
 class ChallengeType(Enum):
     """Types of challenges available"""
@@ -284,23 +291,16 @@ class StreaksChallengesEngine:
         Returns:
             Dictionary with streak information
         """
-        if not activity_dates:
-            return {
-                "current_streak": 0,
-                "longest_streak": 0,
-                "last_activity_date": None,
-                "streak_status": "no_activities"
-            }
-        
-        # Convert strings to dates and sort
-        dates = []
-        for date_str in activity_dates:
-            try:
-                dates.append(datetime.strptime(date_str, "%Y-%m-%d").date())
-            except ValueError:
-                continue
-                
-        if not dates:
+        days = parse_days(list(set(activity_dates)))
+        days = days[~np.isnat(days)].astype(np.int64)
+        return self.streak_from_days(np.unique(days))
+    
+    def streak_from_days(self, days: np.ndarray, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        calculate_streak over distinct active day numbers (days since
+        1970-01-01, ascending), as the emission store returns them
+        """
+        if not len(days):
             return {
                 "current_streak": 0,
                 "longest_streak": 0,
@@ -308,46 +308,26 @@ class StreaksChallengesEngine:
                 "streak_status": "no_activities"
             }
         
-        dates = sorted(set(dates))  # Remove duplicates and sort
-        today = datetime.utcnow().date()
-        yesterday = today - timedelta(days=1)
-        
-        # Calculate current streak
-        current_streak = 0
-        if dates[-1] == today or dates[-1] == yesterday:
-            # Streak is active
-            for i in range(len(dates) - 1, -1, -1):
-                expected_date = dates[-1] - timedelta(days=len(dates) - 1 - i)
-                if dates[i] == expected_date:
-                    current_streak += 1
-                else:
-                    break
-        
-        # Calculate longest streak
-        longest_streak = 1
-        temp_streak = 1
-        
-        for i in range(1, len(dates)):
-            if dates[i] == dates[i-1] + timedelta(days=1):
-                temp_streak += 1
-                longest_streak = max(longest_streak, temp_streak)
-            else:
-                temp_streak = 1
+        # Runs of consecutive days end wherever the gap to the next day isn't 1
+        ends = np.append(np.flatnonzero(np.diff(days) != 1), len(days) - 1)
+        runs = np.diff(np.append(-1, ends))
+        last = int(days[-1])
+        gap = ((today or datetime.utcnow().date()) - _EPOCH).days - last
         
         # Determine streak status
-        if dates[-1] == today:
+        if gap == 0:
             streak_status = "active_today"
-        elif dates[-1] == yesterday:
+        elif gap == 1:
             streak_status = "active_yesterday"
         else:
             streak_status = "broken"
             
         return {
-            "current_streak": current_streak,
-            "longest_streak": longest_streak,
-            "last_activity_date": dates[-1].isoformat(),
+            "current_streak": int(runs[-1]) if gap in (0, 1) else 0,
+            "longest_streak": int(runs.max()),
+            "last_activity_date": (_EPOCH + timedelta(days=last)).isoformat(),
             "streak_status": streak_status,
-            "total_active_days": len(dates)
+            "total_active_days": len(days)
         }
     
     def check_challenge_progress(self, challenge_id: str, user_stats: Dict[str, Any]) -> Dict[str, Any]:
@@ -383,9 +363,24 @@ class StreaksChallengesEngine:
             "is_active": challenge.is_active and datetime.utcnow() <= challenge.end_date
         }
     
+    def refresh_timing(self, progress: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a check_challenge_progress result with its time remaining and active flag brought up to date"""
+        challenge = self.challenges.get(progress.get("challenge_id"))
+        if challenge is None:
+            return progress
+        return {
+            **progress,
+            "time_remaining": self._get_time_remaining(challenge),
+            "is_active": challenge.is_active and datetime.utcnow() <= challenge.end_date
+        }
+    
     def _calculate_challenge_progress(self, challenge: Challenge, user_stats: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate progress for a specific challenge"""
         criteria = challenge.criteria
+        # Windowed challenges read the precomputed counters for their window when present
+        window_stats = user_stats.get("challenge_windows", {}).get(TIMEFRAME_WINDOWS.get(criteria.get("timeframe")))
+        if window_stats:
+            user_stats = {**user_stats, **window_stats}
         progress = {
             "progress": 0,
             "is_completed": False,
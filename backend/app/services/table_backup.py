@@ -0,0 +1,277 @@
+"""
+Streaming backup and restore for CarbonTrack DynamoDB tables
+
+Exports parallel-scan each table into gzip-compressed, chunked NDJSON part
+files (one ``{"Item": <DynamoDB JSON>}`` object per line, the same layout
+as DynamoDB's native S3 export) plus a ``manifest.json`` describing every
+part. Restores stream the parts back through concurrent batch writers.
+Both directions hold at most one chunk per worker in memory, whatever the
+table size.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+
+from app.core.config import settings
+from app.services.bulk_loader import ConcurrentBatchWriter
+from app.services.parallel_scan import parallel_scan
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+BACKUP_FORMAT = "dynamodb-json-ndjson-gzip"
+BACKUP_FORMAT_VERSION = 1
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def default_tables() -> Dict[str, str]:
+    """Logical name -> configured table name for every table we back up"""
+    return {
+        "users": os.getenv("USERS_TABLE") or settings.users_table,
+        "entries": os.getenv("ENTRIES_TABLE") or settings.entries_table,
+        "goals": settings.goals_table,
+        "achievements": settings.achievements_table,
+        "leaderboards": settings.leaderboards_table,
+        "points_ledger": settings.points_ledger_table,
+        "recommendations": settings.recommendations_table,
+    }
+
+
+# ====================
+# ITEM ENCODING
+# ====================
+
+def _encode_binary(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: (
+                base64.b64encode(bytes(inner)).decode("ascii") if key == "B"
+                else [base64.b64encode(bytes(b)).decode("ascii") for b in inner] if key == "BS"
+                else _encode_binary(inner)
+            )
+            for key, inner in value.items()
+        }
+    if isinstance(value, list):
+        return [_encode_binary(inner) for inner in value]
+    return value
+
+
+def _decode_binary(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: (
+                base64.b64decode(inner) if key == "B"
+                else [base64.b64decode(b) for b in inner] if key == "BS"
+                else _decode_binary(inner)
+            )
+            for key, inner in value.items()
+        }
+    if isinstance(value, list):
+        return [_decode_binary(inner) for inner in value]
+    return value
+
+
+def encode_item(item: Dict[str, Any]) -> str:
+    """Serialize a resource-level item to a lossless DynamoDB-JSON line"""
+    typed = {key: _serializer.serialize(value) for key, value in item.items()}
+    return json.dumps({"Item": _encode_binary(typed)}, separators=(",", ":"))
+
+
+def decode_item(line: str) -> Dict[str, Any]:
+    """Inverse of encode_item"""
+    typed = _decode_binary(json.loads(line)["Item"])
+    item = {key: _deserializer.deserialize(value) for key, value in typed.items()}
+    # Resource writes accept bytes, not the Binary wrapper the deserializer returns
+    return {key: value.value if isinstance(value, Binary) else value for key, value in item.items()}
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ====================
+# EXPORT
+# ====================
+
+async def export_table(
+    table,
+    backup_dir: str,
+    name: str,
+    items_per_part: int = 100_000,
+    total_segments: int = 8,
+    max_read_units_per_second: Optional[float] = None,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Stream one table into gzip NDJSON part files
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        backup_dir: Backup root; parts go to ``<backup_dir>/<name>/``
+        name: Logical table name used in the manifest
+        items_per_part: Items per part file before rotating
+        total_segments: Parallel scan segments
+        max_read_units_per_second: Optional read capacity cap
+        progress: Called with (name, items exported so far) after each part
+
+    Returns:
+        Manifest entry for the table
+    """
+    table_dir = os.path.join(backup_dir, name)
+    os.makedirs(table_dir, exist_ok=True)
+
+    parts: List[Dict[str, Any]] = []
+    total_items = 0
+    part_file = None
+    part_path = ""
+    part_items = 0
+
+    def close_part():
+        nonlocal part_file
+        part_file.close()
+        part_file = None
+        parts.append({
+            "file": os.path.relpath(part_path, backup_dir),
+            "items": part_items,
+            "bytes": os.path.getsize(part_path),
+            "sha256": _sha256(part_path),
+        })
+        if progress:
+            progress(name, total_items)
+
+    try:
+        async for item in parallel_scan(
+            table, total_segments=total_segments, max_read_units_per_second=max_read_units_per_second
+        ):
+            if part_file is None:
+                part_path = os.path.join(table_dir, f"part-{len(parts):05d}.ndjson.gz")
+                part_file = gzip.open(part_path, "wt", encoding="utf-8")
+                part_items = 0
+            part_file.write(encode_item(item) + "\n")
+            part_items += 1
+            total_items += 1
+            if part_items >= items_per_part:
+                close_part()
+        if part_file is not None:
+            close_part()
+    finally:
+        if part_file is not None:
+            part_file.close()
+
+    return {
+        "table_name": getattr(table, "name", name),
+        "item_count": total_items,
+        "parts": parts,
+    }
+
+
+async def export_tables(
+    dynamodb,
+    backup_dir: str,
+    tables: Optional[Dict[str, str]] = None,
+    **export_kwargs,
+) -> Dict[str, Any]:
+    """
+    Export several tables and write the backup manifest
+
+    Args:
+        dynamodb: boto3 DynamoDB service resource
+        backup_dir: Directory receiving part files and manifest.json
+        tables: Logical name -> table name (defaults to default_tables())
+        **export_kwargs: Passed through to export_table
+
+    Returns:
+        The manifest that was written
+    """
+    tables = tables or default_tables()
+    os.makedirs(backup_dir, exist_ok=True)
+    manifest = {
+        "format": BACKUP_FORMAT,
+        "version": BACKUP_FORMAT_VERSION,
+        "started_at": datetime.utcnow().isoformat(),
+        "tables": {},
+    }
+    for name, table_name in tables.items():
+        logger.info(f"Exporting {table_name} as '{name}'")
+        manifest["tables"][name] = await export_table(dynamodb.Table(table_name), backup_dir, name, **export_kwargs)
+    manifest["completed_at"] = datetime.utcnow().isoformat()
+
+    # The manifest is written last, so its presence marks a complete backup
+    tmp_path = os.path.join(backup_dir, f"{MANIFEST_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(backup_dir, MANIFEST_FILE))
+    return manifest
+
+
+# ====================
+# RESTORE
+# ====================
+
+def load_manifest(backup_dir: str) -> Dict[str, Any]:
+    path = os.path.join(backup_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No {MANIFEST_FILE} in {backup_dir}; the backup is missing or incomplete")
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BACKUP_FORMAT:
+        raise ValueError(f"Unsupported backup format: {manifest.get('format')}")
+    return manifest
+
+
+def iter_backup_items(backup_dir: str, table_entry: Dict[str, Any], verify: bool = True) -> Iterator[Dict[str, Any]]:
+    """Stream items of one table from its part files"""
+    for part in table_entry["parts"]:
+        path = os.path.join(backup_dir, part["file"])
+        if verify and _sha256(path) != part["sha256"]:
+            raise ValueError(f"Checksum mismatch for {part['file']}")
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield decode_item(line)
+
+
+def restore_table(
+    backup_dir: str,
+    table_entry: Dict[str, Any],
+    target_table: str,
+    workers: int = 8,
+    chunk_size: int = 1000,
+    region: Optional[str] = None,
+    table_factory: Optional[Callable[[], Any]] = None,
+    verify: bool = True,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Write one table's backup into a target table with concurrent batch writers
+
+    Args:
+        backup_dir: Backup root containing the manifest
+        table_entry: The table's manifest entry
+        target_table: Table to restore into (may differ from the source)
+        workers: Concurrent writer threads
+        chunk_size: Items handed to a writer at a time
+        region: AWS region of the target table
+        table_factory: Builds a Table per writer thread (for tests)
+        verify: Check part checksums before reading
+        progress: Called with items queued so far after each chunk
+
+    Returns:
+        Number of items restored
+    """
+    with ConcurrentBatchWriter(target_table, max_workers=workers, region=region, table_factory=table_factory) as writer:
+        return writer.write_stream(iter_backup_items(backup_dir, table_entry, verify), chunk_size, progress)
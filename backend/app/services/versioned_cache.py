@@ -0,0 +1,63 @@
+"""
+Versioned per-user result cache for CarbonTrack
+
+Derived per-user results (gamification snapshots, ranked recommendations)
+only change when the user's data does. Each cached value is tagged with
+the version it was computed at, normally the user's data version (bumped
+by every write to their stats or emissions) together with the day, and is
+served only while the caller's current version still matches. A user may
+hold several variants (e.g. one per category filter); all of them are
+dropped together when a write invalidates the user.
+
+The cache is an LRU bounded by entry count. Values are small and of
+roughly fixed size per kind, so the entry budget is the memory budget.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+
+class VersionedCache:
+    """Bounded LRU of per-user values, valid only for the version they were computed at"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, Any]]" = OrderedDict()
+        self._variants: Dict[str, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str, version: Any, variant: Hashable = None) -> Optional[Any]:
+        """The cached value if it was computed at ``version``, else None"""
+        key = (user_id, variant)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user_id: str, version: Any, value: Any, variant: Hashable = None):
+        key = (user_id, variant)
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        self._variants.setdefault(user_id, set()).add(variant)
+        while len(self._entries) > self.max_entries:
+            (evicted_user, evicted_variant), _ = self._entries.popitem(last=False)
+            self._forget(evicted_user, evicted_variant)
+
+    def invalidate(self, user_id: str):
+        """Drop every variant cached for a user"""
+        for variant in self._variants.pop(user_id, ()):
+            self._entries.pop((user_id, variant), None)
+
+    def _forget(self, user_id: str, variant: Hashable):
+        variants = self._variants.get(user_id)
+        if variants is not None:
+            variants.discard(variant)
+            if not variants:
+                del self._variants[user_id]
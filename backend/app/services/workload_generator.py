@@ -0,0 +1,418 @@
+"""
+Synthetic workload generator for realistic emission histories
+
+Produces N users × M days of emission entries with NumPy: per-user
+category mixes drawn around a configurable base mix, activity on/off
+behaviour modelled as a two-state Markov chain (so users build and break
+streaks), seasonal and weekend amount modulation, and CO2e priced with the
+shared calculator. Generation is vectorized over users and entries, runs
+in fixed-size user blocks so memory stays bounded, and is fully
+deterministic for a given seed.
+"""
+
+import csv
+import json
+import logging
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.bulk_loader import ConcurrentBatchWriter, round_half_up
+from app.services.carbon_calculator import CarbonCalculator, calculator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ActivityTemplate:
+    """One kind of loggable activity and its typical amount"""
+    category: str
+    activity: str
+    unit: str
+    median_amount: float
+    spread: float = 0.5  # Lognormal sigma
+    weight: float = 1.0  # Relative frequency within its category
+    description: str = ""
+
+
+DEFAULT_TEMPLATES: Tuple[ActivityTemplate, ...] = (
+    ActivityTemplate("transportation", "car_gasoline_medium", "km", 25, 0.6, 4.0, "Car trip"),
+    ActivityTemplate("transportation", "car_hybrid", "km", 25, 0.6, 1.0, "Hybrid car trip"),
+    ActivityTemplate("transportation", "bus_city", "km", 8, 0.5, 2.0, "Bus ride"),
+    ActivityTemplate("transportation", "train_local", "km", 20, 0.5, 1.5, "Commuter train"),
+    ActivityTemplate("transportation", "flight_domestic_medium", "km", 900, 0.3, 0.05, "Domestic flight"),
+    ActivityTemplate("energy", "electricity", "kWh", 10, 0.4, 4.0, "Home electricity"),
+    ActivityTemplate("energy", "natural_gas", "m3", 3, 0.5, 2.0, "Gas heating"),
+    ActivityTemplate("food", "beef", "servings", 1, 0.3, 1.0, "Beef meal"),
+    ActivityTemplate("food", "chicken", "servings", 1, 0.3, 2.0, "Chicken meal"),
+    ActivityTemplate("food", "vegetables_root", "kg", 0.4, 0.4, 2.0, "Vegetables"),
+    ActivityTemplate("food", "cheese", "servings", 1, 0.3, 1.0, "Cheese"),
+    ActivityTemplate("waste", "landfill_mixed", "kg", 2, 0.5, 2.0, "General waste"),
+    ActivityTemplate("waste", "recycling_plastic", "kg", 0.5, 0.5, 1.0, "Plastic recycling"),
+    ActivityTemplate("waste", "composting_food", "kg", 1, 0.5, 0.5, "Composting"),
+)
+
+DEFAULT_CATEGORY_MIX: Dict[str, float] = {
+    "transportation": 0.40,
+    "energy": 0.30,
+    "food": 0.22,
+    "waste": 0.08,
+}
+
+# Amplitude and peak day-of-year of the annual cycle per category
+DEFAULT_SEASONALITY: Dict[str, Tuple[float, int]] = {
+    "energy": (0.35, 15),  # Heating peak mid-January
+    "transportation": (0.10, 200),  # Summer travel
+}
+
+
+@dataclass
+class WorkloadConfig:
+    """Shape of a synthetic workload"""
+    users: int = 100
+    days: int = 90
+    start_date: Optional[date] = None  # Defaults to `days` days before today
+    seed: int = 42
+    category_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_CATEGORY_MIX))
+    mix_concentration: float = 20.0  # Higher keeps users closer to the base mix
+    templates: Tuple[ActivityTemplate, ...] = DEFAULT_TEMPLATES
+    entries_per_active_day: float = 2.5
+    seasonality: Dict[str, Tuple[float, int]] = field(default_factory=lambda: dict(DEFAULT_SEASONALITY))
+    weekend_factor: float = 0.8  # Transportation scale on Saturdays and Sundays
+    # Streak behaviour: per-user chance to stay active after an active day,
+    # drawn from Beta(a, b), and chance to come back after an inactive day
+    stay_active_beta: Tuple[float, float] = (8.0, 2.0)
+    return_probability: float = 0.35
+    user_id_prefix: str = "synthetic-user-"
+    block_users: int = 5000  # Users generated per block (bounds memory)
+
+    def resolved_start(self) -> date:
+        return self.start_date or (datetime.utcnow().date() - timedelta(days=self.days - 1))
+
+
+@dataclass
+class WorkloadBlock:
+    """Columnar entries for one block of users"""
+    user_ids: List[str]
+    user_index: np.ndarray  # int32, index into user_ids
+    day_offset: np.ndarray  # int32, days since the workload start date
+    template_index: np.ndarray  # int16, index into config.templates
+    amount: np.ndarray  # float64
+    co2_equivalent: np.ndarray  # float64, rounded to 2 places
+    second_of_day: np.ndarray  # int32
+    microsecond: np.ndarray  # int32
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+
+class WorkloadGenerator:
+    """Generates deterministic synthetic emission histories"""
+
+    def __init__(self, config: Optional[WorkloadConfig] = None, calc: CarbonCalculator = calculator):
+        self.config = config or WorkloadConfig()
+        self.calc = calc
+        self.start = self.config.resolved_start()
+        templates = self.config.templates
+
+        categories = list(self.config.category_mix)
+        unknown = {t.category for t in templates} - set(categories)
+        if unknown:
+            raise ValueError(f"Templates use categories missing from category_mix: {sorted(unknown)}")
+        self.categories = categories
+        mix = np.array([self.config.category_mix[c] for c in categories], dtype=np.float64)
+        self.base_mix = mix / mix.sum()
+
+        # Per category: template indices and cumulative weights for inverse-CDF sampling
+        self._category_templates: List[np.ndarray] = []
+        self._category_cdf: List[np.ndarray] = []
+        for category in categories:
+            indices = np.array([i for i, t in enumerate(templates) if t.category == category], dtype=np.int16)
+            if indices.size == 0:
+                raise ValueError(f"No activity templates for category '{category}'")
+            weights = np.array([templates[i].weight for i in indices], dtype=np.float64)
+            self._category_templates.append(indices)
+            self._category_cdf.append(np.cumsum(weights) / weights.sum())
+
+        self._log_median = np.log([t.median_amount for t in templates])
+        self._spread = np.array([t.spread for t in templates])
+        self._factor = np.array([self._template_factor(t) for t in templates])
+        self._template_category = np.array([categories.index(t.category) for t in templates], dtype=np.int16)
+
+        # Seasonal and weekend scale per (category, day), computed once
+        day_numbers = np.arange(self.config.days)
+        dates = np.datetime64(self.start, "D") + day_numbers
+        day_of_year = (dates - dates.astype("datetime64[Y]")).astype(np.int64) + 1
+        weekday = (dates.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday; Monday == 0
+        self._day_scale = np.ones((len(categories), self.config.days))
+        for c, category in enumerate(categories):
+            amplitude, peak = self.config.seasonality.get(category, (0.0, 1))
+            self._day_scale[c] += amplitude * np.cos(2 * np.pi * (day_of_year - peak) / 365.25)
+            if category == "transportation":
+                self._day_scale[c, weekday >= 5] *= self.config.weekend_factor
+
+    def _template_factor(self, template: ActivityTemplate) -> float:
+        factor = self.calc.resolve_factor(template.category, template.activity, template.unit)
+        if factor is not None:
+            return float(factor)
+        return self.calc.calculate_emission(template.category, template.activity, 1000, template.unit)["co2_equivalent"] / 1000
+
+    def user_id(self, index: int) -> str:
+        return f"{self.config.user_id_prefix}{index:07d}"
+
+    def _activity_matrix(self, rng: np.random.Generator, users: int) -> np.ndarray:
+        """Active-day matrix (users × days) from a per-user two-state Markov chain"""
+        config = self.config
+        stay = rng.beta(*config.stay_active_beta, size=users)
+        draws = rng.random((users, config.days))
+        active = np.zeros((users, config.days), dtype=bool)
+        if config.days:
+            active[:, 0] = draws[:, 0] < 0.7
+        for day in range(1, config.days):
+            threshold = np.where(active[:, day - 1], stay, config.return_probability)
+            active[:, day] = draws[:, day] < threshold
+        return active
+
+    def generate_block(self, first_user: int, users: int) -> WorkloadBlock:
+        """Generate entries for users [first_user, first_user + users)"""
+        config = self.config
+        rng = np.random.default_rng([config.seed, first_user])
+
+        active = self._activity_matrix(rng, users)
+        intensity = rng.gamma(4.0, config.entries_per_active_day / 4.0, size=users)
+        counts = np.where(active, rng.poisson(intensity[:, None], size=active.shape) + 1, 0)
+
+        cell = np.repeat(np.arange(users * config.days, dtype=np.int64), counts.ravel())
+        user_index = (cell // config.days).astype(np.int32)
+        day_offset = (cell % config.days).astype(np.int32)
+        total = len(cell)
+
+        # Category per entry from each user's own mix
+        user_mix = rng.dirichlet(self.base_mix * config.mix_concentration, size=users)
+        user_cdf = np.cumsum(user_mix, axis=1)
+        user_cdf[:, -1] = 1.0
+        u = rng.random(total)
+        category = np.empty(total, dtype=np.int16)
+        # Entries are grouped by user, so slice in user batches to bound the temporary
+        bounds = np.searchsorted(user_index, np.arange(0, users + 1024, 1024))
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            category[lo:hi] = (u[lo:hi, None] > user_cdf[user_index[lo:hi]]).sum(axis=1)
+
+        # Activity within category
+        template_index = np.empty(total, dtype=np.int16)
+        v = rng.random(total)
+        for c in range(len(self.categories)):
+            mask = category == c
+            picks = np.searchsorted(self._category_cdf[c], v[mask], side="right")
+            template_index[mask] = self._category_templates[c][np.minimum(picks, len(self._category_cdf[c]) - 1)]
+
+        scale = self._day_scale[self._template_category[template_index], day_offset]
+        amount = np.exp(self._log_median[template_index] + self._spread[template_index] * rng.standard_normal(total))
+        amount = np.maximum(np.round(amount * scale, 2), 0.01)
+        co2 = round_half_up(amount * self._factor[template_index])
+
+        second_of_day = rng.integers(7 * 3600, 22 * 3600, size=total, dtype=np.int32)
+        microsecond = rng.integers(0, 1_000_000, size=total, dtype=np.int32)
+
+        return WorkloadBlock(
+            user_ids=[self.user_id(first_user + i) for i in range(users)],
+            user_index=user_index,
+            day_offset=day_offset,
+            template_index=template_index,
+            amount=amount,
+            co2_equivalent=co2,
+            second_of_day=second_of_day,
+            microsecond=microsecond,
+        )
+
+    def iter_blocks(self) -> Iterator[WorkloadBlock]:
+        for first_user in range(0, self.config.users, self.config.block_users):
+            yield self.generate_block(first_user, min(self.config.block_users, self.config.users - first_user))
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Entries as DynamoDB items, shaped like those the API writes"""
+        for block in self.iter_blocks():
+            yield from self.block_entries(block)
+
+    def block_entries(self, block: WorkloadBlock) -> Iterator[Dict[str, Any]]:
+        templates = self.config.templates
+        start = datetime.combine(self.start, datetime.min.time())
+        for i in range(len(block)):
+            template = templates[block.template_index[i]]
+            moment = start + timedelta(
+                days=int(block.day_offset[i]), seconds=int(block.second_of_day[i]), microseconds=int(block.microsecond[i])
+            )
+            timestamp = moment.isoformat()
+            amount = float(block.amount[i])
+            co2 = float(block.co2_equivalent[i])
+            item = {
+                "userId": block.user_ids[block.user_index[i]],
+                "timestamp": timestamp,
+                "entry_id": f"{block.user_ids[block.user_index[i]]}-{moment.strftime('%Y%m%d%H%M%S%f')}",
+                "date": timestamp[:10],
+                "category": template.category,
+                "activity": template.activity,
+                "amount": Decimal(f"{amount:.2f}"),
+                "unit": template.unit,
+                "description": template.description,
+                "created_at": timestamp,
+                "updated_at": timestamp,
+            }
+            if co2:
+                item["co2_equivalent"] = Decimal(f"{co2:.2f}")
+                item["emission_factor"] = Decimal(str(co2 / amount))
+            yield item
+
+    def iter_users(self) -> Iterator[Dict[str, Any]]:
+        """User items with the aggregates the API maintains on each write"""
+        start = datetime.combine(self.start, datetime.min.time())
+        for block in self.iter_blocks():
+            users = len(block.user_ids)
+            totals = np.bincount(block.user_index, weights=block.co2_equivalent, minlength=users)
+            counts = np.bincount(block.user_index, minlength=users)
+            last_day = np.full(users, -1, dtype=np.int64)
+            np.maximum.at(last_day, block.user_index, block.day_offset)
+            for i, user_id in enumerate(block.user_ids):
+                item = {
+                    "userId": user_id,
+                    "email": f"{user_id}@example.com",
+                    "full_name": f"Synthetic User {user_id[len(self.config.user_id_prefix):]}",
+                    "role": "user",
+                    "status": "active",
+                    "created_at": start.isoformat(),
+                    "total_emissions": Decimal(f"{totals[i]:.2f}"),
+                    "entries_count": int(counts[i]),
+                }
+                if last_day[i] >= 0:
+                    item["last_active"] = (start + timedelta(days=int(last_day[i]), hours=22)).isoformat()
+                yield item
+
+
+# ====================
+# SINKS
+# ====================
+
+ENTRY_FIELDS = ["user_id", "timestamp", "entry_id", "date", "category", "activity",
+                "amount", "unit", "description", "co2_equivalent"]
+
+
+def _as_record(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a DynamoDB item to the flat record bulk_load.py reads"""
+    return {
+        "user_id": item["userId"],
+        "timestamp": item["timestamp"],
+        "entry_id": item["entry_id"],
+        "date": item["date"],
+        "category": item["category"],
+        "activity": item["activity"],
+        "amount": float(item["amount"]),
+        "unit": item["unit"],
+        "description": item.get("description", ""),
+        "co2_equivalent": float(item.get("co2_equivalent", 0)),
+    }
+
+
+def write_entries_file(generator: WorkloadGenerator, path: str, fmt: str = "ndjson") -> int:
+    """
+    Stream generated entries to an NDJSON or CSV file readable by bulk_load.py
+
+    Returns:
+        Number of entries written
+    """
+    written = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=ENTRY_FIELDS) if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+        for item in generator.iter_entries():
+            record = _as_record(item)
+            if writer:
+                writer.writerow(record)
+            else:
+                f.write(json.dumps(record) + "\n")
+            written += 1
+    return written
+
+
+def write_to_tables(
+    generator: WorkloadGenerator,
+    entries_table: str,
+    users_table: Optional[str] = None,
+    workers: int = 8,
+    chunk_size: int = 1000,
+    region: Optional[str] = None,
+    table_factory: Optional[Callable[[str], Any]] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Write generated entries (and optionally users) straight to DynamoDB
+
+    Args:
+        generator: Configured generator
+        entries_table: Target entries table
+        users_table: Also write user items with aggregates when given
+        workers: Concurrent writer threads per table
+        chunk_size: Items per writer task
+        region: AWS region
+        table_factory: Builds a Table for a table name (for tests and local stores)
+        progress: Called with entries written so far after each chunk is queued
+
+    Returns:
+        Number of entries written
+    """
+    def writer_for(table_name: str) -> ConcurrentBatchWriter:
+        factory = (lambda: table_factory(table_name)) if table_factory else None
+        return ConcurrentBatchWriter(
+            table_name, max_workers=workers, region=region, table_factory=factory,
+            overwrite_by_pkeys=["userId", "timestamp"] if table_name == entries_table else None,
+        )
+
+    with writer_for(entries_table) as writer:
+        written = writer.write_stream(generator.iter_entries(), chunk_size, progress)
+    if users_table:
+        with writer_for(users_table) as writer:
+            writer.write_stream(generator.iter_users(), chunk_size)
+    return written
+
+
+# ====================
+# DEMO DATA
+# ====================
+
+@lru_cache(maxsize=256)
+def _demo_entries(user_id: str, days: int, end_day: date) -> Tuple[Dict[str, Any], ...]:
+    config = WorkloadConfig(
+        users=1,
+        days=days,
+        start_date=end_day - timedelta(days=days - 1),
+        seed=zlib.crc32(user_id.encode()),
+        stay_active_beta=(30.0, 1.0),  # Demo users keep healthy streaks
+        return_probability=0.8,
+        user_id_prefix="",
+    )
+    generator = WorkloadGenerator(config)
+    entries = []
+    for item in generator.iter_entries():
+        item["userId"] = user_id
+        item["entry_id"] = f"demo_{user_id}_{item['timestamp']}"
+        entries.append(item)
+    entries.sort(key=lambda item: item["timestamp"])
+    return tuple(entries)
+
+
+def demo_entries(user_id: str, days: int = 30) -> List[Dict[str, Any]]:
+    """
+    Deterministic sample history for demo users
+
+    Generated once per (user, days, calendar day) and cached, so demo
+    requests no longer rebuild random data each time. Returns copies, so
+    callers may mutate the result. A window of no days has no entries.
+    """
+    if days <= 0:
+        return []
+    return [dict(item) for item in _demo_entries(user_id, days, datetime.utcnow().date())]
@@ -0,0 +1,360 @@
+"""
+End-to-end ASGI benchmark for the hot API routes
+
+Drives ``app.main:app`` in-process through httpx's ASGI transport, with the
+DynamoDBService singleton rewired to in-memory tables (see
+memory_dynamodb.py) seeded by the synthetic workload generator. Each route
+is hammered at a fixed concurrency. The report gives throughput and
+p50/p95/p99 latency per route, and can be saved as a baseline and compared
+against one with a regression threshold.
+
+Usage (from backend/):
+    python -m benchmarks.api_benchmark
+    python -m benchmarks.api_benchmark --users 200 --days 180 --concurrency 32 --latency-ms 5
+    python -m benchmarks.api_benchmark --save-baseline
+    python -m benchmarks.api_benchmark --compare --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from app.core.config import settings
+from app.main import app
+from app.services.dynamodb_service import dynamodb_service
+from app.services.workload_generator import WorkloadConfig, WorkloadGenerator
+
+from benchmarks.memory_dynamodb import LatencyModel, install
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "api.json")
+USER_PREFIX = "mock_bench-"
+
+
+@dataclass
+class RouteSpec:
+    """A benchmarked request: how to build it and which status counts as success"""
+    name: str
+    method: str
+    path: Callable[["BenchmarkContext"], str]
+    body: Optional[Callable[["BenchmarkContext"], Dict[str, Any]]] = None
+    expected_status: int = 200
+
+
+@dataclass
+class BenchmarkContext:
+    """Shared state the request builders draw from"""
+    user_ids: List[str]
+    start_date: date
+    end_date: date
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+
+    def user(self) -> str:
+        return self.rng.choice(self.user_ids)
+
+
+_POST_TEMPLATES = [
+    ("transportation", "car_gasoline_medium", "km", 5.0, 60.0),
+    ("transportation", "bus_city", "km", 2.0, 20.0),
+    ("energy", "electricity", "kWh", 3.0, 25.0),
+    ("food", "beef", "servings", 1.0, 2.0),
+    ("waste", "recycling_plastic", "kg", 0.2, 2.0),
+]
+
+
+def _emission_body(context: BenchmarkContext) -> Dict[str, Any]:
+    category, activity, unit, low, high = context.rng.choice(_POST_TEMPLATES)
+    return {
+        "date": context.end_date.isoformat(),
+        "category": category,
+        "activity": activity,
+        "amount": round(context.rng.uniform(low, high), 2),
+        "unit": unit,
+        "description": "benchmark entry",
+    }
+
+
+ROUTES: List[RouteSpec] = [
+    RouteSpec("GET /carbon-emissions/", "GET", lambda c: "/api/v1/carbon-emissions/?limit=50"),
+    RouteSpec("POST /carbon-emissions/", "POST", lambda c: "/api/v1/carbon-emissions/", _emission_body, 201),
+    RouteSpec(
+        "GET /carbon-emissions/analytics", "GET",
+        lambda c: f"/api/v1/carbon-emissions/analytics?start_date={c.start_date}&end_date={c.end_date}",
+    ),
+    RouteSpec("GET /recommendations/", "GET", lambda c: "/api/v1/recommendations/"),
+    RouteSpec("GET /gamification/profile", "GET", lambda c: "/api/v1/gamification/profile"),
+    RouteSpec("GET /gamification/leaderboards", "GET", lambda c: "/api/v1/gamification/leaderboards"),
+    RouteSpec("GET /users/stats", "GET", lambda c: "/api/v1/users/stats"),
+    RouteSpec("GET /goals/", "GET", lambda c: "/api/v1/goals/"),
+]
+
+
+@dataclass
+class RouteResult:
+    """Measurements for one route"""
+    route: str
+    requests: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    error_statuses: Dict[str, int] = field(default_factory=dict)
+
+
+# ====================
+# SETUP
+# ====================
+
+def seed_backend(users: int, days: int, seed: int, latency: LatencyModel) -> BenchmarkContext:
+    """Rewire dynamodb_service to in-memory tables and fill them with a synthetic workload"""
+    install(dynamodb_service, latency)
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    generator = WorkloadGenerator(WorkloadConfig(
+        users=users, days=days, start_date=start, seed=seed, user_id_prefix=USER_PREFIX,
+    ))
+
+    dynamodb_service.entries_table.load(generator.iter_entries())
+    user_ids = []
+    for user in generator.iter_users():
+        user["current_month_emissions"] = 0
+        user_ids.append(user["userId"])
+        dynamodb_service.users_table.load([user])
+
+    rng = random.Random(seed)
+    goals, achievements = [], []
+    for user_id in user_ids:
+        for n in range(rng.randint(1, 3)):
+            goals.append({
+                "user_id": user_id,
+                "goalId": f"{user_id}-goal-{n}",
+                "userId": user_id,
+                "category": rng.choice(["transportation", "energy", "food", "waste"]),
+                "target_amount": 100 + 50 * n,
+                "current_amount": rng.randint(0, 150),
+                "target_period": "monthly",
+                "is_active": True,
+                "start_date": start.isoformat(),
+                "end_date": (end + timedelta(days=30)).isoformat(),
+                "created_at": f"{start.isoformat()}T00:00:00",
+                "updated_at": f"{start.isoformat()}T00:00:00",
+            })
+        for n in range(rng.randint(0, 5)):
+            achievements.append({
+                "user_id": user_id,
+                "achievement_id": f"achievement-{n}",
+                "is_unlocked": rng.random() < 0.6,
+            })
+    dynamodb_service.goals_table.load(goals)
+    dynamodb_service.achievements_table.load(achievements)
+
+    return BenchmarkContext(user_ids=user_ids, start_date=start, end_date=end, rng=random.Random(seed))
+
+
+# ====================
+# RUNNER
+# ====================
+
+async def run_route(
+    client: httpx.AsyncClient,
+    route: RouteSpec,
+    context: BenchmarkContext,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> RouteResult:
+    """Issue `requests` requests for one route from `concurrency` workers"""
+
+    async def issue() -> tuple:
+        user = context.user()
+        kwargs: Dict[str, Any] = {"headers": {"Authorization": f"Bearer {user}"}}
+        if route.body:
+            kwargs["json"] = route.body(context)
+        started = time.perf_counter()
+        response = await client.request(route.method, route.path(context), **kwargs)
+        return time.perf_counter() - started, response.status_code
+
+    for _ in range(warmup):
+        await issue()
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            elapsed, status_code = await issue()
+            latencies.append(elapsed)
+            if status_code != route.expected_status:
+                statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    samples = np.array(latencies) * 1000.0
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return RouteResult(
+        route=route.name,
+        requests=len(samples),
+        errors=sum(statuses.values()),
+        throughput_rps=round(len(samples) / wall, 1),
+        p50_ms=round(float(p50), 2),
+        p95_ms=round(float(p95), 2),
+        p99_ms=round(float(p99), 2),
+        mean_ms=round(float(samples.mean()), 2),
+        error_statuses=statuses,
+    )
+
+
+async def run_benchmark(
+    context: BenchmarkContext,
+    routes: List[RouteSpec],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> List[RouteResult]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        return [await run_route(client, route, context, requests, concurrency, warmup) for route in routes]
+
+
+# ====================
+# BASELINES
+# ====================
+
+def scenario_key(args) -> str:
+    return (
+        f"users={args.users},days={args.days},requests={args.requests},"
+        f"concurrency={args.concurrency},latency_ms={args.latency_ms},jitter_ms={args.jitter_ms}"
+    )
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, key: str, results: List[RouteResult]):
+    baselines = load_baselines(path)
+    baselines[key] = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "routes": {result.route: asdict(result) for result in results},
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_regressions(results: List[RouteResult], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Routes whose p95 grew or throughput dropped by more than `threshold`"""
+    regressions = []
+    for result in results:
+        reference = baseline.get("routes", {}).get(result.route)
+        if not reference:
+            continue
+        if result.p95_ms > reference["p95_ms"] * (1 + threshold):
+            regressions.append(f"{result.route}: p95 {result.p95_ms:.2f}ms vs baseline {reference['p95_ms']:.2f}ms")
+        if result.throughput_rps < reference["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{result.route}: throughput {result.throughput_rps:.1f} req/s vs baseline {reference['throughput_rps']:.1f} req/s"
+            )
+        if result.errors > reference.get("errors", 0):
+            regressions.append(f"{result.route}: {result.errors} errors vs baseline {reference.get('errors', 0)}")
+    return regressions
+
+
+def print_report(results: List[RouteResult], baseline: Optional[Dict[str, Any]] = None):
+    header = f"{'route':<34} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    if baseline:
+        header += f" {'Δp95':>8}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        line = (
+            f"{result.route:<34} {result.throughput_rps:>9.1f} {result.p50_ms:>9.2f} "
+            f"{result.p95_ms:>9.2f} {result.p99_ms:>9.2f} {result.errors:>7}"
+        )
+        reference = (baseline or {}).get("routes", {}).get(result.route)
+        if reference and reference["p95_ms"]:
+            line += f" {(result.p95_ms / reference['p95_ms'] - 1) * 100:>+7.1f}%"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark hot API routes in-process")
+    parser.add_argument("--users", type=int, default=100, help="Synthetic users (default: 100)")
+    parser.add_argument("--days", type=int, default=90, help="Days of history per user (default: 90)")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per route (default: 400)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (default: 16)")
+    parser.add_argument("--warmup", type=int, default=10, help="Warmup requests per route (default: 10)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected latency per table request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform jitter added to the latency")
+    parser.add_argument("--seed", type=int, default=42, help="Workload seed (default: 42)")
+    parser.add_argument("--routes", nargs="+", help="Only run routes whose name contains one of these")
+    parser.add_argument("--baseline-file", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the baseline for this scenario")
+    parser.add_argument("--compare", action="store_true", help="Fail if results regress against the stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression fraction (default: 0.2)")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Benchmark users must take the real data path, not demo fixtures
+    settings.debug = False
+
+    routes = [r for r in ROUTES if not args.routes or any(f in r.name for f in args.routes)]
+    context = seed_backend(args.users, args.days, args.seed, LatencyModel(args.latency_ms, args.jitter_ms))
+    entries = len(dynamodb_service.entries_table)
+    print(f"Seeded {len(context.user_ids):,} users / {entries:,} entries; "
+          f"{args.requests} requests per route at concurrency {args.concurrency}, "
+          f"latency {args.latency_ms}ms (+{args.jitter_ms}ms jitter)\n")
+
+    results = asyncio.run(run_benchmark(context, routes, args.requests, args.concurrency, args.warmup))
+
+    key = scenario_key(args)
+    baseline = load_baselines(args.baseline_file).get(key)
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"scenario": key, "results": [asdict(r) for r in results]}, f, indent=2)
+
+    if args.save_baseline:
+        save_baseline(args.baseline_file, key, results)
+        print(f"\nBaseline saved for scenario '{key}'")
+
+    if args.compare:
+        if not baseline:
+            print(f"\nNo baseline stored for scenario '{key}'")
+            return 2
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
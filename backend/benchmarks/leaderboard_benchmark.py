@@ -0,0 +1,108 @@
+"""
+Leaderboard engine scaling benchmark
+
+Scores every configured leaderboard for a synthetic population and
+compares the vectorized engine against the previous per-user
+implementation (three dict lookups per user per board plus a full sort).
+Score columns are generated directly as arrays for the large populations;
+user dicts are only built up to ``--dict-users`` since the dict path is
+bounded by Python object overhead rather than by the engine.
+
+Usage (from backend/):
+    python -m benchmarks.leaderboard_benchmark
+    python -m benchmarks.leaderboard_benchmark --users 100000 1000000 --limit 100
+"""
+
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from app.services.leaderboard_engine import LeaderboardEngine, LeaderboardScores, SCORE_FIELDS
+
+
+def synthetic_scores(users: int, seed: int = 42) -> LeaderboardScores:
+    """Skewed score columns (most users low, a long tail of heavy users)"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name in sorted(set(SCORE_FIELDS.values())):
+        values = np.floor(rng.pareto(2.0, users) * 40)
+        # Roughly a third of users are inactive in any given board
+        values[rng.random(users) < 0.35] = 0
+        columns[name] = values
+    user_ids = [f"user-{i:07d}" for i in range(users)]
+    return LeaderboardScores(user_ids, columns)
+
+
+def to_user_dicts(scores: LeaderboardScores) -> List[Dict[str, Any]]:
+    names = list(scores.columns)
+    rows = np.column_stack([scores.columns[name] for name in names]).tolist()
+    return [dict(zip(names, row), user_id=user_id) for user_id, row in zip(scores.user_ids, rows)]
+
+
+def generate_all(engine: LeaderboardEngine, board_ids: List[str], user_data: List[Dict[str, Any]],
+                 target: str, limit: int) -> List[Dict[str, Any]]:
+    """Every board from user dicts, extracting the score columns once"""
+    scores = LeaderboardScores.from_user_data(user_data)
+    return [engine.generate_leaderboard(board_id, user_data, target, limit, scores) for board_id in board_ids]
+
+
+def legacy_generate(engine: LeaderboardEngine, leaderboard_id: str,
+                    user_data: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """The previous algorithm: score every user three times, sort everything"""
+    config = engine.leaderboard_configs[leaderboard_id]
+    ranked = [u for u in user_data if engine._get_user_score(u, config) > 0]
+    ranked.sort(key=lambda u: engine._get_user_score(u, config), reverse=True)
+    sum(1 for u in user_data if engine._get_user_score(u, config) > 0)
+    sum(engine._get_user_score(u, config) for u in user_data)
+    return ranked[:limit]
+
+
+def timed(fn: Callable[[], Any], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark leaderboard generation at scale")
+    parser.add_argument("--users", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Population sizes (default: 100000 1000000)")
+    parser.add_argument("--dict-users", type=int, default=100_000,
+                        help="Largest population also run through user dicts (default: 100000)")
+    parser.add_argument("--limit", type=int, default=50, help="Entries per leaderboard (default: 50)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    args = parser.parse_args(argv)
+
+    engine = LeaderboardEngine()
+    board_ids = list(engine.leaderboard_configs)
+
+    for users in args.users:
+        scores = synthetic_scores(users, args.seed)
+        target = scores.user_ids[users // 2]
+        print(f"👥 {users:,} users, {len(board_ids)} leaderboards, top {args.limit}")
+
+        elapsed = timed(lambda: [engine.generate_leaderboard(board_id, [], target, args.limit, scores)
+                                 for board_id in board_ids])
+        print(f"  ⚡ all boards (columns):       {elapsed * 1000:9.1f} ms")
+        elapsed = timed(lambda: engine.get_user_rankings(target, [], scores))
+        print(f"  ⚡ user rankings (columns):    {elapsed * 1000:9.1f} ms")
+
+        if users <= args.dict_users:
+            user_data = to_user_dicts(scores)
+            elapsed = timed(lambda: generate_all(engine, board_ids, user_data, target, args.limit))
+            print(f"  ⚡ all boards (dicts):         {elapsed * 1000:9.1f} ms")
+            elapsed = timed(lambda: [legacy_generate(engine, board_id, user_data, args.limit)
+                                     for board_id in board_ids], repeat=1)
+            print(f"  🐢 all boards (previous):      {elapsed * 1000:9.1f} ms")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+In-process record memory benchmark
+
+Measures, with tracemalloc, the memory each representation retains for
+a user's emission entries and for leaderboard rows:
+
+- entries: the entries table items themselves, the activity dicts
+  ActivityService used to build, slotted ActivityRecords, and the
+  EmissionStore's columns. Each is built from freshly decoded items, as
+  from a DynamoDB query, so strings it keeps a copy of are counted.
+- leaderboard rows: a regular dataclass with the LeaderboardEntry fields
+  (a __dict__ per row), the slotted LeaderboardEntry, and parallel arrays.
+  User names and ids exist before measuring and the rows share one stats
+  dict, so only the per-row record overhead is compared.
+
+Usage (from backend/):
+    python -m benchmarks.memory_benchmark
+    python -m benchmarks.memory_benchmark --entries 100000 --rows 1000000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from app.models.records import ActivityRecord
+from app.services.activity_service import ActivityService
+from app.services.emission_store import EmissionStore
+from app.services.leaderboard_engine import LeaderboardEntry
+
+ACTIVITIES = [
+    ("transportation", "car_gasoline_medium", "km"),
+    ("transportation", "bus_city", "km"),
+    ("transportation", "flight_domestic_short", "km"),
+    ("energy", "electricity", "kWh"),
+    ("energy", "natural_gas", "kWh"),
+    ("food", "beef", "servings"),
+    ("food", "chicken", "servings"),
+    ("waste", "landfill_food", "kg"),
+]
+
+# LeaderboardEntry's fields on a regular dataclass, as it was before slots
+LegacyLeaderboardEntry = make_dataclass(
+    "LegacyLeaderboardEntry", [(field.name, field.type) for field in fields(LeaderboardEntry)]
+)
+
+
+def retained(build: Callable[[], Any]) -> Tuple[Any, int]:
+    """Bytes still allocated by ``build`` once its temporaries are freed"""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def synthetic_payload(entries: int, seed: int = 42) -> str:
+    """A user's entries as JSON, decoded per measurement into fresh objects"""
+    rng = random.Random(seed)
+    start = date(2023, 1, 1)
+    items = []
+    for n in range(entries):
+        category, activity, unit = rng.choice(ACTIVITIES)
+        day = start + timedelta(days=n * 730 // entries)
+        items.append({
+            "userId": "user-0000001",
+            "timestamp": f"{day.isoformat()}T{n % 24:02d}:{n % 60:02d}:{n % 61:02d}.{n:06d}",
+            "entry_id": f"{n:08x}-4c1e-4f7a-9d2b-{n:012x}",
+            "date": day.isoformat(),
+            "category": category,
+            "activity": activity,
+            "amount": str(round(rng.uniform(1, 100), 1)),
+            "unit": unit,
+            "co2_equivalent": str(round(rng.uniform(0.1, 30), 3)),
+            "emission_factor": "0.171",
+        })
+    return json.dumps(items)
+
+
+def decode(payload: str) -> List[Dict[str, Any]]:
+    """Items as boto3 returns them: fresh strings, numbers as Decimal"""
+    items = json.loads(payload)
+    for item in items:
+        for key in ("amount", "co2_equivalent", "emission_factor"):
+            item[key] = Decimal(item[key])
+    return items
+
+
+def legacy_activity(user_id: str, idx: int, emission: Dict[str, Any]) -> Dict[str, Any]:
+    """The activity dict ActivityService built per entry before ActivityRecord"""
+    return {
+        "activity_id": emission.get("entry_id") or f"{user_id}_{idx}",
+        "user_id": user_id,
+        "timestamp": emission["timestamp"],
+        "date": emission["date"],
+        "activity_type": emission.get("category", "other"),
+        "activity_name": emission.get("activity", "unknown"),
+        "category": emission.get("category", "other"),
+        "carbon_footprint": float(emission.get("co2_equivalent", 0) or 0),
+        "description": emission.get("description", ""),
+        "co2_equivalent": float(emission.get("co2_equivalent", 0) or 0),
+        "activity": emission.get("activity", "unknown"),
+    }
+
+
+def leaderboard_rows(cls: type, user_ids: List[str], names: List[str], scores: np.ndarray) -> List[Any]:
+    stats: Dict[str, Any] = {}
+    return [
+        cls(user_id=user_id, username=name, display_name=name, rank=rank, score=score,
+            previous_rank=0, rank_change=0, avatar_url="", level=1, badge_icon="🌱", additional_stats=stats)
+        for rank, (user_id, name, score) in enumerate(zip(user_ids, names, scores.tolist()), start=1)
+    ]
+
+
+def leaderboard_columns(user_ids: List[str], scores: np.ndarray) -> Dict[str, Any]:
+    count = len(user_ids)
+    return {
+        "user_ids": list(user_ids),
+        "rank": np.arange(1, count + 1, dtype=np.int32),
+        "score": scores.astype(np.float64),
+        "previous_rank": np.zeros(count, dtype=np.int32),
+        "level": np.ones(count, dtype=np.int16),
+    }
+
+
+def report(label: str, size: int, count: int, baseline: int):
+    print(f"  {label:<34} {size / 2 ** 20:9.1f} MiB {size / count:8.0f} B/row {size / baseline:7.2f}x")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure memory held by in-process record types")
+    parser.add_argument("--entries", type=int, default=100_000, help="Emission entries (default: 100000)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Leaderboard rows (default: 1000000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    args = parser.parse_args(argv)
+
+    payload = synthetic_payload(args.entries, args.seed)
+    user_id = "user-0000001"
+    to_activity = ActivityService._emission_to_activity
+    print(f"🧾 {args.entries:,} emission entries")
+    _, items_size = retained(lambda: decode(payload))
+    report("table items (dicts, Decimal)", items_size, args.entries, items_size)
+    _, size = retained(lambda: [legacy_activity(user_id, i, item) for i, item in enumerate(decode(payload))])
+    report("activity dicts", size, args.entries, items_size)
+    records, size = retained(lambda: [to_activity(user_id, i, item) for i, item in enumerate(decode(payload))])
+    assert isinstance(records[0], ActivityRecord)
+    del records
+    report("ActivityRecord (slots, interned)", size, args.entries, items_size)
+    store = EmissionStore()
+    _, size = retained(lambda: store.build(decode(payload)))
+    report("EmissionStore columns", size, args.entries, items_size)
+    print()
+
+    rng = np.random.default_rng(args.seed)
+    user_ids = [f"user-{i:07d}" for i in range(args.rows)]
+    names = [f"Player {i}" for i in range(args.rows)]
+    scores = rng.gamma(2.0, 500.0, args.rows)
+    print(f"🏆 {args.rows:,} leaderboard rows")
+    rows, legacy_size = retained(lambda: leaderboard_rows(LegacyLeaderboardEntry, user_ids, names, scores))
+    del rows
+    report("dataclass with __dict__", legacy_size, args.rows, legacy_size)
+    rows, size = retained(lambda: leaderboard_rows(LeaderboardEntry, user_ids, names, scores))
+    del rows
+    report("LeaderboardEntry (slots)", size, args.rows, legacy_size)
+    _, size = retained(lambda: leaderboard_columns(user_ids, scores))
+    report("parallel arrays", size, args.rows, legacy_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,757 @@
+"""
+In-memory stand-in for the DynamoDB tables behind DynamoDBService
+
+Implements the subset of the boto3 Table resource API the service and the
+data tools use: get/put/update/delete_item, query, scan (with segments and
+pagination), batch_writer, key/condition objects from
+``boto3.dynamodb.conditions`` and the string expression syntax for
+conditions, filters, projections and updates, plus the client's
+``transact_write_items`` (reached as ``resource.meta.client``). Items round-trip through
+boto3's type serializer, so numbers come back as Decimal and floats are
+rejected exactly as they would be by the real client.
+
+Every request can sleep for an injected latency. The sleep is blocking,
+like the synchronous boto3 calls the service makes from async code.
+"""
+
+import random
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import ConditionBase
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+_MISSING = object()
+
+
+@dataclass
+class LatencyModel:
+    """Per-request latency: a base delay plus uniform jitter, in milliseconds"""
+    base_ms: float = 0.0
+    jitter_ms: float = 0.0
+
+    def sleep(self):
+        delay = self.base_ms + (random.random() * self.jitter_ms if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+
+def _clone(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Round-trip through the wire format, as boto3 does on every call"""
+    return {key: _deserializer.deserialize(_serializer.serialize(value)) for key, value in item.items()}
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+# ====================
+# EXPRESSIONS
+# ====================
+
+_TOKEN = re.compile(r"\s*(<>|<=|>=|=|<|>|\(|\)|,|[#:]?[A-Za-z_][\w.\-]*)")
+_KEYWORDS = {"AND", "OR", "NOT", "BETWEEN", "IN"}
+
+
+class _Expression:
+    """Parser for DynamoDB condition / filter / key-condition strings"""
+
+    def __init__(self, text: str, names: Dict[str, str], values: Dict[str, Any]):
+        self.tokens = [token for token in _TOKEN.findall(text)]
+        if "".join(self.tokens).replace(" ", "") != re.sub(r"\s+", "", text):
+            raise NotImplementedError(f"Unsupported expression: {text}")
+        self.names = names
+        self.values = values
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if token is None or (expected and token.upper() != expected):
+            raise ValueError(f"Expected {expected or 'token'}, got {token}")
+        self.position += 1
+        return token
+
+    def path(self, token: str) -> str:
+        return ".".join(self.names.get(part, part) for part in token.split("."))
+
+    def operand(self) -> Tuple[str, Any]:
+        token = self.take()
+        if token.startswith(":"):
+            return ("value", self.values[token])
+        if token.lower() == "size":
+            self.take("(")
+            inner = self.operand()
+            self.take(")")
+            return ("size", inner)
+        return ("path", self.path(token))
+
+    def parse(self):
+        tree = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected token {self.peek()}")
+        return tree
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() and self.peek().upper() == "OR":
+            self.take()
+            node = ("OR", node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() and self.peek().upper() == "AND":
+            self.take()
+            node = ("AND", node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.peek() and self.peek().upper() == "NOT":
+            self.take()
+            return ("NOT", self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        token = self.peek()
+        if token == "(":
+            self.take()
+            node = self.parse_or()
+            self.take(")")
+            return node
+        if token and token.lower() in ("attribute_exists", "attribute_not_exists", "begins_with", "contains", "attribute_type"):
+            function = self.take().lower()
+            self.take("(")
+            args = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                args.append(self.operand())
+            self.take(")")
+            return (function, *args)
+        left = self.operand()
+        operator = self.take().upper()
+        if operator == "BETWEEN":
+            low = self.operand()
+            self.take("AND")
+            return ("BETWEEN", left, low, self.operand())
+        if operator == "IN":
+            self.take("(")
+            options = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                options.append(self.operand())
+            self.take(")")
+            return ("IN", left, *options)
+        return (operator, left, self.operand())
+
+
+def _resolve(item: Dict[str, Any], path: str) -> Any:
+    value: Any = item
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _operand_value(item: Dict[str, Any], operand: Tuple[str, Any]) -> Any:
+    kind, payload = operand
+    if kind == "value":
+        return payload
+    if kind == "size":
+        value = _operand_value(item, payload)
+        return _MISSING if value is _MISSING else len(value)
+    return _resolve(item, payload)
+
+
+def _compare(operator: str, left: Any, right: Any) -> bool:
+    if left is _MISSING or right is _MISSING:
+        return operator == "<>" and left is not right
+    if operator == "=":
+        return left == right
+    if operator == "<>":
+        return left != right
+    try:
+        if operator == "<":
+            return left < right
+        if operator == "<=":
+            return left <= right
+        if operator == ">":
+            return left > right
+        if operator == ">=":
+            return left >= right
+    except TypeError:
+        return False
+    raise NotImplementedError(f"Unsupported operator {operator}")
+
+
+def _evaluate_tree(node, item: Dict[str, Any]) -> bool:
+    operator = node[0]
+    if operator == "AND":
+        return _evaluate_tree(node[1], item) and _evaluate_tree(node[2], item)
+    if operator == "OR":
+        return _evaluate_tree(node[1], item) or _evaluate_tree(node[2], item)
+    if operator == "NOT":
+        return not _evaluate_tree(node[1], item)
+    if operator == "attribute_exists":
+        return _operand_value(item, node[1]) is not _MISSING
+    if operator == "attribute_not_exists":
+        return _operand_value(item, node[1]) is _MISSING
+    if operator == "begins_with":
+        value = _operand_value(item, node[1])
+        return isinstance(value, str) and value.startswith(_operand_value(item, node[2]))
+    if operator == "contains":
+        value = _operand_value(item, node[1])
+        return value is not _MISSING and _operand_value(item, node[2]) in value
+    if operator == "BETWEEN":
+        value = _operand_value(item, node[1])
+        return _compare(">=", value, _operand_value(item, node[2])) and _compare("<=", value, _operand_value(item, node[3]))
+    if operator == "IN":
+        value = _operand_value(item, node[1])
+        return any(value == _operand_value(item, option) for option in node[2:])
+    return _compare(operator, _operand_value(item, node[1]), _operand_value(item, node[2]))
+
+
+def _evaluate_condition_object(condition: ConditionBase, item: Dict[str, Any]) -> bool:
+    expression = condition.get_expression()
+    operator = expression["operator"]
+    values = expression["values"]
+    if operator in ("AND", "OR"):
+        left, right = (_evaluate_condition_object(value, item) for value in values)
+        return left and right if operator == "AND" else left or right
+    if operator == "NOT":
+        return not _evaluate_condition_object(values[0], item)
+
+    def operand(value):
+        if hasattr(value, "name") and not isinstance(value, ConditionBase):
+            return _resolve(item, value.name)
+        return value
+
+    attribute = operand(values[0])
+    if operator == "attribute_exists":
+        return attribute is not _MISSING
+    if operator == "attribute_not_exists":
+        return attribute is _MISSING
+    if operator == "begins_with":
+        return isinstance(attribute, str) and attribute.startswith(values[1])
+    if operator == "contains":
+        return attribute is not _MISSING and values[1] in attribute
+    if operator == "BETWEEN":
+        return _compare(">=", attribute, operand(values[1])) and _compare("<=", attribute, operand(values[2]))
+    if operator == "IN":
+        return attribute in values[1]
+    return _compare(operator, attribute, operand(values[1]))
+
+
+def evaluate_condition(
+    condition: Any,
+    item: Dict[str, Any],
+    names: Optional[Dict[str, str]] = None,
+    values: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Evaluate a boto3 condition object or expression string against an item"""
+    if condition is None:
+        return True
+    if isinstance(condition, ConditionBase):
+        return _evaluate_condition_object(condition, item)
+    return _evaluate_tree(_Expression(condition, names or {}, values or {}).parse(), item)
+
+
+_CLAUSE = re.compile(r"\b(SET|ADD|REMOVE|DELETE)\b", re.IGNORECASE)
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def apply_update(
+    item: Dict[str, Any],
+    expression: str,
+    names: Optional[Dict[str, str]] = None,
+    values: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Apply a SET/ADD/REMOVE/DELETE update expression to an item in place"""
+    names = names or {}
+    values = values or {}
+
+    def name(token: str) -> str:
+        return names.get(token.strip(), token.strip())
+
+    def value_of(token: str) -> Any:
+        token = token.strip()
+        if token.startswith(":"):
+            return values[token]
+        match = re.fullmatch(r"if_not_exists\(\s*([^,]+?)\s*,\s*(.+)\)", token)
+        if match:
+            current = item.get(name(match.group(1)), _MISSING)
+            return value_of(match.group(2)) if current is _MISSING else current
+        match = re.fullmatch(r"list_append\(\s*([^,]+?)\s*,\s*(.+)\)", token)
+        if match:
+            return list(value_of(match.group(1))) + list(value_of(match.group(2)))
+        if token.startswith("#") or re.fullmatch(r"[A-Za-z_]\w*", token):
+            return item.get(name(token), _MISSING)
+        raise NotImplementedError(f"Unsupported update operand: {token}")
+
+    pieces = _CLAUSE.split(expression)
+    for keyword, body in zip(pieces[1::2], pieces[2::2]):
+        keyword = keyword.upper()
+        for action in _split_top_level(body):
+            if keyword == "SET":
+                target, source = (part.strip() for part in action.split("=", 1))
+                arithmetic = re.fullmatch(r"(.+?)\s*([+-])\s*(.+)", source) if "(" not in source else None
+                if arithmetic:
+                    left, right = value_of(arithmetic.group(1)), value_of(arithmetic.group(3))
+                    result = left + right if arithmetic.group(2) == "+" else left - right
+                else:
+                    result = value_of(source)
+                item[name(target)] = result
+            elif keyword == "ADD":
+                target, source = action.split(None, 1)
+                delta = value_of(source)
+                current = item.get(name(target), _MISSING)
+                if isinstance(delta, set):
+                    item[name(target)] = (current if current is not _MISSING else set()) | delta
+                else:
+                    item[name(target)] = (current if current is not _MISSING else 0) + delta
+            elif keyword == "REMOVE":
+                item.pop(name(action), None)
+            elif keyword == "DELETE":
+                target, source = action.split(None, 1)
+                remaining = item.get(name(target), set()) - value_of(source)
+                if remaining:
+                    item[name(target)] = remaining
+                else:
+                    item.pop(name(target), None)
+    return item
+
+
+def _project(item: Dict[str, Any], projection: Optional[str], names: Dict[str, str]) -> Dict[str, Any]:
+    if not projection:
+        return item
+    attributes = [names.get(part.strip(), part.strip()) for part in projection.split(",")]
+    return {attribute: item[attribute] for attribute in attributes if attribute in item}
+
+
+# ====================
+# TABLES
+# ====================
+
+class InMemoryTable:
+    """Thread-safe in-memory table keyed by a hash key and optional range key"""
+
+    def __init__(self, name: str, hash_key: str, range_key: Optional[str] = None, latency: Optional[LatencyModel] = None):
+        self.name = name
+        self.table_name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.latency = latency or LatencyModel()
+        self.table_status = "ACTIVE"
+        self.request_count = 0
+        self._partitions: Dict[Any, Dict[Any, Dict[str, Any]]] = {}
+        self._sort_keys: Dict[Any, List[Any]] = {}
+        self._lock = threading.RLock()
+
+    # -- helpers --
+
+    def _request(self):
+        self.request_count += 1
+        self.latency.sleep()
+
+    def _key_of(self, item: Dict[str, Any]) -> Tuple[Any, Any]:
+        if self.hash_key not in item or (self.range_key and self.range_key not in item):
+            raise _client_error("ValidationException", "The provided key element does not match the schema", "PutItem")
+        return item[self.hash_key], item.get(self.range_key) if self.range_key else None
+
+    def _existing(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        hash_value, range_value = self._key_of(key)
+        return self._partitions.get(hash_value, {}).get(range_value)
+
+    def _store(self, item: Dict[str, Any]):
+        hash_value, range_value = self._key_of(item)
+        partition = self._partitions.setdefault(hash_value, {})
+        if range_value not in partition and self.range_key:
+            insort(self._sort_keys.setdefault(hash_value, []), range_value)
+        partition[range_value] = item
+
+    def _remove(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        hash_value, range_value = self._key_of(key)
+        partition = self._partitions.get(hash_value, {})
+        removed = partition.pop(range_value, None)
+        if removed is not None and self.range_key:
+            keys = self._sort_keys[hash_value]
+            keys.pop(bisect_left(keys, range_value))
+        if not partition:
+            self._partitions.pop(hash_value, None)
+            self._sort_keys.pop(hash_value, None)
+        return removed
+
+    def _check(self, condition, existing, names, values, operation):
+        if condition is not None and not evaluate_condition(condition, existing or {}, names, values):
+            raise _client_error("ConditionalCheckFailedException", "The conditional request failed", operation)
+
+    def load(self, items) -> int:
+        """Seed items directly, without latency or request accounting"""
+        count = 0
+        with self._lock:
+            for item in items:
+                self._store(_clone(item))
+                count += 1
+        return count
+
+    def all_items(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [item for partition in self._partitions.values() for item in partition.values()]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(partition) for partition in self._partitions.values())
+
+    # -- item API --
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, ReturnValues="NONE", **_):
+        self._request()
+        item = _clone(Item)
+        with self._lock:
+            existing = self._existing(item)
+            self._check(ConditionExpression, existing, ExpressionAttributeNames, ExpressionAttributeValues, "PutItem")
+            self._store(item)
+        response = {}
+        if ReturnValues == "ALL_OLD" and existing:
+            response["Attributes"] = _clone(existing)
+        return response
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None, **_):
+        self._request()
+        with self._lock:
+            existing = self._existing(Key)
+            if existing is None:
+                return {}
+            return {"Item": _project(_clone(existing), ProjectionExpression, ExpressionAttributeNames or {})}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues="NONE", **_):
+        self._request()
+        with self._lock:
+            existing = self._existing(Key)
+            self._check(ConditionExpression, existing, ExpressionAttributeNames, ExpressionAttributeValues, "UpdateItem")
+            before = _clone(existing) if existing else {}
+            item = _clone(existing) if existing else _clone(Key)
+            apply_update(item, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            item = _clone(item)
+            self._store(item)
+        if ReturnValues in ("ALL_NEW", "UPDATED_NEW"):
+            attributes = item if ReturnValues == "ALL_NEW" else {k: v for k, v in item.items() if before.get(k, _MISSING) != v}
+            return {"Attributes": _clone(attributes)}
+        if ReturnValues in ("ALL_OLD", "UPDATED_OLD") and before:
+            return {"Attributes": before}
+        return {}
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues="NONE", **_):
+        self._request()
+        with self._lock:
+            existing = self._existing(Key)
+            self._check(ConditionExpression, existing, ExpressionAttributeNames, ExpressionAttributeValues, "DeleteItem")
+            removed = self._remove(Key)
+        if ReturnValues == "ALL_OLD" and removed:
+            return {"Attributes": _clone(removed)}
+        return {}
+
+    # -- reads --
+
+    def _key_condition_parts(self, condition, names, values) -> Tuple[Any, Callable[[Any], bool]]:
+        """Split a key condition into the hash value and a range predicate"""
+        hash_value = _MISSING
+
+        def find_hash(node_item: Dict[str, Any]) -> bool:
+            return evaluate_condition(condition, node_item, names, values)
+
+        # Evaluate against synthetic items: the hash equality must hold on its own
+        if isinstance(condition, ConditionBase):
+            stack = [condition]
+            while stack:
+                current = stack.pop()
+                expression = current.get_expression()
+                if expression["operator"] == "AND":
+                    stack.extend(expression["values"])
+                elif expression["operator"] == "=" and getattr(expression["values"][0], "name", None) == self.hash_key:
+                    hash_value = expression["values"][1]
+        else:
+            tree = _Expression(condition, names or {}, values or {}).parse()
+            stack = [tree]
+            while stack:
+                node = stack.pop()
+                if node[0] == "AND":
+                    stack.extend(node[1:])
+                elif node[0] == "=" and node[1] == ("path", self.hash_key):
+                    hash_value = node[2][1]
+        if hash_value is _MISSING:
+            raise _client_error("ValidationException", "Query condition missed key schema element", "Query")
+
+        def range_matches(range_value: Any) -> bool:
+            probe = {self.hash_key: hash_value}
+            if self.range_key:
+                probe[self.range_key] = range_value
+            return find_hash(probe)
+
+        return hash_value, range_matches
+
+    def query(self, KeyConditionExpression, FilterExpression=None, ExpressionAttributeNames=None,
+              ExpressionAttributeValues=None, ScanIndexForward=True, Limit=None, ExclusiveStartKey=None,
+              ProjectionExpression=None, Select=None, IndexName=None, **_):
+        if IndexName:
+            raise NotImplementedError("Secondary indexes are not emulated")
+        self._request()
+        names = ExpressionAttributeNames or {}
+        hash_value, range_matches = self._key_condition_parts(KeyConditionExpression, names, ExpressionAttributeValues)
+
+        with self._lock:
+            partition = self._partitions.get(hash_value, {})
+            keys = list(self._sort_keys.get(hash_value, [])) if self.range_key else list(partition)
+            if not ScanIndexForward:
+                keys.reverse()
+            if ExclusiveStartKey and self.range_key:
+                start = ExclusiveStartKey[self.range_key]
+                if ScanIndexForward:
+                    keys = keys[bisect_right(keys, start):]
+                else:
+                    keys = [key for key in keys if key < start]
+            evaluated, matched, last_key = 0, [], None
+            for range_value in keys:
+                if not range_matches(range_value):
+                    continue
+                evaluated += 1
+                item = partition[range_value]
+                if evaluate_condition(FilterExpression, item, names, ExpressionAttributeValues):
+                    matched.append(item)
+                if Limit and evaluated >= Limit:
+                    last_key = {self.hash_key: hash_value}
+                    if self.range_key:
+                        last_key[self.range_key] = range_value
+                    break
+
+        response: Dict[str, Any] = {"Count": len(matched), "ScannedCount": evaluated}
+        if Select != "COUNT":
+            response["Items"] = [_project(_clone(item), ProjectionExpression, names) for item in matched]
+        if last_key:
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+    def scan(self, FilterExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+             Limit=None, ExclusiveStartKey=None, ProjectionExpression=None, Select=None,
+             Segment=None, TotalSegments=None, ReturnConsumedCapacity=None, **_):
+        self._request()
+        names = ExpressionAttributeNames or {}
+        with self._lock:
+            ordered = sorted(
+                (
+                    (hash_value, range_value, item)
+                    for hash_value, partition in self._partitions.items()
+                    for range_value, item in partition.items()
+                ),
+                key=lambda entry: (str(entry[0]), str(entry[1])),
+            )
+        if TotalSegments:
+            ordered = [entry for entry in ordered if hash(str(entry[0])) % TotalSegments == Segment]
+        if ExclusiveStartKey:
+            marker = (str(ExclusiveStartKey[self.hash_key]), str(ExclusiveStartKey.get(self.range_key)))
+            ordered = [entry for entry in ordered if (str(entry[0]), str(entry[1])) > marker]
+
+        evaluated, matched, last_key = 0, [], None
+        for hash_value, range_value, item in ordered:
+            evaluated += 1
+            if evaluate_condition(FilterExpression, item, names, ExpressionAttributeValues):
+                matched.append(item)
+            if Limit and evaluated >= Limit:
+                last_key = {self.hash_key: hash_value}
+                if self.range_key:
+                    last_key[self.range_key] = range_value
+                break
+
+        response: Dict[str, Any] = {"Count": len(matched), "ScannedCount": evaluated}
+        if Select != "COUNT":
+            response["Items"] = [_project(_clone(item), ProjectionExpression, names) for item in matched]
+        if last_key:
+            response["LastEvaluatedKey"] = last_key
+        if ReturnConsumedCapacity:
+            response["ConsumedCapacity"] = {"TableName": self.name, "CapacityUnits": max(0.5, evaluated / 8)}
+        return response
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return _InMemoryBatchWriter(self)
+
+
+class _InMemoryBatchWriter:
+    """Buffers writes and flushes them 25 at a time, one latency hit per flush"""
+
+    def __init__(self, table: InMemoryTable):
+        self.table = table
+        self.buffer: List[Tuple[str, Dict[str, Any]]] = []
+
+    def put_item(self, Item):
+        self.buffer.append(("put", _clone(Item)))
+        if len(self.buffer) >= 25:
+            self._flush()
+
+    def delete_item(self, Key):
+        self.buffer.append(("delete", Key))
+        if len(self.buffer) >= 25:
+            self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        self.table._request()
+        with self.table._lock:
+            for action, payload in self.buffer:
+                if action == "put":
+                    self.table._store(payload)
+                else:
+                    self.table._remove(payload)
+        self.buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._flush()
+        return False
+
+
+# Key schemas of the tables DynamoDBService talks to
+TABLE_KEYS: Dict[str, Tuple[str, Optional[str]]] = {
+    "users": ("userId", None),
+    "entries": ("userId", "timestamp"),
+    "goals": ("user_id", "goalId"),
+    "achievements": ("user_id", "achievement_id"),
+    "leaderboards": ("index_key", "chunk"),
+    "points_ledger": ("user_id", "entry_key"),
+    "recommendations": ("user_id", None),
+}
+
+
+class InMemoryClient:
+    """The slice of the low-level DynamoDB client used through ``resource.meta.client``"""
+
+    def __init__(self, resource: "InMemoryDynamoDB"):
+        self.resource = resource
+
+    def transact_write_items(self, TransactItems, **_):
+        """
+        All-or-nothing Put/Update/Delete/ConditionCheck across tables
+
+        Values use the low-level typed format. When a condition fails the
+        whole transaction is cancelled with one reason per action, like
+        DynamoDB's TransactionCanceledException.
+        """
+        actions = []
+        for entry in TransactItems:
+            (kind, request), = entry.items()
+            table = self.resource.Table(request["TableName"])
+            values = {k: _deserializer.deserialize(v) for k, v in request.get("ExpressionAttributeValues", {}).items()}
+            if kind == "Put":
+                target = {k: _deserializer.deserialize(v) for k, v in request["Item"].items()}
+            else:
+                target = {k: _deserializer.deserialize(v) for k, v in request["Key"].items()}
+            actions.append((kind, table, request, target, values))
+
+        tables = sorted({id(table): table for _, table, _, _, _ in actions}.values(), key=lambda table: table.name)
+        for table in tables:
+            table._request()
+            table._lock.acquire()
+        try:
+            reasons = []
+            for kind, table, request, target, values in actions:
+                existing = table._existing(target)
+                condition = request.get("ConditionExpression")
+                passed = condition is None or evaluate_condition(
+                    condition, existing or {}, request.get("ExpressionAttributeNames"), values
+                )
+                reasons.append({"Code": "None"} if passed else {"Code": "ConditionalCheckFailed"})
+            if any(reason["Code"] != "None" for reason in reasons):
+                error = _client_error("TransactionCanceledException", "Transaction cancelled", "TransactWriteItems")
+                error.response["CancellationReasons"] = reasons
+                raise error
+            for kind, table, request, target, values in actions:
+                if kind == "Put":
+                    table._store(_clone(target))
+                elif kind == "Update":
+                    existing = table._existing(target)
+                    item = _clone(existing) if existing else _clone(target)
+                    apply_update(item, request["UpdateExpression"], request.get("ExpressionAttributeNames"), values)
+                    table._store(_clone(item))
+                elif kind == "Delete":
+                    table._remove(target)
+        finally:
+            for table in reversed(tables):
+                table._lock.release()
+        return {}
+
+
+class _Meta:
+    def __init__(self, client: InMemoryClient):
+        self.client = client
+
+
+class InMemoryDynamoDB:
+    """Minimal stand-in for ``boto3.resource('dynamodb')``"""
+
+    def __init__(self, latency: Optional[LatencyModel] = None):
+        self.latency = latency or LatencyModel()
+        self.tables: Dict[str, InMemoryTable] = {}
+        self.meta = _Meta(InMemoryClient(self))
+
+    def create_table(self, name: str, hash_key: str, range_key: Optional[str] = None) -> InMemoryTable:
+        table = InMemoryTable(name, hash_key, range_key, self.latency)
+        self.tables[name] = table
+        return table
+
+    def Table(self, name: str) -> InMemoryTable:
+        if name not in self.tables:
+            raise _client_error("ResourceNotFoundException", f"Requested resource not found: {name}", "DescribeTable")
+        return self.tables[name]
+
+
+def install(service, latency: Optional[LatencyModel] = None) -> InMemoryDynamoDB:
+    """
+    Point a DynamoDBService instance at fresh in-memory tables
+
+    Args:
+        service: The DynamoDBService to rewire (usually the module singleton)
+        latency: Latency injected into every table request
+
+    Returns:
+        The in-memory resource holding the tables
+    """
+    resource = InMemoryDynamoDB(latency)
+    for attribute, (hash_key, range_key) in TABLE_KEYS.items():
+        current = getattr(service, f"{attribute}_table")
+        table_name = getattr(current, "name", None)
+        if not isinstance(table_name, str):
+            table_name = f"carbontrack-{attribute}"
+        setattr(service, f"{attribute}_table", resource.create_table(table_name, hash_key, range_key))
+    service.dynamodb = resource
+    return resource
@@ -0,0 +1,84 @@
+"""
+Peer-cohort index scaling benchmark
+
+Builds a peer index over a synthetic population whose category mixes are
+drawn from a handful of lifestyle archetypes (commuters, heavy heating,
+meat-heavy diets, ...), then times cohort lookups and measures how many of
+the exact top-k neighbours the bucketed search returns.
+
+Usage (from backend/):
+    python -m benchmarks.peer_index_benchmark
+    python -m benchmarks.peer_index_benchmark --users 100000 1000000 --k 50 --queries 200
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.services.peer_index import PEER_CATEGORIES, PeerIndex
+
+
+ARCHETYPES = np.array([
+    [8.0, 2.0, 2.0, 0.5, 0.5],   # car commuter
+    [1.0, 8.0, 2.0, 0.5, 0.5],   # heavy heating
+    [1.0, 2.0, 8.0, 0.5, 0.5],   # meat-heavy diet
+    [3.0, 3.0, 3.0, 1.0, 1.0],   # balanced
+    [6.0, 1.0, 1.0, 0.5, 3.0],   # frequent flyer / other travel
+])
+
+
+def synthetic_breakdowns(users: int, seed: int = 42) -> np.ndarray:
+    """float32 (users, categories) kg CO₂e per 30 days"""
+    rng = np.random.default_rng(seed)
+    kinds = rng.integers(0, len(ARCHETYPES), users)
+    mixes = np.empty((users, len(PEER_CATEGORIES)))
+    for kind in range(len(ARCHETYPES)):
+        rows = kinds == kind
+        mixes[rows] = rng.dirichlet(ARCHETYPES[kind] * 4, size=int(rows.sum()))
+    totals = rng.lognormal(np.log(400), 0.6, users)
+    return (mixes * totals[:, None]).astype(np.float32)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark peer-cohort lookups at scale")
+    parser.add_argument("--users", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Population sizes (default: 100000 1000000)")
+    parser.add_argument("--k", type=int, default=50, help="Cohort size (default: 50)")
+    parser.add_argument("--queries", type=int, default=200, help="Lookups timed per size (default: 200)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    args = parser.parse_args(argv)
+
+    for users in args.users:
+        breakdowns = synthetic_breakdowns(users, args.seed)
+        user_ids = [f"user-{i:07d}" for i in range(users)]
+        print(f"👥 {users:,} users, cohorts of {args.k}")
+
+        start = time.perf_counter()
+        index = PeerIndex(user_ids, breakdowns)
+        print(f"  🏗️  build ({index.bits} projection bits): {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+        queries = breakdowns[np.random.default_rng(args.seed + 1).integers(0, users, args.queries)]
+        start = time.perf_counter()
+        found = [index.neighbours(query, args.k) for query in queries]
+        elapsed = (time.perf_counter() - start) / len(queries)
+        print(f"  ⚡ lookup:                      {elapsed * 1000:9.2f} ms")
+
+        start = time.perf_counter()
+        exact = [np.argsort(-(index.unit @ (query / np.linalg.norm(query))), kind="stable")[:args.k]
+                 for query in queries]
+        elapsed = (time.perf_counter() - start) / len(queries)
+        print(f"  🐢 exact scan:                  {elapsed * 1000:9.2f} ms")
+
+        recall = np.mean([
+            np.isin(rows, truth).mean() if len(truth) else 1.0
+            for rows, truth in zip(found, exact)
+        ])
+        print(f"  🎯 recall@{args.k}:                   {recall:9.3f}")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Recommendation scoring benchmark
+
+Generates recommendations for single users with long synthetic histories
+and compares the trigger-indexed engine (columnar aggregation, candidates
+from the trigger index, savings from per-activity sums) against the
+previous implementation, which parsed every entry's date and rescanned the
+whole history once per recommendation template to estimate savings.
+Also times replaying the history under the what-if scenario catalogue.
+
+Usage (from backend/):
+    python -m benchmarks.recommendation_benchmark
+    python -m benchmarks.recommendation_benchmark --entries 10000 100000
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.recommendation_engine import EmissionTotals, RecommendationEngine
+from app.services.scenario_engine import ScenarioEngine
+from app.services.workload_generator import WorkloadConfig, WorkloadGenerator
+
+
+def synthetic_history(entries: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """One user's history of about ``entries`` entries, shaped like ActivityService output"""
+    generator = WorkloadGenerator(WorkloadConfig(users=1, days=max(1, entries // 2), seed=seed, entries_per_active_day=4.0))
+    history = []
+    for item in generator.iter_entries():
+        history.append({
+            "date": item["date"],
+            "category": item["category"],
+            "activity": item["activity"],
+            "co2_equivalent": float(item.get("co2_equivalent", 0)),
+        })
+        if len(history) == entries:
+            break
+    return history
+
+
+def legacy_aggregate(emissions: List[Dict[str, Any]]) -> EmissionTotals:
+    """The previous analysis pass, which parsed every entry's date"""
+    totals = EmissionTotals(entries=len(emissions))
+    for emission in emissions:
+        category = emission.get("category", "unknown")
+        activity = emission.get("activity", "unknown")
+        co2 = float(emission.get("co2_equivalent", 0))
+        date_str = emission.get("date", "")
+        totals.category_totals[category] = totals.category_totals.get(category, 0) + co2
+        activity_key = f"{category}:{activity}"
+        totals.activity_totals[activity_key] = totals.activity_totals.get(activity_key, 0) + co2
+        try:
+            date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00')) if 'T' in date_str else datetime.strptime(date_str, '%Y-%m-%d')
+            month_key = f"{date_obj.year}-{date_obj.month:02d}"
+            totals.monthly_trends[month_key] = totals.monthly_trends.get(month_key, 0) + co2
+        except Exception:
+            pass
+    return totals
+
+
+def legacy_generate(engine: RecommendationEngine, emissions: List[Dict[str, Any]], limit: int = 8,
+                    category_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+    """The previous algorithm: score every template, rescanning the history for each savings estimate"""
+    analysis = engine._analysis_from_totals(legacy_aggregate(emissions))
+    user_activities = {emission.get("activity", "") for emission in emissions}
+    scored = []
+    for category, recs in engine.recommendations.items():
+        if category_filter and category != category_filter:
+            continue
+        for rec in recs:
+            score = engine._score_recommendation(rec, analysis, user_activities)
+            if score <= 0:
+                continue
+            triggers = rec.get("triggers", [])
+            if not triggers:
+                savings = analysis["total_emissions"] * rec.get("potential_savings_factor", 0) * 12
+            else:
+                relevant = 0
+                for emission in emissions:
+                    if emission.get("activity") in triggers:
+                        relevant += float(emission.get("co2_equivalent", 0))
+                savings = round(relevant * 12 * rec.get("potential_savings_factor", 0), 1)
+            scored.append(dict(rec, score=score, estimated_annual_savings=savings))
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored[:limit]
+
+
+def timed(fn: Callable[[], Any], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark recommendation scoring on long histories")
+    parser.add_argument("--entries", type=int, nargs="+", default=[10_000, 50_000],
+                        help="History lengths (default: 10000 50000)")
+    parser.add_argument("--limit", type=int, default=8, help="Recommendations per request (default: 8)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    args = parser.parse_args(argv)
+
+    engine = RecommendationEngine()
+    templates = sum(len(recs) for recs in engine.recommendations.values())
+    scenarios = ScenarioEngine()
+
+    for entries in args.entries:
+        history = synthetic_history(entries, args.seed)
+        print(f"📜 {len(history):,} entries, {templates} recommendation templates")
+
+        elapsed = timed(lambda: engine.aggregate_emissions(history))
+        print(f"  ⚡ aggregation (columnar):     {elapsed * 1000:9.1f} ms")
+        elapsed = timed(lambda: legacy_aggregate(history))
+        print(f"  🐢 aggregation (per entry):    {elapsed * 1000:9.1f} ms")
+        elapsed = timed(lambda: engine.generate_recommendations(history, limit=args.limit))
+        print(f"  ⚡ recommendations (indexed):  {elapsed * 1000:9.1f} ms")
+        elapsed = timed(lambda: legacy_generate(engine, history, limit=args.limit))
+        print(f"  🐢 recommendations (previous): {elapsed * 1000:9.1f} ms")
+        elapsed = timed(lambda: scenarios.simulate(history))
+        print(f"  ⚡ {len(scenarios.scenarios)} scenarios (batched):     {elapsed * 1000:9.1f} ms")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1324,48 +1324,24 @@ async def get_carbon_emissions(current_user: Dict[str, Any] = Depends(get_curren
             }
 
 async def get_sample_emissions_data(user_id: str):
-    """Generate sample emissions data for demo purposes"""
-    from datetime import datetime, timedelta
+    """Sample emissions data for demo purposes (deterministic, cached per day)"""
+    from app.services.workload_generator import demo_entries
     
-    sample_emissions = []
-    base_date = datetime.now()
-    
-    # Generate emissions for the past 15 days to show a trend
-    for i in range(15, 0, -1):
-        emission_date = base_date - timedelta(days=i)
-        
-        # Vary emissions to create an interesting trend
-        base_emission = 15 + (i % 7) * 2 + (i % 3) * 3
-        
-        sample_emissions.append({
-            "id": f"demo_{i}",
+    # Past 15 days of generated history, sorted by date
+    return [
+        {
+            "id": entry["entry_id"],
             "user_id": user_id,
-            "date": emission_date.strftime("%Y-%m-%d"),
-            "category": "transportation",
-            "activity": "car_drive",
-            "amount": 40 + (i % 10) * 5,
-            "unit": "km",
-            "co2_equivalent": base_emission,
-            "description": f"Sample day {i} activities"
-        })
-        
-        # Add some energy emissions
-        if i % 3 == 0:
-            sample_emissions.append({
-                "id": f"energy_{i}",
-                "user_id": user_id,
-                "date": emission_date.strftime("%Y-%m-%d"),
-                "category": "energy", 
-                "activity": "electricity",
-                "amount": 25 + (i % 5) * 3,
-                "unit": "kWh",
-                "co2_equivalent": 8 + (i % 4) * 2,
-                "description": f"Sample home energy day {i}"
-            })
-    
-    # Sort by date
-    sample_emissions.sort(key=lambda x: x["date"])
-    return sample_emissions
+            "date": entry["date"],
+            "category": entry["category"],
+            "activity": entry["activity"],
+            "amount": float(entry["amount"]),
+            "unit": entry["unit"],
+            "co2_equivalent": float(entry.get("co2_equivalent", 0)),
+            "description": entry.get("description", ""),
+        }
+        for entry in demo_entries(user_id, days=15)
+    ]
 
 @app.post("/api/v1/carbon-emissions/", status_code=status.HTTP_201_CREATED)
 async def create_carbon_emission(
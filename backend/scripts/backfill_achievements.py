@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Achievement Backfill
+====================
+
+Award achievements retroactively after one is added to the achievement
+engine or its criteria change. Users and entries are scanned in parallel,
+criteria are evaluated for all users at once and new awards are
+batch-written and their points credited through the points ledger; with
+--checkpoint an interrupted run resumes after the last fully written chunk
+of users.
+
+Usage:
+    python scripts/backfill_achievements.py --dry-run
+    python scripts/backfill_achievements.py --checkpoint backfill.ckpt --workers 16
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+import boto3
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.achievement_backfill import BackfillStats, run_backfill
+from app.services.dynamodb_service import dynamodb_service
+
+
+def print_progress(stats: BackfillStats):
+    """Render a single live progress line on stderr"""
+    print(
+        f"\r🏅 {stats.users_processed:,}/{stats.users_scanned:,} users | {stats.awards_written:,} awards | "
+        f"{stats.users_per_second:,.0f} users/sec | {stats.elapsed_seconds:,.1f}s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill achievements for all users")
+    parser.add_argument("--region", help="AWS region (default: configured region)")
+    parser.add_argument("--chunk-users", type=int, default=1000, help="Users per write chunk (default: 1000)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent writer threads (default: 8)")
+    parser.add_argument("--segments", type=int, default=8, help="Parallel scan segments per table (default: 8)")
+    parser.add_argument("--rcu", type=float, help="Cap on consumed read capacity units per second")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resuming interrupted runs")
+    parser.add_argument("--dry-run", action="store_true", help="Report the awards without writing them")
+    args = parser.parse_args(argv)
+
+    if args.chunk_users < 1 or args.workers < 1:
+        parser.error("--chunk-users and --workers must be positive")
+
+    region = args.region or settings.aws_region
+    dynamodb = boto3.resource('dynamodb', region_name=region)
+    achievements_table = settings.achievements_table
+
+    stats = asyncio.run(run_backfill(
+        dynamodb.Table(os.getenv('USERS_TABLE') or settings.users_table),
+        dynamodb.Table(os.getenv('ENTRIES_TABLE') or settings.entries_table),
+        dynamodb.Table(achievements_table),
+        chunk_users=args.chunk_users,
+        workers=args.workers,
+        total_segments=args.segments,
+        max_read_units_per_second=args.rcu,
+        checkpoint_path=args.checkpoint,
+        dry_run=args.dry_run,
+        table_factory=lambda: boto3.session.Session().resource('dynamodb', region_name=region).Table(achievements_table),
+        progress=print_progress,
+        record_points=dynamodb_service.record_points,
+    ))
+    print(file=sys.stderr)
+
+    if stats.resumed_after:
+        print(f"↪️  Resumed after user {stats.resumed_after}")
+    print(f"🔎 Scanned {stats.users_scanned:,} users and {stats.entries_scanned:,} entries in {stats.scan_seconds:,.1f}s")
+    for achievement_id, count in sorted(stats.awards_by_achievement.items(), key=lambda pair: -pair[1]):
+        print(f"   {achievement_id}: {count:,}")
+    verb = "Would award" if args.dry_run else "Awarded"
+    print(f"✅ {verb} {stats.awards_written:,} achievements to {stats.users_awarded:,} users "
+          f"in {stats.elapsed_seconds:,.1f}s — {stats.users_per_second:,.0f} users/sec")
+
+    if stats.errors:
+        for error in stats.errors:
+            print(f"❌ {error}", file=sys.stderr)
+        if args.checkpoint:
+            print(f"💾 Progress saved to {args.checkpoint}; re-run the same command to resume", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
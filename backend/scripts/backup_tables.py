@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Table Backup & Restore
+======================
+
+Snapshot the users, entries, goals, achievements and leaderboards tables into
+compressed, chunked NDJSON with a manifest, and restore them again.
+Memory stays constant regardless of table size.
+
+Usage:
+    python scripts/backup_tables.py export backups/2025-10-18
+    python scripts/backup_tables.py export backups/entries-only --tables entries --rcu 500
+    python scripts/backup_tables.py restore backups/2025-10-18 --suffix -loadtest
+    python scripts/backup_tables.py restore backups/2025-10-18 --map entries=carbontrack-entries-staging
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import boto3
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.table_backup import default_tables, export_tables, load_manifest, restore_table
+
+
+def export_command(args) -> int:
+    tables = default_tables()
+    if args.tables:
+        unknown = set(args.tables) - set(tables)
+        if unknown:
+            print(f"❌ Unknown table(s): {', '.join(sorted(unknown))}")
+            return 1
+        tables = {name: tables[name] for name in args.tables}
+
+    dynamodb = boto3.resource('dynamodb', region_name=args.region or settings.aws_region)
+    started = time.monotonic()
+
+    def progress(name, count):
+        print(f"\r💾 {name}: {count:,} items", end="", file=sys.stderr, flush=True)
+
+    manifest = asyncio.run(export_tables(
+        dynamodb,
+        args.backup_dir,
+        tables,
+        items_per_part=args.part_size,
+        total_segments=args.segments,
+        max_read_units_per_second=args.rcu,
+        progress=progress,
+    ))
+    print(file=sys.stderr)
+
+    for name, entry in manifest["tables"].items():
+        print(f"✅ {name} ({entry['table_name']}): {entry['item_count']:,} items in {len(entry['parts'])} part(s)")
+    print(f"📦 Backup written to {args.backup_dir} in {time.monotonic() - started:,.1f}s")
+    return 0
+
+
+def restore_command(args) -> int:
+    manifest = load_manifest(args.backup_dir)
+    names = args.tables or list(manifest["tables"])
+    mapping = dict(pair.split("=", 1) for pair in args.map or [])
+    started = time.monotonic()
+
+    for name in names:
+        if name not in manifest["tables"]:
+            print(f"❌ '{name}' is not in this backup")
+            return 1
+        entry = manifest["tables"][name]
+        target = mapping.get(name) or f"{entry['table_name']}{args.suffix or ''}"
+
+        def progress(count, name=name):
+            print(f"\r♻️  {name}: {count:,}/{entry['item_count']:,} items", end="", file=sys.stderr, flush=True)
+
+        restored = restore_table(
+            args.backup_dir,
+            entry,
+            target,
+            workers=args.workers,
+            region=args.region,
+            verify=not args.skip_verify,
+            progress=progress,
+        )
+        print(file=sys.stderr)
+        print(f"✅ Restored {restored:,} items into {target}")
+
+    print(f"⏱️  Restore finished in {time.monotonic() - started:,.1f}s")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Back up and restore CarbonTrack DynamoDB tables")
+    parser.add_argument("--region", help="AWS region (default: configured region)")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subcommands.add_parser("export", help="Export tables to a backup directory")
+    export_parser.add_argument("backup_dir")
+    export_parser.add_argument("--tables", nargs="+", help="Logical tables to export (default: all)")
+    export_parser.add_argument("--segments", type=int, default=8, help="Parallel scan segments per table (default: 8)")
+    export_parser.add_argument("--part-size", type=int, default=100_000, help="Items per part file (default: 100000)")
+    export_parser.add_argument("--rcu", type=float, help="Cap on consumed read capacity units per second")
+    export_parser.set_defaults(handler=export_command)
+
+    restore_parser = subcommands.add_parser("restore", help="Restore tables from a backup directory")
+    restore_parser.add_argument("backup_dir")
+    restore_parser.add_argument("--tables", nargs="+", help="Logical tables to restore (default: all in backup)")
+    restore_parser.add_argument("--suffix", help="Append to source table names, e.g. -loadtest")
+    restore_parser.add_argument("--map", action="append", metavar="NAME=TABLE", help="Restore a logical table into a specific table")
+    restore_parser.add_argument("--workers", type=int, default=8, help="Concurrent writer threads (default: 8)")
+    restore_parser.add_argument("--skip-verify", action="store_true", help="Skip part checksum verification")
+    restore_parser.set_defaults(handler=restore_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Bulk Emissions Loader
+=====================
+
+Load emission entries from CSV, NDJSON or JSON-array files into the
+entries table. Rows are validated and priced in vectorized chunks and
+written by concurrent batch writers; with --checkpoint an interrupted
+load resumes from the last fully written chunk.
+
+Expected fields: user_id, date (YYYY-MM-DD), category, activity, amount,
+unit, and optionally description, timestamp, entry_id, co2_equivalent.
+
+Usage:
+    python scripts/bulk_load.py entries.csv --checkpoint entries.ckpt
+    python scripts/bulk_load.py export.ndjson --workers 16 --chunk-size 10000
+"""
+
+import argparse
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.bulk_loader import SUPPORTED_FORMATS, LoadStats, run_bulk_load
+
+
+def print_progress(stats: LoadStats):
+    """Render a single live progress line on stderr"""
+    print(
+        f"\r📦 {stats.rows_loaded:,} loaded | {stats.rows_rejected:,} rejected | "
+        f"{stats.rows_per_second:,.0f} rows/sec | {stats.elapsed_seconds:,.1f}s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk load emission entries into DynamoDB")
+    parser.add_argument("source", help="CSV, NDJSON or JSON-array file")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="Source format (default: from extension)")
+    parser.add_argument("--table", help="Target table (default: configured entries table)")
+    parser.add_argument("--region", help="AWS region (default: configured region)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per chunk (default: 5000)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent writer threads (default: 8)")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resuming interrupted loads")
+    parser.add_argument("--rejects", help="NDJSON file collecting rejected rows")
+    parser.add_argument("--trust-co2", action="store_true", help="Keep co2_equivalent values from the source")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error("--chunk-size and --workers must be positive")
+
+    stats = run_bulk_load(
+        args.source,
+        table_name=args.table,
+        fmt=args.format,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        rejects_path=args.rejects,
+        trust_co2=args.trust_co2,
+        region=args.region,
+        progress=print_progress,
+    )
+    print(file=sys.stderr)
+
+    if stats.resumed_from:
+        print(f"↪️  Resumed from byte offset {stats.resumed_from:,}")
+    print(f"✅ Loaded {stats.rows_loaded:,} entries ({stats.rows_rejected:,} rejected) "
+          f"in {stats.elapsed_seconds:,.1f}s — {stats.rows_per_second:,.0f} rows/sec")
+
+    if stats.errors:
+        for error in stats.errors:
+            print(f"❌ {error}", file=sys.stderr)
+        if args.checkpoint:
+            print(f"💾 Progress saved to {args.checkpoint}; re-run the same command to resume", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Points Ledger Compaction
+========================
+
+Roll points ledger rows older than the retention window into one summary
+row per user and month. Balances are unaffected; only history older than
+the window loses its per-event detail (and idempotency keys). Safe to
+re-run: each batch is summarized and deleted in one transaction.
+
+Usage:
+    python scripts/compact_points_ledger.py
+    python scripts/compact_points_ledger.py --retention-days 30 --rcu 200
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.dynamodb_service import dynamodb_service
+from app.services.points_ledger import CompactionStats, run_compaction
+
+
+def print_progress(stats: CompactionStats):
+    """Render a single live progress line on stderr"""
+    print(
+        f"\r🗜️  {stats.users_compacted:,} users | {stats.rows_compacted:,} rows | "
+        f"{stats.rows_per_second:,.0f} rows/sec | {stats.elapsed_seconds:,.1f}s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compact old points ledger rows into monthly summaries")
+    parser.add_argument("--retention-days", type=int, default=settings.points_ledger_retention_days,
+                        help=f"Days of individual rows to keep (default: {settings.points_ledger_retention_days})")
+    parser.add_argument("--segments", type=int, default=8, help="Parallel scan segments (default: 8)")
+    parser.add_argument("--rcu", type=float, help="Cap on consumed read capacity units per second")
+    args = parser.parse_args(argv)
+
+    if args.retention_days < 1:
+        parser.error("--retention-days must be positive")
+
+    stats = asyncio.run(run_compaction(
+        dynamodb_service,
+        retention_days=args.retention_days,
+        total_segments=args.segments,
+        max_read_units_per_second=args.rcu,
+        progress=print_progress,
+    ))
+    print(file=sys.stderr)
+    print(f"✅ Compacted {stats.rows_compacted:,} rows for {stats.users_compacted:,} users into "
+          f"{stats.summaries_updated:,} summary updates in {stats.elapsed_seconds:,.1f}s")
+
+    if stats.errors:
+        for error in stats.errors:
+            print(f"❌ {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Synthetic Workload Generator
+============================
+
+Generate realistic emission histories for N users × M days, either to a
+file (NDJSON/CSV, loadable with scripts/bulk_load.py) or straight into
+the DynamoDB tables. Output is deterministic for a given --seed.
+
+Usage:
+    python scripts/generate_workload.py --users 10000 --days 365 --out workload.ndjson
+    python scripts/generate_workload.py --users 500 --days 90 --write-tables --entries-table carbontrack-entries-loadtest
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.workload_generator import (
+    DEFAULT_CATEGORY_MIX,
+    WorkloadConfig,
+    WorkloadGenerator,
+    write_entries_file,
+    write_to_tables,
+)
+
+
+def parse_mix(value: str):
+    """Parse 'transportation=0.5,energy=0.3,...' into a category mix"""
+    mix = {}
+    for pair in value.split(","):
+        category, weight = pair.split("=", 1)
+        mix[category.strip()] = float(weight)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic emission histories")
+    parser.add_argument("--users", type=int, default=100, help="Number of users (default: 100)")
+    parser.add_argument("--days", type=int, default=90, help="Days of history per user (default: 90)")
+    parser.add_argument("--start-date", type=date.fromisoformat, help="First day (default: DAYS days before today)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--mix", type=parse_mix, help=f"Category mix, e.g. {','.join(f'{k}={v}' for k, v in DEFAULT_CATEGORY_MIX.items())}")
+    parser.add_argument("--entries-per-day", type=float, default=2.5, help="Mean entries on an active day (default: 2.5)")
+    parser.add_argument("--stay-active", type=float, nargs=2, default=(8.0, 2.0), metavar=("A", "B"),
+                        help="Beta(A, B) prior on continuing a streak (default: 8 2)")
+    parser.add_argument("--return-probability", type=float, default=0.35, help="Chance to resume after an idle day")
+    parser.add_argument("--prefix", default="synthetic-user-", help="User id prefix")
+    parser.add_argument("--out", help="Write entries to this .ndjson or .csv file")
+    parser.add_argument("--write-tables", action="store_true", help="Write entries and users to DynamoDB")
+    parser.add_argument("--entries-table", help="Entries table (default: configured entries table)")
+    parser.add_argument("--users-table", help="Users table (default: configured users table)")
+    parser.add_argument("--skip-users", action="store_true", help="Don't write user items")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent writer threads (default: 8)")
+    parser.add_argument("--region", help="AWS region (default: configured region)")
+    args = parser.parse_args(argv)
+
+    if not args.out and not args.write_tables:
+        parser.error("pass --out and/or --write-tables")
+
+    config = WorkloadConfig(
+        users=args.users,
+        days=args.days,
+        start_date=args.start_date,
+        seed=args.seed,
+        entries_per_active_day=args.entries_per_day,
+        stay_active_beta=tuple(args.stay_active),
+        return_probability=args.return_probability,
+        user_id_prefix=args.prefix,
+    )
+    if args.mix:
+        config.category_mix = args.mix
+    generator = WorkloadGenerator(config)
+    started = time.monotonic()
+
+    if args.out:
+        fmt = "csv" if args.out.endswith(".csv") else "ndjson"
+        written = write_entries_file(generator, args.out, fmt)
+        print(f"✅ Wrote {written:,} entries for {args.users:,} users to {args.out}")
+
+    if args.write_tables:
+        def progress(count):
+            print(f"\r📝 {count:,} entries written", end="", file=sys.stderr, flush=True)
+
+        written = write_to_tables(
+            generator,
+            entries_table=args.entries_table or settings.entries_table,
+            users_table=None if args.skip_users else (args.users_table or settings.users_table),
+            workers=args.workers,
+            region=args.region,
+            progress=progress,
+        )
+        print(file=sys.stderr)
+        print(f"✅ Wrote {written:,} entries for {args.users:,} users to DynamoDB")
+
+    print(f"⏱️  Finished in {time.monotonic() - started:,.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Recommendation Precompute
+=========================
+
+Nightly batch job that ranks recommendations for every user active in the
+last month and writes them to the recommendations table. Users are scanned
+in parallel, the collaborative-filtering model is retrained on everyone's
+completions, recent histories are queried concurrently, and rankings are
+computed in a pool of worker processes. The API serves these rows until
+the user logs something new, then ranks on demand. Each ranked user's
+category mix also goes into the per-region peer-cohort indexes.
+
+Usage:
+    python scripts/precompute_recommendations.py
+    python scripts/precompute_recommendations.py --processes 8 --workers 8 --rcu 500
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+import boto3
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.rank_index import RankIndexStore
+from app.services.recommendation_precompute import PrecomputeStats, run_precompute
+
+
+def print_progress(stats: PrecomputeStats):
+    """Render a single live progress line on stderr"""
+    print(
+        f"\r💡 {stats.users_ranked:,}/{stats.users_scanned:,} users | {stats.entries_read:,} entries | "
+        f"{stats.users_per_second:,.0f} users/sec | {stats.elapsed_seconds:,.1f}s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute recommendations for active users")
+    parser.add_argument("--region", help="AWS region (default: configured region)")
+    parser.add_argument("--days", type=int, default=30, help="Days of history ranked (default: 30)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Ranking worker processes, 0 to rank in-process (default: CPU count)")
+    parser.add_argument("--chunk-users", type=int, default=250, help="Users per ranking task (default: 250)")
+    parser.add_argument("--readers", type=int, default=16, help="Concurrent history queries (default: 16)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent writer threads (default: 4)")
+    parser.add_argument("--segments", type=int, default=8, help="Parallel scan segments (default: 8)")
+    parser.add_argument("--rcu", type=float, help="Cap on consumed read capacity units per second for the scan")
+    args = parser.parse_args(argv)
+
+    if args.days < 1 or args.chunk_users < 1 or args.readers < 1 or args.workers < 1 or args.processes < 0:
+        parser.error("--days, --chunk-users, --readers and --workers must be positive")
+
+    region = args.region or settings.aws_region
+    dynamodb = boto3.resource('dynamodb', region_name=region)
+    recommendations_table = settings.recommendations_table
+
+    stats = asyncio.run(run_precompute(
+        dynamodb.Table(os.getenv('USERS_TABLE') or settings.users_table),
+        dynamodb.Table(os.getenv('ENTRIES_TABLE') or settings.entries_table),
+        dynamodb.Table(recommendations_table),
+        window_days=args.days,
+        processes=args.processes,
+        chunk_users=args.chunk_users,
+        read_concurrency=args.readers,
+        workers=args.workers,
+        total_segments=args.segments,
+        max_read_units_per_second=args.rcu,
+        table_factory=lambda: boto3.session.Session().resource('dynamodb', region_name=region).Table(recommendations_table),
+        progress=print_progress,
+        peer_store=RankIndexStore(dynamodb.Table(settings.leaderboards_table)),
+    ))
+    print(file=sys.stderr)
+
+    if stats.training_users >= settings.recommendation_cf_min_users:
+        print(f"🧠 Trained the completion model on {stats.training_users:,} users")
+    else:
+        print(f"🧠 Only {stats.training_users:,} users with completions; model not retrained")
+    print(f"✅ Ranked {stats.users_ranked:,} active users of {stats.users_scanned:,} scanned from {stats.entries_read:,} entries "
+          f"in {stats.elapsed_seconds:,.1f}s — {stats.users_per_second:,.0f} users/sec")
+    if stats.peer_regions:
+        print(f"👥 Published peer-cohort indexes for {stats.peer_regions:,} regions (including global)")
+
+    if stats.errors:
+        for error in stats.errors:
+            print(f"❌ {error}", file=sys.stderr)
+        print("↪️  Users without a fresh row are ranked on demand by the API", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
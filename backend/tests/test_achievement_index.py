@@ -0,0 +1,57 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.services.achievement_engine import AchievementEngine
+from app.services.dynamodb_service import DynamoDBService
+from benchmarks.memory_dynamodb import install
+
+
+def test_threshold_index_matches_rule_scan():
+    engine = AchievementEngine()
+    assert engine.newly_unlocked("activity_count", 9, 50) == ["carbon_conscious", "eco_warrior"]
+    assert engine.newly_unlocked("activity_count", 50, 50) == []
+    assert engine.newly_unlocked("net_zero", False, True) == ["carbon_neutral_hero"]
+
+    rng = random.Random(5)
+    for _ in range(200):
+        stats = {
+            "activity_count": rng.randint(0, 300),
+            "streak_days": rng.randint(0, 120),
+            "reduction_percentage": rng.uniform(0, 30),
+            "net_zero": rng.random() < 0.2,
+            "goals_set": rng.randint(0, 2),
+            "goals_achieved": rng.randint(0, 6),
+            "co2_saved_kg": rng.uniform(0, 12000),
+            "recommendations_completed": rng.randint(0, 12),
+        }
+        expected = [a.id for a in engine.achievements.values() if engine._check_achievement_criteria(a, stats)]
+        assert [a["achievement_id"] for a in engine.check_achievements(stats)] == expected
+
+
+def test_write_events_award_each_achievement_once():
+    service = DynamoDBService()
+    install(service)
+    start = datetime.utcnow() - timedelta(days=9)
+    awarded = []
+    for i in range(10):
+        day = start + timedelta(days=i)
+        emission = CarbonEmissionModel(
+            user_id="carol", emission_date=day.date(), category="energy", activity="electricity",
+            amount=Decimal("3"), unit="kWh", co2_equivalent=Decimal("1.1"), created_at=day,
+        )
+        result = asyncio.run(service.create_carbon_emission(emission))
+        awarded += [a["achievement_id"] for a in result["new_achievements"]]
+    assert awarded == ["first_entry", "daily_habit", "carbon_conscious"]
+
+    goals = asyncio.run(service.award_achievements("carol", {"goals_set": (0, 2)}))
+    assert [a["achievement_id"] for a in goals] == ["goal_setter"]
+
+    # Replaying a crossing does not persist a second copy
+    assert asyncio.run(service.award_achievements("carol", {"activity_count": (0, 10)})) == []
+    stored = asyncio.run(service.get_user_achievements("carol"))
+    assert sorted(a["achievement_id"] for a in stored) == sorted(awarded + ["goal_setter"])
+    profile = asyncio.run(service.get_user_profile("carol"))
+    assert (profile["achievements_count"], profile["entries_count"]) == (4, 10)
@@ -0,0 +1,131 @@
+import asyncio
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.services.activity_counters import RING_DAYS, ActivityCalendar, DailyCounters, EntryDayCounts
+from app.services.dynamodb_service import DynamoDBService
+from app.services.streaks_challenges import StreaksChallengesEngine
+from benchmarks.memory_dynamodb import install
+
+
+def test_ring_buckets_roll_and_sum_periods():
+    counters = DailyCounters()
+    start = date(2025, 3, 1)
+    for i in range(40):
+        counters.add(start + timedelta(days=i), points=10, activities=1, co2_reduced=0.5)
+    today = start + timedelta(days=39)  # 2025-04-09, a Wednesday
+
+    assert counters.rolling("points", 7, today) == 70
+    assert counters.total("activities", today.replace(day=1), today) == 9
+    # Days that fell off the ring count as zero
+    assert counters.rolling("activities", 60, today) == RING_DAYS
+    assert counters.add(today - timedelta(days=RING_DAYS), points=99) is False
+
+    totals = counters.period_totals(today)
+    assert (totals["points_today"], totals["activities_this_week"], totals["co2_reduced_this_month"]) == (10, 3, 4.5)
+    # Reading after a quiet gap does not need a write first
+    assert counters.period_totals(today + timedelta(days=10))["points_this_month"] == 90
+
+    restored = DailyCounters.from_bytes(counters.to_bytes())
+    assert restored.period_totals(today) == totals
+    assert len(counters.to_bytes()) == 5 + 3 * RING_DAYS * 4
+
+    counters.add(today + timedelta(days=100), activities=2)
+    assert counters.rolling("activities", RING_DAYS, today + timedelta(days=100)) == 2
+
+
+def test_service_writes_update_counters():
+    service = DynamoDBService()
+    install(service)
+    today = datetime.utcnow()
+    for _ in range(3):
+        emission = CarbonEmissionModel(
+            user_id="bob", emission_date=today.date(), category="transportation", activity="car_drive",
+            amount=Decimal("5"), unit="km", co2_equivalent=Decimal("1.2"), created_at=datetime.utcnow(),
+        )
+        assert asyncio.run(service.create_carbon_emission(emission))["success"]
+    assert asyncio.run(service.add_user_points("bob", 25, co2_reduced=1.5)) == []
+
+    profile = asyncio.run(service.get_user_profile("bob"))
+    # 25 added here, 10 per logged activity and 50 for the first-entry achievement
+    assert profile["entries_count"] == 3 and profile["total_points"] == 105
+    totals = DailyCounters.from_bytes(profile["daily_counters"]).period_totals(today.date())
+    assert (totals["activities_today"], totals["points_this_week"], totals["co2_reduced_today"]) == (3, 105, 1.5)
+    streak = ActivityCalendar.from_bytes(profile["activity_calendar"]).streak_info(today.date())
+    assert (streak["current_streak"], streak["total_active_days"]) == (1, 1)
+
+
+def test_calendar_streaks_match_full_recalculation():
+    engine = StreaksChallengesEngine()
+    rng = random.Random(11)
+    today = datetime.utcnow().date()
+    for _ in range(30):
+        days = [today - timedelta(days=rng.randint(0, 60)) for _ in range(rng.randint(1, 45))]
+        calendar = ActivityCalendar()
+        for day in days:  # Arrival order includes backfilled days
+            calendar.mark(day)
+        calendar = ActivityCalendar.from_bytes(calendar.to_bytes())
+        expected = engine.calculate_streak([d.isoformat() for d in days])
+        assert calendar.streak_info(today) == expected
+        assert calendar.active_dates(today - timedelta(days=30), today) == sorted(
+            {d for d in days if d >= today - timedelta(days=30)}
+        )
+    assert ActivityCalendar().streak_info(today)["streak_status"] == "no_activities"
+
+
+def test_unmarked_days_match_full_recalculation():
+    engine = StreaksChallengesEngine()
+    rng = random.Random(12)
+    today = datetime.utcnow().date()
+    for _ in range(30):
+        days = {today - timedelta(days=rng.randint(0, 60)) for _ in range(rng.randint(1, 45))}
+        calendar = ActivityCalendar()
+        for day in days:
+            calendar.mark(day)
+        removed = set(rng.sample(sorted(days), rng.randint(1, len(days))))
+        for day in removed:
+            assert calendar.unmark(day)
+        assert not calendar.unmark(today + timedelta(days=1))
+        expected = engine.calculate_streak([d.isoformat() for d in days - removed])
+        info = ActivityCalendar.from_bytes(calendar.to_bytes()).streak_info(today)
+        assert info == expected if days - removed else info["streak_status"] == "no_activities"
+
+
+def test_deleting_or_moving_a_days_last_entry_clears_it():
+    service = DynamoDBService()
+    install(service)
+    today = datetime.utcnow().date()
+    timestamps = {}
+    for offset in (0, 1, 1, 2):
+        emission = CarbonEmissionModel(
+            user_id="eve", emission_date=today - timedelta(days=offset), category="food", activity="beef",
+            amount=Decimal("1"), unit="kg", co2_equivalent=Decimal("1"), created_at=datetime.utcnow(),
+        )
+        timestamps.setdefault(offset, []).append(asyncio.run(service.create_carbon_emission(emission))["timestamp"])
+
+    def active():
+        profile = asyncio.run(service.get_user_profile("eve"))
+        calendar = ActivityCalendar.from_bytes(profile["activity_calendar"])
+        return calendar.active_dates(today - timedelta(days=10), today + timedelta(days=1))
+
+    # Per-day entry counts decide, without querying the entries
+    queries = []
+    original = service.entries_table.query
+    service.entries_table.query = lambda **kwargs: queries.append(kwargs) or original(**kwargs)
+    assert asyncio.run(service.delete_carbon_emission("eve", timestamps[1][0]))["success"]
+    assert asyncio.run(service.delete_carbon_emission("eve", timestamps[0][0]))["success"]
+    assert active() == [today - timedelta(days=2), today - timedelta(days=1)]
+    moved = (today - timedelta(days=5)).isoformat()
+    assert asyncio.run(service.update_carbon_emission("eve", timestamps[2][0], {"date": moved}))
+    assert active() == [today - timedelta(days=5), today - timedelta(days=1)]
+    assert queries == []
+
+    # Profiles written before the counts existed are counted from their entries once
+    service.users_table.update_item(Key={"userId": "eve"}, UpdateExpression="REMOVE entry_days")
+    assert asyncio.run(service.delete_carbon_emission("eve", timestamps[1][1]))["success"]
+    assert active() == [today - timedelta(days=5)] and len(queries) == 1
+    counts = EntryDayCounts.from_bytes(asyncio.run(service.get_user_profile("eve"))["entry_days"])
+    assert counts.counts == {(today - timedelta(days=5)).toordinal(): 1}
+    assert EntryDayCounts.from_bytes(counts.to_bytes()).counts == counts.counts
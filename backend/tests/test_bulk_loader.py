@@ -0,0 +1,119 @@
+import json
+import threading
+
+from app.services.bulk_loader import iter_records, prepare_chunk, run_bulk_load, SourceRow
+from app.services.carbon_calculator import calculator
+from benchmarks.memory_dynamodb import InMemoryTable
+
+
+class FakeTable:
+    """Collects batch-written items; optionally fails on one write call"""
+
+    def __init__(self, fail_on_call=None):
+        self.items = {}
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+        self.lock = threading.Lock()
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        table = self
+
+        class Batch:
+            def __enter__(self):
+                with table.lock:
+                    table.calls += 1
+                    if table.calls == table.fail_on_call:
+                        raise RuntimeError("simulated throttling")
+                return self
+
+            def put_item(self, Item):
+                with table.lock:
+                    table.items[(Item["userId"], Item["timestamp"])] = Item
+
+            def __exit__(self, *exc):
+                return False
+
+        return Batch()
+
+
+def _rows(count):
+    return [
+        {"user_id": f"user-{i % 3}", "date": f"2025-01-{i % 28 + 1:02d}", "category": "transportation",
+         "activity": "car_gasoline_medium", "amount": 10 + i, "unit": "km"}
+        for i in range(count)
+    ]
+
+
+def test_readers_resume_from_offsets(tmp_path):
+    rows = _rows(5)
+    sources = {
+        "ndjson": "\n".join(json.dumps(r) for r in rows) + "\n",
+        "json": json.dumps(rows, indent=2),
+        "csv": "user_id,date,category,activity,amount,unit\n"
+        + "".join(f"{r['user_id']},{r['date']},{r['category']},\"{r['activity']}\",{r['amount']},{r['unit']}\n" for r in rows),
+    }
+    for fmt, content in sources.items():
+        path = tmp_path / f"source.{fmt}"
+        path.write_text(content)
+        records = list(iter_records(str(path), fmt))
+        assert [r.data["user_id"] for r in records] == [r["user_id"] for r in rows], fmt
+
+        resumed = list(iter_records(str(path), fmt, records[1].end_offset))
+        assert [str(r.data["amount"]) for r in resumed] == [str(r["amount"]) for r in rows[2:]], fmt
+
+
+def test_vectorized_co2_matches_calculator():
+    cases = [
+        ("transportation", "car_gasoline_medium", 42.5, "km"),
+        ("transportation", "bus", 12, "miles"),
+        ("energy", "electricity", 250, "kWh"),
+        ("energy", "natural_gas", 30, "therms"),
+        ("food", "beef", 3, "servings"),
+        ("food", "rice", 2.5, "lbs"),
+        ("waste", "landfill_mixed", 7, "kg"),
+        ("shopping", "anything", 5, "items"),
+    ]
+    rows = [
+        SourceRow(i + 1, {"user_id": "u", "date": "2025-03-01", "category": c, "activity": a, "amount": amt, "unit": u})
+        for i, (c, a, amt, u) in enumerate(cases)
+    ]
+    rows.append(SourceRow(100, {"user_id": "u", "date": "2025-3-1", "category": "food", "activity": "beef", "amount": -1, "unit": "kg"}))
+
+    items, rejects = prepare_chunk(rows, "source")
+
+    assert len(items) == len(cases)
+    assert len(rejects) == 1 and "amount" in rejects[0]["reason"] and "date" in rejects[0]["reason"]
+    for item, (c, a, amt, u) in zip(items, cases):
+        expected = calculator.calculate_emission(c, a, amt, u)["co2_equivalent"]
+        assert float(item.get("co2_equivalent", 0)) == expected, (c, a, u)
+
+
+def test_bulk_load_resumes_after_failed_chunk(tmp_path):
+    source = tmp_path / "entries.ndjson"
+    source.write_text("\n".join(json.dumps(r) for r in _rows(10)) + "\n")
+    checkpoint = tmp_path / "load.ckpt"
+    users = InMemoryTable("users", "userId")
+    users.load([{"userId": "user-0", "emissions_version": 3}, {"userId": "user-1"}])
+
+    failing = FakeTable(fail_on_call=2)
+    first = run_bulk_load(str(source), table_name="entries", chunk_size=4, workers=1,
+                          checkpoint_path=str(checkpoint), table_factory=lambda: failing,
+                          users_table_factory=lambda: users)
+    assert first.errors
+    saved = json.loads(checkpoint.read_text())
+    assert saved["rows_loaded"] == 4
+
+    healthy = FakeTable()
+    healthy.items.update(failing.items)
+    second = run_bulk_load(str(source), table_name="entries", chunk_size=4, workers=2,
+                           checkpoint_path=str(checkpoint), table_factory=lambda: healthy,
+                           users_table_factory=lambda: users)
+    assert not second.errors
+    assert second.resumed_from == saved["offset"]
+    assert second.rows_loaded == 6
+    assert len(healthy.items) == 10
+
+    # Both runs bumped the loaded users' versions; users without a profile stay absent
+    profiles = {user["userId"]: user for user in users.all_items()}
+    assert profiles["user-0"]["emissions_version"] == 5 and profiles["user-1"]["data_version"] == 2
+    assert "user-2" not in profiles
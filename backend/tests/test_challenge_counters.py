@@ -0,0 +1,162 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from app.api.v1 import gamification
+from app.api.v1.gamification import streaks_challenges_engine
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.services.activity_counters import DailyCounters
+from app.services.challenge_counters import _CO2, _PREVIOUS_CO2, ChallengeCounters
+from app.services.dynamodb_service import DynamoDBService
+from benchmarks.memory_dynamodb import install
+
+
+def test_windows_roll_and_track_categories_and_reduction():
+    counters = ChallengeCounters()
+    monday = date(2025, 3, 3)
+    # Previous week: 7 kg over 7 days; this week so far: 1 kg over 2 days
+    for i in range(7):
+        counters.record(monday - timedelta(days=7 - i), "food", 1)
+    counters.record(monday, "transportation", 0.5)
+    counters.record(monday + timedelta(days=1), "energy", 0.5)
+    counters = ChallengeCounters.from_bytes(counters.to_bytes())
+
+    week = counters.window_stats("week", monday + timedelta(days=1))
+    assert (week["activities_logged"], week["transportation_activities"], week["food_activities"]) == (2, 1, 0)
+    assert week["categories_logged"] == ["transportation", "energy"]
+    assert week["reduction_percentage"] == 50.0
+
+    month = counters.window_stats("month", monday + timedelta(days=1))
+    assert month["activities_logged"] == 4 and month["categories_logged"] == ["transportation", "energy", "food"]
+    # Reading after a quiet gap does not need a write first
+    assert counters.window_stats("day", monday + timedelta(days=2))["activities_logged"] == 0
+    assert counters.window_stats("week", monday + timedelta(days=14))["activities_logged"] == 0
+    # Days before the stored window are dropped
+    assert counters.record(monday - timedelta(days=40), "waste") is False
+
+
+def test_emission_writes_drive_challenge_progress(monkeypatch):
+    service = DynamoDBService()
+    install(service)
+    today = datetime.utcnow().date()
+    for category in ("transportation", "energy", "food", "waste", "transportation"):
+        emission = CarbonEmissionModel(
+            user_id="cara", emission_date=today, category=category, activity="x",
+            amount=Decimal("1"), unit="kg", co2_equivalent=Decimal("2"), created_at=datetime.utcnow(),
+        )
+        assert asyncio.run(service.create_carbon_emission(emission))["success"]
+
+    monkeypatch.setattr(gamification, "dynamodb_service", service)
+    stats = asyncio.run(gamification._get_user_stats("cara"))
+    progress = {
+        p["challenge_id"]: p for p in (
+            streaks_challenges_engine.check_challenge_progress(c["id"], stats)
+            for c in streaks_challenges_engine.get_active_challenges()
+        )
+    }
+    assert progress["daily_logger"]["is_completed"] and progress["daily_logger"]["progress"] == 5
+    assert progress["transport_tracker"]["progress"] == 2
+    assert progress["category_master"]["is_completed"]
+    assert progress["monthly_milestone"]["progress"] == 5
+
+
+def test_deletes_and_edits_take_entries_back_out_of_the_stats():
+    counters = ChallengeCounters()
+    monday = date(2025, 3, 3)
+    counters.record(monday - timedelta(days=1), "food", 4)
+    counters.record(monday, "food", 1)
+    counters.record(monday, "energy", 2)
+    # Edit last week's entry and delete one of this week's
+    assert counters.record(monday - timedelta(days=1), "food", -4, -1)
+    counters.record(monday - timedelta(days=1), "food", 3, 1)
+    counters.record(monday, "food", -1, -1)
+    week = counters.window_stats("week", monday)
+    assert (week["activities_logged"], week["food_activities"], week["categories_logged"]) == (1, 0, ["energy"])
+    assert counters.rows[1, _PREVIOUS_CO2] == 3000 and counters.rows[1, _CO2] == 2000
+
+    service = DynamoDBService()
+    install(service)
+    now = datetime.utcnow()
+    timestamps = []
+    for category, co2 in (("food", "2"), ("food", "3"), ("transportation", "5")):
+        emission = CarbonEmissionModel(
+            user_id="dan", emission_date=now.date(), category=category, activity="x",
+            amount=Decimal("1"), unit="kg", co2_equivalent=Decimal(co2), created_at=datetime.utcnow(),
+        )
+        timestamps.append(asyncio.run(service.create_carbon_emission(emission))["timestamp"])
+    assert asyncio.run(service.delete_carbon_emission("dan", timestamps[0]))["success"]
+    assert asyncio.run(service.update_carbon_emission("dan", timestamps[2], {"category": "energy", "co2_equivalent": Decimal("1")}))
+    assert not asyncio.run(service.update_carbon_emission("dan", "missing", {"co2_equivalent": Decimal("1")}))
+
+    user = asyncio.run(service.get_user_profile("dan"))
+    assert (user["total_emissions"], user["entries_count"]) == (4, 2)
+    assert DailyCounters.from_bytes(user["daily_counters"]).total("activities", now.date(), now.date()) == 2
+    day = ChallengeCounters.from_bytes(user["challenge_counters"]).window_stats("day", now.date())
+    assert (day["activities_logged"], day["food_activities"], day["energy_activities"]) == (2, 1, 1)
+    assert day["categories_logged"] == ["energy", "food"]
+
+
+def test_huge_or_future_entries_neither_overflow_nor_move_windows():
+    counters = ChallengeCounters()
+    today = date(2025, 3, 3)
+    counters.record(today, "food", 5_000_000)  # 5,000 t: past the int32 gram range
+    assert counters.rows[0, _CO2] == np.iinfo(np.int32).max
+    daily = DailyCounters()
+    daily.add(today, co2_reduced=5_000_000)
+    daily.add(today, points=-10)
+    assert daily.total("co2_reduced", today, today) == np.iinfo(np.int32).max / 1000
+
+    service = DynamoDBService()
+    install(service)
+    now = datetime.utcnow()
+
+    def create(user_id, co2, day=now.date()):
+        emission = CarbonEmissionModel(
+            user_id=user_id, emission_date=day, category="food", activity="x",
+            amount=Decimal("1"), unit="kg", co2_equivalent=Decimal(co2), created_at=datetime.utcnow(),
+        )
+        return asyncio.run(service.create_carbon_emission(emission))
+
+    assert create("hal", "5000000")["success"]
+    assert not create("hal", "1", now.date() + timedelta(days=1))["success"]
+    # An entry whose stats cannot be applied is not left behind
+    service.users_table.update_item(Key={"userId": "hal"}, UpdateExpression="SET challenge_counters = :bad",
+                                    ExpressionAttributeValues={":bad": b"\x09"})
+    assert not create("hal", "1")["success"]
+    assert len(asyncio.run(service.get_user_emissions("hal"))) == 1
+
+
+def test_challenges_are_claimed_once_per_window_and_only_when_complete(monkeypatch):
+    service = DynamoDBService()
+    install(service)
+    monkeypatch.setattr(gamification, "dynamodb_service", service)
+    user = {"user_id": "dex"}
+
+    def claim(challenge_id):
+        try:
+            return asyncio.run(gamification.complete_challenge(challenge_id, user))
+        except gamification.HTTPException as e:
+            return e.status_code
+
+    assert claim("category_master") == 400
+    assert claim("no_such_challenge") == 400
+    today = datetime.utcnow().date()
+    for category in ("transportation", "energy", "food", "waste"):
+        emission = CarbonEmissionModel(
+            user_id="dex", emission_date=today, category=category, activity="x",
+            amount=Decimal("1"), unit="kg", co2_equivalent=Decimal("1"), created_at=datetime.utcnow(),
+        )
+        assert asyncio.run(service.create_carbon_emission(emission))["success"]
+    points_before = asyncio.run(service.get_user_profile("dex"))["total_points"]
+
+    earned = claim("category_master")["data"]["total_points_earned"]
+    assert claim("category_master")["success"]
+    # Weekly challenges are keyed by their week, so the second claim earns nothing
+    monday = today - timedelta(days=today.weekday())
+    credit = service.points_ledger_table.get_item(
+        Key={"user_id": "dex", "entry_key": f"txn#challenge#category_master#{monday.isoformat()}"}
+    )
+    assert "Item" in credit
+    assert asyncio.run(service.get_user_profile("dex"))["total_points"] == points_before + earned
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+import app.services.dynamodb_service as dynamodb_module
+from app.api.v1 import recommendations
+from app.services.collaborative_filtering import (
+    MODEL_KEY,
+    FactorModel,
+    FactorModelCache,
+    decode_factors,
+    encode_factors,
+    train_factors,
+    user_vector,
+)
+from app.services.recommendation_precompute import run_precompute
+from app.services.versioned_cache import VersionedCache
+from tests.test_recommendation_precompute import _log, _service_with_users
+
+
+def test_factors_learn_co_completions_and_round_trip():
+    items = ["a", "b", "c", "d", "e"]
+    completions = [["a", "b"]] * 20 + [["c", "d"]] * 20 + [[]] * 5
+    model, users = train_factors(completions, items, factors=4, trained_at="t1")
+
+    folded = model.fold_in(["a"])
+    affinity = model.affinities(folded, items)
+    assert affinity["b"] > 0.5 > max(affinity["c"], affinity["d"], affinity["e"])
+    assert np.allclose(model.fold_in(["a", "b"]), users[0], atol=1e-4)
+    assert not users[-1].any()
+
+    assert len(encode_factors(users[0])) == 8
+    assert np.allclose(decode_factors(encode_factors(users[0]), 4), users[0], atol=1e-2)
+    assert decode_factors(encode_factors(users[0]), 8) is None
+    restored = FactorModel.from_item(model.to_item(users=45))
+    assert restored.item_ids == items and restored.trained_at == "t1"
+    assert np.allclose(restored.item_factors, model.item_factors, atol=1e-2)
+
+    row = {"model_trained_at": "t1", "completions": 1, "cf_factors": encode_factors(folded)}
+    assert np.allclose(user_vector(model, row, ["a"]), folded, atol=1e-2)
+    assert np.allclose(user_vector(model, row, ["a", "c"]), model.fold_in(["a", "c"]))
+
+
+def test_completions_personalize_ranking_offline_and_online(monkeypatch):
+    # Eight drivers; six of them took public transport and then bought an EV
+    service = _service_with_users(0)
+    for n in range(8):
+        _log(service, f"driver-{n}", "car_gasoline_medium", "transportation", co2="5")
+    for n in range(6):
+        for rec_id in ("use_public_transport", "switch_to_electric"):
+            assert asyncio.run(service.complete_recommendation(f"driver-{n}", rec_id))
+    asyncio.run(service.complete_recommendation("driver-7", "use_public_transport"))
+
+    stats = asyncio.run(run_precompute(
+        service.users_table, service.entries_table, service.recommendations_table,
+        processes=0, min_training_users=3,
+    ))
+    assert stats.training_users == 7 and stats.rows_written == 8 and not stats.errors
+    assert FactorModel.from_item(asyncio.run(service.get_recommendation_model())) is not None
+
+    # Without completions data the cheap tweak outranks the EV; with it the EV comes first
+    row = asyncio.run(service.get_precomputed_recommendations("driver-7"))
+    ranked = [rec["id"] for rec in json.loads(row["payload"])["recommendations"]]
+    assert "use_public_transport" not in ranked
+    assert ranked.index("switch_to_electric") < ranked.index("optimize_driving")
+    plain = json.loads(asyncio.run(service.get_precomputed_recommendations("driver-6"))["payload"])
+    plain_ranked = [rec["id"] for rec in plain["recommendations"]]
+    assert plain_ranked.index("optimize_driving") < plain_ranked.index("switch_to_electric")
+
+    # A later completion is ranked on demand with a folded-in vector
+    monkeypatch.setattr(dynamodb_module, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "recommendation_cache", VersionedCache())
+    monkeypatch.setattr(recommendations, "factor_model_cache", FactorModelCache())
+    user = {"user_id": "driver-7"}
+    asyncio.run(recommendations.complete_recommendation("remote_work", current_user=user))
+    result = asyncio.run(recommendations._get_recommendation_result("driver-7", None))
+    ranked = [rec["id"] for rec in result.recommendations]
+    assert "remote_work" not in ranked and "use_public_transport" not in ranked
+    assert ranked.index("switch_to_electric") < ranked.index("optimize_driving")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(recommendations.complete_recommendation("no_such_tip", current_user=user))
+    assert error.value.status_code == 404
+    assert asyncio.run(service.get_precomputed_recommendations(MODEL_KEY))["users"] == 7
@@ -0,0 +1,34 @@
+import numpy as np
+
+from app.services.emission_columns import EmissionColumns, parse_days
+from app.services.recommendation_engine import RecommendationEngine
+from benchmarks.recommendation_benchmark import legacy_aggregate, synthetic_history
+
+
+def test_parse_days_handles_timestamps_and_bad_dates():
+    days = parse_days(["2025-03-04", "2025-03-04T10:00:00Z", "", "garbage"])
+    assert days[:2].tolist() == [np.datetime64("2025-03-04", "D").item()] * 2
+    assert np.isnat(days[2:]).all()
+
+
+def test_columns_breakdowns():
+    columns = EmissionColumns.from_entries([
+        {"date": "2024-12-31", "category": "food", "activity": "beef", "co2_equivalent": 6.0},
+        {"date": "2025-01-02", "category": "transportation", "activity": "car", "co2_equivalent": 2.5},
+        {"date": "not a date", "category": "food", "activity": "beef", "co2_equivalent": 1.0},
+        {"date": "2025-01-09", "category": "other", "activity": "beef", "co2_equivalent": 0.5},
+    ])
+    assert columns.category_totals() == {"food": 7.0, "transportation": 2.5, "other": 0.5}
+    assert columns.activity_totals()[("food", "beef")] == 7.0
+    assert columns.activity_name_totals() == {"beef": 7.5, "car": 2.5}
+    assert list(columns.monthly_totals().items()) == [("2024-12", 6.0), ("2025-01", 3.0)]
+    assert EmissionColumns.from_entries([]).monthly_totals() == {}
+
+
+def test_columnar_aggregation_matches_per_entry_pass():
+    history = synthetic_history(5000)
+    totals = RecommendationEngine().aggregate_emissions(history)
+    expected = legacy_aggregate(history)
+    assert totals.category_totals == expected.category_totals
+    assert totals.activity_totals == expected.activity_totals
+    assert list(totals.monthly_trends.items()) == list(expected.monthly_trends.items())
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.emission_columns import EmissionColumns
+from app.services.emission_store import EmissionStore, StringTable, UserEmissions
+from app.services.recommendation_engine import RecommendationEngine
+from app.services.streaks_challenges import StreaksChallengesEngine
+from tests.test_recommendation_precompute import _log, _service_with_users
+
+
+def _item(n, day, category="transportation", activity="car_gasoline_medium", co2=2.0):
+    return {"userId": "u", "timestamp": f"2024-03-{day:02d}T10:00:{n:02d}", "entry_id": f"e{n}",
+            "date": f"2024-03-{day:02d}", "category": category, "activity": activity,
+            "amount": 10, "unit": "km", "co2_equivalent": co2, "emission_factor": 0.2}
+
+
+def test_columns_match_the_item_dicts_they_replace():
+    store = EmissionStore()
+    items = [_item(1, 3), _item(2, 1, "food", "beef", 6.0), _item(3, 9, "food", "chicken", 1.5),
+             _item(4, 10), dict(_item(5, 12, "energy", "electricity", 4.0), date="bad", description="meter")]
+    history = store.build(list(reversed(items)))
+    assert history.timestamps.tolist() == sorted(item["timestamp"] for item in items)
+    assert history.categories.dtype == np.int16 and history.days.dtype == np.int32
+
+    # Windows compare timestamps as strings, like the table's key conditions
+    rows = history.newest(history.window("2024-03-02", "2024-03-10"), limit=2)
+    assert [item["entry_id"] for item in history.items(rows)] == ["e3", "e1"]
+    assert history.items(history.newest(limit=1))[0] == {
+        "timestamp": "2024-03-12T10:00:05", "date": "", "category": "energy", "activity": "electricity",
+        "amount": 10.0, "unit": "km", "co2_equivalent": 4.0, "emission_factor": 0.2,
+        "entry_id": "e5", "description": "meter",
+    }
+
+    # Engine totals from the columns equal those from the newest-first item dicts
+    engine = RecommendationEngine()
+    newest = history.newest()
+    expected = engine.aggregate_emissions(history.items(newest))
+    actual = engine.aggregate_columns(history.columns(newest))
+    assert actual == expected and isinstance(history.columns(newest), EmissionColumns)
+    assert history.category_totals() == {"transportation": 4.0, "food": 7.5, "energy": 4.0}
+    assert history.monthly_totals() == {"2024-03": 11.5, "": 4.0}
+
+    streak = StreaksChallengesEngine().streak_from_days(history.active_days(), today=date(2024, 3, 11))
+    assert (streak["current_streak"], streak["longest_streak"], streak["streak_status"]) == (2, 2, "active_yesterday")
+
+
+def test_store_appends_own_writes_and_rebuilds_after_other_changes():
+    service = _service_with_users(0)
+    queries = []
+    original = service.entries_table.query
+    service.entries_table.query = lambda **kwargs: queries.append(kwargs) or original(**kwargs)
+
+    _log(service, "alice", "beef", "food", co2="6")
+    assert len(asyncio.run(service.get_emission_history("alice"))) == 1 and len(queries) == 1
+
+    # Writes through this service are appended without a query
+    _log(service, "alice", "car_gasoline_medium", "transportation", co2="4")
+    history = asyncio.run(service.get_emission_history("alice"))
+    assert len(history) == 2 and len(queries) == 1
+    assert asyncio.run(service.get_analytics("alice", "2000-01-01", "2100-01-01"))["emissions_by_category"] == {
+        "food": 6.0, "transportation": 4.0
+    }
+
+    # An update (or another process's write) bumps the version, so the next read rebuilds
+    timestamp = str(history.timestamps[0])
+    assert asyncio.run(service.update_carbon_emission("alice", timestamp, {"co2_equivalent": 9}))
+    assert asyncio.run(service.get_analytics("alice", "2000-01-01", "2100-01-01"))["total_emissions"] == 13.0
+    assert len(queries) == 2
+    service.users_table.update_item(Key={"userId": "alice"}, UpdateExpression="ADD emissions_version :one",
+                                    ExpressionAttributeValues={":one": 1})
+    asyncio.run(service.get_emission_history("alice"))
+    assert len(queries) == 3 and service.emission_store.hits == 2
+
+
+def test_memory_budget_evicts_least_recently_used():
+    now = datetime.utcnow()
+    items = [dict(_item(n, 1), timestamp=(now - timedelta(minutes=n)).isoformat()) for n in range(50)]
+    size = UserEmissions.from_items(items).nbytes
+    store = EmissionStore(max_bytes=size * 2 + 1)
+    for user_id in ("a", "b"):
+        store.put(user_id, 1, store.build(items))
+    assert store.get("a", 1) is not None
+    store.put("c", 1, store.build(items))
+    assert store.get("b", 1) is None and store.get("a", 1) is not None and len(store) == 2
+    assert store.nbytes == pytest.approx(size * 2, rel=0.01)
+    store.put("huge", 1, store.build(items * 3))
+    assert store.get("huge", 1) is None and len(store) == 2
+
+
+def test_free_text_values_widen_codes_instead_of_failing():
+    store = EmissionStore()
+    count = StringTable.INT16_CODES + 10
+    items = [_item(n % 60, 1 + n % 28, activity=f"custom activity {n}") for n in range(count)]
+    history = store.build(items)
+    assert history.activities.dtype == np.int32 and history.categories.dtype == np.int16
+    assert sorted(item["activity"] for item in history.items(np.arange(len(history)))) == sorted(
+        item["activity"] for item in items
+    )
+    assert len(history.columns(np.arange(len(history))).activities) == count
+    # Each history owns its table, and the table counts towards the budget
+    other = store.build([_item(1, 3)])
+    assert len(other.strings) == 3 and other.strings is not history.strings
+    assert history.nbytes > history.strings.nbytes > count * len("custom activity 0")
+    appended = other.append(_item(2, 4, "food", "beef"))
+    assert appended.items(np.arange(2))[1]["activity"] == "beef" and appended.nbytes > other.nbytes
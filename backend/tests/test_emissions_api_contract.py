@@ -20,9 +20,9 @@ def test_post_and_get_emissions_contract(monkeypatch):
             "timestamp": "2025-10-18T12:00:00Z",
         }
 
-    # Mock get_user_emissions to return one item resembling DynamoDB item
-    async def mock_get(user_id: str, start_date=None, end_date=None, limit: int = 50):
-        return [
+    # Mock get_emission_history to return one item resembling DynamoDB item
+    async def mock_get(user_id: str):
+        return dynamodb_service.emission_store.build([
             {
                 "userId": user_id,
                 "timestamp": "2025-10-18T12:00:00Z",
@@ -36,10 +36,10 @@ def test_post_and_get_emissions_contract(monkeypatch):
                 "co2_equivalent": 5.0,
                 "emission_factor": 0.2,
             }
-        ]
+        ])
 
     monkeypatch.setattr(dynamodb_service, "create_carbon_emission", mock_create)
-    monkeypatch.setattr(dynamodb_service, "get_user_emissions", mock_get)
+    monkeypatch.setattr(dynamodb_service, "get_emission_history", mock_get)
 
     headers = {"Authorization": "Bearer mock_alice"}
 
@@ -70,3 +70,13 @@ def test_post_and_get_emissions_contract(monkeypatch):
     assert d.get("total_emissions") is not None
     assert d.get("monthly_emissions") is not None
     assert d.get("goal_progress") is not None
+
+
+def test_entries_dated_in_the_future_or_distant_past_are_rejected():
+    headers = {"Authorization": "Bearer mock_alice"}
+    payload = {"category": "food", "activity": "beef", "amount": 1.0, "unit": "kg"}
+    for day in ("9999-12-31", "0001-01-01"):
+        resp = client.post("/api/v1/carbon-emissions/", json=dict(payload, date=day), headers=headers)
+        assert resp.status_code == 422, resp.text
+    resp = client.put("/api/v1/carbon-emissions/2025-10-18T12:00:00", json={"date": "9999-12-31"}, headers=headers)
+    assert resp.status_code == 422, resp.text
@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+from app.api.v1 import gamification
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.services.dynamodb_service import DynamoDBService
+from app.services.gamification_snapshot import SnapshotCache
+from benchmarks.memory_dynamodb import install
+
+
+def _log(service, user_id):
+    emission = CarbonEmissionModel(
+        user_id=user_id, emission_date=datetime.utcnow().date(), category="food", activity="beef",
+        amount=Decimal("1"), unit="kg", co2_equivalent=Decimal("27"), created_at=datetime.utcnow(),
+    )
+    assert asyncio.run(service.create_carbon_emission(emission))["success"]
+
+
+def test_snapshot_is_shared_until_the_data_version_changes(monkeypatch):
+    service = DynamoDBService()
+    install(service)
+    cache = SnapshotCache(max_entries=1, rank_ttl_seconds=3600)
+    monkeypatch.setattr(gamification, "dynamodb_service", service)
+    monkeypatch.setattr(gamification, "snapshot_cache", cache)
+
+    _log(service, "gus")
+    first = asyncio.run(gamification._get_user_snapshot("gus"))
+    assert first.stats["total_activities"] == 1
+    assert [a["achievement_id"] for a in first.achievements] == ["first_entry"]
+    # Only boards the user holds a rank on are listed
+    assert all(ranking["rank"] for ranking in first.rankings.values())
+    assert asyncio.run(gamification._get_user_snapshot("gus")) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Emissions, points and achievements all bump the version
+    version = asyncio.run(service.get_data_version("gus"))
+    asyncio.run(service.record_points("gus", 100, "challenge", "daily_logger#1"))
+    assert asyncio.run(service.get_data_version("gus")) == version + 1
+    _log(service, "gus")
+    second = asyncio.run(gamification._get_user_snapshot("gus"))
+    assert second is not first
+    assert (second.stats["total_activities"], second.stats["total_points"]) == (2, 170)
+    assert second.level == gamification.achievement_engine.calculate_user_level(170)
+    assert second.challenges[0]["challenge_id"] == "daily_logger" and second.challenges[0]["progress"] == 2
+
+    # The cache is bounded
+    asyncio.run(gamification._get_user_snapshot("hal"))
+    assert len(cache) == 1 and cache.get("gus", second.version) is None
@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+
+from app.services.leaderboard_engine import LeaderboardEngine, LeaderboardScores, rank_of, top_indices
+
+
+def _users(n=300, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "user_id": f"u{i}",
+            "total_points": rng.choice([0, 5, 10, 10, 20, 35]),
+            "points_this_week": rng.randint(0, 6),
+            "current_streak": rng.randint(0, 3),
+        }
+        for i in range(n)
+    ]
+
+
+def _reference(users, field, include_zero=False, limit=None):
+    ranked = [u for u in users if u.get(field, 0) > 0 or include_zero]
+    ranked.sort(key=lambda u: u.get(field, 0), reverse=True)
+    return [u["user_id"] for u in ranked[:limit]]
+
+
+def test_top_n_and_ranks_match_stable_full_sort():
+    users = _users()
+    engine = LeaderboardEngine()
+
+    board = engine.generate_leaderboard("points_all_time", users, limit=25)
+    assert [e["user_id"] for e in board["entries"]] == _reference(users, "total_points", limit=25)
+    assert [e["rank"] for e in board["entries"]] == list(range(1, 26))
+    assert board["statistics"]["total_participants"] == len(_reference(users, "total_points"))
+
+    # Zero streaks still rank; every user's counted rank matches the full order
+    order = _reference(users, "current_streak", include_zero=True)
+    scores = LeaderboardScores.from_user_data(users)
+    values = scores.column("current_streak")
+    eligible = np.ones(len(users), dtype=bool)
+    assert [rank_of(values, eligible, scores.position(uid)) for uid in order] == list(range(1, len(users) + 1))
+
+
+def test_current_user_ranked_outside_top_n():
+    users = _users()
+    engine = LeaderboardEngine()
+    order = _reference(users, "points_this_week")
+    target = order[-1]
+
+    board = engine.generate_leaderboard("points_weekly", users, target, limit=5)
+    assert board["current_user"]["rank"] == len(order)
+    assert board["current_user"]["entry"]["user_id"] == target
+    assert board["current_user"]["is_in_top"] is False
+
+    rankings = engine.get_user_rankings(target, users)
+    assert rankings["points_weekly"]["rank"] == len(order)
+    # Only boards the user is ranked on are listed
+    assert "goals_all_time" not in rankings and engine.get_user_rankings("nobody", users) == {}
+
+
+def test_top_indices_edge_cases():
+    scores = np.array([3.0, 1.0, 3.0, 2.0])
+    assert top_indices(scores, scores > 0, 0).tolist() == []
+    assert top_indices(scores, scores > 0, 10).tolist() == [0, 2, 3, 1]
+    assert top_indices(scores, scores > 0, 1).tolist() == [0]
+    assert LeaderboardEngine().generate_leaderboard("points_daily", [])["entries"] == []
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.services.dynamodb_service import DynamoDBService
+from benchmarks.memory_dynamodb import InMemoryTable, install
+
+
+def test_service_round_trip_against_in_memory_tables():
+    service = DynamoDBService()
+    install(service)
+    service.users_table.load([{"userId": "alice", "email": "alice@example.com"}])
+
+    base = datetime(2025, 3, 1, 12)
+    for i in range(5):
+        emission = CarbonEmissionModel(
+            user_id="alice", emission_date=date(2025, 3, 1) + timedelta(days=i), category="energy",
+            activity="electricity", amount=Decimal("10"), unit="kWh", co2_equivalent=Decimal("4.25"),
+            created_at=base + timedelta(days=i),
+        )
+        assert asyncio.run(service.create_carbon_emission(emission))["success"]
+
+    newest = asyncio.run(service.get_user_emissions("alice", limit=2))
+    assert [e["date"] for e in newest] == ["2025-03-05", "2025-03-04"]
+    in_range = asyncio.run(service.get_user_emissions("alice", "2025-03-02", "2025-03-04", limit=50))
+    assert len(in_range) == 2  # Timestamps on 03-04 sort after the bare end date
+
+    profile = asyncio.run(service.get_user_profile("alice"))
+    assert profile["total_emissions"] == Decimal("21.25") and profile["entries_count"] == 5
+
+    service.goals_table.load([
+        {"user_id": "alice", "goalId": "g1", "is_active": True},
+        {"user_id": "alice", "goalId": "g2", "is_active": False},
+    ])
+    assert [g["goalId"] for g in asyncio.run(service.get_user_goals("alice"))] == ["g1"]
+    assert len(asyncio.run(service.get_user_goals("alice", active_only=False))) == 2
+
+
+def test_in_memory_table_expressions():
+    table = InMemoryTable("t", "pk")
+    table.put_item(Item={"pk": "a", "status": "pending", "n": 1})
+    with pytest.raises(ClientError):
+        table.put_item(Item={"pk": "a"}, ConditionExpression="attribute_not_exists(pk)")
+    with pytest.raises(TypeError):
+        table.put_item(Item={"pk": "b", "n": 1.5})
+
+    result = table.update_item(
+        Key={"pk": "a"},
+        UpdateExpression="SET #s = :s, n = n + :one ADD tags :t REMOVE missing",
+        ExpressionAttributeNames={"#s": "status"},
+        ExpressionAttributeValues={":s": "active", ":one": 1, ":t": {"x"}},
+        ReturnValues="ALL_NEW",
+    )["Attributes"]
+    assert result == {"pk": "a", "status": "active", "n": 2, "tags": {"x"}}
+
+    scanned = table.scan(
+        FilterExpression="#s = :s AND (n BETWEEN :lo AND :hi OR begins_with(pk, :p))",
+        ExpressionAttributeNames={"#s": "status"},
+        ExpressionAttributeValues={":s": "active", ":lo": 5, ":hi": 9, ":p": "a"},
+    )
+    assert scanned["Count"] == 1
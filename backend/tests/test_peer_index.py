@@ -0,0 +1,75 @@
+import asyncio
+
+import numpy as np
+
+import app.services.dynamodb_service as dynamodb_module
+import app.services.peer_index as peer_index_module
+from app.api.v1 import recommendations
+from app.services.peer_index import PeerIndex, PeerIndexCache, index_key, peer_insights
+from app.services.rank_index import RankIndexStore
+from app.services.recommendation_precompute import run_precompute
+from app.services.versioned_cache import VersionedCache
+from benchmarks.memory_dynamodb import InMemoryTable
+from tests.test_recommendation_precompute import _service_with_users
+
+
+def test_cohort_is_users_with_a_similar_mix():
+    # Drivers emit mostly from transport, households mostly from energy
+    rng = np.random.default_rng(0)
+    drivers = np.column_stack([rng.uniform(80, 120, 30), rng.uniform(5, 10, 30), np.full((30, 3), 1.0)])
+    households = np.column_stack([rng.uniform(5, 10, 30), rng.uniform(80, 120, 30), np.full((30, 3), 1.0)])
+    user_ids = [f"driver-{i}" for i in range(30)] + [f"home-{i}" for i in range(30)]
+    index = PeerIndex(user_ids, np.vstack([drivers, households]))
+
+    comparison = index.compare({"transportation": 300, "energy": 20, "food": 3}, k=10, user_id="driver-0")
+    cohort = [index.user_ids[row] for row in index.neighbours(np.array([300, 20, 3, 0, 0]), 10, exclude="driver-0")]
+    assert all(user_id.startswith("driver-") for user_id in cohort) and "driver-0" not in cohort
+    assert comparison["peers"] == 10 and comparison["better_than_percent"] == 0.0
+    assert comparison["estimated_savings_kg"] > 150
+    assert comparison["category_gap_kg"]["transportation"] > 150
+    assert "transportation emissions" in peer_insights(comparison)[1]
+    assert index.compare({}, k=10) is None and peer_insights(None) == []
+
+
+def test_bucketed_search_matches_exact_search(monkeypatch):
+    monkeypatch.setattr(peer_index_module, "EXACT_SEARCH_MAX_USERS", 100)
+    monkeypatch.setattr(peer_index_module, "_TARGET_BUCKET", 500)
+    rng = np.random.default_rng(1)
+    breakdowns = rng.dirichlet([4, 2, 2, 1, 1], size=8000).astype(np.float32) * 300
+    index = PeerIndex([f"user-{i}" for i in range(8000)], breakdowns)
+    assert index.bits == 4
+
+    hits = []
+    for query in breakdowns[:50]:
+        exact = np.argsort(-(index.unit @ (query / np.linalg.norm(query))))[:20]
+        hits.append(np.isin(index.neighbours(query, 20), exact).mean())
+    assert np.mean(hits) > 0.9
+
+
+def test_precompute_publishes_region_indexes_served_by_the_api(monkeypatch):
+    service = _service_with_users(6)
+    service.leaderboards_table = InMemoryTable("leaderboards", "index_key", "chunk")
+    for n in range(6):
+        asyncio.run(service.update_user_profile(f"user-{n}", {"region": "north" if n < 4 else "south"}))
+    store = RankIndexStore(service.leaderboards_table)
+
+    monkeypatch.setattr("app.core.config.settings.peer_cohort_min_region_users", 4)
+    stats = asyncio.run(run_precompute(
+        service.users_table, service.entries_table, service.recommendations_table,
+        processes=0, peer_store=store,
+    ))
+    assert stats.peer_regions == 2 and not stats.errors
+    user_ids, breakdowns = store.load(index_key("north"))
+    assert sorted(user_ids) == [f"user-{n}" for n in range(4)]
+    assert breakdowns.shape == (4, 5) and breakdowns.dtype == np.float32
+    assert store.load(index_key("south")) is None and len(store.load(index_key("global"))[0]) == 6
+
+    # South has no index of its own, so its users are compared with everyone
+    monkeypatch.setattr(dynamodb_module, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "recommendation_cache", VersionedCache())
+    monkeypatch.setattr(recommendations, "peer_index_cache", PeerIndexCache())
+    monkeypatch.setattr("app.core.config.settings.peer_cohort_size", 3)
+    for user_id, region, peers in (("user-1", "north", 3), ("user-5", "global", 3)):
+        data = asyncio.run(recommendations.get_peer_comparison(current_user={"user_id": user_id}))["data"]
+        assert data["region"] == region and data["comparison"]["peers"] == peers and data["insights"]
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.services.activity_counters import DailyCounters
+from app.services.dynamodb_service import DynamoDBService
+from app.services.points_ledger import run_compaction
+from benchmarks.memory_dynamodb import install
+
+
+def test_ledger_is_idempotent_and_totals_are_atomic():
+    service = DynamoDBService()
+    install(service)
+    first = asyncio.run(service.record_points("dana", 150, "challenge", "daily_logger#2025-03-01"))
+    replay = asyncio.run(service.record_points("dana", 150, "challenge", "daily_logger#2025-03-01"))
+    assert first["recorded"] and not replay["recorded"]
+
+    # Crossing a CO2 threshold awards the achievement, whose points go through the ledger too
+    awarded = asyncio.run(service.record_points("dana", 0, "adjustment", "import-1", co2_reduced=1200))
+    assert [a["achievement_id"] for a in awarded["new_achievements"]] == ["ton_saver"]
+
+    profile = asyncio.run(service.get_user_profile("dana"))
+    ton_saver = service.achievements_table.get_item(Key={"user_id": "dana", "achievement_id": "ton_saver"})["Item"]
+    assert profile["total_points"] == 150 + ton_saver["points"]
+    counters = DailyCounters.from_bytes(profile["daily_counters"])
+    assert counters.period_totals(datetime.utcnow().date())["points_today"] == profile["total_points"]
+
+    history = asyncio.run(service.get_points_history("dana"))
+    assert sorted(e["source"] for e in history["entries"]) == ["achievement", "adjustment", "challenge"]
+    assert asyncio.run(service.record_points("dana", 5, "bogus", "x")) is None
+
+
+def test_compaction_rolls_old_rows_into_monthly_summaries():
+    service = DynamoDBService()
+    install(service)
+    today = date(2025, 6, 15)
+    for i in range(120):
+        day = today - timedelta(days=i)
+        asyncio.run(service.record_points("erin", 10, "activity", f"entry-{i}", day=day))
+    asyncio.run(service.record_points("finn", 7, "challenge", "weekly#1", day=date(2025, 1, 3)))
+    before = asyncio.run(service.get_user_profile("erin"))["total_points"]
+
+    stats = asyncio.run(run_compaction(service, retention_days=90, today=today, total_segments=2))
+    assert (stats.users_compacted, stats.rows_compacted, stats.errors) == (2, 30, [])
+    history = asyncio.run(service.get_points_history("erin", limit=500))
+    assert len(history["entries"]) == 91
+    assert [(m["month"], m["points"], m["entries"]) for m in history["monthly"]] == [("2025-03", 160, 16), ("2025-02", 130, 13)]
+    assert asyncio.run(service.get_user_profile("erin"))["total_points"] == before
+
+    # Re-running finds nothing; summaries accumulate across runs
+    assert asyncio.run(run_compaction(service, retention_days=90, today=today)).rows_compacted == 0
+    asyncio.run(service.record_points("finn", 3, "challenge", "weekly#2", day=date(2025, 1, 20)))
+    asyncio.run(run_compaction(service, retention_days=90, today=today))
+    assert asyncio.run(service.get_points_history("finn"))["monthly"] == [
+        {"month": "2025-01", "points": 10, "co2_reduced": 0.0, "entries": 2, "by_source": {"challenge": 10}}
+    ]
+
+
+def test_deleting_an_entry_takes_its_activity_points_back():
+    service = DynamoDBService()
+    install(service)
+    for round_ in range(3):
+        emission = CarbonEmissionModel(
+            user_id="gus", emission_date=datetime.utcnow().date(), category="food", activity="beef",
+            amount=Decimal("1"), unit="kg", co2_equivalent=Decimal("1"), created_at=datetime.utcnow(),
+        )
+        created = asyncio.run(service.create_carbon_emission(emission))
+        achievement_points = sum(a["points"] for a in created["new_achievements"])
+        deleted = asyncio.run(service.delete_carbon_emission("gus", created["timestamp"]))
+        assert deleted["success"] and deleted["points_reversed"] == created["points_earned"] == 10
+        # The streak each write leaves behind, for the streak boards
+        assert (created["current_streak"], deleted["current_streak"]) == (1, 0)
+    # Only the first-entry achievement's points remain: logging again does not re-award it
+    assert achievement_points == 0
+    profile = asyncio.run(service.get_user_profile("gus"))
+    first_entry = service.achievements_table.get_item(Key={"user_id": "gus", "achievement_id": "first_entry"})["Item"]
+    assert profile["total_points"] == first_entry["points"]
+    assert not asyncio.run(service.delete_carbon_emission("gus", created["timestamp"]))["success"]
+    # Replaying the reversal changes nothing
+    assert asyncio.run(service._reverse_activity_points("gus", {"entry_id": emission.entry_id})) == 0
+
+
+def test_backdated_entry_counts_on_the_day_it_is_written():
+    service = DynamoDBService()
+    install(service)
+    today = datetime.utcnow().date()
+    emission = CarbonEmissionModel(
+        user_id="ivy", emission_date=today - timedelta(days=40), category="food", activity="beef",
+        amount=Decimal("1"), unit="kg", co2_equivalent=Decimal("1"), created_at=datetime.utcnow(),
+    )
+    created = asyncio.run(service.create_carbon_emission(emission))
+    credit = service.points_ledger_table.get_item(
+        Key={"user_id": "ivy", "entry_key": f"txn#activity#{emission.entry_id}"}
+    )["Item"]
+    assert credit["day"] == today.isoformat()
+    counters = DailyCounters.from_bytes(asyncio.run(service.get_user_profile("ivy"))["daily_counters"])
+    totals = counters.period_totals(today)
+    points = created["points_earned"] + sum(a["points"] for a in created["new_achievements"])
+    assert (totals["points_today"], totals["activities_today"]) == (points, 1)
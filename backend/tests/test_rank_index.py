@@ -0,0 +1,189 @@
+import asyncio
+import random
+from datetime import date, datetime
+
+from app.services.activity_counters import ActivityCalendar, DailyCounters
+from app.services.leaderboard_engine import LeaderboardEngine, LeaderboardPeriod, public_user_id
+from app.services.rank_index import LeaderboardIndex, OrderStatisticList, RankIndex, RankIndexStore, period_key
+from benchmarks.memory_dynamodb import InMemoryTable
+
+
+def test_order_statistic_list_matches_sorted_reference():
+    rng = random.Random(3)
+    ordered = OrderStatisticList(load=4)
+    reference = []
+    for _ in range(2000):
+        if reference and rng.random() < 0.4:
+            key = rng.choice(reference)
+            reference.remove(key)
+            ordered.remove(key)
+        else:
+            key = (rng.randint(0, 50), rng.random())
+            reference.append(key)
+            ordered.add(key)
+    reference.sort()
+    assert list(ordered) == reference
+    assert len(ordered) == len(reference)
+    for position in rng.sample(range(len(reference)), 50):
+        assert ordered[position] == reference[position]
+        assert ordered.index(reference[position]) == position
+    assert list(ordered.islice(10, 25)) == reference[10:25]
+
+
+def test_rank_index_queries_and_snapshot_round_trip():
+    index = RankIndex()
+    for i in range(20):
+        index.increment(f"u{i:02d}", i % 7)
+    index.increment("u03", 10)  # 3 -> 13, now first
+    index.remove("u06")
+
+    assert index.top(3) == [("u03", 13.0), ("u13", 6.0), ("u05", 5.0)]
+    assert index.rank("u03") == 1 and index.rank("u06") is None
+    assert [r for r, _, _ in index.around("u12", 1)] == [3, 4, 5]
+    assert index.participants == 16 and index.total == sum(i % 7 for i in range(20)) + 10 - 6
+
+    table = InMemoryTable("leaderboards", "index_key", "chunk")
+    store = RankIndexStore(table, chunk_users=4)
+    store.save("points_all_time#all_time", *index.to_arrays())
+    store.save("points_all_time#all_time", *index.to_arrays())
+    # Only the live snapshot's chunks remain (5 chunks + meta)
+    assert len(table) == 6
+    restored = RankIndex(*store.load("points_all_time#all_time"))
+    assert restored.top(len(index)) == index.top(len(index))
+    assert store.load("missing#all_time") is None
+
+
+def test_leaderboard_index_feeds_engine_and_reloads():
+    now = datetime(2025, 3, 5, 12)
+    board = LeaderboardIndex()
+    for i, user_id in enumerate(["a", "b", "c", "d"]):
+        board.record(user_id, points=10 * (i + 1), activities=i, when=now)
+    board.record("e", activities=1, when=datetime(2025, 2, 20))
+
+    assert board.key("points_weekly", now) == f"points_weekly#{period_key(LeaderboardPeriod.WEEKLY, now)}"
+    engine = LeaderboardEngine()
+    weekly = engine.generate_leaderboard_from_index("activities_weekly", board.get("activities_weekly", now), "b", 2, around=1)
+    # Other users are listed under opaque ids, the current user under their own
+    assert [e["user_id"] for e in weekly["entries"]] == [public_user_id("d"), public_user_id("c")]
+    assert public_user_id("d") != "d" and public_user_id("d") == public_user_id("d")
+    # "a" logged no activities, so it is not on the activities board
+    assert weekly["statistics"]["total_participants"] == 3
+    assert weekly["current_user"]["rank"] == 3
+    assert [e["user_id"] for e in weekly["current_user"]["neighbours"]] == [public_user_id("c"), "b"]
+    assert "activities_weekly" not in engine.get_indexed_user_rankings("a", {"activities_weekly": board.get("activities_weekly", now)})
+
+    store = RankIndexStore(InMemoryTable("leaderboards", "index_key", "chunk"))
+    assert board.snapshot(store) == 6  # 5 boards for March + February's weekly activities
+    assert board.snapshot(store) == 0
+    reloaded = LeaderboardIndex()
+    assert reloaded.reload(store, when=now) == 5
+    assert reloaded.get("points_monthly", now).top(4) == board.get("points_monthly", now).top(4)
+    assert board.prune(when=now) == [f"activities_weekly#{period_key(LeaderboardPeriod.WEEKLY, datetime(2025, 2, 20))}"]
+
+
+def test_period_rollover_supplies_previous_ranks():
+    engine = LeaderboardEngine()
+    day_one = datetime(2025, 3, 5, 10)
+    assert engine._get_next_update_time(LeaderboardPeriod.WEEKLY, day_one) == datetime(2025, 3, 10)
+    assert engine._get_next_update_time(LeaderboardPeriod.MONTHLY, datetime(2025, 12, 31, 23)) == datetime(2026, 1, 1)
+    assert engine._get_period_end(LeaderboardPeriod.DAILY, day_one) == datetime(2025, 3, 5, 23, 59, 59, 999999)
+
+    board = LeaderboardIndex()
+    board.roll_over(day_one)
+    board.record("a", points=10, when=day_one)
+    board.record("b", points=20, when=day_one)
+    store = RankIndexStore(InMemoryTable("leaderboards", "index_key", "chunk"))
+    board.snapshot(store)
+
+    # All-time boards freeze hourly, periodic boards only at their boundary
+    assert board.roll_over(datetime(2025, 3, 5, 11)) == ["points_all_time", "streak_current"]
+    assert board.previous_ranks("points_all_time", datetime(2025, 3, 5, 11)).rank("a") == 2
+    assert board.previous_ranks("points_daily", datetime(2025, 3, 5, 11)) is None
+
+    day_two = datetime(2025, 3, 6, 9)
+    board.record("a", points=30, when=day_two)
+    previous = board.previous_ranks("points_daily", day_two)
+    assert (previous.source, previous.rank("b"), previous.rank("a")) == ("points_daily#2025-03-05", 1, 2)
+    daily = engine.generate_leaderboard_from_index("points_daily", board.get("points_daily", day_two), "a", previous=previous)
+    assert daily["entries"][0]["user_id"] == "a"
+    assert (daily["entries"][0]["previous_rank"], daily["entries"][0]["rank_change"]) == (2, 1)
+
+    # A process started after the boundary rebuilds previous ranks from the stored period
+    restarted = LeaderboardIndex()
+    restarted.reload(store, when=day_two)
+    assert restarted.previous_ranks("points_daily", day_two).rank("b") == 1
+    restarted.snapshot(store)
+    again = LeaderboardIndex()
+    again.reload(store, when=day_two)
+    assert again.previous_ranks("points_daily", day_two).source == "points_daily#2025-03-05"
+
+
+def test_snapshot_writes_copies_and_retries_failed_writes():
+    now = datetime(2025, 3, 5, 12)
+    board = LeaderboardIndex()
+    board.record("a", points=5, when=now)
+    pending = board.take_snapshot()
+    # Recording carries on while the copies are written
+    board.record("b", points=7, when=now)
+    points_key = board.key("points_monthly", now)
+    copy = next(snapshot for snapshot in pending if snapshot.store_key == points_key)
+    assert copy.user_ids == ["a"] and copy.scores.tolist() == [5.0]
+
+    class FailingStore:
+        def save(self, *args, **kwargs):
+            raise RuntimeError("throttled")
+
+    written, failed = board.write_snapshot(pending, FailingStore())
+    assert written == 0 and len(failed) == len(pending)
+    board.restore_dirty(failed)
+    store = RankIndexStore(InMemoryTable("leaderboards", "index_key", "chunk"))
+    assert board.snapshot(store) == len(pending)
+    assert RankIndex(*store.load(points_key)).top(2) == [("b", 7.0), ("a", 5.0)]
+
+
+def test_rebuild_from_users_table_and_streaks():
+    now = datetime(2025, 3, 5, 12)
+    today = now.date()
+    table = InMemoryTable("users", "userId")
+    for user_id, points, days in [("a", 40, [date(2025, 3, 4), today]), ("b", 90, [date(2025, 3, 1)]), ("c", 0, [])]:
+        counters, calendar = DailyCounters(), ActivityCalendar()
+        for day in days:
+            counters.add(day, points=points // 2, activities=1)
+            calendar.mark(day)
+        table.put_item(Item={
+            "userId": user_id, "total_points": points, "entries_count": len(days),
+            "daily_counters": counters.to_bytes(), "activity_calendar": calendar.to_bytes(),
+        })
+
+    board = LeaderboardIndex()
+    board.record("a", points=5, when=now)  # Replaced by the durable totals
+    assert asyncio.run(board.rebuild_from_table(table, total_segments=2, when=now)) == 3
+    assert board.get("points_all_time", now).top(3) == [("b", 90.0), ("a", 40.0)]
+    assert board.get("points_daily", now).top(3) == [("a", 20.0)]
+    # b's only entry was in the previous ISO week
+    assert board.get("activities_weekly", now).top(3) == [("a", 2.0)]
+    # Lapsed streaks rank at zero; users without entries hold no streak rank
+    assert board.get("streak_current", now).top(3) == [("a", 2.0), ("b", 0.0)]
+    board.set_streak("b", 1, when=now)
+    assert board.get("streak_current", now).rank("b") == 2 and board.get("streak_current", now).score("b") == 1
+
+    # Goal completions are not recorded, so goals boards are not indexed
+    assert "goals_all_time" not in board.configs and len(board.get("goals_all_time", now)) == 0
+    store = RankIndexStore(InMemoryTable("leaderboards", "index_key", "chunk"))
+    assert board.snapshot(store) == len(board.configs)
+
+
+def test_retract_only_changes_periods_still_held():
+    written = datetime(2025, 3, 5, 12)
+    board = LeaderboardIndex()
+    board.record("a", points=10, activities=1, when=written)
+    board.record("a", points=10, activities=1, when=written)
+    # Deleted the same week: taken back from the week it was credited to
+    board.retract("a", written, points=10, activities=1, now=datetime(2025, 3, 7))
+    assert board.get("points_weekly", written).score("a") == 10
+    assert board.get("activities_weekly", written).score("a") == 1
+    # Deleted after its week was pruned: the frozen week is left alone
+    board.prune(when=datetime(2025, 3, 20))
+    board.retract("a", written, points=10, activities=1, now=datetime(2025, 3, 20))
+    assert board.get("points_all_time", written).score("a") == 0
+    assert board.key("points_weekly", written) not in board._indexes
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import app.services.dynamodb_service as dynamodb_module
+from app.api.v1 import recommendations
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.services.dynamodb_service import DynamoDBService
+from app.services.versioned_cache import VersionedCache
+from benchmarks.memory_dynamodb import install
+
+
+def test_versioned_cache_variants_eviction_and_invalidation():
+    cache = VersionedCache(max_entries=3)
+    cache.put("ann", 1, "all", None)
+    cache.put("ann", 1, "food", "food")
+    cache.put("bob", 4, "all", None)
+    assert cache.get("ann", 1, "food") == "food" and cache.get("ann", 2, "food") is None
+    cache.put("cy", 1, "all", None)  # Evicts ann's least recently used variant
+    assert cache.get("ann", 1) is None and len(cache) == 3
+    cache.invalidate("ann")
+    assert cache.get("ann", 1, "food") is None and len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_recommendations_recomputed_only_after_a_write(monkeypatch):
+    service = DynamoDBService()
+    install(service)
+    cache = VersionedCache()
+    monkeypatch.setattr(dynamodb_module, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "recommendation_cache", cache)
+    fetches = []
+    original = recommendations.activity_service.get_user_emission_columns
+
+    async def counting(user_id, days=30):
+        fetches.append(user_id)
+        return await original(user_id, days)
+    monkeypatch.setattr(recommendations.activity_service, "get_user_emission_columns", counting)
+
+    def log(activity, category):
+        now = datetime.utcnow()
+        emission = CarbonEmissionModel(
+            user_id="ida", emission_date=now.date(), category=category, activity=activity,
+            amount=Decimal("10"), unit="km", co2_equivalent=Decimal("2.5"), created_at=now,
+        )
+        asyncio.run(service.create_carbon_emission(emission))
+
+    empty = asyncio.run(recommendations._get_recommendation_result("ida", None))
+    assert empty.activity_count == 0
+    log("car_gasoline_medium", "transportation")
+    first = asyncio.run(recommendations._get_recommendation_result("ida", None))
+    assert first.activity_count == 1 and "use_public_transport" in [r["id"] for r in first.recommendations]
+    assert asyncio.run(recommendations._get_recommendation_result("ida", None)) is first
+    food = asyncio.run(recommendations._get_recommendation_result("ida", "food"))
+    assert food.recommendations == []
+    assert len(fetches) == 3
+
+    # Deleting an entry bumps the data version as well
+    log("beef", "food")
+    entries = asyncio.run(service.get_user_emissions("ida"))
+    assert asyncio.run(service.delete_carbon_emission("ida", entries[0]["timestamp"]))["success"]
+    food = asyncio.run(recommendations._get_recommendation_result("ida", "food"))
+    assert food.activity_count == 1 and len(fetches) == 4
@@ -0,0 +1,25 @@
+from app.services.recommendation_engine import RecommendationEngine
+from benchmarks.recommendation_benchmark import legacy_generate, synthetic_history
+
+
+def test_trigger_index_covers_every_template():
+    engine = RecommendationEngine()
+    assert engine.trigger_index["beef"] == ["reduce_beef_consumption", "eat_more_plants"]
+    assert engine.untriggered == ["carbon_offset"]
+    indexed = {rec_id for ids in engine.trigger_index.values() for rec_id in ids} | set(engine.untriggered)
+    assert indexed == {rec["id"] for recs in engine.recommendations.values() for rec in recs}
+
+
+def test_indexed_scoring_matches_full_rescan():
+    engine = RecommendationEngine()
+    history = synthetic_history(3000, seed=7)
+    history.append({"date": "not-a-date", "category": "food", "activity": "beef", "co2_equivalent": 27.0})
+    for category in (None, "transportation", "food", "lifestyle"):
+        expected = legacy_generate(engine, history, limit=20, category_filter=category)
+        actual = engine.generate_recommendations(history, limit=20, category_filter=category)
+        assert [r["id"] for r in actual] == [r["id"] for r in expected]
+        for got, want in zip(actual, expected):
+            assert abs(got["score"] - want["score"]) < 1e-9
+            assert abs(got["estimated_annual_savings"] - want["estimated_annual_savings"]) <= 0.1
+    assert engine.analyze_user_patterns(history)["monthly_trends"]
+    assert engine.generate_recommendations([], limit=3) == engine._get_general_recommendations(3)
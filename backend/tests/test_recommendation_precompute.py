@@ -0,0 +1,96 @@
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import app.services.dynamodb_service as dynamodb_module
+from app.api.v1 import recommendations
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.services.dynamodb_service import DynamoDBService
+from app.services.recommendation_engine import RecommendationEngine
+from app.services.recommendation_precompute import run_precompute
+from app.services.versioned_cache import VersionedCache
+from benchmarks.memory_dynamodb import install
+
+ACTIVITIES = [
+    ("car_gasoline_medium", "transportation"),
+    ("beef", "food"),
+    ("electricity_grid", "energy"),
+    ("flight_domestic_short", "transportation"),
+]
+
+
+def _log(service, user_id, activity, category, co2="2.5"):
+    now = datetime.utcnow()
+    emission = CarbonEmissionModel(
+        user_id=user_id, emission_date=now.date(), category=category, activity=activity,
+        amount=Decimal("10"), unit="km", co2_equivalent=Decimal(co2), created_at=now,
+    )
+    asyncio.run(service.create_carbon_emission(emission))
+
+
+def _service_with_users(count):
+    service = DynamoDBService()
+    install(service)
+    for n in range(count):
+        for i in range(n + 1):
+            activity, category = ACTIVITIES[(n + i) % len(ACTIVITIES)]
+            _log(service, f"user-{n}", activity, category, co2=str(1 + i))
+    return service
+
+
+def test_precomputed_rows_match_on_demand_ranking():
+    service = _service_with_users(5)
+    engine = RecommendationEngine()
+    for processes in (0, 2):
+        stats = asyncio.run(run_precompute(
+            service.users_table, service.entries_table, service.recommendations_table,
+            processes=processes, chunk_users=2, workers=2, total_segments=3,
+        ))
+        assert (stats.users_scanned, stats.rows_written, stats.errors) == (5, 5, [])
+        assert stats.entries_read == 15
+        for n in range(5):
+            row = asyncio.run(service.get_precomputed_recommendations(f"user-{n}"))
+            emissions = asyncio.run(service.get_user_emissions(f"user-{n}", limit=1000))
+            analysis, ranked = engine.recommend([
+                {"date": e["date"], "category": e["category"], "activity": e["activity"],
+                 "co2_equivalent": float(e["co2_equivalent"])} for e in emissions
+            ])
+            payload = json.loads(row["payload"])
+            assert row["activity_count"] == n + 1
+            assert [r["id"] for r in payload["recommendations"]] == [r["id"] for r in ranked]
+            assert payload["analysis"]["total_emissions"] == analysis["total_emissions"]
+
+
+def test_api_serves_precomputed_rows_until_the_user_logs(monkeypatch):
+    service = _service_with_users(3)
+    asyncio.run(run_precompute(service.users_table, service.entries_table, service.recommendations_table, processes=0))
+    monkeypatch.setattr(dynamodb_module, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "recommendation_cache", VersionedCache())
+    fetches = []
+    original = recommendations.activity_service.get_user_emission_columns
+
+    async def counting(user_id, days=30):
+        fetches.append(user_id)
+        return await original(user_id, days)
+    monkeypatch.setattr(recommendations.activity_service, "get_user_emission_columns", counting)
+
+    served = asyncio.run(recommendations._get_recommendation_result("user-2", None))
+    travel = asyncio.run(recommendations._get_recommendation_result("user-2", "transportation"))
+    assert fetches == [] and served.activity_count == 3
+    expected = recommendations.recommendation_engine.recommend(
+        asyncio.run(recommendations.activity_service.get_user_activities("user-2")), category_filter="transportation"
+    )[1]
+    assert travel.recommendations and [r["id"] for r in travel.recommendations] == [r["id"] for r in expected]
+    fetches.clear()
+
+    # A new entry changes the data version, so the row is stale
+    _log(service, "user-2", "beef", "food")
+    fresh = asyncio.run(recommendations._get_recommendation_result("user-2", None))
+    assert fetches == ["user-2"] and fresh.activity_count == 4
+
+    # Users the job never saw are ranked on demand
+    _log(service, "newcomer", "beef", "food")
+    assert asyncio.run(recommendations._get_recommendation_result("newcomer", None)).activity_count == 1
+    assert fetches == ["user-2", "newcomer"]
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import sys
+
+import pytest
+
+import app.api.v1.carbon as carbon
+from app.models.dynamodb_models import CarbonEmissionModel
+from app.models.records import SLOTS, ActivityRecord
+from app.services.achievement_engine import AchievementEngine
+from app.services.activity_service import ActivityService
+from app.services.emission_columns import EmissionColumns
+from app.services.leaderboard_engine import LeaderboardEngine, LeaderboardPeriod, LeaderboardType
+from tests.test_recommendation_precompute import _log, _service_with_users
+
+
+@pytest.mark.skipif(not SLOTS, reason="dataclass slots need Python 3.10")
+def test_hot_records_have_no_instance_dict():
+    engine = LeaderboardEngine()
+    config = {"type": LeaderboardType.POINTS, "period": LeaderboardPeriod.ALL_TIME}
+    records = [
+        CarbonEmissionModel(user_id="u"),
+        engine._build_entry({"user_id": "u", "total_points": 10}, config, 1),
+        next(iter(AchievementEngine().achievements.values())),
+        ActivityService._emission_to_activity("u", 0, {"category": "food", "activity": "beef"}),
+    ]
+    for record in records:
+        assert not hasattr(record, "__dict__")
+
+
+def test_activity_records_read_like_the_activity_dicts():
+    emission = {"entry_id": "e1", "timestamp": "2024-03-01T10:00:00", "category": "".join(["fo", "od"]),
+                "activity": "beef", "co2_equivalent": 6.5}
+    record = ActivityService._emission_to_activity("u", 0, emission)
+    assert record.to_dict() == {
+        "activity_id": "e1", "user_id": "u", "timestamp": "2024-03-01T10:00:00", "date": "2024-03-01",
+        "activity_type": "food", "activity_name": "beef", "category": "food", "carbon_footprint": 6.5,
+        "description": "", "co2_equivalent": 6.5, "activity": "beef",
+    }
+    assert record["carbon_footprint"] == record.get("co2_equivalent") == 6.5
+    assert record.get("missing", 0) == 0 and record.get("get") is None
+    with pytest.raises(KeyError):
+        record["missing"]
+    # Categories read from the table share one string object
+    assert record.category is sys.intern("food")
+    columns = EmissionColumns.from_entries([record, ActivityRecord("e2", "u", "", "bad", "food", "beef", 1.0)])
+    assert columns.categories == ["food"] and columns.co2.tolist() == [6.5, 1.0]
+
+
+def test_list_endpoint_rows_serialize_like_the_dicts(monkeypatch):
+    service = _service_with_users(0)
+    _log(service, "alice", "beef", "food", co2="6.5")
+    monkeypatch.setattr(carbon, "dynamodb_service", service)
+    response = asyncio.run(carbon.get_carbon_emissions(
+        current_user={"user_id": "alice"}, category=None, start_date=None, end_date=None, limit=50
+    ))
+    history = asyncio.run(service.get_emission_history("alice"))
+    item = history.items(history.newest())[0]
+    assert json.loads(response.body)["data"]["emissions"] == [{
+        "id": item.get("entry_id") or item["timestamp"], "category": "food", "activity": "beef",
+        "amount": 6.5, "unit": item["unit"] or "kg", "date": item["date"], "description": None,
+        "co2_equivalent": 6.5, "emission_factor": item["emission_factor"],
+    }]
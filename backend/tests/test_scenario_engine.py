@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+import app.services.dynamodb_service as dynamodb_module
+from app.api.v1 import recommendations
+from app.services.carbon_calculator import CarbonCalculator, Region
+from app.services.emission_columns import EmissionColumns
+from app.services.scenario_engine import ScenarioEngine, calculator_region
+from app.services.versioned_cache import VersionedCache
+from tests.test_recommendation_precompute import _log, _service_with_users
+
+TODAY = date(2024, 6, 30)
+
+
+def _entry(days_ago, category, activity, amount, unit, calculator):
+    co2 = calculator.calculate_emission(category, activity, amount, unit)["co2_equivalent"]
+    return {"date": (TODAY - timedelta(days=days_ago)).isoformat(), "category": category,
+            "activity": activity, "amount": amount, "unit": unit, "co2_equivalent": co2}
+
+
+def test_replay_matches_recalculating_each_entry_with_regional_factors():
+    uk = CarbonCalculator(region=Region.UK)
+    history = [
+        _entry(0, "transportation", "car_gasoline_medium", 40, "km", uk),
+        _entry(45, "transportation", "car_gasoline_large", 25, "miles", uk),
+        _entry(90, "transportation", "flight_domestic_short", 400, "km", uk),
+        _entry(100, "food", "beef", 2, "servings", uk),
+        _entry(120, "energy", "electricity", 300, "kWh", uk),
+    ]
+    matrix = ScenarioEngine().matrix("GB")
+    report = matrix.simulate(EmissionColumns.from_entries(history), TODAY)
+    scenarios = {scenario["id"]: scenario for scenario in report["scenarios"]}
+
+    def replayed(substitute):
+        return sum(
+            uk.calculate_emission(e["category"], substitute.get(e["activity"], e["activity"]), e["amount"], e["unit"])["co2_equivalent"]
+            for e in history
+        )
+
+    ev = replayed({"car_gasoline_medium": "car_electric", "car_gasoline_large": "car_electric"})
+    assert scenarios["car_to_ev"]["scenario_total_kg"] == pytest.approx(ev, abs=0.05)
+    rail = replayed({"flight_domestic_short": "train_intercity"})
+    half_rail = report["history_kg"] - (report["history_kg"] - rail) / 2
+    assert scenarios["flights_to_train_50"]["scenario_total_kg"] == pytest.approx(half_rail, abs=0.05)
+    assert scenarios["beef_to_chicken_100"]["affected_kg"] == pytest.approx(history[3]["co2_equivalent"], abs=0.01)
+
+    # Only scenarios touching the history are reported, largest saving first,
+    # with savings split by month and annualized over the 121 days covered
+    assert "compost_food_100" not in scenarios
+    savings = [scenario["savings_kg"] for scenario in report["scenarios"]]
+    assert savings == sorted(savings, reverse=True)
+    assert report["months"] == ["2024-03", "2024-04", "2024-05", "2024-06"]
+    assert report["days_covered"] == 121
+    car = scenarios["car_to_ev"]
+    assert sum(car["monthly_savings_kg"]) == pytest.approx(car["savings_kg"], abs=0.02)
+    assert car["estimated_annual_savings"] == pytest.approx(car["savings_kg"] * 365 / 121, abs=0.1)
+
+    # A cleaner grid makes driving electric save more
+    us = ScenarioEngine().matrix(None).simulate(EmissionColumns.from_entries(history), TODAY)
+    us_ev = next(s for s in us["scenarios"] if s["id"] == "car_to_ev")
+    assert car["savings_kg"] > us_ev["savings_kg"]
+    assert calculator_region("uk") == Region.UK and calculator_region("mars") == Region.US_AVERAGE
+
+
+def test_scenarios_are_cached_per_data_version(monkeypatch):
+    service = _service_with_users(0)
+    _log(service, "driver", "car_gasoline_medium", "transportation", co2="19.2")
+    monkeypatch.setattr(dynamodb_module, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "dynamodb_service", service)
+    monkeypatch.setattr(recommendations, "scenario_cache", VersionedCache())
+    user = {"user_id": "driver"}
+
+    first = asyncio.run(recommendations.get_scenarios(limit=5, current_user=user))["data"]
+    assert len(first["scenarios"]) == 5 and first["history_kg"] == 19.2 and first["region"] == "us_average"
+    assert recommendations.scenario_cache.misses == 1
+
+    asyncio.run(recommendations.get_scenarios(limit=5, current_user=user))
+    assert recommendations.scenario_cache.hits == 1
+
+    _log(service, "driver", "beef", "food", co2="6.78")
+    after = asyncio.run(recommendations.get_scenarios(limit=100, current_user=user))["data"]
+    assert after["history_kg"] == pytest.approx(25.98)
+    assert any(scenario["id"] == "beef_to_chicken_100" for scenario in after["scenarios"])
@@ -0,0 +1,37 @@
+from datetime import date
+
+import numpy as np
+
+from app.services.carbon_calculator import calculator
+from app.services.workload_generator import WorkloadConfig, WorkloadGenerator, demo_entries
+
+
+def test_generator_is_deterministic_and_priced_like_the_calculator():
+    config = WorkloadConfig(users=40, days=60, start_date=date(2025, 1, 1), seed=7, block_users=16)
+    first = list(WorkloadGenerator(config).iter_entries())
+    second = list(WorkloadGenerator(config).iter_entries())
+    other = list(WorkloadGenerator(WorkloadConfig(users=40, days=60, start_date=date(2025, 1, 1), seed=8)).iter_entries())
+
+    assert first == second
+    assert first != other
+    assert {entry["userId"] for entry in first} <= {f"synthetic-user-{i:07d}" for i in range(40)}
+    assert all("2025-01-01" <= entry["date"] <= "2025-03-01" for entry in first)
+    assert len({(entry["userId"], entry["timestamp"]) for entry in first}) == len(first)
+
+    for entry in first[:200]:
+        expected = calculator.calculate_emission(entry["category"], entry["activity"], float(entry["amount"]), entry["unit"])
+        assert float(entry.get("co2_equivalent", 0)) == expected["co2_equivalent"]
+
+
+def test_generator_user_aggregates_and_demo_cache():
+    generator = WorkloadGenerator(WorkloadConfig(users=10, days=30, start_date=date(2025, 6, 1)))
+    entries = list(generator.iter_entries())
+    users = {user["userId"]: user for user in generator.iter_users()}
+    for user_id, user in users.items():
+        own = [entry for entry in entries if entry["userId"] == user_id]
+        assert user["entries_count"] == len(own)
+        assert np.isclose(float(user["total_emissions"]), sum(float(e.get("co2_equivalent", 0)) for e in own))
+
+    assert demo_entries("demo-user", 30) == demo_entries("demo-user", 30)
+    assert demo_entries("demo-user", 30)[0]["userId"] == "demo-user"
+    assert demo_entries("demo-user", 0) == demo_entries("demo-user", -1) == []
@@ -80,6 +80,20 @@ create_table "carbontrack-goals" "userId" "goalId"
 # Sort Key: achievementId (String)
 create_table "carbontrack-achievements" "userId" "achievementId"
 
+# 5. Leaderboards table - Stores leaderboard rank index snapshots
+# Partition Key: index_key (String) - leaderboard id and period, e.g. points_weekly#2025-W42
+# Sort Key: chunk (String) - "meta" or <snapshot_id>#<n>
+create_table "carbontrack-leaderboards" "index_key" "chunk"
+
+# 6. Points ledger table - Append-only points history and monthly summaries
+# Partition Key: user_id (String)
+# Sort Key: entry_key (String) - "txn#<source>#<idempotency key>" or "summary#YYYY-MM"
+create_table "carbontrack-points-ledger" "user_id" "entry_key"
+
+# 7. Recommendations table - Ranked recommendations precomputed by the nightly batch job
+# Partition Key: user_id (String)
+create_table "carbontrack-recommendations" "user_id"
+
 echo "🎉 All DynamoDB tables created successfully!"
 echo ""
 echo "📊 Table Summary:"
@@ -87,6 +101,9 @@ echo "1. carbontrack-users (userId)"
 echo "2. carbontrack-entries (userId, timestamp)"
 echo "3. carbontrack-goals (userId, goalId)"
 echo "4. carbontrack-achievements (userId, achievementId)"
+echo "5. carbontrack-leaderboards (index_key, chunk)"
+echo "6. carbontrack-points-ledger (user_id, entry_key)"
+echo "7. carbontrack-recommendations (user_id)"
 echo ""
 echo "🔗 Next steps:"
 echo "1. Wait for tables to become ACTIVE"
@@ -100,5 +117,8 @@ aws dynamodb wait table-exists --table-name "carbontrack-users" --region "$REGIO
 aws dynamodb wait table-exists --table-name "carbontrack-entries" --region "$REGION"
 aws dynamodb wait table-exists --table-name "carbontrack-goals" --region "$REGION"
 aws dynamodb wait table-exists --table-name "carbontrack-achievements" --region "$REGION"
+aws dynamodb wait table-exists --table-name "carbontrack-leaderboards" --region "$REGION"
+aws dynamodb wait table-exists --table-name "carbontrack-points-ledger" --region "$REGION"
+aws dynamodb wait table-exists --table-name "carbontrack-recommendations" --region "$REGION"
 
 echo "✅ All tables are now ACTIVE and ready for use!"
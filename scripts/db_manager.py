@@ -4,53 +4,72 @@ CarbonTrack Database Manager
 A simple CLI tool to interact with DynamoDB tables
 """
 
+import asyncio
+import os
+import sys
+
 import boto3
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+# Add backend to path for the shared scan utilities
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.parallel_scan import count_items, parallel_scan
+
 class CarbonTrackDBManager:
     def __init__(self, region='us-east-1'):
         self.dynamodb = boto3.resource('dynamodb', region_name=region)
         self.users_table = self.dynamodb.Table('carbontrack-users-production')
         self.emissions_table = self.dynamodb.Table('carbontrack-emissions-production')
     
+    async def _print_items(self, table, print_item):
+        """Stream every item of a table through print_item, returning the count"""
+        count = 0
+        async for item in parallel_scan(table):
+            print_item(item)
+            count += 1
+        return count
+    
+    @staticmethod
+    def _print_user(user):
+        print(f"User ID: {user.get('user_id', 'N/A')}")
+        print(f"Email: {user.get('email', 'N/A')}")
+        print(f"Created: {user.get('created_at', 'N/A')}")
+        print("-" * 40)
+    
+    @staticmethod
+    def _print_emission(emission):
+        print(f"Record ID: {emission.get('record_id', 'N/A')}")
+        print(f"User ID: {emission.get('user_id', 'N/A')}")
+        print(f"Activity: {emission.get('activity_type', 'N/A')}")
+        print(f"CO2 (kg): {emission.get('co2_kg', 'N/A')}")
+        print(f"Date: {emission.get('date', 'N/A')}")
+        print("-" * 40)
+    
     def list_all_users(self):
         """List all users in the database"""
         try:
-            response = self.users_table.scan()
-            users = response.get('Items', [])
+            print("\n=== USERS TABLE ===")
+            count = asyncio.run(self._print_items(self.users_table, self._print_user))
             
-            print(f"\n=== USERS TABLE ({len(users)} records) ===")
-            if not users:
+            if not count:
                 print("No users found.")
-                return
-                
-            for user in users:
-                print(f"User ID: {user.get('user_id', 'N/A')}")
-                print(f"Email: {user.get('email', 'N/A')}")
-                print(f"Created: {user.get('created_at', 'N/A')}")
-                print("-" * 40)
+            else:
+                print(f"({count} records)")
         except ClientError as e:
             print(f"Error scanning users table: {e}")
     
     def list_all_emissions(self):
         """List all emissions records"""
         try:
-            response = self.emissions_table.scan()
-            emissions = response.get('Items', [])
+            print("\n=== EMISSIONS TABLE ===")
+            count = asyncio.run(self._print_items(self.emissions_table, self._print_emission))
             
-            print(f"\n=== EMISSIONS TABLE ({len(emissions)} records) ===")
-            if not emissions:
+            if not count:
                 print("No emissions records found.")
-                return
-                
-            for emission in emissions:
-                print(f"Record ID: {emission.get('record_id', 'N/A')}")
-                print(f"User ID: {emission.get('user_id', 'N/A')}")
-                print(f"Activity: {emission.get('activity_type', 'N/A')}")
-                print(f"CO2 (kg): {emission.get('co2_kg', 'N/A')}")
-                print(f"Date: {emission.get('date', 'N/A')}")
-                print("-" * 40)
+            else:
+                print(f"({count} records)")
         except ClientError as e:
             print(f"Error scanning emissions table: {e}")
     
@@ -115,8 +134,8 @@ class CarbonTrackDBManager:
             print(f"Emissions Table: {emissions_info}")
             
             # Get item counts
-            users_count = self.users_table.scan(Select='COUNT')['Count']
-            emissions_count = self.emissions_table.scan(Select='COUNT')['Count']
+            users_count = asyncio.run(count_items(self.users_table))
+            emissions_count = asyncio.run(count_items(self.emissions_table))
             
             print("\n=== RECORD COUNTS ===")
             print(f"Users: {users_count}")
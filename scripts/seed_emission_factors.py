@@ -4,10 +4,18 @@ Seed script to populate the carbontrack-emission-factors DynamoDB table
 with comprehensive emission factor data for carbon footprint calculations.
 """
 
+import asyncio
 import boto3
+import os
 import sys
+from contextlib import aclosing
 from decimal import Decimal
 
+# Add backend to path for the shared scan utilities
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.parallel_scan import count_items, parallel_scan
+
 # AWS Configuration
 REGION = 'eu-central-1'
 TABLE_NAME = 'carbontrack-emission-factors'
@@ -573,34 +581,35 @@ def seed_emission_factors():
         print(f"Error seeding emission factors: {str(e)}")
         return False
 
+async def _sample_items(table, limit):
+    """Return the first few items a parallel scan yields"""
+    items = []
+    async with aclosing(parallel_scan(table, total_segments=1, page_size=limit)) as scan:
+        async for item in scan:
+            items.append(item)
+            if len(items) >= limit:
+                break
+    return items
+
 def verify_seed():
     """Verify the seeded data"""
     try:
-        dynamodb = boto3.client('dynamodb', region_name=REGION)
+        dynamodb = boto3.resource('dynamodb', region_name=REGION)
+        table = dynamodb.Table(TABLE_NAME)
         
         print("\nVerifying seeded data...")
-        response = dynamodb.scan(
-            TableName=TABLE_NAME,
-            Select='COUNT'
-        )
-        
-        count = response.get('Count', 0)
+        count = asyncio.run(count_items(table))
         print(f"Total items in table: {count}")
         
         # Sample some items
         if count > 0:
             print("\nSample emission factors:")
-            response = dynamodb.scan(
-                TableName=TABLE_NAME,
-                Limit=5
-            )
-            
-            for item in response.get('Items', []):
-                category = item['category']['S']
-                activity = item['activity']['S']
-                factor = item['emission_factor']['N']
-                unit = item['unit']['S']
-                description = item['description']['S']
+            for item in asyncio.run(_sample_items(table, 5)):
+                category = item['category']
+                activity = item['activity']
+                factor = item['emission_factor']
+                unit = item['unit']
+                description = item['description']
                 print(f"  {category}/{activity}: {factor} kg CO2/{unit} - {description}")
         
         return True